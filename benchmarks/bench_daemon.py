@@ -0,0 +1,86 @@
+"""Connect cost and request latency direct to the robot or through the daemon.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_daemon
+
+Each session connects, sends a number of sequential distance queries and
+disconnects, the way a short-lived script would, against the simulator:
+
+* direct - RobotController.connect() to the robot's TCP port
+* daemon - DaemonClient.connect() to a RobotDaemon's Unix socket
+
+The daemon adds one local hop per request, well under a millisecond next
+to the serial link's round trip, and its robot keeps its upstream
+connection between sessions. Over WiFi the direct connect costs far more
+than it does against a local simulator.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from robotapi.controller import RobotController
+from robotapi.daemon import DaemonClient, RobotDaemon
+from robotapi.protocol import build_distance_cmd
+from robotapi.simulator import SimulatorServer
+
+MODES = ("direct", "daemon")
+
+
+def session(server, path, mode, requests):
+    """Return (connect seconds, per-request seconds) of one session."""
+    start = time.perf_counter()
+    if mode == "direct":
+        client = RobotController("127.0.0.1", server.ports[0], reactor=True)
+        client.connect()
+        send = lambda: client.request(build_distance_cmd())
+        close = client.disconnect
+    else:
+        client = DaemonClient(path)
+        client.connect()
+        send = lambda: client.request(0, build_distance_cmd())
+        close = client.close
+    connected = time.perf_counter()
+    latencies = []
+    for _ in range(requests):
+        sent = time.perf_counter()
+        send().result(timeout=1.0)
+        latencies.append(time.perf_counter() - sent)
+    close()
+    return connected - start, latencies
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "robotapi.sock")
+    print(f"{'mode':<8} {'connect ms':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    with SimulatorServer(count=1, heartbeat_interval=1.0) as server:
+        for mode in MODES:
+            # The robot takes one client, so the daemon only runs for its own rows
+            daemon = RobotDaemon([("127.0.0.1", server.ports[0])], path) if mode == "daemon" else None
+            if daemon is not None:
+                daemon.start()
+            connects, latencies = [], []
+            for _ in range(args.sessions):
+                connect, samples = session(server, path, mode, args.requests)
+                connects.append(connect)
+                latencies.extend(samples)
+            if daemon is not None:
+                daemon.stop()
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(
+                f"{mode:<8} {statistics.median(connects) * 1e3:>11.2f} "
+                f"{statistics.median(latencies) * 1e3:>8.3f} {p99 * 1e3:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
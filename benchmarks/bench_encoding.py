@@ -0,0 +1,82 @@
+"""Command encoding cost and bytes on the wire.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_encoding
+
+Compares the previous ``json.dumps(cmd).encode()`` of a freshly built dict
+against the pre-encoded command table and compact encoder for the commands
+sent in hot loops. Reports nanoseconds per command and bytes per command
+over TCP and over the ESP32-to-Arduino UART (which never sees spaces).
+"""
+
+import argparse
+import json
+import time
+from robotapi import protocol
+from robotapi.protocol import SerialCounter, with_serial
+
+
+def legacy_encode(cmd):
+    """Encoding used before the command table, for comparison."""
+    return json.dumps(cmd).encode("utf-8")
+
+
+def cases():
+    """Return (name, legacy callable, current callable) triples."""
+    serials = SerialCounter()
+    return [
+        (
+            "stop",
+            lambda: legacy_encode(protocol.build_stop_cmd()),
+            lambda: protocol.STOP_COMMAND,
+        ),
+        (
+            "move fwd 50",
+            lambda: legacy_encode(protocol.build_movement_cmd(protocol.DIR_FORWARD, 50)),
+            lambda: protocol.encode_movement(protocol.DIR_FORWARD, 50),
+        ),
+        (
+            "camera center",
+            lambda: legacy_encode(protocol.build_camera_cmd(protocol.CAM_CENTER)),
+            lambda: protocol.encode_camera(protocol.CAM_CENTER),
+        ),
+        (
+            "obstacle+serial",
+            lambda: legacy_encode(with_serial(protocol.build_obstacle_cmd(), serials.next())),
+            lambda: protocol.encode_command(with_serial(protocol.build_obstacle_cmd(), serials.next())),
+        ),
+    ]
+
+
+def measure(func, count, repeat):
+    """Return (best ns per call, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(count):
+            result = func()
+        best = min(best, (time.perf_counter_ns() - start) / count)
+    return best, result
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'command':<16} {'old ns':>8} {'new ns':>8} {'old B':>6} {'new B':>6} {'UART B':>7}")
+    for name, old, new in cases():
+        old_ns, old_bytes = measure(old, args.count, args.repeat)
+        new_ns, new_bytes = measure(new, args.count, args.repeat)
+        print(
+            f"{name:<16} {old_ns:>8.0f} {new_ns:>8.0f} {len(old_bytes):>6} "
+            f"{len(new_bytes):>6} {protocol.uart_size(new_bytes):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Heartbeat-reply latency as the fleet grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fleet --sizes 1 10 50 100 200 --duration 5
+
+Every simulated car sends {Heartbeat} on its own schedule; latency is
+measured on the simulator side, i.e. what the firmware would observe.
+"""
+
+import argparse
+import resource
+import statistics
+import time
+from robotapi.fleet import Fleet
+from robotapi.simulator import SimulatorServer
+
+
+def percentile(samples, fraction):
+    """Return the given percentile of a sorted list."""
+    if not samples:
+        return float("nan")
+    index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+    return samples[index]
+
+
+def run(size, duration, heartbeat_interval):
+    """Measure heartbeat reply latency for one fleet size."""
+    with SimulatorServer(count=size, heartbeat_interval=heartbeat_interval) as server:
+        with Fleet() as fleet:
+            for port in server.ports:
+                fleet.add("127.0.0.1", port)
+            cpu_start = time.process_time()
+            time.sleep(duration)
+            cpu = time.process_time() - cpu_start
+
+        latencies = sorted(
+            latency for robot in server.robots for latency in robot.heartbeat_latencies
+        )
+        missed = sum(robot.heartbeats_sent - robot.heartbeats_answered for robot in server.robots)
+
+    return {
+        "robots": size,
+        "samples": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else float("nan")) * 1000,
+        "mean_ms": (statistics.mean(latencies) if latencies else float("nan")) * 1000,
+        "unanswered": missed,
+        "cpu_pct": 100.0 * cpu / duration,
+    }
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--heartbeat-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = 2 * max(args.sizes) + 64
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+    print(f"{'robots':>6} {'samples':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'unans.':>6} {'cpu %':>6}")
+    for size in args.sizes:
+        r = run(size, args.duration, args.heartbeat_interval)
+        print(f"{r['robots']:>6} {r['samples']:>8} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['max_ms']:>8.3f} {r['unanswered']:>6} {r['cpu_pct']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
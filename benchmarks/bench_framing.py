@@ -0,0 +1,100 @@
+"""Framing throughput under pathological TCP segmentation.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_framing
+
+Compares FrameDecoder against the previous str-concatenation framer on
+the same byte stream delivered as 1-byte segments, random small segments
+and large bursts. The old framer returned at most one message per read
+and split on the first "}", so it both leaves a backlog behind and
+mis-frames nested JSON; "delivered" and "backlog" show both effects.
+"""
+
+import argparse
+import random
+import time
+from robotapi.framing import FrameDecoder
+
+FRAMES = [
+    b"{Heartbeat}",
+    b"{22_ok}",
+    b"{22_true}",
+    b'{"H":"17","N":3,"D1":3,"D2":50}',
+    b'{"status":"ok","data":{"L":512,"M":60,"R":498}}',
+]
+
+
+class StrConcatFramer:
+    """The framer Connection used before FrameDecoder, for comparison."""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, data):
+        self._buffer += data.decode("utf-8")
+        if "}" in self._buffer:
+            end_pos = self._buffer.find("}")
+            message = self._buffer[:end_pos + 1]
+            self._buffer = self._buffer[end_pos + 1:]
+            return [message]
+        return []
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+
+def segments(stream, mode, rng):
+    """Split stream into TCP-like segments."""
+    if mode == "1-byte":
+        return [stream[i:i + 1] for i in range(len(stream))]
+    if mode == "random-small":
+        out, pos = [], 0
+        while pos < len(stream):
+            size = rng.randint(1, 24)
+            out.append(stream[pos:pos + size])
+            pos += size
+        return out
+    if mode == "burst-4k":
+        return [stream[i:i + 4096] for i in range(0, len(stream), 4096)]
+    raise ValueError(mode)
+
+
+def measure(factory, chunks, repeat):
+    """Return (MB/s, frames delivered, backlog bytes) for a framer."""
+    best = float("inf")
+    count = backlog = 0
+    size = sum(len(chunk) for chunk in chunks)
+    for _ in range(repeat):
+        framer = factory()
+        start = time.perf_counter()
+        count = 0
+        for chunk in chunks:
+            count += len(framer.feed(chunk))
+        best = min(best, time.perf_counter() - start)
+        backlog = framer.pending
+    return size / best / 1e6, count, backlog
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    stream = b"".join(rng.choice(FRAMES) for _ in range(args.frames))
+
+    print(f"{args.frames} frames, {len(stream)} bytes")
+    print(f"{'segmentation':<14} {'framer':<12} {'MB/s':>8} {'delivered':>10} {'backlog B':>10}")
+    for mode in ("1-byte", "random-small", "burst-4k"):
+        chunks = segments(stream, mode, rng)
+        for name, factory in (("FrameDecoder", FrameDecoder), ("str-concat", StrConcatFramer)):
+            rate, count, backlog = measure(factory, chunks, args.repeat)
+            print(f"{mode:<14} {name:<12} {rate:>8.2f} {count:>10} {backlog:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Mission wall-clock time with driving and scanning serialized or overlapped.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_mission
+
+A simulated patrol of several legs, each a timed drive plus an ultrasonic
+sweep scan, run two ways against the simulator:
+
+* serial  - backward() then scan(), each waiting for the other
+* overlap - start_backward(), scan() while the car moves, then wait for
+            the motion handle
+"""
+
+import argparse
+import time
+from robotapi.controller import RobotController
+from robotapi.simulator import SimulatorServer
+
+MODES = ("serial", "overlap")
+
+
+def leg(robot, mode, duration):
+    """Drive for duration and scan once."""
+    if mode == "serial":
+        robot.backward(duration)
+        robot.scan()
+    else:
+        motion = robot.start_backward(duration)
+        robot.scan()
+        motion.result()
+
+
+def run(server, mode, legs, duration, reactor):
+    """Return seconds taken by one mission."""
+    with RobotController("127.0.0.1", server.ports[0], reactor=reactor) as robot:
+        robot.camera_set(pan=90)
+        # Let the firmware finish the servo hold before timing
+        time.sleep(1.0)
+        start = time.monotonic()
+        for _ in range(legs):
+            leg(robot, mode, duration)
+        return time.monotonic() - start
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--legs", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=1.5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'reader':<8} {'mission s':>10} {'per leg':>8}")
+    with SimulatorServer(count=1, heartbeat_interval=1.0) as server:
+        for reactor in (False, True):
+            for mode in MODES:
+                wall = run(server, mode, args.legs, args.duration, reactor)
+                reader = "reactor" if reactor else "polled"
+                print(f"{mode:<8} {reader:<8} {wall:>10.2f} {wall / args.legs:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Commanded versus actual movement durations.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_motion
+
+Drives a simulated robot with backward() for a range of durations and
+reports how long the simulated car actually moved (command to stop, as
+logged by the simulator) and how long the call took, for:
+
+* legacy   - the previous int(duration * 10) loop of 100 ms receive + 100 ms sleep
+* deadline - the polled monotonic-deadline wait
+* reactor  - the background reader thread
+* timed    - firmware-timed moves (N=2), stopped by the robot's own timer
+"""
+
+import argparse
+import time
+from robotapi.controller import HeartbeatMonitor, RobotController
+from robotapi.simulator import SimulatorServer
+
+MODES = ("legacy", "deadline", "reactor", "timed")
+
+
+class LegacyHeartbeatMonitor(HeartbeatMonitor):
+    """The wait loop used before deadline timing, for comparison."""
+
+    def wait_for_duration(self, duration, callback=None):
+        for _ in range(int(duration * 10)):
+            response = self.poll(timeout=0.1)
+            if callback and response and not callback(response):
+                return False
+            time.sleep(0.1)
+        return True
+
+
+def run(server, mode, duration, repeat):
+    """Return (mean actual motion s, mean call s) over repeat moves."""
+    robot = RobotController(
+        "127.0.0.1",
+        server.ports[0],
+        reactor=mode == "reactor",
+        timed_moves=mode == "timed",
+        keepalive=mode != "legacy",
+    )
+    sim = server.robots[0]
+    with robot:
+        if mode == "legacy":
+            robot._heartbeat.close()
+            robot._heartbeat = LegacyHeartbeatMonitor(robot._connection, None, robot._pipeline)
+        actual = calls = 0.0
+        for _ in range(repeat):
+            before = len(sim.moves)
+            start = time.monotonic()
+            robot.backward(duration)
+            calls += time.monotonic() - start
+            deadline = time.monotonic() + 1.0
+            while len(sim.moves) == before and time.monotonic() < deadline:
+                time.sleep(0.001)
+            _, _, started, ended = sim.moves[-1]
+            actual += ended - started
+    return actual / repeat, calls / repeat
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--durations", type=float, nargs="+", default=[0.05, 0.1, 0.25, 0.5, 1.0, 2.0]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    print(f"{'mode':<9} {'commanded':>9} {'actual':>8} {'error':>8} {'call':>8}")
+    with SimulatorServer(count=1, heartbeat_interval=1.0) as server:
+        for mode in args.modes:
+            for duration in args.durations:
+                actual, call = run(server, mode, duration, args.repeat)
+                print(
+                    f"{mode:<9} {duration:>9.3f} {actual:>8.3f} "
+                    f"{actual - duration:>+8.3f} {call:>8.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Distance travelled between obstacle onset and stop.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_obstacle
+
+Drives a simulated robot forward, makes its ultrasonic sensor report an
+obstacle at a random moment, and measures how long the simulated car
+kept moving before the stop arrived. The delay is converted to distance
+using the simulator's CM_PER_SECOND_PER_SPEED (20 cm/s at speed 50). Compares:
+
+* heartbeat - the previous one obstacle query per {Heartbeat} (1 s)
+* <n> Hz    - ObstacleSampler at the requested rate (capped by the UART budget)
+"""
+
+import argparse
+import random
+import threading
+import time
+from robotapi.controller import RobotController
+from robotapi.messages import BoolReply, Heartbeat
+from robotapi.protocol import DIR_FORWARD, build_obstacle_cmd
+from robotapi.exceptions import CommandError
+from robotapi.sampler import sample_interval
+from robotapi.simulator import SimulatorServer
+from robotapi.simulator.world import CM_PER_SECOND_PER_SPEED
+
+
+class HeartbeatRobotController(RobotController):
+    """The forward() used before ObstacleSampler, for comparison."""
+
+    def forward(self, duration, speed=50):
+        self._obstacle_detected = False
+
+        def on_obstacle_reply(future):
+            if future.exception() is None and future.result() is True:
+                self._obstacle_detected = True
+
+        def check_obstacle(response):
+            if self._obstacle_detected:
+                return False
+            if isinstance(response, Heartbeat):
+                try:
+                    self.request(build_obstacle_cmd()).add_done_callback(on_obstacle_reply)
+                except CommandError:
+                    pass
+            elif isinstance(response, BoolReply) and response.serial is None and response.value:
+                self._obstacle_detected = True
+                return False
+            return True
+
+        completed = self._drive(DIR_FORWARD, duration, speed, check_obstacle)
+        return completed and not self._obstacle_detected
+
+
+def trial(server, robot, rng, speed):
+    """Return seconds from obstacle onset to stop for one forward() call."""
+    sim = server.robots[0]
+    sim.obstacle_detected = False
+    before = len(sim.moves)
+    onset = []
+
+    def place():
+        time.sleep(rng.uniform(0.2, 1.2))
+        onset.append(time.monotonic())
+        sim.obstacle_detected = True
+
+    placer = threading.Thread(target=place)
+    placer.start()
+    robot.forward(5.0, speed)
+    placer.join()
+    deadline = time.monotonic() + 1.0
+    while len(sim.moves) == before and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return sim.moves[-1][3] - onset[0]
+
+
+def run(server, rate, reactor, trials, speed, seed):
+    """Return onset-to-stop delays for one configuration."""
+    rng = random.Random(seed)
+    port = server.ports[0]
+    if rate is None:
+        robot = HeartbeatRobotController("127.0.0.1", port, reactor=reactor)
+    else:
+        robot = RobotController("127.0.0.1", port, reactor=reactor, obstacle_rate=rate)
+    with robot:
+        delays = [trial(server, robot, rng, speed) for _ in range(trials)]
+    return delays
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", type=float, nargs="+", default=[5.0, 10.0, 15.0, 30.0])
+    parser.add_argument("--trials", type=int, default=10)
+    parser.add_argument("--speed", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'sampling':<10} {'reader':<8} {'mean ms':>8} {'max ms':>8} "
+        f"{'mean cm':>8} {'max cm':>8}"
+    )
+    cm_per_second = args.speed * CM_PER_SECOND_PER_SPEED
+    with SimulatorServer(count=1, heartbeat_interval=1.0) as server:
+        for rate in [None] + args.rates:
+            for reactor in (False, True):
+                delays = run(server, rate, reactor, args.trials, args.speed, args.seed)
+                mean = sum(delays) / len(delays)
+                name = "heartbeat" if rate is None else f"{1 / sample_interval(rate):.1f} Hz"
+                print(
+                    f"{name:<10} {'reactor' if reactor else 'polled':<8} "
+                    f"{mean * 1000:>8.1f} {max(delays) * 1000:>8.1f} "
+                    f"{mean * cm_per_second:>8.1f} {max(delays) * cm_per_second:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
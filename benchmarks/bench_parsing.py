@@ -0,0 +1,78 @@
+"""Response parsing throughput.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parsing
+
+Compares the previous substring-matching parse_response() against the
+dispatch-table decode_frame() on each kind of frame the firmware sends and
+on a mixed stream dominated by command replies, as seen when several
+commands are pipelined.
+"""
+
+import argparse
+import json
+import random
+import time
+from robotapi.messages import decode_frame
+
+KINDS = {
+    "heartbeat": ["{Heartbeat}"],
+    "ack": ["{17_ok}", "{ok}"],
+    "bool": ["{18_true}", "{19_false}"],
+    "value": ["{20_512}", "{21_37}"],
+    "json": ['{"status":"ok","data":{"L":512,"M":60,"R":498}}'],
+}
+
+# Relative frequency of each kind in the mixed stream
+MIX = {"heartbeat": 1, "ack": 10, "bool": 6, "value": 6, "json": 1}
+
+
+def legacy_parse(data, timestamp=None):
+    """parse_response() as it was before typed messages, for comparison."""
+    data = data.strip()
+    if data == "{Heartbeat}":
+        return {"type": "heartbeat"}
+    if "true" in data.lower():
+        return {"type": "obstacle", "detected": True}
+    if "false" in data.lower():
+        return {"type": "obstacle", "detected": False}
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        return None
+
+
+def measure(parse, frames, repeat):
+    """Return best frames per second for parse over frames."""
+    best = float("inf")
+    now = time.monotonic()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in frames:
+            parse(frame, now)
+        best = min(best, time.perf_counter() - start)
+    return len(frames) / best
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    population = [kind for kind, weight in MIX.items() for _ in range(weight)]
+    streams = {kind: [rng.choice(frames) for _ in range(args.frames)] for kind, frames in KINDS.items()}
+    streams["mixed"] = [rng.choice(KINDS[rng.choice(population)]) for _ in range(args.frames)]
+
+    print(f"{'frames':<10} {'legacy/s':>12} {'typed/s':>12} {'speedup':>8}")
+    for kind, frames in streams.items():
+        old = measure(legacy_parse, frames, args.repeat)
+        new = measure(decode_frame, frames, args.repeat)
+        print(f"{kind:<10} {old:>12,.0f} {new:>12,.0f} {new / old:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Recording overhead and replay speed of a captured session.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_replay
+
+A controller polls a simulated robot through a TrafficRecorder, then the
+log is played back with ReplayTransport(speed=None):
+
+* record     - cost of TrafficRecorder.record per chunk
+* decode     - replay through Connection.receive_all alone
+* controller - replay through a RobotController answering heartbeats
+
+Replay rates are given as multiples of the recorded session's duration.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from robotapi.connection import Connection
+from robotapi.controller import RobotController
+from robotapi.exceptions import RobotConnectionError
+from robotapi.protocol import build_distance_cmd
+from robotapi.recorder import RECEIVED, ReplayTransport, TrafficRecorder, iter_records
+from robotapi.simulator import SimulatorServer
+
+
+def capture(path, queries):
+    """Record a session of distance queries and heartbeats to path."""
+    with SimulatorServer(count=1, heartbeat_interval=0.01, uart_rate=None) as server:
+        with TrafficRecorder(path) as recorder:
+            with RobotController("sim", transport=server.transport(0), recorder=recorder) as robot:
+                for _ in range(queries):
+                    robot.wait_reply(robot.request(build_distance_cmd()))
+
+
+def record_cost(path, chunks):
+    """Return seconds per TrafficRecorder.record call for a typical frame."""
+    with TrafficRecorder(path) as recorder:
+        start = time.perf_counter()
+        for _ in range(chunks):
+            recorder.record(RECEIVED, b"{Heartbeat}")
+        return (time.perf_counter() - start) / chunks
+
+
+def replay_decode(path):
+    """Return (frames, seconds) to decode the log's received side."""
+    conn = Connection("replay", transport=ReplayTransport(path, speed=None))
+    conn.connect()
+    frames = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            frames += len(conn.receive_all(1.0))
+    except RobotConnectionError:
+        pass
+    return frames, time.perf_counter() - start
+
+
+def replay_controller(path):
+    """Return (frames, seconds) to play the log through a controller."""
+    robot = RobotController("replay", transport=ReplayTransport(path, speed=None))
+    start = time.perf_counter()
+    robot.connect()
+    while robot.is_connected():
+        time.sleep(0.0005)
+    elapsed = time.perf_counter() - start
+    frames = robot.metrics.messages_received.value
+    robot.disconnect()
+    return frames, elapsed
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--chunks", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.rlog")
+        capture(path, args.queries)
+        stamps = [timestamp for timestamp, _, _ in iter_records(path)]
+        duration = (stamps[-1] - stamps[0]) / 1e9
+        size = os.path.getsize(path)
+        print(f"session: {len(stamps)} records, {size} bytes, {duration:.2f} s recorded")
+        print()
+        cost = record_cost(os.path.join(tmp, "cost.rlog"), args.chunks)
+        print(f"{'stage':<11} {'frames':>8} {'seconds':>9} {'us/frame':>9} {'x real':>8}")
+        print(f"{'record':<11} {args.chunks:>8} {cost * args.chunks:>9.3f} {cost * 1e6:>9.2f} {'':>8}")
+        for name, replay in (("decode", replay_decode), ("controller", replay_controller)):
+            frames, elapsed = replay(path)
+            print(
+                f"{name:<11} {frames:>8} {elapsed:>9.3f} "
+                f"{elapsed / max(frames, 1) * 1e6:>9.2f} {duration / elapsed:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
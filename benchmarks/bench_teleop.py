@@ -0,0 +1,93 @@
+"""Command lag of paced and direct teleoperation.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_teleop
+
+Streams wheel-speed updates (N=4) at a fixed rate to a simulated robot,
+each carrying its sequence number as the speed. The simulator records when
+every command arrives; the benchmark then replays the arrivals through a
+model of the bridge's 9600-baud UART (UART_BYTES_PER_SECOND, first in
+first out) to find when the Arduino would have acted on each one. Lag is
+that time minus when the caller issued the setting. Compares:
+
+* direct - every update written straight to the socket
+* paced  - pace_commands=True (CommandScheduler coalescing to the UART rate)
+"""
+
+import argparse
+import time
+from robotapi.controller import RobotController
+from robotapi.protocol import CMD_MOTOR_SPEEDS, UART_BYTES_PER_SECOND, encode_command
+from robotapi.simulator import SimulatorServer
+
+
+def record_arrivals(sim):
+    """Make the simulated robot log (arrival time, command) pairs."""
+    arrivals = []
+    handle = sim.handle_command
+
+    def handle_command(cmd, now=None):
+        arrivals.append((time.monotonic() if now is None else now, cmd))
+        return handle(cmd, now)
+
+    sim.handle_command = handle_command
+    return arrivals
+
+
+def uart_deliveries(arrivals):
+    """Return (delivery time, command) after queueing behind the UART."""
+    free = 0.0
+    delivered = []
+    for arrived, cmd in arrivals:
+        free = max(free, arrived) + len(encode_command(cmd)) / UART_BYTES_PER_SECOND
+        delivered.append((free, cmd))
+    return delivered
+
+
+def run(server, paced, rate, updates):
+    """Return (lags, updates delivered) for one configuration."""
+    sim = server.robots[0]
+    arrivals = record_arrivals(sim)
+    issued = {}
+    interval = 1.0 / rate
+    with RobotController("127.0.0.1", server.ports[0], pace_commands=paced) as robot:
+        start = time.monotonic()
+        for i in range(updates):
+            issued[i] = time.monotonic()
+            robot.set_wheel_speeds(i, i)
+            time.sleep(max(0.0, start + (i + 1) * interval - time.monotonic()))
+        if robot.scheduler:
+            robot.scheduler.flush(5.0)
+        time.sleep(0.1)
+    del sim.handle_command
+    speeds = [(t, c) for t, c in uart_deliveries(arrivals) if c.get("N") == CMD_MOTOR_SPEEDS]
+    return [t - issued[c["D1"]] for t, c in speeds], len(speeds)
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", type=float, nargs="+", default=[10.0, 25.0, 50.0])
+    parser.add_argument("--updates", type=int, default=200, help="at most 256")
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<8} {'rate Hz':>8} {'sent':>6} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8}"
+    )
+    with SimulatorServer(count=1, heartbeat_interval=1.0) as server:
+        for rate in args.rates:
+            for paced in (False, True):
+                lags, sent = run(server, paced, rate, min(args.updates, 256))
+                lags.sort()
+                print(
+                    f"{'paced' if paced else 'direct':<8} {rate:>8.0f} {sent:>6} "
+                    f"{lags[len(lags) // 2] * 1000:>8.1f} "
+                    f"{lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000:>8.1f} "
+                    f"{lags[-1] * 1000:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
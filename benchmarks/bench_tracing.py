@@ -0,0 +1,95 @@
+"""Cost of span tracing on the hot paths, disabled and enabled.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_tracing
+
+Times decode_frame() and Connection.send() over a socketpair with the
+process-wide tracer disabled and enabled, and the bare disabled-tracing
+guard on its own, which is all disabled tracing adds to each span
+(tens of nanoseconds).
+"""
+
+import argparse
+import socket
+import threading
+import time
+from time import perf_counter_ns
+from robotapi import tracing
+from robotapi.connection import Connection
+from robotapi.messages import decode_frame
+from robotapi.tracing import TRACER
+from robotapi.transport import SocketTransport
+
+
+def guard(count):
+    """The check instrumented code makes, with tracing disabled."""
+    for _ in range(count):
+        start = perf_counter_ns() if TRACER.enabled else 0
+        if start:
+            TRACER.record("guard", "bench", start)
+
+
+def empty(count):
+    """Loop overhead, subtracted from guard()."""
+    for _ in range(count):
+        pass
+
+
+def decode(count):
+    """Decode a reply count times."""
+    for _ in range(count):
+        decode_frame("{17_ok}", 0.0)
+
+
+def sender():
+    """Return a function sending count heartbeats through a Connection."""
+    near, far = socket.socketpair()
+    connection = Connection("socketpair", transport=SocketTransport(near))
+    connection.connect()
+
+    def drain():
+        while far.recv(65536):
+            pass
+
+    threading.Thread(target=drain, daemon=True).start()
+
+    def send(count):
+        for _ in range(count):
+            connection.send(b"{Heartbeat}")
+
+    return send
+
+
+def measure(func, count, repeat):
+    """Return best ns per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func(count)
+        best = min(best, (time.perf_counter_ns() - start) / count)
+    return best
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    overhead = measure(guard, args.count, args.repeat) - measure(empty, args.count, args.repeat)
+    print(f"disabled guard: {overhead:.1f} ns per span")
+    print(f"{'path':<18} {'off ns':>8} {'on ns':>8}")
+    send = sender()
+    for name, func in (("decode_frame", decode), ("Connection.send", send)):
+        tracing.disable()
+        off = measure(func, args.count, args.repeat)
+        tracing.enable()
+        on = measure(func, args.count, args.repeat)
+        tracing.disable()
+        print(f"{name:<18} {off:>8.0f} {on:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Connect cost and request round trip over each socket transport.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_transport
+
+A controller talks to a simulator with no serial latency, so only the
+transport and the host stack are measured:
+
+* tcp        - TCPTransport to the simulated robot's loopback port
+* socketpair - SimulatorServer.transport(), an in-process socketpair
+"""
+
+import argparse
+import statistics
+import time
+from robotapi.controller import RobotController
+from robotapi.protocol import build_ground_cmd
+from robotapi.simulator import SimulatorServer
+
+MODES = ("tcp", "socketpair")
+
+
+def run(server, mode, connects, requests):
+    """Return (connect seconds, round-trip seconds) samples for one mode."""
+    transport = server.transport(0) if mode == "socketpair" else None
+    robot = RobotController("127.0.0.1", server.ports[0], keepalive=False, transport=transport)
+    connect_times, round_trips = [], []
+    for _ in range(connects):
+        start = time.perf_counter()
+        robot.connect()
+        connect_times.append(time.perf_counter() - start)
+        for _ in range(requests):
+            sent = time.perf_counter()
+            robot.wait_reply(robot.request(build_ground_cmd()))
+            round_trips.append(time.perf_counter() - sent)
+        robot.disconnect()
+    return connect_times, round_trips
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connects", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'transport':<11} {'connect us':>11} {'rtt p50 us':>11} {'rtt p99 us':>11}")
+    with SimulatorServer(count=1, uart_rate=None) as server:
+        for mode in MODES:
+            connect_times, round_trips = run(server, mode, args.connects, args.requests)
+            round_trips.sort()
+            p99 = round_trips[min(len(round_trips) - 1, int(len(round_trips) * 0.99))]
+            print(
+                f"{mode:<11} {statistics.median(connect_times) * 1e6:>11.0f} "
+                f"{statistics.median(round_trips) * 1e6:>11.0f} {p99 * 1e6:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Benchmark suite for the I/O hot paths, checked against pinned baselines.
+
+Run from the repository root:
+
+    python -m benchmarks.suite                       # print a table
+    python -m benchmarks.suite --json results.json   # also write JSON ("-" for stdout)
+    python -m benchmarks.suite --check               # exit 1 on any regression
+    python -m benchmarks.suite --update              # re-pin benchmarks/baselines.json
+
+Each case reports one headline metric. Throughput cases run in-process;
+latency cases run a RobotController against a local SimulatorServer. A case
+regresses when its metric is worse than the pinned baseline by more than the
+baseline's tolerance (a fraction, e.g. 0.5 allows 50% worse). Baselines are
+machine-specific: re-pin them on the machine that runs --check.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import time
+from robotapi.connection import Connection
+from robotapi.controller import RobotController
+from robotapi.protocol import (
+    SerialCounter,
+    build_led_cmd,
+    build_obstacle_cmd,
+    encode_command,
+    parse_response,
+    with_serial,
+)
+from robotapi.simulator import SimulatorServer
+from robotapi.transport import SocketTransport
+from benchmarks.bench_framing import FRAMES, segments
+from benchmarks.bench_obstacle import trial
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Tolerances used when a case is first pinned; throughput varies with load,
+# socket latencies more so
+DEFAULT_TOLERANCE = {"higher": 0.5, "lower": 1.0}
+
+# Frames in the parse stream, weighted like a pipelined command session
+PARSE_FRAMES = ["{Heartbeat}"] + ["{17_ok}", "{ok}", "{18_true}", "{19_false}", "{20_512}"] * 4
+
+
+def percentile(samples, fraction):
+    """Return the given percentile of a sorted list."""
+    if not samples:
+        return float("nan")
+    return samples[min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))]
+
+
+def best_rate(func, count, repeat):
+    """Return the best calls per second of func over repeat runs of count calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(count)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def bench_encode(args):
+    """encode_command() on a serial-tagged query, in commands/s."""
+    serials = SerialCounter()
+    cmds = [with_serial(build_obstacle_cmd(), serials.next()) for _ in range(256)]
+
+    def run(count):
+        for i in range(count):
+            encode_command(cmds[i & 255])
+
+    return best_rate(run, args.count, args.repeat), {}
+
+
+def bench_parse(args):
+    """parse_response() on a mixed reply stream, in frames/s."""
+    rng = random.Random(0)
+    frames = [rng.choice(PARSE_FRAMES) for _ in range(1024)]
+
+    def run(count):
+        for i in range(count):
+            parse_response(frames[i & 1023])
+
+    return best_rate(run, args.count, args.repeat), {}
+
+
+def receive_rate(mode, args):
+    """Frames/s through Connection.receive_all() for one segmentation."""
+    rng = random.Random(0)
+    stream = b"".join(rng.choice(FRAMES) for _ in range(args.frames))
+    frame_count = args.frames
+    chunks = segments(stream, mode, rng)
+    best = float("inf")
+    for _ in range(args.repeat):
+        near, far = socket.socketpair()
+        connection = Connection("socketpair", transport=SocketTransport(near))
+        connection.connect()
+        received = 0
+        start = time.perf_counter()
+        try:
+            if mode == "burst-4k":
+                # Coalesced: the whole backlog is waiting when the reader wakes
+                far.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, len(stream) + 4096)
+                near.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, len(stream) + 4096)
+                for chunk in chunks:
+                    far.sendall(chunk)
+                while received < frame_count:
+                    received += len(connection.receive_all(timeout=1.0))
+            else:
+                # Fragmented: every read finds one small segment
+                for chunk in chunks:
+                    far.sendall(chunk)
+                    received += len(connection.receive_all(timeout=1.0))
+            best = min(best, time.perf_counter() - start)
+        finally:
+            connection.disconnect()
+            far.close()
+    return frame_count / best
+
+
+def bench_receive_fragmented(args):
+    """Connection.receive_all() fed random 1-24 byte segments, in frames/s."""
+    return receive_rate("random-small", args), {}
+
+
+def bench_receive_coalesced(args):
+    """Connection.receive_all() draining 4 KB bursts, in frames/s."""
+    return receive_rate("burst-4k", args), {}
+
+
+def bench_heartbeat(args):
+    """Heartbeat reply latency seen by the bridge, p99 in ms."""
+    with SimulatorServer(count=1, heartbeat_interval=0.01) as server:
+        with RobotController("127.0.0.1", server.ports[0], reactor=True):
+            time.sleep(args.duration)
+        latencies = sorted(server.robots[0].heartbeat_latencies)
+    return percentile(latencies, 0.99) * 1000, {
+        "samples": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+    }
+
+
+def bench_round_trip(args):
+    """Request to reply round trip without serial latency, p99 in ms.
+
+    Uses an LED command so the simulated firmware adds only its 2 ms loop
+    time, not an ultrasonic echo.
+    """
+    command = build_led_cmd(1, 0, 0, 0)
+    samples = []
+    with SimulatorServer(count=1, uart_rate=None) as server:
+        with RobotController("127.0.0.1", server.ports[0], reactor=True) as robot:
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                robot.wait_reply(robot.request(command))
+                samples.append(time.perf_counter() - start)
+    samples.sort()
+    return percentile(samples, 0.99) * 1000, {
+        "samples": len(samples),
+        "p50_ms": percentile(samples, 0.50) * 1000,
+    }
+
+
+def bench_obstacle_stop(args):
+    """Obstacle onset to the car stopping during forward(), mean in ms."""
+    rng = random.Random(0)
+    with SimulatorServer(count=1) as server:
+        with RobotController("127.0.0.1", server.ports[0], reactor=True) as robot:
+            delays = sorted(trial(server, robot, rng, 50) for _ in range(args.trials))
+    return sum(delays) / len(delays) * 1000, {"max_ms": delays[-1] * 1000}
+
+
+def bench_scan(args):
+    """Wall time of a five-angle sweep scan, best of repeat in s."""
+    best = float("inf")
+    with SimulatorServer(count=1) as server:
+        with RobotController("127.0.0.1", server.ports[0], reactor=True) as robot:
+            robot.scan()
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                robot.scan()
+                best = min(best, time.perf_counter() - start)
+    return best, {}
+
+
+# name: (function, unit, which direction is better)
+CASES = {
+    "encode_command": (bench_encode, "ops/s", "higher"),
+    "parse_response": (bench_parse, "ops/s", "higher"),
+    "receive_fragmented": (bench_receive_fragmented, "frames/s", "higher"),
+    "receive_coalesced": (bench_receive_coalesced, "frames/s", "higher"),
+    "heartbeat_reply_p99": (bench_heartbeat, "ms", "lower"),
+    "round_trip_p99": (bench_round_trip, "ms", "lower"),
+    "obstacle_stop_mean": (bench_obstacle_stop, "ms", "lower"),
+    "scan_wall": (bench_scan, "s", "lower"),
+}
+
+
+def load_baselines(path):
+    """Return pinned baselines by case name (empty if the file is missing)."""
+    try:
+        with open(path) as f:
+            return json.load(f)["cases"]
+    except FileNotFoundError:
+        return {}
+
+
+def compare(value, baseline, better):
+    """Return (relative change, regressed) of value against a baseline entry.
+
+    The change is positive when the value is better than the baseline.
+    """
+    pinned = baseline["value"]
+    tolerance = baseline["tolerance"]
+    if better == "higher":
+        return value / pinned - 1, value < pinned * (1 - tolerance)
+    change = pinned / value - 1 if value else float("inf")
+    return change, value > pinned * (1 + tolerance)
+
+
+def main():
+    """Run the suite, print a table and optionally write JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON (- for stdout)")
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--check", action="store_true", help="exit 1 if any case regressed")
+    parser.add_argument("--update", action="store_true", help="pin these results as baselines")
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--trials", type=int, default=5)
+    args = parser.parse_args()
+
+    baselines = load_baselines(args.baselines)
+    results = []
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{'case':<20} {'value':>12} {'unit':<9} {'baseline':>12} {'change':>8}  status", file=out)
+    for name in args.cases:
+        func, unit, better = CASES[name]
+        value, extra = func(args)
+        result = {"name": name, "value": value, "unit": unit, "better": better, **extra}
+        baseline = baselines.get(name)
+        status = "new"
+        if baseline is not None:
+            change, regressed = compare(value, baseline, better)
+            result.update(baseline=baseline["value"], change=change, regressed=regressed)
+            status = "REGRESSED" if regressed else "ok"
+        results.append(result)
+        pinned = f"{baseline['value']:>12,.3f}" if baseline else f"{'-':>12}"
+        change = f"{result['change']:>+7.0%}" if baseline else f"{'-':>8}"
+        print(f"{name:<20} {value:>12,.3f} {unit:<9} {pinned} {change:>8}  {status}", file=out)
+
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update:
+        for result in results:
+            previous = baselines.get(result["name"], {})
+            baselines[result["name"]] = {
+                "value": round(result["value"], 3),
+                "unit": result["unit"],
+                "tolerance": previous.get("tolerance", DEFAULT_TOLERANCE[result["better"]]),
+            }
+        with open(args.baselines, "w") as f:
+            json.dump({"machine": report["machine"], "python": report["python"],
+                       "cases": baselines}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.check and any(result.get("regressed") for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,52 +6,44 @@ Demonstrates camera control for scanning the environment.
 from robotapi import RobotController
 import time
 
+# Pan angles visited by the scan, right to left (90 faces forward)
+SCAN_PANS = [150, 120, 90, 60, 30]
+# Tilt angles visited by the vertical scan (90 is level)
+SCAN_TILTS = [110, 90, 60]
+
+
 def main():
     """Run camera scanning routine."""
     robot = RobotController("10.0.0.57")
     robot.connect()
-    
+
     try:
         print("Starting camera scan...")
-        
-        # Center camera first
+        start = time.monotonic()
+
+        # Move to a known pose first; every later move is one command per servo
         print("Centering camera...")
-        robot.camera_center()
-        time.sleep(0.5)
-        
-        # Pan left scan
-        print("Scanning left...")
-        for i in range(3):
-            robot.camera_pan_left(count=1)
-            print(f"  Position {i+1}/3")
-            time.sleep(0.5)
-        
-        # Return to center
-        print("Returning to center...")
-        robot.camera_center()
-        time.sleep(0.5)
-        
-        # Pan right scan
-        print("Scanning right...")
-        for i in range(3):
-            robot.camera_pan_right(count=1)
-            print(f"  Position {i+1}/3")
-            time.sleep(0.5)
-        
+        robot.camera_set(pan=90, tilt=90)
+
+        # Horizontal scan: each camera_set() sleeps only until the servo settles
+        print("Scanning horizontally...")
+        for i, pan in enumerate(SCAN_PANS):
+            robot.camera_set(pan=pan)
+            print(f"  Position {i+1}/{len(SCAN_PANS)} (pan {pan})")
+
+        # Vertical scan facing forward
+        print("Scanning vertically...")
+        robot.camera_set(pan=90)
+        for tilt in SCAN_TILTS:
+            robot.camera_set(tilt=tilt)
+            print(f"  Tilt {tilt}")
+
         # Return to center
         print("Returning to center...")
-        robot.camera_center()
-        
-        # Tilt scan
-        print("Scanning vertical...")
-        robot.camera_tilt_up(count=2)
-        time.sleep(0.5)
-        robot.camera_tilt_down(count=2)
-        time.sleep(0.5)
-        robot.camera_center()
-        
-        print("\nCamera scan complete!")
-        
+        robot.camera_set(pan=90, tilt=90)
+
+        print(f"\nCamera scan complete in {time.monotonic() - start:.1f}s!")
+
     finally:
         robot.disconnect()
 
@@ -4,39 +4,54 @@ Demonstrates forward movement with obstacle detection and avoidance.
 """
 
 from robotapi import RobotController
-import time
+
+# Turn rate at speed 50; calibrate for your car and floor
+ROTATE_DEGREES_PER_SECOND = 90.0
+# Minimum free range for an escape heading, in cm
+CLEARANCE_CM = 40
 
 def main():
     """Run obstacle avoidance routine."""
     robot = RobotController("10.0.0.57")
     robot.connect()
-    
+
     try:
         print("Starting obstacle avoidance routine...")
-        
+
         for i in range(5):
             print(f"\nAttempt {i+1}: Moving forward...")
-            
+
             # Try to move forward
             completed = robot.forward(duration=2.0, speed=50)
-            
+
             if not completed:
                 print("Obstacle detected! Taking evasive action...")
-                
+
                 # Back up
                 print("Backing up...")
                 robot.backward(duration=1.0, speed=50)
-                
-                # Rotate to avoid obstacle
-                print("Rotating right to avoid...")
-                robot.rotate_right(duration=1.5, speed=50)
-                
-                time.sleep(0.5)
+
+                # One sweep of the ultrasonic sensor finds the clearest way out
+                print("Scanning...")
+                profile = robot.scan([10, 30, 50, 70, 90, 110, 130, 150, 170])
+                for angle, distance in profile:
+                    print(f"  {profile.heading(angle):+4d} deg: {distance or '-'} cm")
+                robot.camera_set(pan=90, wait=False)
+
+                angle = profile.clearest(min_cm=CLEARANCE_CM)
+                heading = profile.heading(angle) if angle is not None else 180
+                duration = abs(heading) / ROTATE_DEGREES_PER_SECOND
+                if heading > 0:
+                    print(f"Turning right {heading} degrees...")
+                    robot.rotate_right(duration=duration, speed=50)
+                elif heading < 0:
+                    print(f"Turning left {-heading} degrees...")
+                    robot.rotate_left(duration=duration, speed=50)
             else:
                 print("Path clear, continuing...")
-        
+
         print("\nObstacle avoidance routine complete!")
-        
+
     finally:
         robot.disconnect()
 
@@ -3,6 +3,7 @@
 __version__ = "0.1.0"
 
 from robotapi.controller import RobotController
+from robotapi.async_controller import AsyncRobotController
 from robotapi.exceptions import (
     RobotAPIError,
     RobotConnectionError,
@@ -12,6 +13,7 @@ from robotapi.exceptions import (
 
 __all__ = [
     "RobotController",
+    "AsyncRobotController",
     "RobotAPIError",
     "RobotConnectionError",
     "CommandError",
@@ -0,0 +1,166 @@
+"""Asyncio TCP connection management for robot communication."""
+
+import asyncio
+from collections import deque
+from typing import Deque, List, Optional
+from robotapi.framing import FrameDecoder
+from robotapi.exceptions import RobotConnectionError
+
+
+class AsyncConnection:
+    """Manages an asyncio stream connection to robot."""
+
+    def __init__(self, ip: str, port: int = 100):
+        """Initialize connection.
+
+        Args:
+            ip: Robot IP address
+            port: TCP port (default 100)
+        """
+        self.ip = ip
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._decoder = FrameDecoder()
+        self._pending: Deque[str] = deque()
+        # One writer at a time: concurrent drain() calls are unsupported
+        # before Python 3.10. Created in connect() so it binds to its loop.
+        self._send_lock: Optional[asyncio.Lock] = None
+
+    async def connect(self, timeout: Optional[float] = None) -> None:
+        """Establish TCP connection to robot.
+
+        Args:
+            timeout: Connect timeout in seconds (None waits for the OS default)
+
+        Raises:
+            RobotConnectionError: If connection fails
+        """
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port), timeout
+            )
+            self._send_lock = asyncio.Lock()
+            self._reset_buffer()
+        except (OSError, asyncio.TimeoutError) as e:
+            self._reader = None
+            self._writer = None
+            raise RobotConnectionError(f"Failed to connect to {self.ip}:{self.port}: {e}")
+
+    async def disconnect(self) -> None:
+        """Close TCP connection."""
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        self._reset_buffer()
+        if writer:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except (OSError, ConnectionResetError):
+                pass
+
+    def is_connected(self) -> bool:
+        """Check if connection is active.
+
+        Returns:
+            True if connected, False otherwise
+        """
+        return self._writer is not None
+
+    async def send(self, data: bytes) -> None:
+        """Send data to robot.
+
+        Concurrent sends are serialized, so each is written whole.
+
+        Args:
+            data: Bytes to send
+
+        Raises:
+            RobotConnectionError: If not connected or send fails
+        """
+        if not self._writer or self._send_lock is None:
+            raise RobotConnectionError("Not connected")
+
+        async with self._send_lock:
+            writer = self._writer
+            if not writer:
+                raise RobotConnectionError("Not connected")
+            try:
+                writer.write(data)
+                await writer.drain()
+            except (OSError, BrokenPipeError, ConnectionResetError) as e:
+                await self.disconnect()
+                raise RobotConnectionError(f"Send failed: {e}")
+
+    async def receive(self, timeout: Optional[float] = 0.1) -> Optional[str]:
+        """Receive data from robot with message buffering.
+
+        Args:
+            timeout: Receive timeout in seconds (None waits until data arrives)
+
+        Returns:
+            Complete message string or None if no complete message available
+
+        Raises:
+            RobotConnectionError: If not connected or receive fails
+        """
+        if not self._pending:
+            await self._read(timeout)
+        return self._pending.popleft() if self._pending else None
+
+    async def receive_all(self, timeout: Optional[float] = 0.1) -> List[str]:
+        """Receive every complete message available after one read.
+
+        Args:
+            timeout: Receive timeout in seconds (None waits until data arrives)
+
+        Returns:
+            Complete messages in arrival order (empty if none arrived)
+
+        Raises:
+            RobotConnectionError: If not connected or receive fails
+        """
+        if not self._pending:
+            await self._read(timeout)
+        messages = list(self._pending)
+        self._pending.clear()
+        return messages
+
+    async def _read(self, timeout: Optional[float]) -> None:
+        """Read once from the stream and queue any completed messages.
+
+        Raises:
+            RobotConnectionError: If not connected or receive fails
+        """
+        if not self._reader:
+            raise RobotConnectionError("Not connected")
+
+        try:
+            data = await asyncio.wait_for(self._reader.read(4096), timeout)
+        except asyncio.TimeoutError:
+            return
+        except (OSError, ConnectionResetError, BrokenPipeError) as e:
+            await self.disconnect()
+            raise RobotConnectionError(f"Receive failed: {e}")
+
+        if not data:
+            # Connection closed
+            await self.disconnect()
+            raise RobotConnectionError("Connection closed by robot")
+
+        self._pending.extend(self._decoder.feed(data))
+
+    def _reset_buffer(self) -> None:
+        """Discard partially received and undelivered messages."""
+        self._decoder.reset()
+        self._pending.clear()
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.disconnect()
@@ -0,0 +1,657 @@
+"""Asyncio robot controller - native event loop API interface."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from robotapi.async_connection import AsyncConnection
+from robotapi.camera import CameraStream, STREAM_PORT
+from robotapi.pipeline import CommandFuture, CommandPipeline
+from robotapi.sampler import OBSTACLE_RATE, ObstacleSampler
+from robotapi.sensors import DistanceFilter
+from robotapi.telemetry import TelemetryScheduler
+from robotapi.pacing import TokenBucket
+from robotapi.motion import TIMED_MOVE_GRACE
+from robotapi.servo import CameraPose, servo_commands
+from robotapi.scan import SCAN_ANGLES, PolarProfile, query_delay, sweep_order
+from robotapi.messages import BoolReply, Heartbeat, Message, decode_frame
+from robotapi.protocol import (
+    build_distance_cmd,
+    build_obstacle_cmd,
+    build_timed_movement_cmd,
+    encode_camera,
+    encode_command,
+    encode_movement,
+    DIR_FORWARD,
+    DIR_BACKWARD,
+    DIR_LEFT,
+    DIR_RIGHT,
+    CAM_PAN_LEFT,
+    CAM_PAN_RIGHT,
+    CAM_TILT_UP,
+    CAM_TILT_DOWN,
+    CAM_CENTER,
+    CMD_CAMERA,
+    CMD_MOVEMENT,
+    CMD_STOP,
+    STOP_COMMAND,
+    CommandByteCounter,
+)
+from robotapi.exceptions import CommandError, RobotConnectionError
+
+
+class AsyncRobotController:
+    """Asyncio robot control interface.
+
+    Heartbeats are answered by a background reader task, so a single event
+    loop can drive many robots without a thread per robot.
+    """
+
+    def __init__(
+        self,
+        ip: str,
+        port: int = 100,
+        timed_moves: bool = False,
+        camera_port: int = STREAM_PORT,
+        obstacle_rate: float = OBSTACLE_RATE,
+    ):
+        """Initialize robot controller.
+
+        Args:
+            ip: Robot IP address
+            port: TCP port (default 100)
+            timed_moves: Send movements as firmware-timed commands (N=2) so the
+                         robot itself stops the car when the duration is up
+            camera_port: Port of the camera's MJPEG stream server (default 81)
+            obstacle_rate: Obstacle queries per second during forward(),
+                           capped to fit the robot's 9600-baud serial link
+        """
+        self.ip = ip
+        self.port = port
+        self.timed_moves = timed_moves
+        self.camera_port = camera_port
+        self.obstacle_rate = obstacle_rate
+        self._camera: Optional[CameraStream] = None
+        self._telemetry: Optional[TelemetryScheduler] = None
+        self._connection = AsyncConnection(ip, port)
+        self._reader_task: Optional[asyncio.Task] = None
+        self._queues: List[asyncio.Queue] = []
+        self._error: Optional[RobotConnectionError] = None
+        self._pipeline = CommandPipeline()
+        self.command_bytes = CommandByteCounter()
+        self.distance = DistanceFilter()
+        self.camera_pose = CameraPose()
+        # Created on connect(), inside the event loop
+        self._camera_lock: Optional[asyncio.Lock] = None
+        self._distance_query: Optional[CommandFuture] = None
+        self._moving = False
+        self._obstacle_detected = False
+
+    async def connect(self) -> None:
+        """Establish connection to robot and start the heartbeat task."""
+        await self._connection.connect()
+        self.camera_pose.forget()
+        self._camera_lock = asyncio.Lock()
+        self._error = None
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+
+    async def disconnect(self) -> None:
+        """Close connection to robot."""
+        if self._camera is not None:
+            self._camera.stop()
+            self._camera = None
+        await self.stop_telemetry()
+        if self._moving:
+            await self.stop()
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        await self._connection.disconnect()
+        self._pipeline.fail_all(RobotConnectionError("Disconnected"))
+
+    def is_connected(self) -> bool:
+        """Check if connected to robot."""
+        return self._connection.is_connected()
+
+    async def _read_loop(self) -> None:
+        """Background task: answer heartbeats and fan responses out to waiters."""
+        try:
+            while True:
+                messages = await self._connection.receive_all(timeout=None)
+                now = time.monotonic()
+                for message in messages:
+                    response = decode_frame(message, now)
+                    if response is None:
+                        continue
+                    if isinstance(response, Heartbeat):
+                        await self._connection.send(b"{Heartbeat}")
+                    else:
+                        self._pipeline.resolve(response)
+                    for queue in self._queues:
+                        queue.put_nowait(response)
+        except RobotConnectionError as e:
+            self._error = e
+            self._pipeline.fail_all(e)
+            for queue in self._queues:
+                queue.put_nowait(None)
+
+    async def wait_for_duration(
+        self,
+        duration: float,
+        callback: Optional[Callable[[Message], Awaitable[bool]]] = None,
+    ) -> bool:
+        """Wait for specified duration while responses are dispatched.
+
+        Args:
+            duration: Duration in seconds
+            callback: Optional coroutine function for processing decoded messages.
+                      Should return False to stop early, True to continue.
+
+        Returns:
+            True if duration completed, False if stopped early by callback
+
+        Raises:
+            RobotConnectionError: If the connection fails while waiting
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues.append(queue)
+        try:
+            while True:
+                if self._error:
+                    raise self._error
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return True
+                try:
+                    response = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    return True
+                if response is None:
+                    raise self._error or RobotConnectionError("Connection closed by robot")
+                if callback and not await callback(response):
+                    return False
+        finally:
+            self._queues.remove(queue)
+
+    async def _send_command(self, cmd: dict) -> None:
+        """Send command to robot."""
+        await self._send_encoded(cmd.get("N"), encode_command(cmd))
+
+    async def _send_encoded(self, command: int, data: bytes) -> None:
+        """Send pre-encoded command bytes to robot and account for them."""
+        if not self.is_connected():
+            raise RobotConnectionError("Not connected")
+        await self._connection.send(data)
+        self.command_bytes.record(command, data)
+
+    async def request(self, cmd: Dict[str, Any]) -> "asyncio.Future[Any]":
+        """Send a command tagged with a fresh serial number.
+
+        Several requests may be in flight at once; each returned future is
+        resolved by the reply echoing its serial number.
+
+        Args:
+            cmd: Command dictionary from one of the protocol builders
+
+        Returns:
+            Awaitable future resolved with the reply value
+
+        Raises:
+            RobotConnectionError: If not connected or send fails
+            CommandError: If the command has no serial reply or too many
+                          commands are in flight
+        """
+        return asyncio.wrap_future(await self._submit(cmd))
+
+    async def _submit(self, cmd: Dict[str, Any]) -> CommandFuture:
+        """Send a serial-tagged command and return its pipeline future.
+
+        The returned future is resolved on the reader task before the
+        reply is handed to waiters, unlike the wrapped future of request().
+        """
+        if not self.is_connected():
+            raise RobotConnectionError("Not connected")
+        tagged, future = self._pipeline.prepare(cmd)
+        try:
+            await self._send_command(tagged)
+        except RobotConnectionError:
+            self._pipeline.discard(future)
+            raise
+        return future
+
+    async def stop(self) -> None:
+        """Emergency stop - halt all movement."""
+        if self.is_connected():
+            await self._send_encoded(CMD_STOP, STOP_COMMAND)
+            self._moving = False
+
+    async def forward(self, duration: float, speed: int = 50) -> bool:
+        """Move forward with obstacle detection.
+
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+
+        Returns:
+            True if completed, False if obstacle detected
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        self._obstacle_detected = False
+
+        def on_obstacle() -> None:
+            # Runs on the reader task as the reply is decoded
+            self._obstacle_detected = True
+            asyncio.ensure_future(self.stop())
+
+        async def check_obstacle(response: Message) -> bool:
+            if self._obstacle_detected:
+                return False  # Stop early
+            if isinstance(response, BoolReply) and response.serial is None:
+                # Bridges that do not echo serial numbers send a bare token
+                if response.value:
+                    self._obstacle_detected = True
+                    return False  # Stop early
+            return True
+
+        sampler = ObstacleSampler(
+            None, on_obstacle, self.obstacle_rate, discard=self._pipeline.discard
+        )
+        completed = await self._move(DIR_FORWARD, duration, speed, check_obstacle, sampler)
+        return completed and not self._obstacle_detected
+
+    async def _sample(self, sampler: ObstacleSampler) -> None:
+        """Send obstacle queries at the sampler's rate until cancelled."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while not sampler.detected:
+            if sampler.due():
+                try:
+                    sampler.track(await self._submit(build_obstacle_cmd()))
+                except CommandError:
+                    pass  # Pipeline full of other commands
+                except RobotConnectionError:
+                    return
+            next_tick = max(next_tick + sampler.interval, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+    async def _move(
+        self,
+        direction: int,
+        duration: float,
+        speed: int,
+        callback: Optional[Callable[[Message], Awaitable[bool]]] = None,
+        sampler: Optional[ObstacleSampler] = None,
+    ) -> bool:
+        """Drive in a direction until the duration elapses.
+
+        An optional obstacle sampler is run once the car is moving.
+
+        Returns:
+            True if the duration completed, False if stopped by callback
+        """
+        if not self.is_connected():
+            raise RobotConnectionError("Not connected")
+
+        self._moving = True
+        sampling: Optional[asyncio.Task] = None
+        try:
+            if not self.timed_moves:
+                await self._send_encoded(CMD_MOVEMENT, encode_movement(direction, speed))
+                if sampler:
+                    sampling = asyncio.ensure_future(self._sample(sampler))
+                return await self.wait_for_duration(duration, callback)
+
+            # The firmware times the move and replies when it has stopped
+            move = await self._submit(build_timed_movement_cmd(direction, speed, duration))
+            if sampler:
+                sampling = asyncio.ensure_future(self._sample(sampler))
+            stopped = []
+
+            async def until_done(response: Message) -> bool:
+                if callback and not await callback(response):
+                    stopped.append(True)
+                    return False
+                return not move.done()
+
+            await self.wait_for_duration(duration + TIMED_MOVE_GRACE, until_done)
+            return not stopped
+        finally:
+            if sampler:
+                sampler.stop()
+            if sampling:
+                sampling.cancel()
+            await self.stop()
+
+    async def backward(self, duration: float, speed: int = 50) -> bool:
+        """Move backward.
+
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+
+        Returns:
+            True when completed
+        """
+        await self._move(DIR_BACKWARD, duration, speed)
+        return True
+
+    async def rotate_left(self, duration: float, speed: int = 50) -> bool:
+        """Rotate left.
+
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+
+        Returns:
+            True when completed
+        """
+        await self._move(DIR_LEFT, duration, speed)
+        return True
+
+    async def rotate_right(self, duration: float, speed: int = 50) -> bool:
+        """Rotate right.
+
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+
+        Returns:
+            True when completed
+        """
+        await self._move(DIR_RIGHT, duration, speed)
+        return True
+
+    def detect_obstacle(self) -> bool:
+        """Check for obstacles.
+
+        Returns:
+            True if obstacle detected
+        """
+        result = self._obstacle_detected
+        self._obstacle_detected = False
+        return result
+
+    async def get_distance(self, max_age: Optional[float] = None, timeout: float = 1.0) -> float:
+        """Get distance to nearest obstacle.
+
+        Readings are median filtered and cached: a call within max_age of
+        the last measurement returns the cached value without a round trip,
+        and concurrent callers share one in-flight query.
+
+        Args:
+            max_age: Seconds a cached reading may be old (defaults to
+                     distance.freshness)
+            timeout: Maximum time to wait for a new measurement in seconds
+
+        Returns:
+            Distance in cm
+
+        Raises:
+            RobotConnectionError: If not connected
+            CommandError: If no valid measurement arrived in time
+        """
+        reading = self.distance.latest(max_age)
+        if reading is not None:
+            return reading.value
+
+        query = self._distance_query
+        if query is None or query.done():
+            query = await self._submit(build_distance_cmd())
+            query.add_done_callback(self._on_distance)
+            self._distance_query = query
+        try:
+            value = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(query)), timeout)
+        except asyncio.TimeoutError:
+            raise CommandError(f"No reply to serial {query.serial} within {timeout}s")
+        reading = self.distance.latest(float("inf"))
+        if reading is None or reading.timestamp < query.replied_at:
+            raise CommandError(f"Invalid distance reading: {value!r}")
+        return reading.value
+
+    async def scan(
+        self, angles: Iterable[float] = SCAN_ANGLES, timeout: float = 1.0
+    ) -> PolarProfile:
+        """Sweep the ultrasonic sensor across pan angles and measure each.
+
+        Each angle's distance query is sent together with the move to the
+        next angle, so the servo turns while the reading travels back.
+
+        Args:
+            angles: Pan angles in degrees (90 faces forward, higher is right)
+            timeout: Maximum time to wait for each reading in seconds
+
+        Returns:
+            Profile of distances by angle; angles without a reply or a valid
+            echo read NO_READING (0)
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        async with self._pose_lock():
+            order = sweep_order(angles, self.camera_pose.pan)
+            profile = PolarProfile(order)
+            query = None
+            for i, angle in enumerate(order):
+                settle = await self._aim(pan=angle)
+                if query is not None:
+                    await self._scan_reading(profile, order[i - 1], query, timeout)
+                await asyncio.sleep(query_delay(settle))
+                query = await self._submit(build_distance_cmd())
+            if query is not None:
+                await self._scan_reading(profile, order[-1], query, timeout)
+        profile.timestamp = time.monotonic()
+        return profile
+
+    async def _scan_reading(
+        self, profile: PolarProfile, angle: int, query: CommandFuture, timeout: float
+    ) -> None:
+        """Wait for one scan query and record its reading."""
+        try:
+            value = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(query)), timeout)
+        except (asyncio.TimeoutError, CommandError):
+            self._pipeline.discard(query)
+            value = None
+        profile.set(angle, value)
+
+    def _on_distance(self, future: CommandFuture) -> None:
+        """Feed a distance reply into the filter."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        value = future.result()
+        if isinstance(value, int) and not isinstance(value, bool):
+            self.distance.add(value, future.replied_at)
+
+    def is_moving(self) -> bool:
+        """Check if robot is currently moving.
+
+        Returns:
+            True if moving
+        """
+        return self._moving
+
+    async def _camera_steps(self, direction: int, count: int) -> None:
+        """Send camera steps spaced 100 ms apart."""
+        async with self._pose_lock():
+            for _ in range(count):
+                await self._send_encoded(CMD_CAMERA, encode_camera(direction))
+                self.camera_pose.step(direction)
+                await asyncio.sleep(0.1)
+
+    async def camera_pan_left(self, count: int = 1) -> None:
+        """Pan camera left.
+
+        Args:
+            count: Number of pan steps
+        """
+        await self._camera_steps(CAM_PAN_LEFT, count)
+
+    async def camera_pan_right(self, count: int = 1) -> None:
+        """Pan camera right.
+
+        Args:
+            count: Number of pan steps
+        """
+        await self._camera_steps(CAM_PAN_RIGHT, count)
+
+    async def camera_tilt_up(self, count: int = 1) -> None:
+        """Tilt camera up.
+
+        Args:
+            count: Number of tilt steps
+        """
+        await self._camera_steps(CAM_TILT_UP, count)
+
+    async def camera_tilt_down(self, count: int = 1) -> None:
+        """Tilt camera down.
+
+        Args:
+            count: Number of tilt steps
+        """
+        await self._camera_steps(CAM_TILT_DOWN, count)
+
+    async def camera_center(self) -> None:
+        """Reset camera to center position."""
+        await self._camera_steps(CAM_CENTER, 1)
+
+    async def camera_set(
+        self, pan: Optional[float] = None, tilt: Optional[float] = None, wait: bool = True
+    ) -> float:
+        """Point the camera at absolute angles.
+
+        Sends one servo command (N=5) per servo that has to move.
+
+        Args:
+            pan: Pan angle in degrees (10-170, 90 faces forward, higher
+                 turns right), or None to leave pan alone
+            tilt: Tilt angle in degrees (30-110, 90 is level, higher looks
+                  up), or None to leave tilt alone
+            wait: Sleep until the servos are predicted to have settled
+
+        Returns:
+            Predicted settle time in seconds from when the commands were sent
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        async with self._pose_lock():
+            settle = await self._aim(pan, tilt)
+        if wait:
+            await asyncio.sleep(settle)
+        return settle
+
+    async def camera_move(self, pan: float = 0, tilt: float = 0, wait: bool = True) -> float:
+        """Move the camera relative to its tracked pose.
+
+        Args:
+            pan: Degrees to pan (positive turns right)
+            tilt: Degrees to tilt (positive looks up)
+            wait: Sleep until the servos are predicted to have settled
+
+        Returns:
+            Predicted settle time in seconds
+
+        Raises:
+            RobotConnectionError: If not connected
+            CommandError: If a servo to be moved has no known angle; call
+                          camera_set() or camera_center() first
+        """
+        async with self._pose_lock():
+            settle = await self._aim(**self.camera_pose.offset(pan, tilt))
+        if wait:
+            await asyncio.sleep(settle)
+        return settle
+
+    def _pose_lock(self) -> asyncio.Lock:
+        """Return the lock serializing camera moves against the tracked pose.
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        if not self.is_connected() or self._camera_lock is None:
+            raise RobotConnectionError("Not connected")
+        return self._camera_lock
+
+    async def _aim(self, pan: Optional[float] = None, tilt: Optional[float] = None) -> float:
+        """Send the servo commands for a pose; the caller holds the camera lock.
+
+        Returns:
+            Predicted settle time in seconds
+        """
+        moves, settle = self.camera_pose.plan(pan, tilt)
+        for cmd in servo_commands(moves):
+            await self._send_command(cmd)
+        self.camera_pose.apply(moves)
+        return settle
+
+    async def get_image(self, timeout: float = 2.0) -> bytes:
+        """Return the latest camera frame.
+
+        The first call opens the camera stream (received on its own thread)
+        and waits for a frame; later calls return the newest frame already
+        received without blocking.
+
+        Args:
+            timeout: Maximum time to wait for the first frame in seconds
+
+        Returns:
+            JPEG data, or b"" if no frame arrived in time
+        """
+        if self._camera is None:
+            self._camera = CameraStream(self.ip, self.camera_port)
+            self._camera.start()
+        frame = self._camera.latest()
+        if frame is None:
+            loop = asyncio.get_running_loop()
+            frame = await loop.run_in_executor(None, self._camera.wait_frame, timeout)
+        return frame.data if frame else b""
+
+    def start_telemetry(self, budget: Optional[TokenBucket] = None) -> TelemetryScheduler:
+        """Start polling sensors from a background scheduler thread.
+
+        Must be called from the event loop. Queries are sent on the loop and
+        subscriber callbacks run on the reader task.
+
+        Args:
+            budget: Token bucket metering telemetry's UART bytes (defaults to
+                    half of the serial link)
+
+        Returns:
+            Running telemetry scheduler
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        if not self.is_connected():
+            raise RobotConnectionError("Not connected")
+        if self._telemetry is None:
+            loop = asyncio.get_running_loop()
+
+            def submit(cmd: Dict[str, Any]) -> CommandFuture:
+                return asyncio.run_coroutine_threadsafe(self._submit(cmd), loop).result()
+
+            self._telemetry = TelemetryScheduler(submit, budget, self._pipeline.discard)
+            self._telemetry.start()
+        return self._telemetry
+
+    async def stop_telemetry(self) -> None:
+        """Stop sensor polling if it is running."""
+        if self._telemetry is not None:
+            telemetry, self._telemetry = self._telemetry, None
+            # The scheduler thread may be waiting on the loop to send
+            await asyncio.get_running_loop().run_in_executor(None, telemetry.stop)
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.disconnect()
@@ -0,0 +1,429 @@
+"""MJPEG camera stream client with a latest-frame ring buffer.
+
+The ESP32 camera firmware serves a multipart MJPEG stream on port 81.
+Each part is introduced by the boundary and carries a Content-Length:
+
+    \\r\\n--123456789000000000000987654321\\r\\n
+    Content-Type: image/jpeg\\r\\n
+    Content-Length: 12345\\r\\n
+    \\r\\n
+    <JPEG bytes>
+"""
+
+import logging
+import socket
+import threading
+import time
+from typing import List, Optional
+from robotapi.exceptions import RobotConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Camera web server defaults (app_httpd.cpp)
+STREAM_PORT = 81
+STREAM_PATH = "/stream"
+STREAM_BOUNDARY = b"123456789000000000000987654321"
+
+# Initial receive buffer; grown if a single frame does not fit
+BUFFER_SIZE = 256 * 1024
+# Largest frame accepted before the stream is considered corrupt
+MAX_FRAME_SIZE = 4 * 1024 * 1024
+# Number of recent frames kept by default
+RING_SIZE = 4
+
+_CONTENT_LENGTH = b"content-length:"
+_HEADER_END = b"\r\n\r\n"
+
+
+class Frame:
+    """One JPEG frame from the stream.
+
+    Attributes:
+        data: JPEG bytes
+        timestamp: time.monotonic() when the last byte was received
+        sequence: Frame number since the stream started
+    """
+
+    __slots__ = ("data", "timestamp", "sequence")
+
+    def __init__(self, data: bytes, timestamp: float, sequence: int):
+        self.data = data
+        self.timestamp = timestamp
+        self.sequence = sequence
+
+    def __repr__(self) -> str:
+        return f"Frame(sequence={self.sequence}, size={len(self.data)})"
+
+
+class FrameRing:
+    """Fixed-size ring of the most recent frames."""
+
+    def __init__(self, size: int = RING_SIZE):
+        """Initialize ring.
+
+        Args:
+            size: Number of frames to keep
+        """
+        if size < 1:
+            raise ValueError("Ring size must be at least 1")
+        self.size = size
+        self._slots: List[Optional[Frame]] = [None] * size
+        self._count = 0
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        """Number of frames currently held."""
+        return min(self._count, self.size)
+
+    @property
+    def count(self) -> int:
+        """Total frames pushed since creation."""
+        return self._count
+
+    def push(self, frame: Frame) -> None:
+        """Store a frame, overwriting the oldest when full.
+
+        Args:
+            frame: Frame to store
+        """
+        with self._cond:
+            self._slots[self._count % self.size] = frame
+            self._count += 1
+            self._cond.notify_all()
+
+    def latest(self) -> Optional[Frame]:
+        """Return the newest frame without blocking.
+
+        Returns:
+            Newest frame, or None if none has arrived
+        """
+        count = self._count
+        if not count:
+            return None
+        return self._slots[(count - 1) % self.size]
+
+    def frames(self) -> List[Frame]:
+        """Return held frames, oldest first."""
+        with self._cond:
+            count = self._count
+            return [self._slots[i % self.size] for i in range(max(0, count - self.size), count)]
+
+    def wait_newer(self, sequence: int, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Block until a frame newer than sequence arrives.
+
+        Args:
+            sequence: Sequence number already seen (-1 for any frame)
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            Newest frame, or None if the timeout expired
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._count > sequence + 1, timeout):
+                return None
+            return self._slots[(self._count - 1) % self.size]
+
+    def wake(self) -> None:
+        """Release threads blocked in wait_newer() so they can re-check state."""
+        with self._cond:
+            self._cond.notify_all()
+
+
+class MjpegParser:
+    """Splits a multipart MJPEG byte stream into JPEG frames.
+
+    Data is received straight into a reusable bytearray (see writable() and
+    commit()); part headers are parsed in place and the only copy made is
+    of each complete JPEG.
+    """
+
+    def __init__(self, boundary: bytes = STREAM_BOUNDARY, buffer_size: int = BUFFER_SIZE):
+        """Initialize parser.
+
+        Args:
+            boundary: Multipart boundary without the leading dashes
+            buffer_size: Initial buffer size in bytes
+        """
+        self.boundary = b"--" + boundary
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._length: Optional[int] = None
+        self.dropped_bytes = 0
+
+    def reset(self) -> None:
+        """Discard buffered data."""
+        self._start = 0
+        self._end = 0
+        self._length = None
+
+    def writable(self) -> memoryview:
+        """Return free buffer space to receive into.
+
+        Returns:
+            Writable view of at least one byte
+        """
+        if self._end == len(self._buffer):
+            self._compact()
+        return self._view[self._end:]
+
+    def commit(self, size: int) -> List[bytes]:
+        """Account for bytes written into writable() and parse them.
+
+        Args:
+            size: Number of bytes written
+
+        Returns:
+            Complete JPEG frames in arrival order
+        """
+        self._end += size
+        frames = []
+        buf = self._buffer
+        while True:
+            if self._length is None:
+                start = buf.find(self.boundary, self._start, self._end)
+                if start < 0:
+                    # Keep a tail that may hold the start of a boundary
+                    keep = max(self._start, self._end - len(self.boundary) - 2)
+                    self.dropped_bytes += keep - self._start
+                    self._start = keep
+                    break
+                if start - self._start > 2:
+                    # Anything beyond the CRLF before the boundary is junk
+                    self.dropped_bytes += start - self._start
+                header_end = buf.find(_HEADER_END, start, self._end)
+                if header_end < 0:
+                    self._start = start
+                    break
+                length = self._content_length(start, header_end)
+                self._start = header_end + len(_HEADER_END)
+                if length is None or length > MAX_FRAME_SIZE:
+                    continue
+                self._length = length
+            if self._end - self._start < self._length:
+                break
+            body_end = self._start + self._length
+            frames.append(bytes(self._view[self._start:body_end]))
+            self._start = body_end
+            self._length = None
+        if self._start == self._end:
+            self._start = self._end = 0
+        return frames
+
+    def feed(self, data) -> List[bytes]:
+        """Copy received bytes into the buffer and parse them.
+
+        Args:
+            data: Bytes-like object
+
+        Returns:
+            Complete JPEG frames in arrival order
+        """
+        frames = []
+        data = memoryview(data)
+        while data:
+            with self.writable() as space:
+                size = min(len(space), len(data))
+                space[:size] = data[:size]
+            data = data[size:]
+            frames.extend(self.commit(size))
+        return frames
+
+    def _content_length(self, start: int, end: int) -> Optional[int]:
+        """Read Content-Length from the part header between start and end."""
+        lowered = self._buffer[start:end].lower()
+        pos = lowered.find(_CONTENT_LENGTH)
+        if pos < 0:
+            return None
+        pos += len(_CONTENT_LENGTH)
+        eol = lowered.find(b"\r\n", pos)
+        try:
+            return int(lowered[pos:eol if eol >= 0 else len(lowered)])
+        except ValueError:
+            return None
+
+    def _compact(self) -> None:
+        """Make room at the end of a full buffer."""
+        pending = self._end - self._start
+        if self._start:
+            # Move unparsed data to the front
+            self._buffer[:pending] = self._view[self._start:self._end]
+            self._start = 0
+            self._end = pending
+        elif len(self._buffer) >= MAX_FRAME_SIZE + BUFFER_SIZE:
+            # No frame fits: the stream is corrupt, resynchronise
+            self.dropped_bytes += pending
+            self.reset()
+        else:
+            self._view.release()
+            self._buffer.extend(bytes(len(self._buffer)))
+            self._view = memoryview(self._buffer)
+
+
+class CameraStream:
+    """Holds one persistent /stream connection and keeps the newest frames.
+
+    A background thread receives the stream, reconnecting after errors,
+    and pushes each JPEG into a FrameRing. latest() never blocks.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = STREAM_PORT,
+        path: str = STREAM_PATH,
+        ring_size: int = RING_SIZE,
+        timeout: float = 5.0,
+        reconnect_delay: float = 1.0,
+    ):
+        """Initialize camera stream.
+
+        Args:
+            host: Robot IP address
+            port: Stream server port (default 81)
+            path: Stream URL path
+            ring_size: Number of recent frames to keep
+            timeout: Connect and receive timeout in seconds
+            reconnect_delay: Seconds to wait before reconnecting after an error
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.ring = FrameRing(ring_size)
+        self.bytes_received = 0
+        self.reconnects = 0
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def is_running(self) -> bool:
+        """Check if the stream thread is running.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    def start(self) -> None:
+        """Start receiving the stream in a background thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robotapi-camera", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the stream thread and close the connection."""
+        self._running = False
+        sock = self._socket
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.timeout + 1.0)
+        self._thread = None
+        self.ring.wake()
+
+    def latest(self) -> Optional[Frame]:
+        """Return the newest frame without blocking.
+
+        Returns:
+            Newest frame, or None if none has arrived
+        """
+        return self.ring.latest()
+
+    def wait_frame(self, timeout: Optional[float] = None, after: int = -1) -> Optional[Frame]:
+        """Block until a frame newer than after is available.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+            after: Sequence number already seen (-1 for any frame)
+
+        Returns:
+            Newest frame, or None if the timeout expired
+        """
+        return self.ring.wait_newer(after, timeout)
+
+    def _connect(self) -> MjpegParser:
+        """Open the stream and consume the HTTP response header.
+
+        Returns:
+            Parser primed with any body bytes received with the header
+
+        Raises:
+            RobotConnectionError: If the server does not return a stream
+        """
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._socket = sock
+        request = f"GET {self.path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n\r\n"
+        sock.sendall(request.encode("ascii"))
+
+        head = bytearray()
+        while _HEADER_END not in head:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise RobotConnectionError("Camera stream closed")
+            head += chunk
+            if len(head) > 16384:
+                raise RobotConnectionError("Camera stream header too large")
+        header, _, body = bytes(head).partition(_HEADER_END)
+        status = header.split(b"\r\n", 1)[0].split()
+        if len(status) < 2 or status[1] != b"200":
+            raise RobotConnectionError(f"Camera stream failed: {header.splitlines()[0]!r}")
+
+        boundary = STREAM_BOUNDARY
+        for line in header.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-type" and b"boundary=" in value:
+                boundary = value.split(b"boundary=", 1)[1].strip().strip(b'"')
+                if boundary.startswith(b"--"):
+                    boundary = boundary[2:]
+        parser = MjpegParser(boundary)
+        self._push(parser.feed(body))
+        return parser
+
+    def _push(self, frames: List[bytes]) -> None:
+        """Add parsed frames to the ring."""
+        now = time.monotonic()
+        for data in frames:
+            self.ring.push(Frame(data, now, self.ring.count))
+
+    def _run(self) -> None:
+        """Stream thread main loop."""
+        while self._running:
+            try:
+                parser = self._connect()
+                sock = self._socket
+                while self._running:
+                    size = sock.recv_into(parser.writable())
+                    if not size:
+                        raise RobotConnectionError("Camera stream closed")
+                    self.bytes_received += size
+                    self._push(parser.commit(size))
+            except (OSError, RobotConnectionError) as e:
+                if self._running:
+                    logger.warning("Camera stream error: %s", e)
+            finally:
+                if self._socket:
+                    try:
+                        self._socket.close()
+                    except OSError:
+                        pass
+                    self._socket = None
+            if self._running:
+                self.reconnects += 1
+                time.sleep(self.reconnect_delay)
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
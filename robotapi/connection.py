@@ -1,51 +1,74 @@
-"""TCP connection management for robot communication."""
+"""Connection management for robot communication."""
 
-import socket
+import threading
 import time
-from typing import Optional
+from collections import deque
+from time import perf_counter_ns
+from typing import Deque, List, Optional
+from robotapi.framing import FrameDecoder
+from robotapi.metrics import LinkMetrics
+from robotapi.tracing import TRACER
+from robotapi.recorder import RECEIVED, SENT, TrafficRecorder
+from robotapi.transport import TCPTransport, Transport
 from robotapi.exceptions import RobotConnectionError
 
 
 class Connection:
-    """Manages TCP socket connection to robot."""
+    """Manages the connection to a robot, framing messages over a transport."""
 
-    def __init__(self, ip: str, port: int = 100):
+    def __init__(
+        self,
+        ip: str,
+        port: int = 100,
+        metrics: Optional[LinkMetrics] = None,
+        transport: Optional[Transport] = None,
+        recorder: Optional[TrafficRecorder] = None,
+    ):
         """Initialize connection.
         
         Args:
             ip: Robot IP address
             port: TCP port (default 100)
+            metrics: Metrics to count traffic and reconnects in (a private
+                     set by default)
+            transport: Byte stream to use instead of TCP to ip:port, e.g. a
+                       SerialTransport or SocketPairTransport
+            recorder: Log to append all traffic to (see TrafficRecorder)
         """
         self.ip = ip
         self.port = port
-        self._socket: Optional[socket.socket] = None
-        self._buffer = ""
+        self.metrics = metrics if metrics is not None else LinkMetrics()
+        self.transport = transport if transport is not None else TCPTransport(ip, port)
+        self.recorder = recorder
+        self._connected = False
+        self._decoder = FrameDecoder()
+        self._pending: Deque[str] = deque()
+        self._send_lock = threading.Lock()
 
     def connect(self) -> None:
-        """Establish TCP connection to robot.
+        """Establish connection to robot.
         
         Raises:
             RobotConnectionError: If connection fails
         """
         try:
-            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self._socket.connect((self.ip, self.port))
-            self._socket.settimeout(0.1)
-            self._buffer = ""
-        except (socket.error, OSError) as e:
-            self._socket = None
-            raise RobotConnectionError(f"Failed to connect to {self.ip}:{self.port}: {e}")
+            self.transport.open()
+        except OSError as e:
+            raise RobotConnectionError(f"Failed to connect to {self.transport}: {e}")
+        self._reset_buffer()
+        self._connected = True
+        self.metrics.connected()
 
     def disconnect(self) -> None:
-        """Close TCP connection."""
-        if self._socket:
+        """Close connection."""
+        if self._connected:
+            self._connected = False
             try:
-                self._socket.close()
-            except (socket.error, OSError):
+                self.transport.close()
+            except OSError:
                 pass
             finally:
-                self._socket = None
-                self._buffer = ""
+                self._reset_buffer()
 
     def is_connected(self) -> bool:
         """Check if connection is active.
@@ -53,7 +76,7 @@ class Connection:
         Returns:
             True if connected, False otherwise
         """
-        return self._socket is not None
+        return self._connected
 
     def send(self, data: bytes) -> None:
         """Send data to robot.
@@ -64,14 +87,23 @@ class Connection:
         Raises:
             RobotConnectionError: If not connected or send fails
         """
-        if not self._socket:
+        if not self._connected:
             raise RobotConnectionError("Not connected")
 
+        start = perf_counter_ns() if TRACER.enabled else 0
         try:
-            self._socket.sendall(data)
-        except (socket.error, OSError, BrokenPipeError, ConnectionResetError) as e:
+            with self._send_lock:
+                self.transport.send(data)
+        except OSError as e:
+            self.metrics.connections_lost.inc()
             self.disconnect()
             raise RobotConnectionError(f"Send failed: {e}")
+        if self.recorder is not None:
+            self.recorder.record(SENT, data)
+        self.metrics.bytes_sent.inc(len(data))
+        self.metrics.messages_sent.inc()
+        if start:
+            TRACER.record("Connection.send", "io", start, {"bytes": len(data)})
 
     def receive(self, timeout: float = 0.1) -> Optional[str]:
         """Receive data from robot with message buffering.
@@ -85,35 +117,88 @@ class Connection:
         Raises:
             RobotConnectionError: If not connected or receive fails
         """
-        if not self._socket:
-            raise RobotConnectionError("Not connected")
+        if not self._pending:
+            self._read(timeout)
+        return self._pending.popleft() if self._pending else None
 
-        try:
-            self._socket.settimeout(timeout)
-            data = self._socket.recv(1024)
-            
-            if not data:
-                # Connection closed
-                self.disconnect()
-                raise RobotConnectionError("Connection closed by robot")
-            
-            # Add to buffer
-            self._buffer += data.decode("utf-8")
+    def receive_all(self, timeout: float = 0.1) -> List[str]:
+        """Receive every complete message available after one read.
+        
+        Args:
+            timeout: Receive timeout in seconds
             
-            # Check for complete message (ends with })
-            if "}" in self._buffer:
-                end_pos = self._buffer.find("}")
-                message = self._buffer[:end_pos + 1]
-                self._buffer = self._buffer[end_pos + 1:]
-                return message
+        Returns:
+            Complete messages in arrival order (empty if none arrived)
             
-            return None
+        Raises:
+            RobotConnectionError: If not connected or receive fails
+        """
+        if not self._pending:
+            self._read(timeout)
+        messages = list(self._pending)
+        self._pending.clear()
+        return messages
+
+    def readable(self, timeout: float = 0.0) -> bool:
+        """Wait until a message can be received without blocking.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
             
-        except socket.timeout:
-            return None
-        except (socket.error, OSError, ConnectionResetError, BrokenPipeError) as e:
+        Returns:
+            True if a complete message is queued or data has arrived,
+            False on timeout or if not connected
+        """
+        if self._pending:
+            return True
+        if not self._connected:
+            return False
+        try:
+            return self.transport.readable(timeout)
+        except (OSError, ValueError, TypeError):
+            # Closed meanwhile, or an object without a real descriptor
+            return False
+
+    def _read(self, timeout: float) -> None:
+        """Read once from the transport and queue any completed messages.
+        
+        Raises:
+            RobotConnectionError: If not connected or receive fails
+        """
+        if not self._connected:
+            raise RobotConnectionError("Not connected")
+
+        start = perf_counter_ns() if TRACER.enabled else 0
+        try:
+            data = self.transport.recv(timeout)
+        except OSError as e:
+            self.metrics.connections_lost.inc()
             self.disconnect()
             raise RobotConnectionError(f"Receive failed: {e}")
+        if data is None:
+            if start:
+                TRACER.record("Connection.receive", "io", start, {"bytes": 0})
+            return
+
+        if not data:
+            # Connection closed
+            self.metrics.connections_lost.inc()
+            self.disconnect()
+            raise RobotConnectionError("Connection closed by robot")
+
+        if self.recorder is not None:
+            self.recorder.record(RECEIVED, data)
+        frames = self._decoder.feed(data)
+        self.metrics.bytes_received.inc(len(data))
+        self.metrics.messages_received.inc(len(frames))
+        self._pending.extend(frames)
+        if start:
+            TRACER.record("Connection.receive", "io", start, {"bytes": len(data), "frames": len(frames)})
+
+    def _reset_buffer(self) -> None:
+        """Discard partially received and undelivered messages."""
+        self._decoder.reset()
+        self._pending.clear()
 
     def __enter__(self):
         """Context manager entry."""
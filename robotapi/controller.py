@@ -2,15 +2,39 @@
 
 import time
 import threading
-from typing import Optional, Callable
+from contextlib import contextmanager
+from time import perf_counter_ns
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Iterable, Optional, Callable, Tuple
 from robotapi.connection import Connection
+from robotapi.recorder import TrafficRecorder
+from robotapi.transport import Transport
+from robotapi.metrics import LinkMetrics, MetricsRegistry
+from robotapi.tracing import TRACER, traced
+from robotapi.reactor import Reactor
+from robotapi.keepalive import PROBE_INTERVAL, HeartbeatResponder
+from robotapi.motion import TIMED_MOVE_GRACE, Motion
+from robotapi.camera import CameraStream, RING_SIZE, STREAM_PORT
+from robotapi.pipeline import CommandFuture, CommandPipeline
+from robotapi.sampler import OBSTACLE_RATE, ObstacleSampler
+from robotapi.sensors import DistanceFilter
+from robotapi.telemetry import TelemetryScheduler
+from robotapi.pacing import TokenBucket, uart_bucket
+from robotapi.scheduler import CommandScheduler, command_channel
+from robotapi.servo import CameraPose, servo_commands
+from robotapi.scan import SCAN_ANGLES, PolarProfile, query_delay, sweep_order
+from robotapi.messages import BoolReply, Heartbeat, Message, decode_frame
 from robotapi.protocol import (
-    build_movement_cmd,
+    build_distance_cmd,
+    build_ground_cmd,
+    build_joystick_cmd,
+    build_led_cmd,
+    build_motor_speeds_cmd,
     build_obstacle_cmd,
-    build_camera_cmd,
-    build_stop_cmd,
+    build_timed_movement_cmd,
+    encode_camera,
     encode_command,
-    parse_response,
+    encode_movement,
     DIR_FORWARD,
     DIR_BACKWARD,
     DIR_LEFT,
@@ -20,147 +44,622 @@ from robotapi.protocol import (
     CAM_TILT_UP,
     CAM_TILT_DOWN,
     CAM_CENTER,
+    CMD_CAMERA,
+    CMD_MOVEMENT,
+    CMD_STOP,
+    JOYSTICK_STOP,
+    STOP_COMMAND,
+    CommandByteCounter,
 )
-from robotapi.exceptions import RobotConnectionError, ObstacleDetectedError
+from robotapi.exceptions import CommandError, RobotConnectionError, ObstacleDetectedError
+
+# Longest a polled wait holds the connection before letting other callers in
+POLL_SLICE = 0.1
 
 
 class HeartbeatMonitor:
     """Monitors heartbeat and handles responses during operations."""
 
-    def __init__(self, connection: Connection):
+    def __init__(
+        self,
+        connection: Connection,
+        reactor: Optional[Reactor] = None,
+        pipeline: Optional[CommandPipeline] = None,
+        metrics: Optional[LinkMetrics] = None,
+    ):
         """Initialize heartbeat monitor.
         
         Args:
             connection: Active connection to robot
+            reactor: Optional running reactor. When given, heartbeats are answered
+                     from the reactor thread and waits block on events instead of
+                     polling the connection.
+            pipeline: Optional command pipeline whose futures are resolved from
+                      replies before callbacks see them
+            metrics: Optional metrics to time heartbeats in
         """
         self.connection = connection
+        self.reactor = reactor
+        self.pipeline = pipeline
+        self.metrics = metrics
         self._lock = threading.Lock()
+        # Callers currently reading the connection (see reading())
+        self._readers = 0
+        self._readers_lock = threading.Lock()
+        # Callbacks of polled waits, called with every response any caller reads
+        self._watchers: Tuple[Callable[[Message], None], ...] = ()
         self._running = False
+        if reactor is not None:
+            reactor.subscribe(self._on_response)
+
+    def _on_response(self, response: Message) -> None:
+        """Answer heartbeats and resolve replies as soon as they arrive."""
+        if isinstance(response, Heartbeat):
+            self.connection.send(b"{Heartbeat}")
+            if self.metrics is not None:
+                self.metrics.heartbeat(response.timestamp)
+                self.metrics.heartbeat_answered(time.monotonic() - response.timestamp)
+        elif self.pipeline is not None:
+            self.pipeline.resolve(response)
+
+    def _handle(self, response: Message) -> None:
+        """Handle a response read without a reactor and pass it to watchers."""
+        self._on_response(response)
+        for watcher in self._watchers:
+            watcher(response)
+
+    def _watch(self, watcher: Callable[[Message], None]) -> None:
+        """Register a callback for every response read while polling."""
+        with self._readers_lock:
+            self._watchers = self._watchers + (watcher,)
+
+    def _unwatch(self, watcher: Callable[[Message], None]) -> None:
+        """Remove a callback registered with _watch()."""
+        with self._readers_lock:
+            self._watchers = tuple(w for w in self._watchers if w is not watcher)
+
+    def poll(
+        self, timeout: float = 0.1, done: Optional[Callable[[], bool]] = None
+    ) -> Optional[Message]:
+        """Receive and handle one response without a reactor.
+
+        Callers in several threads take turns reading; whichever reads a
+        response answers it, resolves its future and passes it to every
+        waiting wait_for_duration().
+
+        Args:
+            timeout: Longest wait in seconds, including any wait for
+                     another caller to finish reading
+            done: Optional check made once the connection is free; if it
+                  returns True nothing is received. Lets a waiter notice a
+                  reply that another reader handled while it was queued.
+
+        Returns:
+            Decoded message, or None if nothing arrived
+        """
+        start = time.monotonic()
+        if not self._lock.acquire(timeout=timeout):
+            return None
+        try:
+            if done is not None and done():
+                return None
+            remaining = max(0.001, timeout - (time.monotonic() - start))
+            message = self.connection.receive(timeout=remaining)
+        finally:
+            self._lock.release()
+        if not message:
+            return None
+        response = decode_frame(message)
+        if response is not None:
+            self._handle(response)
+        return response
+
+    @contextmanager
+    def reading(self):
+        """Mark the calling thread as polling the connection.
+
+        While any caller is waiting in a polled loop, service() leaves the
+        connection to it: the caller answers heartbeats itself and sees
+        every reply in order.
+        """
+        with self._readers_lock:
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._readers_lock:
+                self._readers -= 1
+
+    def service(self) -> int:
+        """Handle whatever has arrived, unless a caller is reading.
+
+        Used by HeartbeatResponder once Connection.readable() reports data.
+
+        Returns:
+            Number of messages handled, or -1 if a caller is polling the
+            connection and was left to handle them
+
+        Raises:
+            RobotConnectionError: If the connection failed
+        """
+        if self._readers or not self._lock.acquire(blocking=False):
+            return -1
+        try:
+            messages = self.connection.receive_all(timeout=0.001)
+        finally:
+            self._lock.release()
+        now = time.monotonic()
+        for message in messages:
+            response = decode_frame(message, now)
+            if response is not None:
+                self._handle(response)
+        return len(messages)
+
+    def close(self) -> None:
+        """Detach from the reactor."""
+        if self.reactor is not None:
+            self.reactor.unsubscribe(self._on_response)
 
     def wait_for_duration(
-        self, duration: float, callback: Optional[Callable[[dict], bool]] = None
+        self,
+        duration: float,
+        callback: Optional[Callable[[Message], bool]] = None,
+        wake: Optional[threading.Event] = None,
     ) -> bool:
         """Wait for specified duration while handling heartbeats.
         
+        Several threads may wait at once; the callback sees every response,
+        whichever thread reads it.
+        
         Args:
             duration: Duration in seconds
-            callback: Optional callback for processing responses.
+            callback: Optional callback for processing decoded messages.
                      Should return False to stop early, True to continue.
+            wake: Optional event that ends the wait early when set from
+                  another thread; it is also set when the callback stops
+                  the wait
         
         Returns:
             True if duration completed, False if stopped early by callback
+            or wake
         """
-        count = int(duration * 10)  # 100ms intervals
+        if self.reactor is not None and self.reactor.is_running():
+            stop = (lambda response: not callback(response)) if callback else (lambda _: False)
+            with TRACER.span("HeartbeatMonitor.wait_for_duration", "wait"):
+                matched = self.reactor.wait_for(stop, timeout=duration, wake=wake)
+            return matched is None and not (wake is not None and wake.is_set())
+
+        # Poll until the deadline, in slices so other waiting threads get
+        # turns; time spent handling messages never stretches the wait
+        deadline = time.monotonic() + duration
+        stopped = wake if wake is not None else threading.Event()
         
-        for _ in range(count):
-            try:
-                with self._lock:
-                    message = self.connection.receive(timeout=0.1)
-                    
-                    if message:
-                        response = parse_response(message)
-                        
-                        if response and response.get("type") == "heartbeat":
-                            # Respond to heartbeat
-                            self.connection.send(b"{Heartbeat}")
-                        
-                        # Call callback if provided
-                        if callback and response:
-                            if not callback(response):
-                                return False
-                                
-            except RobotConnectionError:
-                raise
-            
-            time.sleep(0.1)
+        def watch(response: Message) -> None:
+            if callback and not stopped.is_set() and not callback(response):
+                stopped.set()
         
-        return True
+        self._watch(watch)
+        try:
+            with self.reading():
+                while not stopped.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return True
+                    
+                    start = perf_counter_ns() if TRACER.enabled else 0
+                    self.poll(timeout=min(remaining, POLL_SLICE), done=stopped.is_set)
+                    if start:
+                        TRACER.record("HeartbeatMonitor.wait_for_duration", "wait", start)
+                return False
+        finally:
+            self._unwatch(watch)
 
 
 class RobotController:
     """Main robot control interface."""
 
-    def __init__(self, ip: str, port: int = 100):
+    def __init__(
+        self,
+        ip: str,
+        port: int = 100,
+        reactor: bool = False,
+        timed_moves: bool = False,
+        camera_port: int = STREAM_PORT,
+        obstacle_rate: float = OBSTACLE_RATE,
+        pace_commands: bool = False,
+        keepalive: bool = True,
+        transport: Optional[Transport] = None,
+        recorder: Optional[TrafficRecorder] = None,
+        probe_interval: Optional[float] = None,
+    ):
         """Initialize robot controller.
         
         Args:
             ip: Robot IP address
             port: TCP port (default 100)
+            reactor: Run a background reader thread that dispatches responses
+                     as they arrive instead of polling during movements
+            timed_moves: Send movements as firmware-timed commands (N=2) so the
+                         robot itself stops the car when the duration is up
+            camera_port: Port of the camera's MJPEG stream server (default 81)
+            obstacle_rate: Obstacle queries per second during forward(),
+                           capped to fit the robot's 9600-baud serial link
+            pace_commands: Queue commands and release them at the serial
+                           link's byte rate, keeping only the newest drive,
+                           servo and LED command (see CommandScheduler)
+            keepalive: Start a background thread on connect() that answers
+                       heartbeats while no call is polling, so an idle
+                       controller is not dropped (see HeartbeatResponder).
+                       With a reactor, which answers them itself, the thread
+                       is only started to send probes.
+            transport: Byte stream to the firmware instead of TCP to ip:port,
+                       e.g. SerialTransport for a tethered Arduino (see
+                       robotapi.transport)
+            recorder: Log to append every chunk sent and received to, for
+                      replay with ReplayTransport (see robotapi.recorder)
+            probe_interval: Seconds between ground queries (N=23) the
+                            keepalive thread sends to measure the link's
+                            round trip; None (the default) sends none
         """
         self.ip = ip
         self.port = port
-        self._connection = Connection(ip, port)
+        self.timed_moves = timed_moves
+        self.camera_port = camera_port
+        self.obstacle_rate = obstacle_rate
+        self.pace_commands = pace_commands
+        self.keepalive = keepalive
+        self.probe_interval = probe_interval
+        self.heartbeat_responder: Optional[HeartbeatResponder] = None
+        self.scheduler: Optional[CommandScheduler] = None
+        self._camera: Optional[CameraStream] = None
+        self._telemetry: Optional[TelemetryScheduler] = None
+        # Traffic, heartbeat, round-trip and obstacle metrics for this robot
+        self.metrics = LinkMetrics(MetricsRegistry({"robot": f"{ip}:{port}"}))
+        self._connection = Connection(ip, port, self.metrics, transport, recorder)
+        self._use_reactor = reactor
+        self._reactor: Optional[Reactor] = None
         self._heartbeat: Optional[HeartbeatMonitor] = None
+        self._pipeline = CommandPipeline(metrics=self.metrics)
+        self.command_bytes = CommandByteCounter()
+        self.distance = DistanceFilter()
+        self.camera_pose = CameraPose()
+        self._distance_query: Optional[CommandFuture] = None
+        # Last query fed to the filter, so its reply is only counted once
+        self._distance_fed: Optional[CommandFuture] = None
+        self._distance_fed_lock = threading.Lock()
+        # Channel locks: drive commands, camera servos and distance queries
+        # each serialize among themselves but proceed concurrently
+        self._distance_lock = threading.Lock()
+        self._drive_lock = threading.Lock()
+        self._camera_lock = threading.RLock()
+        self._motion: Optional[Motion] = None
         self._moving = False
         self._obstacle_detected = False
 
+    @traced()
     def connect(self) -> None:
         """Establish connection to robot."""
         self._connection.connect()
-        self._heartbeat = HeartbeatMonitor(self._connection)
+        self.camera_pose.forget()
+        if self._use_reactor:
+            self._reactor = Reactor(self._connection)
+            self._reactor.start()
+        self._heartbeat = HeartbeatMonitor(
+            self._connection, self._reactor, self._pipeline, self.metrics
+        )
+        if self.pace_commands:
+            self.scheduler = CommandScheduler(self._connection.send, uart_bucket())
+            self.scheduler.start()
+        probing = self.probe_interval is not None
+        if self.keepalive and (self._reactor is None or probing):
+            self.heartbeat_responder = HeartbeatResponder(
+                self._connection,
+                self._heartbeat.service,
+                self.metrics,
+                probe=(lambda: self.request(build_ground_cmd())) if probing else None,
+                probe_interval=self.probe_interval if probing else PROBE_INTERVAL,
+                read=self._reactor is None,
+            )
+            self.heartbeat_responder.start()
 
+    @traced()
     def disconnect(self) -> None:
         """Close connection to robot."""
+        self.stop_camera()
+        self.stop_telemetry()
         if self._moving:
             self.stop()
+        if self.heartbeat_responder:
+            self.heartbeat_responder.stop()
+            self.heartbeat_responder = None
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        if self._heartbeat:
+            self._heartbeat.close()
+        if self._reactor:
+            self._reactor.stop()
+            self._reactor = None
         self._connection.disconnect()
         self._heartbeat = None
+        self._pipeline.fail_all(RobotConnectionError("Disconnected"))
 
     def is_connected(self) -> bool:
         """Check if connected to robot."""
         return self._connection.is_connected()
 
-    def _send_command(self, cmd: dict) -> None:
+    def _send_command(self, cmd: dict, on_drop: Optional[Callable[[], None]] = None) -> None:
         """Send command to robot."""
+        self._send_encoded(cmd.get("N"), encode_command(cmd), command_channel(cmd), on_drop)
+
+    def _send_encoded(
+        self,
+        command: int,
+        data: bytes,
+        channel: Any = None,
+        on_drop: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Send pre-encoded command bytes to robot and account for them.
+
+        With pace_commands the bytes are queued on the scheduler instead;
+        channel and on_drop are passed to CommandScheduler.submit().
+        """
         if not self.is_connected():
             raise RobotConnectionError("Not connected")
-        self._connection.send(encode_command(cmd))
+        start = perf_counter_ns() if TRACER.enabled else 0
+        if self.scheduler is not None:
+            self.scheduler.submit(command, data, channel, on_drop)
+        else:
+            self._connection.send(data)
+        self.command_bytes.record(command, data)
+        if start:
+            TRACER.record("command", "controller", start, {"N": command})
+
+    @traced()
+    def request(self, cmd: Dict[str, Any]) -> CommandFuture:
+        """Send a command tagged with a fresh serial number.
+
+        Several requests may be in flight at once; each returned future is
+        resolved by the reply echoing its serial number.
 
+        Args:
+            cmd: Command dictionary from one of the protocol builders
+
+        Returns:
+            Future resolved with the reply value (True/False, an int or "ok")
+
+        Raises:
+            RobotConnectionError: If not connected or send fails
+            CommandError: If the command has no serial reply or too many
+                          commands are in flight
+        """
+        if not self.is_connected():
+            raise RobotConnectionError("Not connected")
+        tagged, future = self._pipeline.prepare(cmd)
+
+        def superseded() -> None:
+            self._pipeline.discard(future)
+            if not future.done():
+                future.set_exception(CommandError(f"Command {cmd.get('N')} superseded before sending"))
+
+        try:
+            self._send_command(tagged, superseded)
+        except RobotConnectionError:
+            self._pipeline.discard(future)
+            raise
+        return future
+
+    @traced()
+    def wait_reply(self, future: CommandFuture, timeout: float = 1.0) -> Any:
+        """Wait for the reply to a request.
+
+        Without a reactor the connection is polled (and heartbeats answered)
+        until the reply arrives.
+
+        Args:
+            future: Future returned by request()
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            Reply value
+
+        Raises:
+            CommandError: If no reply arrived in time
+            RobotConnectionError: If the connection failed while waiting
+        """
+        heartbeat = self._heartbeat
+        if heartbeat is not None and (self._reactor is None or not self._reactor.is_running()):
+            deadline = time.monotonic() + timeout
+            with heartbeat.reading():
+                while not future.done():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    heartbeat.poll(timeout=min(remaining, 0.1), done=future.done)
+        try:
+            return future.result(timeout=0 if future.done() else timeout)
+        except FutureTimeoutError:
+            self.metrics.reply_timeouts.inc()
+            raise CommandError(f"No reply to serial {future.serial} within {timeout}s")
+
+    @traced()
     def stop(self) -> None:
-        """Emergency stop - halt all movement."""
+        """Emergency stop - halt all movement.
+        
+        A movement started with start_forward() and friends ends with
+        result False.
+        """
+        self._halt()
+        with self._drive_lock:
+            motion, self._motion = self._motion, None
+        if motion is not None:
+            motion.interrupt()
+
+    def _halt(self) -> None:
+        """Send stop without ending the current movement's wait."""
         if self.is_connected():
-            self._send_command(build_stop_cmd())
+            self._send_encoded(CMD_STOP, STOP_COMMAND)
             self._moving = False
 
-    def forward(self, duration: float, speed: int = 50) -> bool:
-        """Move forward with obstacle detection.
+    def _drive(
+        self,
+        direction: int,
+        duration: float,
+        speed: int,
+        callback: Optional[Callable[[Message], bool]] = None,
+        sampler: Optional[ObstacleSampler] = None,
+    ) -> bool:
+        """Drive in a direction until the duration elapses.
         
         Args:
+            direction: Movement direction
             duration: Duration in seconds
             speed: Speed (0-100)
+            callback: Optional message callback; return False to stop early
+            sampler: Optional obstacle sampler to run once the car is moving
             
         Returns:
-            True if completed, False if obstacle detected
+            True if the duration completed, False if stopped by callback
             
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        motion = Motion(direction, duration, speed)
+        self._begin_drive(motion, sampler)
+        return self._wait_drive(motion, callback, sampler)
+
+    def _begin_drive(self, motion: Motion, sampler: Optional[ObstacleSampler] = None) -> None:
+        """Send a movement's drive command and make it the current movement.
+        
+        A movement still running is superseded: its wait ends without
+        stopping the car.
+        
         Raises:
             RobotConnectionError: If not connected
         """
         if not self.is_connected():
             raise RobotConnectionError("Not connected")
-        
+        with self._drive_lock:
+            previous, self._motion = self._motion, motion
+        if previous is not None:
+            previous.interrupt()
         self._moving = True
-        self._obstacle_detected = False
+        motion.started_at = time.monotonic()
+        try:
+            if self.timed_moves:
+                # The firmware times the move and replies when it has stopped
+                motion.reply = self.request(
+                    build_timed_movement_cmd(motion.direction, motion.speed, motion.duration)
+                )
+            else:
+                self._send_encoded(CMD_MOVEMENT, encode_movement(motion.direction, motion.speed))
+        except RobotConnectionError:
+            with self._drive_lock:
+                if self._motion is motion:
+                    self._motion = None
+            raise
+        if sampler:
+            sampler.start()
+
+    def _wait_drive(
+        self,
+        motion: Motion,
+        callback: Optional[Callable[[Message], bool]] = None,
+        sampler: Optional[ObstacleSampler] = None,
+    ) -> bool:
+        """Wait for a movement begun by _begin_drive(), then stop the car.
         
-        # Start forward movement
-        self._send_command(build_movement_cmd(DIR_FORWARD, speed))
+        The car is not stopped if a newer movement has superseded this one.
         
-        def check_obstacle(response: dict) -> bool:
-            if response.get("type") == "heartbeat":
-                # Check for obstacles on each heartbeat
-                self._send_command(build_obstacle_cmd())
-            elif response.get("type") == "obstacle":
-                if response.get("detected"):
-                    self._obstacle_detected = True
+        Returns:
+            True if the duration completed, False if stopped early
+        """
+        try:
+            heartbeat = self._heartbeat
+            if heartbeat is None:
+                raise RobotConnectionError("Not connected")
+            move = motion.reply
+            if move is None:
+                completed = heartbeat.wait_for_duration(motion.duration, callback, motion.wake)
+            else:
+                stopped = []
+                
+                def until_done(response: Message) -> bool:
+                    if callback and not callback(response):
+                        stopped.append(True)
+                        return False
+                    return not move.done()
+                
+                heartbeat.wait_for_duration(motion.duration + TIMED_MOVE_GRACE, until_done, motion.wake)
+                completed = not stopped
+            return completed and not motion.interrupted
+        finally:
+            if sampler:
+                sampler.stop()
+            with self._drive_lock:
+                current = self._motion is motion
+                if current:
+                    self._motion = None
+            if current:
+                self._halt()
+
+    def _obstacle_guard(self, motion: Motion) -> Tuple[Callable[[Message], bool], ObstacleSampler]:
+        """Return the wait callback and sampler stopping a movement at an obstacle."""
+        self._obstacle_detected = False
+        
+        def on_obstacle() -> None:
+            # Runs in the thread that decoded the reply: stop the car now
+            # rather than when the wait loop next looks at the flag
+            motion.obstacle = self._obstacle_detected = True
+            self.metrics.obstacles_detected.inc()
+            if self._motion is motion:
+                self._halt()
+
+        def check_obstacle(response: Message) -> bool:
+            if motion.obstacle:
+                return False  # Stop early
+            if isinstance(response, BoolReply) and response.serial is None:
+                # Bridges that do not echo serial numbers send a bare token
+                if response.value:
+                    motion.obstacle = self._obstacle_detected = True
                     return False  # Stop early
             return True
         
-        try:
-            completed = self._heartbeat.wait_for_duration(duration, check_obstacle)
-        finally:
-            self.stop()
+        sampler = ObstacleSampler(
+            self._query_obstacle,
+            on_obstacle,
+            self.obstacle_rate,
+            discard=self._pipeline.discard,
+        )
+        return check_obstacle, sampler
+
+    @traced()
+    def forward(self, duration: float, speed: int = 50) -> bool:
+        """Move forward with obstacle detection.
         
-        return completed and not self._obstacle_detected
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+            
+        Returns:
+            True if completed, False if obstacle detected
+            
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        motion = Motion(DIR_FORWARD, duration, speed)
+        check_obstacle, sampler = self._obstacle_guard(motion)
+        self._begin_drive(motion, sampler)
+        completed = self._wait_drive(motion, check_obstacle, sampler)
+        return completed and not motion.obstacle
 
+    def _query_obstacle(self) -> CommandFuture:
+        """Send one obstacle query (N=21 D1=1)."""
+        future = self.request(build_obstacle_cmd())
+        self.metrics.obstacle_queries.inc()
+        return future
+
+    @traced()
     def backward(self, duration: float, speed: int = 50) -> bool:
         """Move backward.
         
@@ -171,19 +670,10 @@ class RobotController:
         Returns:
             True when completed
         """
-        if not self.is_connected():
-            raise RobotConnectionError("Not connected")
-        
-        self._moving = True
-        self._send_command(build_movement_cmd(DIR_BACKWARD, speed))
-        
-        try:
-            self._heartbeat.wait_for_duration(duration)
-        finally:
-            self.stop()
-        
+        self._drive(DIR_BACKWARD, duration, speed)
         return True
 
+    @traced()
     def rotate_left(self, duration: float, speed: int = 50) -> bool:
         """Rotate left.
         
@@ -194,19 +684,10 @@ class RobotController:
         Returns:
             True when completed
         """
-        if not self.is_connected():
-            raise RobotConnectionError("Not connected")
-        
-        self._moving = True
-        self._send_command(build_movement_cmd(DIR_LEFT, speed))
-        
-        try:
-            self._heartbeat.wait_for_duration(duration)
-        finally:
-            self.stop()
-        
+        self._drive(DIR_LEFT, duration, speed)
         return True
 
+    @traced()
     def rotate_right(self, duration: float, speed: int = 50) -> bool:
         """Rotate right.
         
@@ -217,18 +698,108 @@ class RobotController:
         Returns:
             True when completed
         """
-        if not self.is_connected():
-            raise RobotConnectionError("Not connected")
+        self._drive(DIR_RIGHT, duration, speed)
+        return True
+
+    @traced()
+    def start_forward(self, duration: float, speed: int = 50) -> Motion:
+        """Start moving forward with obstacle detection and return at once.
         
-        self._moving = True
-        self._send_command(build_movement_cmd(DIR_RIGHT, speed))
+        The movement is waited on by a background thread, so the caller can
+        pan the camera, query sensors or react to what it sees meanwhile.
+        Starting another movement supersedes this one.
         
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+            
+        Returns:
+            Motion resolved with True if the duration completed, or False
+            if stopped early (motion.obstacle is True for an obstacle);
+            motion.cancel() stops the car
+            
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        motion = Motion(DIR_FORWARD, duration, speed, self._cancel_motion)
+        check_obstacle, sampler = self._obstacle_guard(motion)
+        return self._start_drive(motion, check_obstacle, sampler)
+
+    @traced()
+    def start_backward(self, duration: float, speed: int = 50) -> Motion:
+        """Start moving backward and return at once (see start_forward).
+        
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+            
+        Returns:
+            Motion resolved when the car has stopped
+        """
+        return self._start_drive(Motion(DIR_BACKWARD, duration, speed, self._cancel_motion))
+
+    @traced()
+    def start_rotate_left(self, duration: float, speed: int = 50) -> Motion:
+        """Start rotating left and return at once (see start_forward).
+        
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+            
+        Returns:
+            Motion resolved when the car has stopped
+        """
+        return self._start_drive(Motion(DIR_LEFT, duration, speed, self._cancel_motion))
+
+    @traced()
+    def start_rotate_right(self, duration: float, speed: int = 50) -> Motion:
+        """Start rotating right and return at once (see start_forward).
+        
+        Args:
+            duration: Duration in seconds
+            speed: Speed (0-100)
+            
+        Returns:
+            Motion resolved when the car has stopped
+        """
+        return self._start_drive(Motion(DIR_RIGHT, duration, speed, self._cancel_motion))
+
+    def _start_drive(
+        self,
+        motion: Motion,
+        callback: Optional[Callable[[Message], bool]] = None,
+        sampler: Optional[ObstacleSampler] = None,
+    ) -> Motion:
+        """Send a movement's drive command and wait for it on a new thread."""
+        self._begin_drive(motion, sampler)
+        threading.Thread(
+            target=self._run_motion,
+            args=(motion, callback, sampler),
+            name="robotapi-motion",
+            daemon=True,
+        ).start()
+        return motion
+
+    def _run_motion(
+        self,
+        motion: Motion,
+        callback: Optional[Callable[[Message], bool]],
+        sampler: Optional[ObstacleSampler],
+    ) -> None:
+        """Motion thread: wait for a movement and resolve its future."""
         try:
-            self._heartbeat.wait_for_duration(duration)
-        finally:
+            completed = self._wait_drive(motion, callback, sampler)
+        except Exception as e:
+            motion.fail(e)
+        else:
+            motion.finish(completed and not motion.obstacle)
+
+    def _cancel_motion(self, motion: Motion) -> None:
+        """Stop the car for a cancelled movement that is still current."""
+        with self._drive_lock:
+            current = self._motion is motion
+        if current:
             self.stop()
-        
-        return True
 
     def detect_obstacle(self) -> bool:
         """Check for obstacles.
@@ -240,14 +811,103 @@ class RobotController:
         self._obstacle_detected = False
         return result
 
-    def get_distance(self) -> float:
+    @traced()
+    def get_distance(self, max_age: Optional[float] = None, timeout: float = 1.0) -> float:
         """Get distance to nearest obstacle.
         
+        Readings are median filtered and cached: a call within max_age of
+        the last measurement returns the cached value without a round trip,
+        and concurrent callers share one in-flight query.
+        
+        Args:
+            max_age: Seconds a cached reading may be old (defaults to
+                     distance.freshness)
+            timeout: Maximum time to wait for a new measurement in seconds
+        
         Returns:
-            Distance in cm (placeholder - not implemented in protocol)
+            Distance in cm
+        
+        Raises:
+            RobotConnectionError: If not connected
+            CommandError: If no valid measurement arrived in time
         """
-        # Not implemented in current robot protocol
-        return 0.0
+        reading = self.distance.latest(max_age)
+        if reading is not None:
+            return reading.value
+        
+        with self._distance_lock:
+            query = self._distance_query
+            if query is None or query.done():
+                query = self.request(build_distance_cmd())
+                query.add_done_callback(self._on_distance)
+                self._distance_query = query
+        value = self.wait_reply(query, timeout)
+        # Waiters can wake before done callbacks run; feeding twice is a no-op
+        self._on_distance(query)
+        reading = self.distance.latest(float("inf"))
+        if reading is None or reading.timestamp < query.replied_at:
+            raise CommandError(f"Invalid distance reading: {value!r}")
+        return reading.value
+
+    @traced()
+    def scan(self, angles: Iterable[float] = SCAN_ANGLES, timeout: float = 1.0) -> PolarProfile:
+        """Sweep the ultrasonic sensor across pan angles and measure each.
+        
+        The sensor turns with the camera's pan servo. Each angle's distance
+        query is sent together with the move to the next angle, so the servo
+        turns while the reading travels back. The sweep starts from the end
+        nearer the current pan angle and leaves the sensor at the other end.
+        
+        Args:
+            angles: Pan angles in degrees (90 faces forward, higher is right)
+            timeout: Maximum time to wait for each reading in seconds
+        
+        Returns:
+            Profile of distances by angle; angles without a reply or a valid
+            echo read NO_READING (0)
+        
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        if not self.is_connected():
+            raise RobotConnectionError("Not connected")
+        with self._camera_lock:
+            order = sweep_order(angles, self.camera_pose.pan)
+            profile = PolarProfile(order)
+            query = None
+            for i, angle in enumerate(order):
+                settle = self.camera_set(pan=angle, wait=False)
+                if query is not None:
+                    self._scan_reading(profile, order[i - 1], query, timeout)
+                time.sleep(query_delay(settle))
+                query = self.request(build_distance_cmd())
+            if query is not None:
+                self._scan_reading(profile, order[-1], query, timeout)
+        profile.timestamp = time.monotonic()
+        return profile
+
+    def _scan_reading(
+        self, profile: PolarProfile, angle: int, query: CommandFuture, timeout: float
+    ) -> None:
+        """Wait for one scan query and record its reading."""
+        try:
+            value = self.wait_reply(query, timeout)
+        except CommandError:
+            self._pipeline.discard(query)
+            value = None
+        profile.set(angle, value)
+
+    def _on_distance(self, future: CommandFuture) -> None:
+        """Feed a distance reply into the filter, once per query."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._distance_fed_lock:
+            if future is self._distance_fed:
+                return
+            self._distance_fed = future
+        value = future.result()
+        if isinstance(value, int) and not isinstance(value, bool):
+            self.distance.add(value, future.replied_at)
 
     def is_moving(self) -> bool:
         """Check if robot is currently moving.
@@ -257,6 +917,7 @@ class RobotController:
         """
         return self._moving
 
+    @traced()
     def camera_pan_left(self, count: int = 1) -> None:
         """Pan camera left.
         
@@ -266,10 +927,13 @@ class RobotController:
         if not self.is_connected():
             raise RobotConnectionError("Not connected")
         
-        for _ in range(count):
-            self._send_command(build_camera_cmd(CAM_PAN_LEFT))
-            time.sleep(0.1)
+        with self._camera_lock:
+            for _ in range(count):
+                self._send_encoded(CMD_CAMERA, encode_camera(CAM_PAN_LEFT))
+                self.camera_pose.step(CAM_PAN_LEFT)
+                time.sleep(0.1)
 
+    @traced()
     def camera_pan_right(self, count: int = 1) -> None:
         """Pan camera right.
         
@@ -279,10 +943,13 @@ class RobotController:
         if not self.is_connected():
             raise RobotConnectionError("Not connected")
         
-        for _ in range(count):
-            self._send_command(build_camera_cmd(CAM_PAN_RIGHT))
-            time.sleep(0.1)
+        with self._camera_lock:
+            for _ in range(count):
+                self._send_encoded(CMD_CAMERA, encode_camera(CAM_PAN_RIGHT))
+                self.camera_pose.step(CAM_PAN_RIGHT)
+                time.sleep(0.1)
 
+    @traced()
     def camera_tilt_up(self, count: int = 1) -> None:
         """Tilt camera up.
         
@@ -292,10 +959,13 @@ class RobotController:
         if not self.is_connected():
             raise RobotConnectionError("Not connected")
         
-        for _ in range(count):
-            self._send_command(build_camera_cmd(CAM_TILT_UP))
-            time.sleep(0.1)
+        with self._camera_lock:
+            for _ in range(count):
+                self._send_encoded(CMD_CAMERA, encode_camera(CAM_TILT_UP))
+                self.camera_pose.step(CAM_TILT_UP)
+                time.sleep(0.1)
 
+    @traced()
     def camera_tilt_down(self, count: int = 1) -> None:
         """Tilt camera down.
         
@@ -305,26 +975,200 @@ class RobotController:
         if not self.is_connected():
             raise RobotConnectionError("Not connected")
         
-        for _ in range(count):
-            self._send_command(build_camera_cmd(CAM_TILT_DOWN))
-            time.sleep(0.1)
+        with self._camera_lock:
+            for _ in range(count):
+                self._send_encoded(CMD_CAMERA, encode_camera(CAM_TILT_DOWN))
+                self.camera_pose.step(CAM_TILT_DOWN)
+                time.sleep(0.1)
 
+    @traced()
     def camera_center(self) -> None:
         """Reset camera to center position."""
         if not self.is_connected():
             raise RobotConnectionError("Not connected")
         
-        self._send_command(build_camera_cmd(CAM_CENTER))
-        time.sleep(0.1)
+        with self._camera_lock:
+            self._send_encoded(CMD_CAMERA, encode_camera(CAM_CENTER))
+            self.camera_pose.step(CAM_CENTER)
+            time.sleep(0.1)
+
+    @traced()
+    def camera_set(
+        self, pan: Optional[float] = None, tilt: Optional[float] = None, wait: bool = True
+    ) -> float:
+        """Point the camera at absolute angles.
+        
+        Sends one servo command (N=5) per servo that has to move, however
+        far, instead of one 100 ms step per 10 degrees.
+        
+        Args:
+            pan: Pan angle in degrees (10-170, 90 faces forward, higher
+                 turns right), or None to leave pan alone
+            tilt: Tilt angle in degrees (30-110, 90 is level, higher looks
+                  up), or None to leave tilt alone
+            wait: Sleep until the servos are predicted to have settled
+        
+        Returns:
+            Predicted settle time in seconds from when the commands were sent
+        
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        if not self.is_connected():
+            raise RobotConnectionError("Not connected")
+        with self._camera_lock:
+            moves, settle = self.camera_pose.plan(pan, tilt)
+            for cmd in servo_commands(moves):
+                self._send_command(cmd)
+            self.camera_pose.apply(moves)
+        if wait:
+            time.sleep(settle)
+        return settle
+
+    @traced()
+    def camera_move(self, pan: float = 0, tilt: float = 0, wait: bool = True) -> float:
+        """Move the camera relative to its tracked pose.
+        
+        Args:
+            pan: Degrees to pan (positive turns right)
+            tilt: Degrees to tilt (positive looks up)
+            wait: Sleep until the servos are predicted to have settled
+        
+        Returns:
+            Predicted settle time in seconds
+        
+        Raises:
+            RobotConnectionError: If not connected
+            CommandError: If a servo to be moved has no known angle; call
+                          camera_set() or camera_center() first
+        """
+        with self._camera_lock:
+            settle = self.camera_set(wait=False, **self.camera_pose.offset(pan, tilt))
+        if wait:
+            time.sleep(settle)
+        return settle
+
+    @traced()
+    def set_wheel_speeds(self, left: int, right: int) -> None:
+        """Set each side's motor speed without waiting.
+        
+        Intended for continuous teleoperation: call it as often as the input
+        changes. With pace_commands only the newest setting is sent when the
+        serial link is busy.
+        
+        Args:
+            left: Left motor speed (0-255)
+            right: Right motor speed (0-255)
+        
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        self._send_command(build_motor_speeds_cmd(left, right))
+        self._moving = bool(left or right)
+
+    @traced()
+    def joystick(self, direction: int) -> None:
+        """Drive in a joystick direction without waiting.
+        
+        The car keeps moving until the next joystick or stop command.
+        
+        Args:
+            direction: 1=forward, 2=backward, 3=left, 4=right (not the DIR_*
+                       order), 5-8 for the diagonals, JOYSTICK_STOP to stop
+        
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        self._send_command(build_joystick_cmd(direction))
+        self._moving = direction != JOYSTICK_STOP
+
+    @traced()
+    def set_led(self, led: int, red: int, green: int, blue: int) -> None:
+        """Set an LED's colour.
+        
+        Args:
+            led: LED position (1=left, 2=front, 3=right, 4=back, 5=center)
+            red: Red value (0-255)
+            green: Green value (0-255)
+            blue: Blue value (0-255)
+        
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        self._send_command(build_led_cmd(led, red, green, blue))
+        if self.scheduler is None:
+            # Paced LED writes coalesce in the scheduler instead
+            time.sleep(0.1)
 
-    def get_image(self) -> bytes:
-        """Capture camera image.
+    def start_camera(self, ring_size: int = RING_SIZE) -> CameraStream:
+        """Open the camera's MJPEG stream in the background.
         
+        Args:
+            ring_size: Number of recent frames to keep
+            
         Returns:
-            Image data as bytes (placeholder - not implemented in protocol)
+            Running camera stream
         """
-        # Not implemented in current robot protocol
-        return b""
+        if self._camera is None:
+            self._camera = CameraStream(self.ip, self.camera_port, ring_size=ring_size)
+            self._camera.start()
+        return self._camera
+
+    def stop_camera(self) -> None:
+        """Close the camera stream if it is open."""
+        if self._camera is not None:
+            self._camera.stop()
+            self._camera = None
+
+    @traced()
+    def get_image(self, timeout: float = 2.0) -> bytes:
+        """Return the latest camera frame.
+        
+        The first call opens the camera stream and waits for a frame; later
+        calls return the newest frame already received without blocking.
+        
+        Args:
+            timeout: Maximum time to wait for the first frame in seconds
+        
+        Returns:
+            JPEG data, or b"" if no frame arrived in time
+        """
+        camera = self.start_camera()
+        frame = camera.latest() or camera.wait_frame(timeout)
+        return frame.data if frame else b""
+
+    def start_telemetry(self, budget: Optional[TokenBucket] = None) -> TelemetryScheduler:
+        """Start polling sensors in the background.
+        
+        Replies are read by the reactor, so the controller must have been
+        created with reactor=True. Subscribe to sensors on the returned scheduler, e.g.
+        ``robot.start_telemetry().subscribe("line", 10, on_line)``.
+        
+        Args:
+            budget: Token bucket metering telemetry's UART bytes (defaults to
+                    half of the serial link)
+        
+        Returns:
+            Running telemetry scheduler
+        
+        Raises:
+            RobotConnectionError: If not connected
+            CommandError: If the controller has no reactor to read replies
+        """
+        if not self.is_connected():
+            raise RobotConnectionError("Not connected")
+        if self._reactor is None:
+            raise CommandError("Telemetry needs a controller created with reactor=True")
+        if self._telemetry is None:
+            self._telemetry = TelemetryScheduler(self.request, budget, self._pipeline.discard)
+            self._telemetry.start()
+        return self._telemetry
+
+    def stop_telemetry(self) -> None:
+        """Stop sensor polling if it is running."""
+        if self._telemetry is not None:
+            self._telemetry.stop()
+            self._telemetry = None
 
     def __enter__(self):
         """Context manager entry."""
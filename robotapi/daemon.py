@@ -0,0 +1,699 @@
+"""Local daemon sharing robot connections between processes.
+
+The ESP32 bridge accepts one TCP client at a time. RobotDaemon holds that
+connection for each robot (through a Fleet, which answers heartbeats) and
+serves any number of local processes over a Unix domain socket:
+
+    python -m robotapi.daemon 192.168.4.1 --socket /tmp/robotapi.sock
+
+Clients use DaemonClient to send commands, await their replies and
+subscribe to telemetry:
+
+    with DaemonClient("/tmp/robotapi.sock") as client:
+        distance = client.request(0, build_distance_cmd()).result(timeout=1.0)
+        client.subscribe(0, "obstacle", 10, print)
+
+Frames are an 8-byte header followed by a payload of at most 65535 bytes:
+
+    !HBBI  payload length, frame type, robot index, request id
+
+Commands travel as the firmware's own JSON; the daemon tags those that
+reply with a serial number and answers with a REPLY (or ERROR) frame
+carrying the client's request id. Heartbeats never reach clients. If the
+client that last drove a robot disconnects, the daemon stops the car.
+"""
+
+import argparse
+import json
+import logging
+import os
+import selectors
+import socket
+import struct
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+from robotapi.fleet import Fleet, RobotHandle
+from robotapi.metrics import MetricsServer
+from robotapi.protocol import REPLY_COMMANDS, encode_command
+from robotapi.scheduler import DRIVE_CHANNEL, command_channel
+from robotapi.telemetry import Sample, Subscription
+from robotapi.exceptions import CommandError, RobotAPIError, RobotConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Default path of the daemon's Unix socket
+DEFAULT_SOCKET = "/tmp/robotapi.sock"
+
+# Frame header: payload length, frame type, robot index, request id
+HEADER = struct.Struct("!HBBI")
+MAX_PAYLOAD = 0xFFFF
+
+# Frame types
+FRAME_HELLO = 0  # daemon -> client: {"robots": ["ip:port", ...]}
+FRAME_COMMAND = 1  # client -> daemon: firmware JSON; id 0 wants no reply
+FRAME_REPLY = 2  # daemon -> client: JSON reply value
+FRAME_ERROR = 3  # daemon -> client: UTF-8 error message
+FRAME_SUBSCRIBE = 4  # client -> daemon: {"sensor", "rate", "priority"}; id names it
+FRAME_SAMPLE = 5  # daemon -> client: [value, timestamp] for subscription id
+FRAME_UNSUBSCRIBE = 6  # client -> daemon: cancel subscription id
+
+# Drop a client that stops reading once this many bytes are queued for it
+MAX_OUTBOX = 262144
+
+
+def encode_frame(kind: int, robot: int, ident: int, payload: bytes = b"") -> bytes:
+    """Encode one frame.
+
+    Args:
+        kind: Frame type (FRAME_*)
+        robot: Robot index
+        ident: Request or subscription id
+        payload: Frame payload
+
+    Returns:
+        Header and payload bytes
+
+    Raises:
+        ValueError: If the payload is too long
+    """
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Frame payload of {len(payload)} bytes exceeds {MAX_PAYLOAD}")
+    return HEADER.pack(len(payload), kind, robot, ident) + payload
+
+
+class FrameReader:
+    """Splits a byte stream into (type, robot, id, payload) frames."""
+
+    def __init__(self):
+        """Initialize reader."""
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, int, int, bytes]]:
+        """Add received bytes and return the frames they complete.
+
+        Args:
+            data: Bytes read from the socket
+
+        Returns:
+            Complete frames in order
+        """
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        offset = 0
+        while len(buffer) - offset >= HEADER.size:
+            length, kind, robot, ident = HEADER.unpack_from(buffer, offset)
+            end = offset + HEADER.size + length
+            if end > len(buffer):
+                break
+            frames.append((kind, robot, ident, bytes(buffer[offset + HEADER.size : end])))
+            offset = end
+        del buffer[:offset]
+        return frames
+
+
+def _json(value: Any) -> bytes:
+    """Encode a payload as compact JSON."""
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+class _Client:
+    """One local client connection of a RobotDaemon."""
+
+    def __init__(self, daemon: "RobotDaemon", sock: socket.socket):
+        self.daemon = daemon
+        self.sock: Optional[socket.socket] = sock
+        self.reader = FrameReader()
+        self.subscriptions: Dict[int, Tuple[RobotHandle, Subscription]] = {}
+        self._outbox = bytearray()
+        self._out_lock = threading.Lock()
+        self._writing = False
+
+    def queue(self, kind: int, robot: int, ident: int, payload: bytes = b"") -> None:
+        """Queue a frame for the loop thread to write (any thread)."""
+        frame = encode_frame(kind, robot, ident, payload)
+        with self._out_lock:
+            if self.sock is None:
+                return
+            if len(self._outbox) + len(frame) > MAX_OUTBOX:
+                overflow = True
+            else:
+                overflow = False
+                self._outbox += frame
+        if overflow:
+            logger.warning("Dropping local client that stopped reading")
+            self.daemon._call_soon(lambda: self.daemon._drop(self))
+        elif self.daemon._in_loop():
+            self.flush()
+        else:
+            self.daemon._call_soon(self.flush)
+
+    def flush(self) -> None:
+        """Write as much queued data as the socket accepts (loop thread)."""
+        sock = self.sock
+        if sock is None:
+            return
+        with self._out_lock:
+            try:
+                sent = sock.send(self._outbox) if self._outbox else 0
+                del self._outbox[:sent]
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._outbox.clear()
+                sent = -1
+            pending = bool(self._outbox)
+        if sent < 0:
+            self.daemon._drop(self)
+            return
+        if pending != self._writing:
+            self._writing = pending
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if pending else 0)
+            self.daemon._selector.modify(sock, events, self)
+
+
+class RobotDaemon:
+    """Holds one upstream connection per robot and serves local clients."""
+
+    def __init__(
+        self,
+        robots: Sequence[Tuple[str, int]],
+        path: str = DEFAULT_SOCKET,
+        poll_interval: float = 0.5,
+    ):
+        """Initialize daemon.
+
+        Args:
+            robots: (ip, port) of each robot; clients address them by index
+            path: Unix socket path to listen on
+            poll_interval: Selector timeout in seconds. The loop wakes
+                           immediately for I/O; this only bounds stop() latency.
+        """
+        self.addresses = list(robots)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.fleet = Fleet()
+        self.robots: List[RobotHandle] = []
+        self.clients: List[_Client] = []
+        self._drivers: Dict[int, _Client] = {}
+        self._listener: Optional[socket.socket] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._calls: Deque[Callable[[], None]] = deque()
+        self._waker_r: Optional[socket.socket] = None
+        self._waker_w: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self) -> None:
+        """Connect to every robot, then listen for local clients.
+
+        Raises:
+            RobotConnectionError: If a robot cannot be reached or another
+                                  daemon is listening on path
+        """
+        if self._running:
+            return
+        self._listener = self._listen()
+        try:
+            for ip, port in self.addresses:
+                self.robots.append(self.fleet.add(ip, port, pace_commands=True))
+        except RobotConnectionError:
+            self.fleet.stop()
+            self.robots = []
+            self._listener.close()
+            self._listener = None
+            os.unlink(self.path)
+            raise
+        self._selector = selectors.DefaultSelector()
+        self._waker_r, self._waker_w = socket.socketpair()
+        self._waker_r.setblocking(False)
+        self._waker_w.setblocking(False)
+        self._selector.register(self._waker_r, selectors.EVENT_READ, None)
+        self._selector.register(self._listener, selectors.EVENT_READ, self._listener)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robotapi-daemon", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Disconnect every client and robot and remove the socket."""
+        self._running = False
+        self._wake()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.poll_interval + 1.0)
+        self._thread = None
+        for client in list(self.clients):
+            self._drop(client)
+        for sock in (self._listener, self._waker_r, self._waker_w):
+            if sock:
+                sock.close()
+        if self._listener is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        self._listener = self._waker_r = self._waker_w = None
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+        self.fleet.stop()
+        self.robots = []
+
+    def is_running(self) -> bool:
+        """Check if the daemon loop is active.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    def _listen(self) -> socket.socket:
+        """Bind the Unix socket, replacing a stale one left by a dead daemon."""
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.unlink(self.path)
+            else:
+                raise RobotConnectionError(f"A daemon is already listening on {self.path}")
+            finally:
+                probe.close()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        listener.listen(16)
+        listener.setblocking(False)
+        return listener
+
+    def _in_loop(self) -> bool:
+        """Check if the caller is the daemon loop thread."""
+        return threading.current_thread() is self._thread
+
+    def _call_soon(self, callback: Callable[[], None]) -> None:
+        """Run callback on the loop thread."""
+        self._calls.append(callback)
+        self._wake()
+
+    def _wake(self) -> None:
+        """Interrupt the selector wait."""
+        try:
+            if self._waker_w:
+                self._waker_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _accept(self) -> None:
+        """Accept a local client and greet it with the robot list (loop thread)."""
+        try:
+            sock, _ = self._listener.accept()
+        except (BlockingIOError, OSError):
+            return
+        sock.setblocking(False)
+        client = _Client(self, sock)
+        self.clients.append(client)
+        self._selector.register(sock, selectors.EVENT_READ, client)
+        names = [f"{robot.ip}:{robot.port}" for robot in self.robots]
+        client.queue(FRAME_HELLO, 0, 0, _json({"robots": names}))
+
+    def _drop(self, client: _Client) -> None:
+        """Close a client, cancel its subscriptions and stop cars it drove."""
+        with client._out_lock:
+            sock, client.sock = client.sock, None
+        if sock is None:
+            return
+        if client in self.clients:
+            self.clients.remove(client)
+        if self._selector is not None:
+            try:
+                self._selector.unregister(sock)
+            except (KeyError, ValueError):
+                pass
+        sock.close()
+        for robot, subscription in client.subscriptions.values():
+            if robot._telemetry is not None:
+                robot._telemetry.unsubscribe(subscription)
+        client.subscriptions.clear()
+        for index, driver in list(self._drivers.items()):
+            if driver is client:
+                del self._drivers[index]
+                try:
+                    self.robots[index].stop()
+                except RobotConnectionError:
+                    pass
+
+    def _on_readable(self, client: _Client) -> None:
+        """Read a client's frames and handle them (loop thread)."""
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(client)
+            return
+        for kind, index, ident, payload in client.reader.feed(data):
+            try:
+                if index >= len(self.robots):
+                    raise CommandError(f"No robot {index}")
+                self._handle(client, kind, index, ident, payload)
+            except (RobotAPIError, ValueError, TypeError, KeyError) as e:
+                client.queue(FRAME_ERROR, index, ident, str(e).encode("utf-8"))
+
+    def _handle(self, client: _Client, kind: int, index: int, ident: int, payload: bytes) -> None:
+        """Handle one client frame (loop thread)."""
+        robot = self.robots[index]
+        if kind == FRAME_COMMAND:
+            cmd = json.loads(payload)
+            if ident and cmd.get("N") in REPLY_COMMANDS:
+                future = robot.request(cmd)
+                future.add_done_callback(lambda f: self._reply(client, index, ident, f))
+                return
+            robot._send_command(cmd)
+            if command_channel(cmd) == DRIVE_CHANNEL:
+                self._drivers[index] = client
+        elif kind == FRAME_SUBSCRIBE:
+            request = json.loads(payload)
+
+            def publish(sample: Sample) -> None:
+                client.queue(FRAME_SAMPLE, index, ident, _json([sample.value, sample.timestamp]))
+
+            telemetry = robot.start_telemetry()
+            subscription = telemetry.subscribe(
+                request["sensor"], request["rate"], publish, request.get("priority", 0)
+            )
+            client.subscriptions[ident] = (robot, subscription)
+        elif kind == FRAME_UNSUBSCRIBE:
+            entry = client.subscriptions.pop(ident, None)
+            if entry is not None and entry[0]._telemetry is not None:
+                entry[0]._telemetry.unsubscribe(entry[1])
+        else:
+            raise CommandError(f"Unknown frame type {kind}")
+
+    def _reply(self, client: _Client, index: int, ident: int, future: Future) -> None:
+        """Send a command's reply or failure to the client that asked."""
+        if future.cancelled():
+            client.queue(FRAME_ERROR, index, ident, b"Cancelled")
+        elif future.exception() is not None:
+            client.queue(FRAME_ERROR, index, ident, str(future.exception()).encode("utf-8"))
+        else:
+            client.queue(FRAME_REPLY, index, ident, _json(future.result()))
+
+    def _run(self) -> None:
+        """Daemon loop: accept clients and service their sockets."""
+        while self._running:
+            for key, mask in self._selector.select(self.poll_interval):
+                client = key.data
+                if client is None:
+                    try:
+                        while self._waker_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                elif client is self._listener:
+                    self._accept()
+                else:
+                    if mask & selectors.EVENT_READ and client.sock:
+                        self._on_readable(client)
+                    if mask & selectors.EVENT_WRITE and client.sock:
+                        client.flush()
+            while self._calls:
+                self._calls.popleft()()
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
+
+
+class DaemonClient:
+    """Connection from one local process to a RobotDaemon."""
+
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        """Initialize client.
+
+        Args:
+            path: Daemon's Unix socket path
+        """
+        self.path = path
+        self.robots: List[str] = []
+        self._socket: Optional[socket.socket] = None
+        self._reader = FrameReader()
+        self._pending: Dict[int, Future] = {}
+        self._callbacks: Dict[int, Callable[[Sample], None]] = {}
+        self._names: Dict[int, str] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._hello = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def connect(self, timeout: float = 2.0) -> None:
+        """Connect to the daemon and wait for its robot list.
+
+        Args:
+            timeout: Seconds to wait for the daemon's greeting
+
+        Raises:
+            RobotConnectionError: If the daemon is not running
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise RobotConnectionError(f"No daemon on {self.path}: {e}")
+        self._socket = sock
+        self._hello.clear()
+        self._thread = threading.Thread(target=self._run, name="robotapi-daemon-client", daemon=True)
+        self._thread.start()
+        if not self._hello.wait(timeout):
+            self.close()
+            raise RobotConnectionError(f"No greeting from daemon on {self.path}")
+
+    def close(self) -> None:
+        """Disconnect; outstanding requests fail."""
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        self._fail_all(RobotConnectionError("Disconnected from daemon"))
+
+    def is_connected(self) -> bool:
+        """Check if connected to the daemon.
+
+        Returns:
+            True if connected
+        """
+        return self._socket is not None
+
+    def request(self, robot: Union[int, str], cmd: Dict[str, Any]) -> Future:
+        """Send a command and return the future of its reply.
+
+        Args:
+            robot: Robot index or "ip:port" name
+            cmd: Command dictionary from one of the protocol builders
+
+        Returns:
+            Future resolved with the reply value, or failed with
+            CommandError if the daemon rejected the command
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        future: Future = Future()
+        ident = self._register(future)
+        try:
+            self._send(FRAME_COMMAND, self._index(robot), ident, encode_command(cmd))
+        except RobotConnectionError:
+            with self._lock:
+                self._pending.pop(ident, None)
+            raise
+        return future
+
+    def send(self, robot: Union[int, str], cmd: Dict[str, Any]) -> None:
+        """Send a command without waiting for a reply.
+
+        Args:
+            robot: Robot index or "ip:port" name
+            cmd: Command dictionary
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        self._send(FRAME_COMMAND, self._index(robot), 0, encode_command(cmd))
+
+    def subscribe(
+        self,
+        robot: Union[int, str],
+        sensor: str,
+        rate: float,
+        callback: Callable[[Sample], None],
+        priority: int = 0,
+    ) -> int:
+        """Receive a sensor's samples from the daemon's shared telemetry.
+
+        Args:
+            robot: Robot index or "ip:port" name
+            sensor: Sensor name ("distance", "obstacle", "line" or "ground")
+            rate: Samples per second wanted
+            callback: Called with each Sample on the client's reader thread
+            priority: Higher values are served first when the budget is short
+
+        Returns:
+            Subscription id to pass to unsubscribe()
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        index = self._index(robot)
+        ident = self._register(None)
+        with self._lock:
+            self._callbacks[ident] = callback
+            self._names[ident] = sensor
+        request = {"sensor": sensor, "rate": rate, "priority": priority}
+        self._send(FRAME_SUBSCRIBE, index, ident, _json(request))
+        return ident
+
+    def unsubscribe(self, ident: int) -> None:
+        """Stop a subscription.
+
+        Args:
+            ident: Id returned by subscribe()
+        """
+        with self._lock:
+            self._callbacks.pop(ident, None)
+            self._names.pop(ident, None)
+        if self._socket is not None:
+            self._send(FRAME_UNSUBSCRIBE, 0, ident)
+
+    def _index(self, robot: Union[int, str]) -> int:
+        """Return a robot's index from its index or name."""
+        if isinstance(robot, str):
+            try:
+                return self.robots.index(robot)
+            except ValueError:
+                raise CommandError(f"Daemon has no robot {robot}")
+        return robot
+
+    def _register(self, future: Optional[Future]) -> int:
+        """Allocate a request id, remembering the future waiting on it."""
+        with self._lock:
+            self._next_id = self._next_id % 0xFFFFFFFF + 1
+            ident = self._next_id
+            if future is not None:
+                self._pending[ident] = future
+        return ident
+
+    def _send(self, kind: int, robot: int, ident: int, payload: bytes = b"") -> None:
+        """Write one frame to the daemon."""
+        sock = self._socket
+        if sock is None:
+            raise RobotConnectionError("Not connected to daemon")
+        try:
+            with self._send_lock:
+                sock.sendall(encode_frame(kind, robot, ident, payload))
+        except OSError as e:
+            raise RobotConnectionError(f"Send to daemon failed: {e}")
+
+    def _fail_all(self, error: Exception) -> None:
+        """Fail every outstanding request."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _run(self) -> None:
+        """Reader thread: resolve replies and deliver samples."""
+        sock = self._socket
+        try:
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                for kind, robot, ident, payload in self._reader.feed(data):
+                    self._on_frame(kind, robot, ident, payload)
+        except OSError:
+            pass
+        if self._socket is sock:
+            self._socket = None
+        self._fail_all(RobotConnectionError("Daemon closed the connection"))
+
+    def _on_frame(self, kind: int, robot: int, ident: int, payload: bytes) -> None:
+        """Handle one frame from the daemon (reader thread)."""
+        if kind == FRAME_SAMPLE:
+            callback = self._callbacks.get(ident)
+            if callback is not None:
+                value, timestamp = json.loads(payload)
+                if isinstance(value, list):
+                    value = tuple(value)
+                callback(Sample(self._names[ident], value, timestamp))
+        elif kind in (FRAME_REPLY, FRAME_ERROR):
+            with self._lock:
+                future = self._pending.pop(ident, None)
+            if future is None or future.done():
+                return
+            if kind == FRAME_REPLY:
+                future.set_result(json.loads(payload))
+            else:
+                future.set_exception(CommandError(payload.decode("utf-8", "replace")))
+        elif kind == FRAME_HELLO:
+            self.robots = json.loads(payload)["robots"]
+            self._hello.set()
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+
+def _address(text: str) -> Tuple[str, int]:
+    """Parse "ip" or "ip:port"."""
+    ip, _, port = text.partition(":")
+    return ip, int(port) if port else 100
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the daemon until interrupted."""
+    parser = argparse.ArgumentParser(description="Share robot connections with local processes")
+    parser.add_argument("robots", nargs="+", type=_address, help="robot address, ip[:port]")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    daemon = RobotDaemon(args.robots, args.socket)
+    daemon.start()
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = MetricsServer([robot.metrics.registry for robot in daemon.robots], port=args.metrics_port)
+        metrics.start()
+    logger.info("Serving %d robot(s) on %s", len(daemon.robots), args.socket)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if metrics is not None:
+            metrics.stop()
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Fleet manager - many robots serviced from one selector loop."""
+
+import selectors
+import socket
+import threading
+from collections import deque
+from typing import Callable, Deque, Iterator, List, Optional
+from robotapi.controller import HeartbeatMonitor, RobotController
+from robotapi.messages import MessageDecoder
+from robotapi.pacing import uart_bucket
+from robotapi.reactor import Dispatcher
+from robotapi.scheduler import CommandScheduler
+from robotapi.exceptions import RobotConnectionError
+
+# Drop a robot that stops reading once this many bytes are queued for it
+MAX_OUTBOX = 65536
+
+
+class FleetLink(Dispatcher):
+    """Non-blocking connection to one robot, driven by a Fleet loop.
+
+    Acts as both the connection and the response dispatcher for a
+    RobotHandle. Sends are queued and written by the loop thread.
+    """
+
+    def __init__(self, fleet: "Fleet", ip: str, port: int = 100):
+        """Initialize link.
+
+        Args:
+            fleet: Owning fleet
+            ip: Robot IP address
+            port: TCP port (default 100)
+        """
+        super().__init__()
+        self.fleet = fleet
+        self.ip = ip
+        self.port = port
+        self._socket: Optional[socket.socket] = None
+        self._decoder = MessageDecoder()
+        self._outbox = bytearray()
+        self._out_lock = threading.Lock()
+        self._writing = False
+
+    def connect(self, timeout: float = 5.0) -> None:
+        """Connect to the robot and register with the fleet loop.
+
+        Args:
+            timeout: Connect timeout in seconds
+
+        Raises:
+            RobotConnectionError: If connection fails
+        """
+        try:
+            sock = socket.create_connection((self.ip, self.port), timeout=timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setblocking(False)
+        except (socket.error, OSError) as e:
+            raise RobotConnectionError(f"Failed to connect to {self.ip}:{self.port}: {e}")
+        self._socket = sock
+        self._decoder.reset()
+        self._error = None
+        self._running = True
+        self.fleet._call_soon(lambda: self.fleet._register(self))
+
+    def disconnect(self) -> None:
+        """Close the connection."""
+        self._close()
+
+    def is_connected(self) -> bool:
+        """Check if connection is active.
+
+        Returns:
+            True if connected, False otherwise
+        """
+        return self._socket is not None
+
+    def stop(self) -> None:
+        """Stop dispatching and wake any blocked waiters."""
+        self._running = False
+        self._wake_all()
+
+    def send(self, data: bytes) -> None:
+        """Queue data for the fleet loop to write.
+
+        Args:
+            data: Bytes to send
+
+        Raises:
+            RobotConnectionError: If not connected
+        """
+        if not self._socket:
+            raise self._error or RobotConnectionError("Not connected")
+        with self._out_lock:
+            if len(self._outbox) + len(data) > MAX_OUTBOX:
+                raise RobotConnectionError("Send queue full")
+            self._outbox += data
+        if self.fleet._in_loop():
+            self._flush()
+        else:
+            self.fleet._call_soon(self._flush)
+
+    def receive(self, timeout: float = 0.1) -> Optional[str]:
+        """Not supported: the fleet loop owns the receive side.
+
+        Raises:
+            RobotConnectionError: Always
+        """
+        raise RobotConnectionError("Receive is handled by the fleet loop")
+
+    def _flush(self) -> None:
+        """Write as much queued data as the socket accepts (loop thread)."""
+        sock = self._socket
+        if not sock:
+            return
+        error = None
+        with self._out_lock:
+            try:
+                sent = sock.send(self._outbox) if self._outbox else 0
+                del self._outbox[:sent]
+            except BlockingIOError:
+                pass
+            except OSError as e:
+                error = e
+            pending = bool(self._outbox)
+        if error:
+            self._fail(RobotConnectionError(f"Send failed: {error}"))
+            return
+        if pending != self._writing:
+            self._writing = pending
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if pending else 0)
+            try:
+                self.fleet._selector.modify(sock, events, self)
+            except (KeyError, ValueError):
+                # Not registered yet; _register() flushes again
+                self._writing = False
+
+    def _on_readable(self) -> None:
+        """Read available data and dispatch complete messages (loop thread)."""
+        try:
+            data = self._socket.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._fail(RobotConnectionError(f"Receive failed: {e}"))
+            return
+        if not data:
+            self._fail(RobotConnectionError("Connection closed by robot"))
+            return
+
+        for response in self._decoder.feed(data):
+            try:
+                self._dispatch(response)
+            except RobotConnectionError as e:
+                self._fail(e)
+                return
+
+    def _fail(self, error: RobotConnectionError) -> None:
+        """Record a connection failure and release waiters."""
+        self._error = error
+        self._close()
+
+    def _close(self) -> None:
+        """Unregister and close the socket."""
+        sock = self._socket
+        self._socket = None
+        self._running = False
+        with self._out_lock:
+            self._outbox.clear()
+        if sock:
+            self.fleet._call_soon(lambda: self.fleet._unregister(sock))
+        self._wake_all()
+
+
+class RobotHandle(RobotController):
+    """RobotController whose I/O is serviced by a shared Fleet loop.
+
+    Heartbeats are answered on the fleet thread, so a handle never misses
+    the firmware's heartbeat window even while its caller is busy.
+    """
+
+    def __init__(self, fleet: "Fleet", ip: str, port: int = 100, pace_commands: bool = False):
+        """Initialize robot handle.
+
+        Args:
+            fleet: Owning fleet
+            ip: Robot IP address
+            port: TCP port (default 100)
+            pace_commands: Release commands at the serial link's byte rate
+                           (see RobotController)
+        """
+        super().__init__(ip, port, pace_commands=pace_commands)
+        self.fleet = fleet
+        self._connection = FleetLink(fleet, ip, port)
+
+    def connect(self) -> None:
+        """Establish connection to robot."""
+        self._connection.connect()
+        self.metrics.connected()
+        self._reactor = self._connection
+        self._heartbeat = HeartbeatMonitor(
+            self._connection, self._reactor, self._pipeline, self.metrics
+        )
+        if self.pace_commands:
+            self.scheduler = CommandScheduler(self._connection.send, uart_bucket())
+            self.scheduler.start()
+
+
+class Fleet:
+    """Holds connections to many robots and services them from one thread."""
+
+    def __init__(self, poll_interval: float = 0.5):
+        """Initialize fleet.
+
+        Args:
+            poll_interval: Selector timeout in seconds. The loop wakes
+                           immediately for I/O; this only bounds stop() latency.
+        """
+        self.poll_interval = poll_interval
+        self._handles: List[RobotHandle] = []
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._calls: Deque[Callable[[], None]] = deque()
+        self._waker_r: Optional[socket.socket] = None
+        self._waker_w: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self) -> None:
+        """Start the fleet loop thread."""
+        if self._running:
+            return
+        self._selector = selectors.DefaultSelector()
+        self._waker_r, self._waker_w = socket.socketpair()
+        self._waker_r.setblocking(False)
+        self._waker_w.setblocking(False)
+        self._selector.register(self._waker_r, selectors.EVENT_READ, None)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robotapi-fleet", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Disconnect every robot and stop the loop thread."""
+        for handle in list(self._handles):
+            self.remove(handle)
+        self._running = False
+        self._wake()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.poll_interval + 1.0)
+        self._thread = None
+        for sock in (self._waker_r, self._waker_w):
+            if sock:
+                sock.close()
+        self._waker_r = self._waker_w = None
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+
+    def is_running(self) -> bool:
+        """Check if the fleet loop is active.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    def add(self, ip: str, port: int = 100, pace_commands: bool = False) -> RobotHandle:
+        """Connect to a robot and return its handle.
+
+        Args:
+            ip: Robot IP address
+            port: TCP port (default 100)
+            pace_commands: Release commands at the serial link's byte rate
+
+        Returns:
+            Connected robot handle
+
+        Raises:
+            RobotConnectionError: If connection fails
+        """
+        self.start()
+        handle = RobotHandle(self, ip, port, pace_commands)
+        handle.connect()
+        self._handles.append(handle)
+        return handle
+
+    def remove(self, handle: RobotHandle) -> None:
+        """Disconnect a robot and drop its handle.
+
+        Args:
+            handle: Handle returned by add()
+        """
+        if handle in self._handles:
+            self._handles.remove(handle)
+        handle.disconnect()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def __iter__(self) -> Iterator[RobotHandle]:
+        return iter(list(self._handles))
+
+    def _in_loop(self) -> bool:
+        """Check if the caller is the fleet loop thread."""
+        return threading.current_thread() is self._thread
+
+    def _call_soon(self, callback: Callable[[], None]) -> None:
+        """Run callback on the loop thread."""
+        self._calls.append(callback)
+        self._wake()
+
+    def _wake(self) -> None:
+        """Interrupt the selector wait."""
+        try:
+            if self._waker_w:
+                self._waker_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _register(self, link: FleetLink) -> None:
+        """Start watching a link's socket (loop thread)."""
+        if link._socket:
+            link._writing = False
+            self._selector.register(link._socket, selectors.EVENT_READ, link)
+            link._flush()
+
+    def _unregister(self, sock: socket.socket) -> None:
+        """Stop watching and close a socket (loop thread)."""
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        """Fleet loop: service every robot's socket from one thread."""
+        while self._running:
+            for key, mask in self._selector.select(self.poll_interval):
+                link = key.data
+                if link is None:
+                    try:
+                        while self._waker_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                if mask & selectors.EVENT_READ and link._socket:
+                    link._on_readable()
+                if mask & selectors.EVENT_WRITE and link._socket:
+                    link._flush()
+            while self._calls:
+                self._calls.popleft()()
+        # Close sockets released while shutting down
+        while self._calls:
+            self._calls.popleft()()
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
@@ -0,0 +1,154 @@
+"""Incremental frame decoder for the robot byte stream."""
+
+import re
+from typing import List, Optional
+
+# Bytes that can change framing state
+_SPECIAL = re.compile(rb'[{}"\\]')
+_WHITESPACE = b" \t\r\n"
+
+# Largest frame the decoder will buffer before discarding it
+MAX_FRAME_SIZE = 4096
+
+
+class FrameDecoder:
+    """Splits a byte stream into complete ``{...}`` frames.
+
+    Frames are delimited by balanced braces, ignoring braces inside JSON
+    strings, so nested objects survive intact. Bytes are buffered in a
+    bytearray and only completed frames are decoded to ``str``. Text found
+    between frames (such as a bare ``true``) is returned as its own frame
+    once the next frame starts.
+
+    Flat frames such as ``{Heartbeat}`` or ``{22_ok}`` are located with a
+    handful of C-level searches; only frames containing nesting or escapes
+    are scanned byte by byte.
+    """
+
+    def __init__(self, max_frame_size: int = MAX_FRAME_SIZE):
+        """Initialize decoder.
+
+        Args:
+            max_frame_size: Maximum buffered bytes before an incomplete frame
+                            is discarded and the decoder resynchronises
+        """
+        self.max_frame_size = max_frame_size
+        self.dropped_bytes = 0
+        self._buffer = bytearray()
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard buffered data and framing state."""
+        del self._buffer[:]
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape_at = -1
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered bytes not yet returned as frames."""
+        return len(self._buffer)
+
+    def feed(self, data) -> List[str]:
+        """Add received bytes and return every frame they complete.
+
+        Args:
+            data: Bytes-like object from the transport
+
+        Returns:
+            Complete frames in arrival order (possibly empty)
+        """
+        buf = self._buffer
+        buf += data
+        frames: List[str] = []
+        # Buffered frames always start at offset 0; stray text is trimmed
+        # as soon as the following frame begins.
+        pos = 0
+
+        while True:
+            if self._depth == 0:
+                start = buf.find(b"{", pos)
+                if start < 0:
+                    break
+                if start > pos:
+                    stray = self._stray(buf, pos, start)
+                    if stray is not None:
+                        frames.append(stray)
+                end = buf.find(b"}", start + 1)
+                if (
+                    end >= 0
+                    and buf.find(b"{", start + 1, end) < 0
+                    and buf.find(b"\\", start + 1, end) < 0
+                    and buf.count(b'"', start + 1, end) % 2 == 0
+                ):
+                    # Flat frame: no nesting, escapes or braces inside strings
+                    frames.append(buf[start:end + 1].decode("utf-8", "replace"))
+                    pos = end + 1
+                    continue
+                self._depth = 1
+                self._scan = start + 1
+                pos = start
+            end = self._scan_frame(buf)
+            if end < 0:
+                break
+            frames.append(buf[pos:end + 1].decode("utf-8", "replace"))
+            pos = end + 1
+
+        if pos:
+            del buf[:pos]
+            if self._depth:
+                self._scan -= pos
+                if self._escape_at >= 0:
+                    self._escape_at -= pos
+
+        if len(buf) > self.max_frame_size:
+            self.dropped_bytes += len(buf)
+            self.reset()
+        return frames
+
+    def _scan_frame(self, buf: bytearray) -> int:
+        """Continue scanning an open frame byte by byte.
+
+        Returns:
+            Index of the frame's closing brace, or -1 if it is incomplete
+        """
+        depth = self._depth
+        in_string = self._in_string
+        escape_at = self._escape_at
+
+        for match in _SPECIAL.finditer(buf, self._scan):
+            i = match.start()
+            if i == escape_at:
+                continue
+            c = buf[i]
+            if in_string:
+                if c == 0x5C:  # backslash
+                    escape_at = i + 1
+                elif c == 0x22:  # quote
+                    in_string = False
+            elif c == 0x7B:  # {
+                depth += 1
+            elif c == 0x7D:  # }
+                depth -= 1
+                if depth == 0:
+                    self._depth = 0
+                    self._in_string = False
+                    self._escape_at = -1
+                    return i
+            elif c == 0x22:  # quote
+                in_string = True
+
+        self._depth = depth
+        self._in_string = in_string
+        self._escape_at = escape_at
+        self._scan = len(buf)
+        return -1
+
+    @staticmethod
+    def _stray(buf: bytearray, begin: int, end: int) -> Optional[str]:
+        """Decode non-whitespace text found between frames."""
+        text = bytes(buf[begin:end]).strip(_WHITESPACE)
+        if not text:
+            return None
+        return text.decode("utf-8", "replace")
@@ -0,0 +1,192 @@
+"""Always-on heartbeat answering for polled connections.
+
+Without a reactor, heartbeats are only answered while a call is polling
+the connection, so a controller left idle for more than about four
+seconds is dropped by the bridge (which also stops the car). The
+HeartbeatResponder thread sleeps in select() on the socket and answers a
+heartbeat within milliseconds of its arrival whenever no caller is
+reading. Given a probe, it also measures the link with an occasional
+round trip.
+"""
+
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Optional
+from robotapi.connection import Connection
+from robotapi.metrics import LinkMetrics
+from robotapi.exceptions import CommandError, RobotConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Seconds between round-trip probes, when probing is enabled
+PROBE_INTERVAL = 5.0
+# Probe round trips kept for statistics
+RTT_SAMPLES = 64
+
+
+class HeartbeatResponder:
+    """Answers heartbeats from a background thread while callers are idle.
+
+    The thread never competes with a caller: service() returns without
+    reading while a caller polls the connection, and the caller answers
+    heartbeats itself. With a reactor (read=False) the reactor answers
+    heartbeats and the responder only sends probes.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        service: Callable[[], int],
+        metrics: Optional[LinkMetrics] = None,
+        probe: Optional[Callable[[], Future]] = None,
+        probe_interval: float = PROBE_INTERVAL,
+        poll_interval: float = 0.05,
+        read: bool = True,
+    ):
+        """Initialize responder.
+
+        Args:
+            connection: Active connection to robot
+            service: Handles arrived messages; returns how many, or -1 if a
+                     caller is reading (HeartbeatMonitor.service)
+            metrics: Metrics the heartbeat statistics are read from
+            probe: Sends one command with a reply and returns its future;
+                   its round trip measures the link (no probes if None)
+            probe_interval: Seconds between probes
+            poll_interval: Longest sleep in select(). Arriving data wakes the
+                           thread at once; this only bounds how quickly
+                           stop() returns.
+            read: Read the connection; False when a reactor reads it
+        """
+        self.connection = connection
+        self.service = service
+        self.metrics = metrics if metrics is not None else LinkMetrics()
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.poll_interval = poll_interval
+        self.read = read
+        self.probes_sent = 0
+        self.probes_lost = 0
+        self._rtts: Deque[float] = deque(maxlen=RTT_SAMPLES)
+        self._probe: Optional[Future] = None
+        self._next_probe = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def is_running(self) -> bool:
+        """Check if the responder thread is running.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    def start(self) -> None:
+        """Start the responder thread."""
+        if self._running:
+            return
+        self._running = True
+        self._stop.clear()
+        self._next_probe = time.monotonic() + self.probe_interval
+        self._thread = threading.Thread(target=self._run, name="robotapi-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the responder thread."""
+        self._running = False
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.poll_interval + 1.0)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return heartbeat and round-trip statistics.
+
+        Returns:
+            Dictionary with heartbeats answered, missed (gaps in arrival)
+            and late (answered after the next was due), the p50/p99
+            heartbeat reply delay (histogram bucket bounds), seconds since
+            the last heartbeat, probes sent and lost, and the last, median
+            and worst probe round trip in seconds (None before any reply)
+        """
+        metrics = self.metrics
+        last = metrics.last_heartbeat
+        rtts = list(self._rtts)
+        return {
+            "heartbeats": metrics.heartbeat_reply.count,
+            "missed": metrics.heartbeats_missed.value,
+            "late": metrics.heartbeats_late.value,
+            "reply_p50": metrics.heartbeat_reply.quantile(0.5),
+            "reply_p99": metrics.heartbeat_reply.quantile(0.99),
+            "last_heartbeat_age": None if last is None else time.monotonic() - last,
+            "probes": self.probes_sent,
+            "probes_lost": self.probes_lost,
+            "rtt": rtts[-1] if rtts else None,
+            "rtt_p50": statistics.median(rtts) if rtts else None,
+            "rtt_max": max(rtts) if rtts else None,
+        }
+
+    def _send_probe(self, now: float) -> None:
+        """Send a probe if one is due, writing off the last if unanswered."""
+        if self.probe is None or now < self._next_probe:
+            return
+        self._next_probe = now + self.probe_interval
+        if self._probe is not None and not self._probe.done():
+            self.probes_lost += 1
+        try:
+            self._probe = self.probe()
+        except CommandError:
+            # Too many commands in flight; try again next interval
+            self._probe = None
+            return
+        self.probes_sent += 1
+        self._probe.add_done_callback(self._on_probe)
+
+    def _on_probe(self, future: Future) -> None:
+        """Record a probe's round trip (I/O thread)."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        rtt = getattr(future, "rtt", None)
+        if rtt is not None:
+            self._rtts.append(rtt)
+
+    def _run(self) -> None:
+        """Responder thread main loop."""
+        try:
+            while not self._stop.is_set() and self.connection.is_connected():
+                now = time.monotonic()
+                self._send_probe(now)
+                wait = min(self.poll_interval, self._probe_wait(now))
+                if not self.read:
+                    self._stop.wait(wait)
+                elif self.connection.readable(wait):
+                    if self.service() < 0:
+                        # A caller is polling and answers heartbeats itself
+                        self._stop.wait(self.poll_interval)
+                else:
+                    # Only returns early if the connection cannot be watched
+                    self._stop.wait(max(0.0, now + wait - time.monotonic()))
+        except RobotConnectionError as e:
+            logger.debug("Heartbeat responder stopped: %s", e)
+        finally:
+            self._running = False
+
+    def _probe_wait(self, now: float) -> float:
+        """Seconds until the next probe is due."""
+        if self.probe is None:
+            return self.poll_interval
+        return max(0.0, self._next_probe - now)
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
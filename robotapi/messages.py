@@ -0,0 +1,248 @@
+"""Typed messages decoded from the robot byte stream."""
+
+import json
+import time
+from functools import partial
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional, Union
+from robotapi.framing import FrameDecoder
+from robotapi.tracing import TRACER
+
+
+class Message:
+    """Base class for decoded robot messages.
+
+    Attributes:
+        serial: Serial number echoed by the firmware, or None
+        timestamp: time.monotonic() when the message was received
+    """
+
+    __slots__ = ("serial", "timestamp")
+
+    def __init__(self, serial: Optional[str] = None, timestamp: float = 0.0):
+        self.serial = serial
+        self.timestamp = timestamp
+
+    def _fields(self) -> tuple:
+        return (self.serial,)
+
+    def __eq__(self, other) -> bool:
+        # Receive time is deliberately ignored
+        return type(other) is type(self) and other._fields() == self._fields()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self._fields()!r}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the dictionary form used by parse_response()."""
+        raise NotImplementedError
+
+
+class Heartbeat(Message):
+    """``{Heartbeat}`` sent by the ESP32 bridge every second."""
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": "heartbeat"}
+
+
+class Reply(Message):
+    """Reply to a command, ``{<serial>_<value>}``."""
+
+    __slots__ = ()
+    value: Any = None
+
+    def _fields(self) -> tuple:
+        return (self.serial, self.value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": "reply", "serial": self.serial, "value": self.value}
+
+
+class Ack(Reply):
+    """Command acknowledgement, ``{<serial>_ok}`` or a bare ``{ok}``."""
+
+    __slots__ = ()
+    value = "ok"
+
+
+class BoolReply(Reply):
+    """Boolean sensor reply, ``{<serial>_true}`` or ``{<serial>_false}``.
+
+    Bare ``true``/``false`` tokens from older bridges decode to a
+    BoolReply without a serial.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, serial: Optional[str], value: bool, timestamp: float = 0.0):
+        self.serial = serial
+        self.value = value
+        self.timestamp = timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.serial is None:
+            return {"type": "obstacle", "detected": self.value}
+        return super().to_dict()
+
+
+class ValueReply(Reply):
+    """Sensor reading reply, ``{<serial>_<value>}``.
+
+    Numeric values are converted to int; anything else is kept as text.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, serial: Optional[str], value: Union[int, str], timestamp: float = 0.0):
+        self.serial = serial
+        self.value = value
+        self.timestamp = timestamp
+
+
+class Json(Message):
+    """Any other JSON object sent by the robot."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Dict[str, Any], timestamp: float = 0.0):
+        self.serial = None
+        self.data = data
+        self.timestamp = timestamp
+
+    def _fields(self) -> tuple:
+        return (self.data,)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.data
+
+
+# Largest number of distinct reply frames remembered by decode_frame()
+FACTORY_CACHE_SIZE = 4096
+
+# Message factories for short frames already seen, keyed by frame text.
+# Replies repeat as serial numbers roll over, so most frames hit here.
+_factories: Dict[str, Callable[[float], Message]] = {
+    "{Heartbeat}": partial(Heartbeat, None),
+    "{ok}": partial(Ack, None),
+}
+
+
+def _reply_factory(frame: str) -> Optional[Callable[[float], Message]]:
+    """Build a factory for a {<serial>_<value>} frame."""
+    split = frame.find("_")
+    if split < 0 or frame[-1] != "}":
+        return None
+    serial = frame[1:split]
+    value = frame[split + 1:-1]
+    if value == "ok":
+        return partial(Ack, serial)
+    if value == "true":
+        return partial(BoolReply, serial, True)
+    if value == "false":
+        return partial(BoolReply, serial, False)
+    if value.isdigit() or (value[:1] == "-" and value[1:].isdigit()):
+        return partial(ValueReply, serial, int(value))
+    return partial(ValueReply, serial, value)
+
+
+def _decode_reply(frame: str, timestamp: float) -> Optional[Message]:
+    factory = _reply_factory(frame)
+    if factory is None:
+        return None
+    if len(_factories) >= FACTORY_CACHE_SIZE:
+        _factories.clear()
+        _factories["{Heartbeat}"] = partial(Heartbeat, None)
+        _factories["{ok}"] = partial(Ack, None)
+    _factories[frame] = factory
+    return factory(timestamp)
+
+
+def _decode_json(frame: str, timestamp: float) -> Optional[Message]:
+    try:
+        data = json.loads(frame)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return Json(data, timestamp)
+
+
+def _decode_bare(frame: str, timestamp: float) -> Optional[Message]:
+    token = frame.strip().lower()
+    if token == "true":
+        return BoolReply(None, True, timestamp)
+    if token == "false":
+        return BoolReply(None, False, timestamp)
+    return None
+
+
+# Frame classifier keyed by the character after the opening brace
+_DECODERS: Dict[str, Callable[[str, float], Optional[Message]]] = {
+    '"': _decode_json,
+    "_": _decode_reply,
+}
+_DECODERS.update((digit, _decode_reply) for digit in "0123456789")
+
+
+def decode_frame(frame: str, timestamp: Optional[float] = None) -> Optional[Message]:
+    """Decode one frame into a typed message.
+
+    Args:
+        frame: Frame from FrameDecoder, e.g. ``{Heartbeat}`` or ``{7_ok}``
+        timestamp: Receive time (defaults to time.monotonic())
+
+    Returns:
+        Decoded message, or None if the frame is not understood
+    """
+    start = perf_counter_ns() if TRACER.enabled else 0
+    if timestamp is None:
+        timestamp = time.monotonic()
+    factory = _factories.get(frame)
+    if factory is not None:
+        message = factory(timestamp)
+    elif frame[:1] != "{":
+        message = _decode_bare(frame, timestamp)
+    else:
+        message = _DECODERS.get(frame[1:2], _decode_json)(frame, timestamp)
+    if start:
+        TRACER.record("decode_frame", "parse", start)
+    return message
+
+
+class MessageDecoder:
+    """Turns received bytes straight into typed messages."""
+
+    def __init__(self, frames: Optional[FrameDecoder] = None):
+        """Initialize decoder.
+
+        Args:
+            frames: Frame decoder to use (a new one by default)
+        """
+        self.frames = frames if frames is not None else FrameDecoder()
+
+    def reset(self) -> None:
+        """Discard buffered data."""
+        self.frames.reset()
+
+    def feed(self, data, timestamp: Optional[float] = None) -> List[Message]:
+        """Add received bytes and return every message they complete.
+
+        Args:
+            data: Bytes-like object from the transport
+            timestamp: Receive time (defaults to time.monotonic())
+
+        Returns:
+            Decoded messages in arrival order
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        messages = []
+        for frame in self.frames.feed(data):
+            message = decode_frame(frame, timestamp)
+            if message is not None:
+                messages.append(message)
+        return messages
@@ -0,0 +1,556 @@
+"""Counters and histograms for diagnosing the robot link.
+
+Metrics are created up front, so recording one is an attribute lookup
+and an integer add: counters hold a number and histograms a fixed list of
+bucket counts. Updates are not locked; under the GIL an increment racing
+another thread's can very occasionally be lost, which is acceptable for
+diagnostics and keeps recording cheap on the I/O threads.
+
+A MetricsRegistry renders everything it holds in the Prometheus text
+exposition format for scraping, or as a plain dictionary via snapshot().
+"""
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from robotapi.protocol import HEARTBEAT_INTERVAL, REPLY_COMMANDS
+
+# Default histogram bounds in seconds, from a fast LAN reply to a stalled link
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Heartbeat inter-arrival bounds in seconds around the bridge's 1 s period
+HEARTBEAT_BUCKETS = (0.5, 0.9, 0.95, 1.0, 1.05, 1.1, 1.25, 1.5, 2.0, 3.0, 5.0)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    """Render label pairs as {name="value",...}, or "" if there are none."""
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value the way Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    __slots__ = ("name", "help", "value")
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        """Add to the count.
+
+        Args:
+            amount: Non-negative increment
+        """
+        self.value += amount
+
+    def samples(self, labels: Sequence[Tuple[str, str]]) -> List[str]:
+        """Prometheus sample lines."""
+        return [f"{self.name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+    def snapshot(self) -> int:
+        """Current count."""
+        return self.value
+
+    def reset(self) -> None:
+        """Zero the count."""
+        self.value = 0
+
+
+class Histogram:
+    """Distribution of observations over fixed buckets.
+
+    Each observation lands in the first bucket whose upper bound is at
+    least the value; values above every bound land in the +Inf bucket.
+    """
+
+    __slots__ = ("name", "help", "bounds", "counts", "sum", "count")
+
+    def __init__(self, name: str, help: str, bounds: Sequence[float] = LATENCY_BUCKETS):
+        """Initialize histogram.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            bounds: Strictly increasing bucket upper bounds
+        """
+        self.name = name
+        self.help = help
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation.
+
+        Args:
+            value: Observed value (seconds for latencies)
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, fraction: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket holding it.
+
+        Args:
+            fraction: Quantile between 0 and 1
+
+        Returns:
+            Bucket upper bound (inf past the last bound), or 0.0 when empty
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return float("inf")
+
+    def samples(self, labels: Sequence[Tuple[str, str]]) -> List[str]:
+        """Prometheus sample lines with cumulative buckets."""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            bucket_labels = _format_labels(tuple(labels) + (("le", _format_value(bound)),))
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        suffix = _format_labels(labels)
+        lines.append(f"{self.name}_sum{suffix} {_format_value(self.sum)}")
+        lines.append(f"{self.name}_count{suffix} {self.count}")
+        return lines
+
+    def snapshot(self) -> Dict[str, float]:
+        """Count, sum, mean and estimated p50/p99."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.50),
+            "p99": self.quantile(0.99),
+        }
+
+    def reset(self) -> None:
+        """Forget all observations."""
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.sum = 0.0
+        self.count = 0
+
+
+class HistogramFamily:
+    """Histograms sharing a name, one per value of a label."""
+
+    __slots__ = ("name", "help", "label", "bounds", "children", "_lock")
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label: str,
+        values: Iterable[Union[int, str]] = (),
+        bounds: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """Initialize family.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            label: Label distinguishing the histograms
+            values: Label values to preallocate
+            bounds: Bucket upper bounds
+        """
+        self.name = name
+        self.help = help
+        self.label = label
+        self.bounds = tuple(bounds)
+        self.children: Dict[Union[int, str], Histogram] = {
+            value: Histogram(name, help, self.bounds) for value in values
+        }
+        self._lock = threading.Lock()
+
+    def observe(self, value: Union[int, str], observation: float) -> None:
+        """Record one observation for a label value.
+
+        Args:
+            value: Label value; unknown values get a histogram on first use
+            observation: Observed value
+        """
+        child = self.children.get(value)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(value, Histogram(self.name, self.help, self.bounds))
+        child.observe(observation)
+
+    def samples(self, labels: Sequence[Tuple[str, str]]) -> List[str]:
+        """Prometheus sample lines for every histogram with observations."""
+        lines = []
+        for value, child in sorted(self.children.items(), key=lambda item: str(item[0])):
+            if child.count:
+                lines.extend(child.samples(tuple(labels) + ((self.label, str(value)),)))
+        return lines
+
+    def snapshot(self) -> Dict[Union[int, str], Dict[str, float]]:
+        """Snapshot of each histogram with observations, by label value."""
+        return {value: child.snapshot() for value, child in self.children.items() if child.count}
+
+    def reset(self) -> None:
+        """Forget all observations."""
+        for child in self.children.values():
+            child.reset()
+
+
+Metric = Union[Counter, Histogram, HistogramFamily]
+
+
+class MetricsRegistry:
+    """Named metrics of one robot link, with Prometheus text export."""
+
+    def __init__(self, labels: Optional[Dict[str, str]] = None):
+        """Initialize registry.
+
+        Args:
+            labels: Labels added to every sample, e.g. {"robot": "10.0.0.57"}
+        """
+        self.labels: Tuple[Tuple[str, str], ...] = tuple((labels or {}).items())
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        """Add a metric, or return the existing one of the same name and kind."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric):
+            raise ValueError(f"Metric {metric.name} already registered as {type(existing).__name__}")
+        return existing
+
+    def counter(self, name: str, help: str) -> Counter:
+        """Create or look up a counter.
+
+        Args:
+            name: Metric name, ending in _total by convention
+            help: One-line description
+
+        Returns:
+            Counter
+
+        Raises:
+            ValueError: If the name is taken by another kind of metric
+        """
+        return self._register(Counter(name, help))
+
+    def histogram(self, name: str, help: str, bounds: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Create or look up a histogram.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            bounds: Bucket upper bounds
+
+        Returns:
+            Histogram
+
+        Raises:
+            ValueError: If the name is taken by another kind of metric
+        """
+        return self._register(Histogram(name, help, bounds))
+
+    def histogram_family(
+        self,
+        name: str,
+        help: str,
+        label: str,
+        values: Iterable[Union[int, str]] = (),
+        bounds: Sequence[float] = LATENCY_BUCKETS,
+    ) -> HistogramFamily:
+        """Create or look up a family of labelled histograms.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            label: Label distinguishing the histograms
+            values: Label values to preallocate
+            bounds: Bucket upper bounds
+
+        Returns:
+            HistogramFamily
+
+        Raises:
+            ValueError: If the name is taken by another kind of metric
+        """
+        return self._register(HistogramFamily(name, help, label, values, bounds))
+
+    def get(self, name: str) -> Optional[Metric]:
+        """Look up a metric by name.
+
+        Returns:
+            Metric, or None if not registered
+        """
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return the current value of every metric.
+
+        Returns:
+            Dictionary keyed by metric name: counts for counters, a dict
+            of count/sum/mean/p50/p99 for histograms, and such dicts keyed
+            by label value for histogram families
+        """
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Text ending in a newline
+        """
+        return render([self])
+
+    def reset(self) -> None:
+        """Zero every metric."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+
+class LinkMetrics:
+    """The metrics recorded for one robot connection.
+
+    Connection counts traffic and reconnects, HeartbeatMonitor times
+    heartbeats, CommandPipeline records command-to-reply round trips by
+    command number and RobotController counts obstacle queries.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[MetricsRegistry] = None,
+        heartbeat_period: float = HEARTBEAT_INTERVAL,
+    ):
+        """Initialize metrics.
+
+        Args:
+            registry: Registry to create the metrics in (a new unlabelled
+                      one by default)
+            heartbeat_period: Seconds between the bridge's heartbeats, used
+                              to count missed and late ones
+        """
+        self.heartbeat_period = heartbeat_period
+        self.registry = registry if registry is not None else MetricsRegistry()
+        r = self.registry
+        self.bytes_sent = r.counter("robotapi_bytes_sent_total", "Bytes sent to the robot")
+        self.messages_sent = r.counter("robotapi_messages_sent_total", "Writes to the robot")
+        self.bytes_received = r.counter("robotapi_bytes_received_total", "Bytes received from the robot")
+        self.messages_received = r.counter(
+            "robotapi_messages_received_total", "Complete frames received from the robot"
+        )
+        self.connects = r.counter("robotapi_connects_total", "Successful connects")
+        self.reconnects = r.counter("robotapi_reconnects_total", "Connects after the first")
+        self.connections_lost = r.counter(
+            "robotapi_connections_lost_total", "Connections closed by a send or receive failure"
+        )
+        self.heartbeat_interval = r.histogram(
+            "robotapi_heartbeat_interval_seconds", "Time between heartbeats", HEARTBEAT_BUCKETS
+        )
+        self.heartbeat_jitter = r.histogram(
+            "robotapi_heartbeat_jitter_seconds", "Change in time between consecutive heartbeats"
+        )
+        self.heartbeat_reply = r.histogram(
+            "robotapi_heartbeat_reply_seconds", "Heartbeat arrival to reply sent"
+        )
+        self.heartbeats_missed = r.counter(
+            "robotapi_heartbeats_missed_total", "Heartbeats that never arrived, judged by gaps"
+        )
+        self.heartbeats_late = r.counter(
+            "robotapi_heartbeats_late_total", "Heartbeats answered too late for the bridge to count"
+        )
+        self.command_rtt = r.histogram_family(
+            "robotapi_command_rtt_seconds", "Command sent to reply received", "n", sorted(REPLY_COMMANDS)
+        )
+        self.reply_timeouts = r.counter(
+            "robotapi_reply_timeouts_total", "Requests whose caller gave up waiting for the reply"
+        )
+        self.commands_expired = r.counter(
+            "robotapi_commands_expired_total", "Unanswered commands evicted from the pipeline"
+        )
+        self.obstacle_queries = r.counter("robotapi_obstacle_queries_total", "Obstacle queries sent")
+        self.obstacles_detected = r.counter(
+            "robotapi_obstacles_detected_total", "Obstacle queries answered true"
+        )
+        self._has_connected = False
+        self._last_heartbeat: Optional[float] = None
+        self._last_interval: Optional[float] = None
+
+    def connected(self) -> None:
+        """Count a successful connect."""
+        self.connects.inc()
+        if self._has_connected:
+            self.reconnects.inc()
+        self._has_connected = True
+        self._last_heartbeat = self._last_interval = None
+
+    def heartbeat(self, timestamp: float) -> None:
+        """Record a heartbeat's arrival.
+
+        Args:
+            timestamp: time.monotonic() when it was received
+        """
+        last = self._last_heartbeat
+        self._last_heartbeat = timestamp
+        if last is None:
+            return
+        interval = timestamp - last
+        self.heartbeat_interval.observe(interval)
+        if interval > 1.5 * self.heartbeat_period:
+            self.heartbeats_missed.inc(round(interval / self.heartbeat_period) - 1)
+        if self._last_interval is not None:
+            self.heartbeat_jitter.observe(abs(interval - self._last_interval))
+        self._last_interval = interval
+
+    @property
+    def last_heartbeat(self) -> Optional[float]:
+        """time.monotonic() when the last heartbeat arrived, or None."""
+        return self._last_heartbeat
+
+    def heartbeat_answered(self, delay: float) -> None:
+        """Record the time taken to answer a heartbeat.
+
+        Args:
+            delay: Seconds from its arrival to the reply being sent
+        """
+        self.heartbeat_reply.observe(delay)
+        if delay > self.heartbeat_period:
+            self.heartbeats_late.inc()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return the current value of every metric (see MetricsRegistry.snapshot)."""
+        return self.registry.snapshot()
+
+    def render(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        return self.registry.render()
+
+
+def render(registries: Iterable[MetricsRegistry]) -> str:
+    """Render several registries as one exposition.
+
+    HELP and TYPE lines are written once per metric name, so registries
+    told apart by their labels (one per robot) can be scraped together.
+
+    Args:
+        registries: Registries to render
+
+    Returns:
+        Text ending in a newline
+    """
+    families: Dict[str, Tuple[Metric, List[str]]] = {}
+    for registry in list(registries):
+        for metric in list(registry._metrics.values()):
+            entry = families.setdefault(metric.name, (metric, []))
+            entry[1].extend(metric.samples(registry.labels))
+    lines = []
+    for name, (metric, samples) in families.items():
+        kind = "counter" if isinstance(metric, Counter) else "histogram"
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves registries over HTTP for Prometheus to scrape.
+
+    Every path answers with the current metrics, rendered on each request.
+    """
+
+    def __init__(self, registries: Iterable[MetricsRegistry], host: str = "127.0.0.1", port: int = 9100):
+        """Initialize server.
+
+        Args:
+            registries: Registries to expose; the list may grow while serving
+            host: Interface to listen on
+            port: TCP port (0 picks a free one)
+        """
+        self.registries = registries
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Bind the port and start serving in a background thread."""
+        if self._server is not None:
+            return
+        registries = self.registries
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = render(registries).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="robotapi-metrics", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        """Check if the server is running.
+
+        Returns:
+            True if running
+        """
+        return self._server is not None
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
@@ -0,0 +1,104 @@
+"""Handles for movements running in the background."""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+from robotapi.pipeline import CommandFuture
+
+# Extra time allowed for a firmware-timed move's reply to arrive
+TIMED_MOVE_GRACE = 0.5
+
+
+class Motion(Future):
+    """Future of one timed movement, resolved once the car has stopped.
+
+    The result is True if the movement ran its full duration and False if
+    it ended early: stopped for an obstacle (obstacle is then True), by
+    stop(), or superseded by a newer movement (interrupted is then True).
+    cancel() stops the car; result() then raises CancelledError.
+
+    Attributes:
+        direction: Movement direction (DIR_*)
+        duration: Requested duration in seconds
+        speed: Speed (0-100)
+        obstacle: Stopped because an obstacle was detected
+        interrupted: Stopped by stop(), cancel() or a newer movement
+        started_at: time.monotonic() when the drive command was sent
+        ended_at: time.monotonic() when the movement finished
+    """
+
+    def __init__(
+        self,
+        direction: int,
+        duration: float,
+        speed: int,
+        on_cancel: Optional[Callable[["Motion"], None]] = None,
+    ):
+        """Initialize motion.
+
+        Args:
+            direction: Movement direction (DIR_*)
+            duration: Duration in seconds
+            speed: Speed (0-100)
+            on_cancel: Called with the motion when cancel() succeeds
+        """
+        super().__init__()
+        self.direction = direction
+        self.duration = duration
+        self.speed = speed
+        self.obstacle = False
+        self.interrupted = False
+        self.started_at: Optional[float] = None
+        self.ended_at: Optional[float] = None
+        # Firmware-timed move awaiting its reply (timed_moves only)
+        self.reply: Optional[CommandFuture] = None
+        # Set to end the wait early; also set when a wait's predicate matches
+        self.wake = threading.Event()
+        self._on_cancel = on_cancel
+        # Orders cancel() against finish()/fail(); setting a cancelled
+        # future raises on Python 3.8+ and overwrites it on 3.7
+        self._resolve_lock = threading.Lock()
+
+    def interrupt(self) -> None:
+        """End the movement's wait early."""
+        self.interrupted = True
+        self.wake.set()
+
+    def cancel(self) -> bool:
+        """Stop the movement.
+
+        Returns:
+            True if it was still running and has been stopped
+        """
+        with self._resolve_lock:
+            if self.cancelled():
+                return True
+            if not super().cancel():
+                return False
+        self.interrupt()
+        if self._on_cancel is not None:
+            self._on_cancel(self)
+        return True
+
+    def finish(self, completed: bool) -> None:
+        """Resolve the future once the car has stopped.
+
+        Args:
+            completed: True if the full duration elapsed
+        """
+        self.ended_at = time.monotonic()
+        with self._resolve_lock:
+            if not self.done():  # Else cancelled meanwhile
+                self.set_result(completed)
+
+    def fail(self, error: BaseException) -> None:
+        """Resolve the future with the error that ended the movement.
+
+        Args:
+            error: Exception raised while driving
+        """
+        self.ended_at = time.monotonic()
+        with self._resolve_lock:
+            if not self.done():
+                self.set_exception(error)
@@ -0,0 +1,134 @@
+"""Byte-rate pacing for the robot's ESP32-to-Arduino serial link."""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+from robotapi.protocol import (
+    SERIAL_MAX,
+    UART_BYTES_PER_SECOND,
+    encode_command,
+    uart_size,
+    with_serial,
+)
+
+# Default burst allowance, in seconds of link time
+BURST_SECONDS = 0.1
+
+# Shortfall treated as rounding error, so waiting exactly delay() suffices
+TOKEN_EPSILON = 1e-6
+
+
+def command_cost(cmd: Dict[str, Any]) -> int:
+    """UART bytes a command costs once tagged with the longest serial.
+
+    Args:
+        cmd: Command dictionary from one of the protocol builders
+
+    Returns:
+        Byte count on the serial link
+    """
+    if "H" in cmd:
+        cmd = with_serial(cmd, str(SERIAL_MAX))
+    return uart_size(encode_command(cmd))
+
+
+class TokenBucket:
+    """Token bucket metering bytes onto a rate-limited link.
+
+    Tokens are bytes. They refill at rate per second up to capacity; a
+    send that finds too few tokens must wait delay() seconds. Thread-safe,
+    so one bucket can be shared by every producer using the same link.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Initialize bucket, initially full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (defaults to BURST_SECONDS of rate)
+        """
+        if rate <= 0:
+            raise ValueError("Token rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate * BURST_SECONDS
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def available(self, now: Optional[float] = None) -> float:
+        """Return the tokens currently available.
+
+        Args:
+            now: Current monotonic time (defaults to time.monotonic())
+        """
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            return self._tokens
+
+    def delay(self, amount: float, now: Optional[float] = None) -> float:
+        """Seconds until amount tokens are available.
+
+        Args:
+            amount: Tokens wanted
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            0.0 if available now
+        """
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            missing = min(amount, self.capacity) - self._tokens
+        if missing <= TOKEN_EPSILON:
+            return 0.0
+        return missing / self.rate
+
+    def consume(self, amount: float, now: Optional[float] = None) -> bool:
+        """Take amount tokens if available.
+
+        Amounts above capacity are allowed once the bucket is full, so an
+        oversized command is delayed rather than blocked forever.
+
+        Args:
+            amount: Tokens to take
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            True if the tokens were taken
+        """
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            if self._tokens + TOKEN_EPSILON < min(amount, self.capacity):
+                return False
+            self._tokens -= amount
+            return True
+
+    def charge(self, amount: float, now: Optional[float] = None) -> None:
+        """Take amount tokens unconditionally, going into debt if needed.
+
+        Used for traffic that must not wait (e.g. stop) but still occupies
+        the link.
+
+        Args:
+            amount: Tokens to take
+            now: Current monotonic time (defaults to time.monotonic())
+        """
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            self._tokens -= amount
+
+
+def uart_bucket(share: float = 1.0) -> TokenBucket:
+    """Token bucket for a share of the ESP32-to-Arduino UART.
+
+    Args:
+        share: Fraction of UART_BYTES_PER_SECOND to allow
+
+    Returns:
+        New bucket
+    """
+    return TokenBucket(UART_BYTES_PER_SECOND * share)
@@ -0,0 +1,156 @@
+"""Matching of firmware replies to in-flight commands by serial number."""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+from robotapi.protocol import REPLY_COMMANDS, SerialCounter, with_serial
+from robotapi.messages import Message, Reply
+from robotapi.metrics import LinkMetrics
+from robotapi.exceptions import CommandError, RobotAPIError
+
+# Default limit on commands awaiting a reply
+MAX_IN_FLIGHT = 32
+# Seconds after which an unanswered command may be evicted
+REPLY_TIMEOUT = 2.0
+
+
+class CommandFuture(Future):
+    """Future resolved with the value of a command's reply.
+
+    The result is True/False for boolean replies, an int for numeric
+    replies and the raw text (usually "ok") otherwise.
+    """
+
+    def __init__(self, command: Dict[str, Any]):
+        """Initialize future.
+
+        Args:
+            command: Serial-tagged command this future is waiting on
+        """
+        super().__init__()
+        self.command = command
+        self.serial: str = command["H"]
+        self.sent_at = time.monotonic()
+        self.replied_at: Optional[float] = None
+
+    @property
+    def rtt(self) -> Optional[float]:
+        """Command-to-reply round trip in seconds, once replied."""
+        if self.replied_at is None:
+            return None
+        return self.replied_at - self.sent_at
+
+
+class CommandPipeline:
+    """Assigns rolling serial numbers and resolves futures from replies.
+
+    Several commands can be in flight at once; each reply carrying a known
+    serial resolves exactly the future of the command that caused it.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        reply_timeout: float = REPLY_TIMEOUT,
+        metrics: Optional[LinkMetrics] = None,
+    ):
+        """Initialize pipeline.
+
+        Args:
+            max_in_flight: Maximum commands awaiting a reply
+            reply_timeout: Age in seconds after which an unanswered command
+                           is failed to make room for new ones
+            metrics: Optional metrics to record round trips and evictions in
+        """
+        self.max_in_flight = max_in_flight
+        self.reply_timeout = reply_timeout
+        self.metrics = metrics
+        self._serials = SerialCounter()
+        self._pending: Dict[str, CommandFuture] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of commands awaiting a reply."""
+        return len(self._pending)
+
+    def prepare(self, cmd: Dict[str, Any]) -> Tuple[Dict[str, Any], CommandFuture]:
+        """Tag a command with a serial number and register its future.
+
+        Args:
+            cmd: Command dictionary whose N echoes the serial
+
+        Returns:
+            Tuple of (tagged command, future)
+
+        Raises:
+            CommandError: If the command has no serial reply or the
+                          pipeline is full
+        """
+        if cmd.get("N") not in REPLY_COMMANDS:
+            raise CommandError(f"Command N={cmd.get('N')} does not reply with a serial number")
+
+        expired = []
+        with self._lock:
+            if len(self._pending) >= self.max_in_flight:
+                cutoff = time.monotonic() - self.reply_timeout
+                expired = [f for f in self._pending.values() if f.sent_at < cutoff]
+                for stale in expired:
+                    del self._pending[stale.serial]
+            if len(self._pending) >= self.max_in_flight:
+                raise CommandError("Too many commands in flight")
+            tagged = with_serial(cmd, self._serials.next())
+            future = CommandFuture(tagged)
+            stale = self._pending.pop(future.serial, None)
+            if stale is not None:
+                expired.append(stale)
+            self._pending[future.serial] = future
+
+        if expired and self.metrics is not None:
+            self.metrics.commands_expired.inc(len(expired))
+        for stale in expired:
+            stale.set_exception(CommandError(f"No reply to serial {stale.serial}"))
+        return tagged, future
+
+    def discard(self, future: CommandFuture) -> None:
+        """Forget a future whose command could not be sent.
+
+        Args:
+            future: Future returned by prepare()
+        """
+        with self._lock:
+            if self._pending.get(future.serial) is future:
+                del self._pending[future.serial]
+
+    def resolve(self, response: Message) -> bool:
+        """Resolve the future matching a reply.
+
+        Args:
+            response: Decoded message
+
+        Returns:
+            True if the response completed an in-flight command
+        """
+        if response.serial is None or not isinstance(response, Reply):
+            return False
+        with self._lock:
+            future = self._pending.pop(response.serial, None)
+        if future is None:
+            return False
+        future.replied_at = response.timestamp
+        if self.metrics is not None:
+            self.metrics.command_rtt.observe(future.command["N"], future.replied_at - future.sent_at)
+        future.set_result(response.value)
+        return True
+
+    def fail_all(self, error: RobotAPIError) -> None:
+        """Fail every in-flight command.
+
+        Args:
+            error: Exception to set on each pending future
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.set_exception(error)
@@ -1,19 +1,51 @@
 """Protocol encoding/decoding for robot communication."""
 
+import itertools
 import json
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, FrozenSet, Optional, Tuple
+from robotapi.messages import decode_frame
 
 # Command numbers
+CMD_TIMED_MOVEMENT = 2
 CMD_MOVEMENT = 3
+CMD_MOTOR_SPEEDS = 4
+CMD_SERVO = 5
+CMD_LED = 8
 CMD_OBSTACLE = 21
+CMD_LINE_TRACKING = 22
+CMD_GROUND = 23
 CMD_CAMERA = 106
 CMD_STOP = 100
+CMD_JOYSTICK = 102
 
 # Movement directions
 DIR_LEFT = 1
 DIR_RIGHT = 2
 DIR_FORWARD = 3
 DIR_BACKWARD = 4
+# Joystick (N=102) direction that stops the car
+JOYSTICK_STOP = 9
+
+# Ultrasonic query modes (N=21 D1): obstacle within 20 cm, or distance in cm
+ULTRASONIC_OBSTACLE = 1
+ULTRASONIC_DISTANCE = 2
+
+# Line tracking sensors (N=22 D1), each answered with its analog reading
+LINE_LEFT = 0
+LINE_MIDDLE = 1
+LINE_RIGHT = 2
+
+# Commands whose firmware handler echoes the serial number ("H") in its
+# reply. N=2 (timed move) echoes it when the timer expires.
+REPLY_COMMANDS = frozenset({1, 2, 3, 4, 5, 8, 21, 22, 23, 110})
+
+# Serial numbers roll over within this range to keep replies short
+SERIAL_MIN = 1
+SERIAL_MAX = 999
+# "H" of commands sent without a serial. The firmware still echoes it,
+# e.g. {22_ok}, so rolling serials skip it.
+UNTAGGED_SERIAL = 22
 
 # Camera directions
 CAM_TILT_DOWN = 1
@@ -22,6 +54,32 @@ CAM_PAN_RIGHT = 3
 CAM_PAN_LEFT = 4
 CAM_CENTER = 5
 
+# Camera servos (N=5 D1) and the angles the firmware accepts, in degrees.
+# The firmware truncates D2 to a multiple of SERVO_STEP and clamps it.
+SERVO_PAN = 1
+SERVO_TILT = 2
+SERVO_STEP = 10
+SERVO_CENTER = 90
+PAN_MIN, PAN_MAX = 10, 170
+TILT_MIN, TILT_MAX = 30, 110
+
+# Speed range accepted by the movement command
+SPEED_MIN = 0
+SPEED_MAX = 100
+
+# The ESP32 bridge sends {Heartbeat} about once a second and drops the
+# client, stopping the car, after more than MISSED_HEARTBEAT_LIMIT in a row
+# go unanswered
+HEARTBEAT_INTERVAL = 1.0
+MISSED_HEARTBEAT_LIMIT = 3
+
+# ESP32-to-Arduino serial link (Serial2, 8N1: ten bit times per byte)
+UART_BAUD = 9600
+UART_BYTES_PER_SECOND = UART_BAUD // 10
+
+# Compact JSON: the default ", " and ": " separators cost a byte each
+_compact_json = json.JSONEncoder(separators=(",", ":")).encode
+
 
 def build_movement_cmd(direction: int, speed: int) -> Dict[str, Any]:
     """Build movement command.
@@ -33,7 +91,86 @@ def build_movement_cmd(direction: int, speed: int) -> Dict[str, Any]:
     Returns:
         Command dictionary
     """
-    return {"H": 22, "N": CMD_MOVEMENT, "D1": direction, "D2": speed}
+    return {"H": UNTAGGED_SERIAL, "N": CMD_MOVEMENT, "D1": direction, "D2": speed}
+
+
+def build_timed_movement_cmd(direction: int, speed: int, duration: float) -> Dict[str, Any]:
+    """Build timed movement command.
+    
+    The firmware stops the car itself when the time is up and then
+    replies with ``{H_ok}``.
+    
+    Args:
+        direction: Movement direction (DIR_LEFT, DIR_RIGHT, DIR_FORWARD, DIR_BACKWARD)
+        speed: Speed value (0-100)
+        duration: Duration in seconds (sent as whole milliseconds)
+        
+    Returns:
+        Command dictionary
+    """
+    return {
+        "H": UNTAGGED_SERIAL,
+        "N": CMD_TIMED_MOVEMENT,
+        "D1": direction,
+        "D2": speed,
+        "T": max(0, int(round(duration * 1000))),
+    }
+
+
+def build_motor_speeds_cmd(left: int, right: int) -> Dict[str, Any]:
+    """Build per-side motor speed command.
+    
+    Args:
+        left: Left motor speed (0-255)
+        right: Right motor speed (0-255)
+        
+    Returns:
+        Command dictionary
+    """
+    return {"H": UNTAGGED_SERIAL, "N": CMD_MOTOR_SPEEDS, "D1": left, "D2": right}
+
+
+def build_joystick_cmd(direction: int) -> Dict[str, Any]:
+    """Build joystick (rocker) command.
+    
+    The firmware does not reply to joystick commands.
+    
+    Args:
+        direction: 1=forward, 2=backward, 3=left, 4=right (not the DIR_*
+                   order), 5-8 for the diagonals, JOYSTICK_STOP to stop
+        
+    Returns:
+        Command dictionary
+    """
+    return {"H": UNTAGGED_SERIAL, "N": CMD_JOYSTICK, "D1": direction}
+
+
+def build_led_cmd(led: int, red: int, green: int, blue: int) -> Dict[str, Any]:
+    """Build LED colour command.
+    
+    Args:
+        led: LED position (1=left, 2=front, 3=right, 4=back, 5=center)
+        red: Red value (0-255)
+        green: Green value (0-255)
+        blue: Blue value (0-255)
+        
+    Returns:
+        Command dictionary
+    """
+    return {"H": UNTAGGED_SERIAL, "N": CMD_LED, "D1": led, "D2": red, "D3": green, "D4": blue}
+
+
+def build_servo_cmd(servo: int, angle: int) -> Dict[str, Any]:
+    """Build absolute servo angle command.
+    
+    Args:
+        servo: SERVO_PAN or SERVO_TILT
+        angle: Angle in degrees (truncated to SERVO_STEP by the firmware)
+        
+    Returns:
+        Command dictionary
+    """
+    return {"H": UNTAGGED_SERIAL, "N": CMD_SERVO, "D1": servo, "D2": angle}
 
 
 def build_obstacle_cmd() -> Dict[str, Any]:
@@ -42,7 +179,44 @@ def build_obstacle_cmd() -> Dict[str, Any]:
     Returns:
         Command dictionary
     """
-    return {"H": 22, "N": CMD_OBSTACLE, "D1": 1}
+    return {"H": UNTAGGED_SERIAL, "N": CMD_OBSTACLE, "D1": ULTRASONIC_OBSTACLE}
+
+
+def build_distance_cmd() -> Dict[str, Any]:
+    """Build ultrasonic distance command.
+    
+    The firmware replies with the measured distance, ``{H_<cm>}``.
+    
+    Returns:
+        Command dictionary
+    """
+    return {"H": UNTAGGED_SERIAL, "N": CMD_OBSTACLE, "D1": ULTRASONIC_DISTANCE}
+
+
+def build_line_tracking_cmd(sensor: int) -> Dict[str, Any]:
+    """Build line tracking sensor command.
+    
+    The firmware replies with the sensor's analog reading, ``{H_<value>}``.
+    
+    Args:
+        sensor: Sensor to read (LINE_LEFT, LINE_MIDDLE, LINE_RIGHT)
+        
+    Returns:
+        Command dictionary
+    """
+    return {"H": UNTAGGED_SERIAL, "N": CMD_LINE_TRACKING, "D1": sensor}
+
+
+def build_ground_cmd() -> Dict[str, Any]:
+    """Build ground detection command.
+    
+    The firmware replies ``{H_true}`` while the car is on the ground and
+    ``{H_false}`` once it has been lifted.
+    
+    Returns:
+        Command dictionary
+    """
+    return {"H": UNTAGGED_SERIAL, "N": CMD_GROUND}
 
 
 def build_camera_cmd(direction: int) -> Dict[str, Any]:
@@ -55,7 +229,7 @@ def build_camera_cmd(direction: int) -> Dict[str, Any]:
     Returns:
         Command dictionary
     """
-    return {"H": 22, "N": CMD_CAMERA, "D1": direction}
+    return {"H": UNTAGGED_SERIAL, "N": CMD_CAMERA, "D1": direction}
 
 
 def build_stop_cmd() -> Dict[str, Any]:
@@ -67,41 +241,188 @@ def build_stop_cmd() -> Dict[str, Any]:
     return {"N": CMD_STOP}
 
 
+class SerialCounter:
+    """Thread-safe rolling source of command serial numbers."""
+
+    def __init__(
+        self,
+        start: int = SERIAL_MIN,
+        stop: int = SERIAL_MAX,
+        reserved: FrozenSet[int] = frozenset({UNTAGGED_SERIAL}),
+    ):
+        """Initialize counter.
+
+        Args:
+            start: First serial number
+            stop: Last serial number before rolling over to start
+            reserved: Serials never handed out, since untagged commands'
+                      replies carry them
+        """
+        self._cycle = itertools.cycle([n for n in range(start, stop + 1) if n not in reserved])
+        self._lock = threading.Lock()
+
+    def next(self) -> str:
+        """Return the next serial number.
+
+        Returns:
+            Serial number as a string, ready for the "H" field
+        """
+        with self._lock:
+            return str(next(self._cycle))
+
+
+def with_serial(cmd: Dict[str, Any], serial: str) -> Dict[str, Any]:
+    """Return a copy of a command tagged with a serial number.
+
+    The firmware reads "H" as a string (``char *temp = doc["H"]``), so the
+    serial is sent as a JSON string to have it echoed in the reply.
+
+    Args:
+        cmd: Command dictionary
+        serial: Serial number from SerialCounter
+
+    Returns:
+        Command dictionary with "H" set
+    """
+    tagged = dict(cmd)
+    tagged["H"] = serial
+    return tagged
+
+
 def encode_command(cmd: Dict[str, Any]) -> bytes:
-    """Encode command dictionary to JSON bytes.
+    """Encode command dictionary to compact JSON bytes.
     
     Args:
         cmd: Command dictionary
         
     Returns:
-        JSON-encoded bytes
+        JSON-encoded bytes without whitespace
     """
-    return json.dumps(cmd).encode("utf-8")
+    return _compact_json(cmd).encode("utf-8")
 
 
-def parse_response(data: str) -> Optional[Dict[str, Any]]:
-    """Parse JSON response from robot.
+# Pre-encoded fixed commands
+STOP_COMMAND = encode_command(build_stop_cmd())
+OBSTACLE_COMMAND = encode_command(build_obstacle_cmd())
+_CAMERA_COMMANDS: Dict[int, bytes] = {
+    direction: encode_command(build_camera_cmd(direction))
+    for direction in (CAM_TILT_DOWN, CAM_TILT_UP, CAM_PAN_RIGHT, CAM_PAN_LEFT, CAM_CENTER)
+}
+_MOVEMENT_COMMANDS: Dict[Tuple[int, int], bytes] = {
+    (direction, speed): encode_command(build_movement_cmd(direction, speed))
+    for direction in (DIR_LEFT, DIR_RIGHT, DIR_FORWARD, DIR_BACKWARD)
+    for speed in range(SPEED_MIN, SPEED_MAX + 1)
+}
+
+
+def encode_movement(direction: int, speed: int) -> bytes:
+    """Return the encoded movement command for a direction and speed.
     
     Args:
-        data: Response string
+        direction: Movement direction (DIR_LEFT, DIR_RIGHT, DIR_FORWARD, DIR_BACKWARD)
+        speed: Speed value (0-100)
         
     Returns:
-        Parsed dictionary or None if not valid JSON
+        Pre-encoded command bytes
     """
-    data = data.strip()
+    data = _MOVEMENT_COMMANDS.get((direction, speed))
+    if data is None:
+        data = encode_command(build_movement_cmd(direction, speed))
+    return data
+
+
+def encode_camera(direction: int) -> bytes:
+    """Return the encoded camera command for a direction.
+    
+    Args:
+        direction: Camera direction (CAM_TILT_DOWN, CAM_TILT_UP, CAM_PAN_RIGHT,
+                   CAM_PAN_LEFT, CAM_CENTER)
+        
+    Returns:
+        Pre-encoded command bytes
+    """
+    data = _CAMERA_COMMANDS.get(direction)
+    if data is None:
+        data = encode_command(build_camera_cmd(direction))
+    return data
+
+
+def uart_size(data: bytes) -> int:
+    """Number of bytes a command occupies on the ESP32-to-Arduino UART.
     
-    # Handle heartbeat
-    if data == "{Heartbeat}":
-        return {"type": "heartbeat"}
+    The ESP32 bridge drops spaces before forwarding commands to the
+    Arduino, so only the remaining bytes cost serial time.
+    
+    Args:
+        data: Encoded command as sent over TCP
+        
+    Returns:
+        UART byte count
+    """
+    return len(data) - data.count(b" ")
+
+
+class CommandByteCounter:
+    """Per-command accounting of bytes sent to the robot."""
+
+    def __init__(self):
+        """Initialize counter."""
+        self._lock = threading.Lock()
+        self._stats: Dict[Optional[int], list] = {}
+
+    def record(self, command: Optional[int], data: bytes) -> None:
+        """Account one sent command.
+        
+        Args:
+            command: Command number (N), or None for non-command frames
+            data: Encoded bytes as sent
+        """
+        uart = uart_size(data)
+        with self._lock:
+            stats = self._stats.get(command)
+            if stats is None:
+                stats = self._stats[command] = [0, 0, 0]
+            stats[0] += 1
+            stats[1] += len(data)
+            stats[2] += uart
+
+    def snapshot(self) -> Dict[Optional[int], Dict[str, int]]:
+        """Return counts and byte totals keyed by command number.
+        
+        Returns:
+            Mapping of N to {"count", "tcp_bytes", "uart_bytes"}
+        """
+        with self._lock:
+            return {
+                command: {"count": count, "tcp_bytes": tcp, "uart_bytes": uart}
+                for command, (count, tcp, uart) in self._stats.items()
+            }
+
+    @property
+    def total_bytes(self) -> int:
+        """Total TCP bytes recorded."""
+        with self._lock:
+            return sum(stats[1] for stats in self._stats.values())
+
+    def reset(self) -> None:
+        """Clear all counts."""
+        with self._lock:
+            self._stats.clear()
+
+
+def parse_response(data: str) -> Optional[Dict[str, Any]]:
+    """Parse a response from robot into a dictionary.
     
-    # Handle obstacle detection responses
-    if "true" in data.lower():
-        return {"type": "obstacle", "detected": True}
-    if "false" in data.lower():
-        return {"type": "obstacle", "detected": False}
+    Kept for callers that expect dictionaries; the receive paths use
+    robotapi.messages.decode_frame() and its typed messages directly.
     
-    # Try to parse as JSON
-    try:
-        return json.loads(data)
-    except json.JSONDecodeError:
+    Args:
+        data: Response string
+        
+    Returns:
+        Parsed dictionary or None if the response is not understood
+    """
+    message = decode_frame(data.strip(), 0.0)
+    if message is None:
         return None
+    return message.to_dict()
@@ -0,0 +1,177 @@
+"""Background I/O reactor that owns the receive side of a robot connection."""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional, Set, Tuple
+from robotapi.connection import Connection
+from robotapi.messages import Message, decode_frame
+from robotapi.exceptions import RobotConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class Dispatcher:
+    """Delivers decoded responses to subscribers and blocked waiters.
+
+    Subscribers are called on the I/O thread for every decoded response,
+    so they must be quick and must not block.
+    """
+
+    def __init__(self):
+        """Initialize dispatcher."""
+        self._subscribers: Tuple[Callable[[Message], None], ...] = ()
+        self._wakeups: Set[threading.Event] = set()
+        self._lock = threading.Lock()
+        self._running = False
+        self._error: Optional[RobotConnectionError] = None
+
+    def is_running(self) -> bool:
+        """Check if responses are being dispatched.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    @property
+    def error(self) -> Optional[RobotConnectionError]:
+        """Connection error that terminated dispatch, if any."""
+        return self._error
+
+    def subscribe(self, callback: Callable[[Message], None]) -> None:
+        """Register a callback for every decoded response.
+
+        Args:
+            callback: Called on the I/O thread with each decoded message
+        """
+        with self._lock:
+            self._subscribers = self._subscribers + (callback,)
+
+    def unsubscribe(self, callback: Callable[[Message], None]) -> None:
+        """Remove a previously registered callback.
+
+        Args:
+            callback: Callback passed to subscribe()
+        """
+        with self._lock:
+            self._subscribers = tuple(cb for cb in self._subscribers if cb is not callback)
+
+    def wait_for(
+        self,
+        predicate: Callable[[Message], bool],
+        timeout: Optional[float] = None,
+        wake: Optional[threading.Event] = None,
+    ) -> Optional[Message]:
+        """Block until a response satisfies predicate.
+
+        Args:
+            predicate: Called on the I/O thread with each response.
+                       Return True to wake the waiter.
+            timeout: Maximum time to wait in seconds (None waits forever)
+            wake: Optional event to wait on; setting it from another thread
+                  ends the wait early, returning None. It is also set when
+                  a response matches.
+
+        Returns:
+            Matching response, or None if the timeout expired
+
+        Raises:
+            RobotConnectionError: If the connection failed while waiting
+        """
+        done = wake if wake is not None else threading.Event()
+        matched = []
+
+        def on_response(response: Message) -> None:
+            if not done.is_set() and predicate(response):
+                matched.append(response)
+                done.set()
+
+        with self._lock:
+            self._wakeups.add(done)
+        self.subscribe(on_response)
+        try:
+            if self._running:
+                done.wait(timeout)
+        finally:
+            self.unsubscribe(on_response)
+            with self._lock:
+                self._wakeups.discard(done)
+
+        if matched:
+            return matched[0]
+        if self._error:
+            raise self._error
+        if not self._running:
+            raise RobotConnectionError("Not connected")
+        return None
+
+    def _dispatch(self, response: Message) -> None:
+        """Deliver a response to all subscribers."""
+        for callback in self._subscribers:
+            try:
+                callback(response)
+            except RobotConnectionError:
+                raise
+            except Exception:
+                logger.exception("Response subscriber failed")
+
+    def _wake_all(self) -> None:
+        """Release every thread blocked in wait_for()."""
+        with self._lock:
+            wakeups = list(self._wakeups)
+        for event in wakeups:
+            event.set()
+
+
+class Reactor(Dispatcher):
+    """Continuously drains a connection and dispatches responses as they arrive.
+
+    The reactor thread is the only reader of the connection while it runs.
+    """
+
+    def __init__(self, connection: Connection, poll_interval: float = 0.05):
+        """Initialize reactor.
+
+        Args:
+            connection: Active connection to robot
+            poll_interval: Receive timeout in seconds. Incoming data is dispatched
+                           immediately; this only bounds how quickly stop() returns.
+        """
+        super().__init__()
+        self.connection = connection
+        self.poll_interval = poll_interval
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the reader thread."""
+        if self._running:
+            return
+        self._error = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robotapi-reactor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the reader thread and wake any blocked waiters."""
+        self._running = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.poll_interval + 1.0)
+        self._thread = None
+        self._wake_all()
+
+    def _run(self) -> None:
+        """Reader thread main loop."""
+        try:
+            while self._running:
+                messages = self.connection.receive_all(timeout=self.poll_interval)
+                now = time.monotonic()
+                for message in messages:
+                    response = decode_frame(message, now)
+                    if response is not None:
+                        self._dispatch(response)
+        except RobotConnectionError as e:
+            self._error = e
+        finally:
+            self._running = False
+            self._wake_all()
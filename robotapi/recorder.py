@@ -0,0 +1,256 @@
+"""Binary traffic recording and replay.
+
+A TrafficRecorder attached to a Connection appends every chunk sent and
+received to a log, stamped with time.monotonic_ns():
+
+    with TrafficRecorder("patrol.rlog") as recorder:
+        with RobotController("10.0.0.57", recorder=recorder) as robot:
+            robot.forward(2.0)
+
+The log is an 8-byte magic followed by records of an 11-byte header
+(little-endian timestamp ns, direction, length) and the bytes themselves.
+Received chunks are kept as read from the socket, so a replay reproduces
+the original segmentation.
+
+ReplayTransport memory-maps a log and plays the robot's side back to a
+Connection at the recorded pace, scaled, or as fast as possible:
+
+    replay = ReplayTransport("patrol.rlog", speed=None)
+    robot = RobotController("replay", reactor=True, transport=replay)
+"""
+
+import mmap
+import struct
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+from robotapi.transport import Transport
+
+# File signature, including the format version
+MAGIC = b"RAPILOG1"
+
+# Record header: monotonic timestamp in ns, direction, payload length
+RECORD = struct.Struct("<QBH")
+MAX_RECORD = 0xFFFF
+
+# Directions
+SENT = 0  # Host to robot
+RECEIVED = 1  # Robot to host
+
+# Default write buffer; a record is only in the file once flushed
+BUFFER_SIZE = 65536
+
+
+class TrafficRecorder:
+    """Appends timestamped traffic to a binary log.
+
+    Safe to share between the threads sending and receiving on a
+    connection, or between several connections.
+    """
+
+    def __init__(self, path: str, buffer_size: int = BUFFER_SIZE):
+        """Open a log for appending.
+
+        Args:
+            path: Log file; created with a header if new, else appended to
+            buffer_size: Bytes buffered in memory between writes to disk
+        """
+        self.path = path
+        self.records = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "ab", buffering=buffer_size)
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def record(self, direction: int, data: bytes) -> None:
+        """Append one chunk of traffic.
+
+        Args:
+            direction: SENT or RECEIVED
+            data: Bytes as written to or read from the transport
+        """
+        with self._lock:
+            log = self._file
+            if log is None:
+                return
+            now = time.monotonic_ns()
+            for start in range(0, max(len(data), 1), MAX_RECORD):
+                chunk = data[start : start + MAX_RECORD]
+                log.write(RECORD.pack(now, direction, len(chunk)))
+                log.write(chunk)
+                self.records += 1
+            self.bytes += len(data)
+
+    def flush(self) -> None:
+        """Write buffered records to disk."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the log; later records are ignored."""
+        with self._lock:
+            log, self._file = self._file, None
+        if log is not None:
+            log.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+
+def _check_magic(log: mmap.mmap, path: str) -> None:
+    """Raise ValueError unless log starts with MAGIC."""
+    if log[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a robotapi traffic log")
+
+
+def iter_records(path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """Read a log.
+
+    Args:
+        path: Log file written by TrafficRecorder
+
+    Yields:
+        (timestamp ns, direction, data) in file order; a record cut short
+        by a crash ends the log
+
+    Raises:
+        ValueError: If the file is not a traffic log
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+            _check_magic(log, path)
+            offset = len(MAGIC)
+            end = len(log)
+            while offset + RECORD.size <= end:
+                timestamp, direction, length = RECORD.unpack_from(log, offset)
+                offset += RECORD.size
+                if offset + length > end:
+                    return
+                yield timestamp, direction, log[offset : offset + length]
+                offset += length
+
+
+class ReplayTransport(Transport):
+    """Plays the received side of a log back as if it were the robot.
+
+    Chunks arrive at their recorded offsets from the first record, divided
+    by speed, or back to back with speed=None. Sent data is discarded and
+    counted. Once the log is exhausted the transport reports the far end
+    closed, so the Connection fails like a dropped link.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0):
+        """Initialize transport.
+
+        Args:
+            path: Log file written by TrafficRecorder
+            speed: Replay rate relative to real time, or None for as fast as
+                   possible
+        """
+        self.path = path
+        self.speed = speed
+        self.bytes_sent = 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._offset = 0
+        self._origin = 0
+        self._started = 0.0
+        self._next: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        """Map the log and start the replay clock.
+
+        Raises:
+            OSError: If the log cannot be read
+            ValueError: If the file is not a traffic log
+        """
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            _check_magic(self._map, self.path)
+        except (OSError, ValueError):
+            self.close()
+            raise
+        self._offset = len(MAGIC)
+        self._origin = 0
+        if len(self._map) >= self._offset + RECORD.size:
+            self._origin = RECORD.unpack_from(self._map, self._offset)[0]
+        self._started = time.monotonic()
+        self._next = None
+
+    def close(self) -> None:
+        """Unmap the log."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def send(self, data: bytes) -> None:
+        """Discard data; the recording already holds the robot's answers."""
+        if self._map is None:
+            raise OSError("Replay closed")
+        self.bytes_sent += len(data)
+
+    def recv(self, timeout: float) -> Optional[bytes]:
+        """Return the next received chunk once it is due."""
+        if not self.readable(timeout):
+            return None
+        with self._lock:
+            entry = self._peek()
+            if entry is None:
+                return b""
+            _, start, length = entry
+            self._next = None
+            self._offset = start + length
+            return self._map[start : start + length]
+
+    def readable(self, timeout: float) -> bool:
+        """Wait until the next received chunk is due or the log has ended."""
+        with self._lock:
+            entry = self._peek()
+        if entry is None or self.speed is None:
+            return True
+        due = self._started + (entry[0] - self._origin) / 1e9 / self.speed
+        wait = due - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0.0))
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def _peek(self) -> Optional[Tuple[int, int, int]]:
+        """Find the next received record as (timestamp, data offset, length).
+
+        Called with the lock held.
+        """
+        log = self._map
+        if log is None:
+            raise OSError("Replay closed")
+        if self._next is None:
+            offset, end = self._offset, len(log)
+            while offset + RECORD.size <= end:
+                timestamp, direction, length = RECORD.unpack_from(log, offset)
+                start = offset + RECORD.size
+                if start + length > end:
+                    break
+                if direction == RECEIVED:
+                    self._next = (timestamp, start, length)
+                    break
+                offset = start + length
+            self._offset = offset
+        return self._next
+
+    def __str__(self) -> str:
+        return f"replay of {self.path}"
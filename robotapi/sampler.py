@@ -0,0 +1,229 @@
+"""Fixed-rate ultrasonic obstacle sampling while the car drives."""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+from robotapi.pacing import command_cost
+from robotapi.protocol import UART_BYTES_PER_SECOND, build_obstacle_cmd
+from robotapi.exceptions import CommandError, RobotConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Default obstacle queries per second
+OBSTACLE_RATE = 15.0
+# Share of the UART byte budget obstacle queries may use
+UART_SHARE = 0.5
+# Seconds after which an unanswered query is abandoned and re-sent
+QUERY_TIMEOUT = 0.5
+
+# Largest serial-tagged obstacle query on the UART
+QUERY_UART_BYTES = command_cost(build_obstacle_cmd())
+
+
+def max_sample_rate(share: float = UART_SHARE) -> float:
+    """Fastest obstacle query rate that fits in a share of the UART budget.
+
+    Args:
+        share: Fraction of UART_BYTES_PER_SECOND available to queries
+
+    Returns:
+        Queries per second
+    """
+    return share * UART_BYTES_PER_SECOND / QUERY_UART_BYTES
+
+
+def sample_interval(rate: float, share: float = UART_SHARE) -> float:
+    """Seconds between queries for a requested rate, capped by the UART budget.
+
+    Args:
+        rate: Requested queries per second
+        share: Fraction of the UART budget available to queries
+
+    Returns:
+        Interval in seconds
+
+    Raises:
+        ValueError: If rate is not positive
+    """
+    if rate <= 0:
+        raise ValueError("Sample rate must be positive")
+    return 1.0 / min(rate, max_sample_rate(share))
+
+
+class ObstacleSampler:
+    """Sends obstacle queries at a fixed rate from a background thread.
+
+    At most one query is in flight: a tick that finds the previous query
+    still unanswered is coalesced into it instead of queueing another
+    behind it on the slow serial link. The reply is handled in the thread
+    that resolves the query's future (the reactor thread, or whichever
+    thread is polling the connection), so on_obstacle runs as soon as a
+    positive reading arrives rather than on the next tick.
+    """
+
+    def __init__(
+        self,
+        submit: Optional[Callable[[], Future]],
+        on_obstacle: Callable[[], None],
+        rate: float = OBSTACLE_RATE,
+        discard: Optional[Callable[[Future], None]] = None,
+        query_timeout: float = QUERY_TIMEOUT,
+        share: float = UART_SHARE,
+    ):
+        """Initialize sampler.
+
+        Args:
+            submit: Sends one obstacle query and returns its reply future.
+                    May be None when queries are sent by the caller through
+                    due() and track() instead of the sampler thread.
+            on_obstacle: Called once, from the I/O thread, on the first
+                         positive reading
+            rate: Requested queries per second (capped by the UART budget)
+            discard: Called with a query abandoned after query_timeout
+            query_timeout: Seconds before an unanswered query is re-sent
+            share: Fraction of the UART budget queries may use
+        """
+        self.interval = sample_interval(rate, share)
+        self.submit = submit
+        self.on_obstacle = on_obstacle
+        self.discard = discard
+        self.query_timeout = query_timeout
+        self.queries_sent = 0
+        self.queries_coalesced = 0
+        self.queries_abandoned = 0
+        self.replies = 0
+        self.detected_at: Optional[float] = None
+        self._query: Optional[Future] = None
+        self._query_sent = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._closed = False
+
+    @property
+    def rate(self) -> float:
+        """Effective queries per second."""
+        return 1.0 / self.interval
+
+    @property
+    def detected(self) -> bool:
+        """True once a query has reported an obstacle."""
+        return self.detected_at is not None
+
+    def start(self) -> None:
+        """Start sampling."""
+        if self._running:
+            return
+        self._running = True
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name="robotapi-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling. Replies still in flight are ignored."""
+        self._closed = True
+        self._running = False
+        self._wake.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """Check whether a new query should be sent.
+
+        A query still awaiting its reply coalesces the tick; one older than
+        query_timeout is abandoned so a lost reply cannot stall sampling.
+
+        Args:
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            True if a query should be sent now
+        """
+        if now is None:
+            now = time.monotonic()
+        query = self._query
+        if query is None or query.done():
+            return True
+        if now - self._query_sent < self.query_timeout:
+            self.queries_coalesced += 1
+            return False
+        self.queries_abandoned += 1
+        self._query = None
+        if self.discard is not None:
+            self.discard(query)
+        return True
+
+    def track(self, query: Future, now: Optional[float] = None) -> None:
+        """Watch the reply to a query sent after due() returned True.
+
+        Args:
+            query: Reply future of the query
+            now: Send time (defaults to time.monotonic())
+        """
+        self._query = query
+        self._query_sent = time.monotonic() if now is None else now
+        self.queries_sent += 1
+        query.add_done_callback(self._on_reply)
+
+    def tick(self, now: Optional[float] = None) -> bool:
+        """Send a query unless one is already in flight.
+
+        Args:
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            True if a query was sent
+
+        Raises:
+            RobotConnectionError: If the query could not be sent
+        """
+        with self._lock:
+            if not self.due(now):
+                return False
+            try:
+                query = self.submit()
+            except CommandError:
+                # Pipeline full of other commands; try again next tick
+                return False
+            self.track(query, now)
+        return True
+
+    def _on_reply(self, future: Future) -> None:
+        """Handle a query reply (I/O thread)."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.replies += 1
+        if future.result() is True and not self._closed and self.detected_at is None:
+            self.detected_at = time.monotonic()
+            self._running = False
+            self._wake.set()
+            self.on_obstacle()
+
+    def _run(self) -> None:
+        """Sampler thread main loop."""
+        next_tick = time.monotonic()
+        while self._running:
+            try:
+                self.tick()
+            except RobotConnectionError as e:
+                logger.warning("Obstacle sampling stopped: %s", e)
+                break
+            next_tick += self.interval
+            now = time.monotonic()
+            if next_tick < now:
+                # Fell behind (e.g. a stalled send); do not burst to catch up
+                next_tick = now
+            self._wake.wait(next_tick - now)
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
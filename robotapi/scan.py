@@ -0,0 +1,127 @@
+"""Ultrasonic sweep scans as compact polar range profiles.
+
+The ultrasonic sensor sits on the pan servo under the camera, so a sweep is
+a sequence of pan moves (N=5) and distance queries (N=21 D1=2). The firmware
+handles commands in order, so the query for one angle and the move to the
+next can be sent back to back: the reading is taken before the servo moves.
+"""
+
+import time
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from robotapi.protocol import SERVO_CENTER, SERVO_PAN
+from robotapi.sensors import DISTANCE_MAX_CM, DISTANCE_MIN_CM
+from robotapi.servo import FIRMWARE_SERVO_HOLD, servo_angle
+
+# Pan angles of the default sweep, in degrees (90 faces forward)
+SCAN_ANGLES = (30, 60, 90, 120, 150)
+# Stored for angles without a valid echo
+NO_READING = 0
+
+
+def query_delay(settle: float) -> float:
+    """Seconds to wait after a pan move before sending its distance query.
+
+    The firmware reads the next command once its servo hold ends, so only
+    the part of the settle time beyond the hold needs waiting out.
+
+    Args:
+        settle: Predicted settle time of the pan move
+
+    Returns:
+        Delay in seconds
+    """
+    return max(0.0, settle - FIRMWARE_SERVO_HOLD)
+
+
+def sweep_order(angles: Iterable[float], start: Optional[int] = None) -> List[int]:
+    """Order scan angles as one sweep beginning at the nearer end.
+
+    Args:
+        angles: Requested pan angles in degrees
+        start: Current pan angle, if known
+
+    Returns:
+        Distinct reachable angles, ascending or descending
+    """
+    order = sorted({servo_angle(SERVO_PAN, a) for a in angles})
+    if start is not None and order and abs(order[-1] - start) < abs(order[0] - start):
+        order.reverse()
+    return order
+
+
+class PolarProfile:
+    """Distances measured at a set of pan angles.
+
+    Attributes:
+        angles: Pan angles in degrees, ascending (array of unsigned bytes)
+        distances: Distance in cm at each angle, NO_READING where no valid
+                   echo came back (array of unsigned shorts)
+        timestamp: time.monotonic() when the scan finished
+    """
+
+    __slots__ = ("angles", "distances", "timestamp")
+
+    def __init__(self, angles: Sequence[int], distances: Optional[Sequence[int]] = None):
+        """Initialize profile.
+
+        Args:
+            angles: Pan angles in degrees
+            distances: Distances in cm, or None for an empty profile
+        """
+        pairs = sorted(zip(angles, distances or [NO_READING] * len(angles)))
+        self.angles = array("B", (a for a, _ in pairs))
+        self.distances = array("H", (d for _, d in pairs))
+        self.timestamp = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.angles)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """Iterate (angle, distance) pairs in ascending angle order."""
+        return zip(self.angles, self.distances)
+
+    def set(self, angle: int, value: Optional[int]) -> None:
+        """Record the reading for an angle.
+
+        Args:
+            angle: Pan angle in the profile
+            value: Distance reply in cm; None or out of range counts as no reading
+        """
+        valid = isinstance(value, int) and DISTANCE_MIN_CM <= value <= DISTANCE_MAX_CM
+        self.distances[self.angles.index(angle)] = value if valid else NO_READING
+
+    def clearest(self, min_cm: int = 0) -> Optional[int]:
+        """Return the angle with the longest free range.
+
+        Ties go to the angle closest to straight ahead.
+
+        Args:
+            min_cm: Minimum distance for an angle to qualify
+
+        Returns:
+            Pan angle in degrees, or None if no reading reaches min_cm
+        """
+        best = None
+        for angle, distance in self:
+            if distance == NO_READING or distance < min_cm:
+                continue
+            key = (distance, -abs(angle - SERVO_CENTER))
+            if best is None or key > best[0]:
+                best = (key, angle)
+        return best[1] if best else None
+
+    @staticmethod
+    def heading(angle: int) -> int:
+        """Convert a pan angle to a heading relative to the car.
+
+        Args:
+            angle: Pan angle in degrees
+
+        Returns:
+            Degrees from straight ahead, positive to the right
+        """
+        return angle - SERVO_CENTER
+
+    def __repr__(self) -> str:
+        return f"PolarProfile({dict(self)!r})"
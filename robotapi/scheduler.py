@@ -0,0 +1,322 @@
+"""Paced outbound command queue with last-writer-wins coalescing.
+
+Commands reach the car over a 9600-baud serial hop, far slower than the
+TCP link to the ESP32 bridge. Writing every update straight to the socket
+lets stale commands queue up behind each other in the bridge, so the car
+lags the controller by seconds. CommandScheduler instead holds one pending
+command per channel (drive, each servo, each LED), replacing it when a
+newer one arrives, and releases commands at the UART's byte rate. Stop
+bypasses the queue.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+from robotapi.pacing import TokenBucket, uart_bucket
+from robotapi.protocol import (
+    CMD_LED,
+    CMD_MOTOR_SPEEDS,
+    CMD_MOVEMENT,
+    CMD_JOYSTICK,
+    CMD_SERVO,
+    CMD_STOP,
+    CMD_TIMED_MOVEMENT,
+    uart_size,
+)
+from robotapi.exceptions import RobotConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Commands setting the car's motion; each replaces the last
+DRIVE_CHANNEL = "drive"
+_DRIVE_COMMANDS = frozenset({CMD_TIMED_MOVEMENT, CMD_MOVEMENT, CMD_MOTOR_SPEEDS, CMD_JOYSTICK})
+# Command age samples kept for percentiles
+AGE_SAMPLES = 1024
+
+
+def command_channel(cmd: Dict[str, Any]) -> Optional[Hashable]:
+    """Return the coalescing channel of a command.
+
+    Absolute set-points share a channel and the newest wins: every drive
+    command, each servo (N=5, per D1) and each LED (N=8, per D1). Relative
+    or one-shot commands such as camera steps (N=106) and sensor queries
+    return None and are sent in order.
+
+    Args:
+        cmd: Command dictionary
+
+    Returns:
+        Channel key, or None if the command must not be coalesced
+    """
+    n = cmd.get("N")
+    if n in _DRIVE_COMMANDS:
+        return DRIVE_CHANNEL
+    if n == CMD_SERVO:
+        return ("servo", cmd.get("D1"))
+    if n == CMD_LED:
+        return ("led", cmd.get("D1"))
+    return None
+
+
+class _Pending:
+    """A queued command."""
+
+    __slots__ = ("command", "data", "enqueued", "on_drop")
+
+    def __init__(
+        self,
+        command: int,
+        data: bytes,
+        enqueued: float,
+        on_drop: Optional[Callable[[], None]],
+    ):
+        self.command = command
+        self.data = data
+        self.enqueued = enqueued
+        self.on_drop = on_drop
+
+
+class SchedulerMetrics:
+    """Counts, queue depth and command age for a CommandScheduler."""
+
+    def __init__(self, samples: int = AGE_SAMPLES):
+        """Initialize metrics.
+
+        Args:
+            samples: Number of recent age samples to keep
+        """
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.stops = 0
+        self.failed = 0
+        self.bytes_sent = 0
+        self.max_depth = 0
+        self._ages: Deque[float] = deque(maxlen=samples)
+
+    def record_send(self, pending: _Pending, now: float) -> None:
+        """Record one command leaving the queue."""
+        self.sent += 1
+        self.bytes_sent += uart_size(pending.data)
+        self._ages.append(now - pending.enqueued)
+
+    def snapshot(self, depth: int) -> Dict[str, float]:
+        """Return counts and age statistics.
+
+        Args:
+            depth: Current queue depth
+
+        Returns:
+            Dictionary of counts, depths and p50/p99/max age in seconds
+        """
+        ages = sorted(self._ages)
+        return {
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "stops": self.stops,
+            "failed": self.failed,
+            "bytes_sent": self.bytes_sent,
+            "queue_depth": depth,
+            "max_depth": self.max_depth,
+            "age_p50": ages[len(ages) // 2] if ages else 0.0,
+            "age_p99": ages[min(len(ages) - 1, int(len(ages) * 0.99))] if ages else 0.0,
+            "age_max": ages[-1] if ages else 0.0,
+        }
+
+
+class CommandScheduler:
+    """Sends queued commands at the UART's pace from a background thread."""
+
+    def __init__(self, send: Callable[[bytes], None], budget: Optional[TokenBucket] = None):
+        """Initialize scheduler.
+
+        Args:
+            send: Writes bytes to the robot, e.g. Connection.send
+            budget: Bucket metering UART bytes (defaults to the whole link)
+        """
+        self.send = send
+        self.budget = budget if budget is not None else uart_bucket()
+        self.metrics = SchedulerMetrics()
+        self._queue: "OrderedDict[Hashable, _Pending]" = OrderedDict()
+        self._sequence = 0
+        self._sending = False
+        self._cond = threading.Condition()
+        # Held from taking a command off the queue until it is written, so
+        # a stop cannot overtake a drive command already on its way out
+        self._send_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def __len__(self) -> int:
+        """Number of queued commands."""
+        return len(self._queue)
+
+    def is_running(self) -> bool:
+        """Check if the sender thread is running.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    def start(self) -> None:
+        """Start the sender thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robotapi-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sender thread and drop anything still queued."""
+        with self._cond:
+            self._running = False
+            dropped = list(self._queue.values())
+            self._queue.clear()
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        for pending in dropped:
+            self._drop(pending)
+
+    def submit(
+        self,
+        command: int,
+        data: bytes,
+        channel: Optional[Hashable] = None,
+        on_drop: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Queue a command.
+
+        Stop is sent immediately from the calling thread and discards any
+        queued drive command. A command on a channel replaces the one
+        already queued there, keeping its place in the queue.
+
+        Args:
+            command: Command number (N)
+            data: Encoded command
+            channel: Coalescing channel from command_channel(), or None
+            on_drop: Called if the command is replaced or never sent
+
+        Raises:
+            RobotConnectionError: If a stop could not be sent
+        """
+        now = time.monotonic()
+        pending = _Pending(command, data, now, on_drop)
+        self.metrics.submitted += 1
+        if command == CMD_STOP:
+            self._send_stop(pending, now)
+            return
+        with self._cond:
+            if channel is None:
+                self._sequence += 1
+                channel = ("fifo", self._sequence)
+            replaced = self._queue.get(channel)
+            self._queue[channel] = pending
+            if replaced is not None:
+                self.metrics.coalesced += 1
+            self.metrics.max_depth = max(self.metrics.max_depth, len(self._queue))
+            self._cond.notify_all()
+        if replaced is not None:
+            self._drop(replaced)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued command has been sent.
+
+        Args:
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            True if the queue drained
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not (self._queue or self._sending) or not self._running, timeout
+            )
+
+    def stats(self) -> Dict[str, float]:
+        """Return scheduler metrics.
+
+        Returns:
+            Dictionary from SchedulerMetrics.snapshot()
+        """
+        return self.metrics.snapshot(len(self._queue))
+
+    def _send_stop(self, pending: _Pending, now: float) -> None:
+        """Priority lane: discard queued motion and send stop at once.
+
+        Waits for a command the sender thread is writing, so the stop is
+        always the last drive frame on the wire.
+        """
+        with self._send_lock:
+            with self._cond:
+                dropped = self._queue.pop(DRIVE_CHANNEL, None)
+            self.metrics.stops += 1
+            # Stop never waits for tokens, but its bytes still occupy the link
+            self.budget.charge(uart_size(pending.data), now)
+            self.send(pending.data)
+            self.metrics.record_send(pending, time.monotonic())
+        if dropped is not None:
+            self.metrics.coalesced += 1
+            self._drop(dropped)
+
+    def _drop(self, pending: _Pending) -> None:
+        """Tell a command's owner it will not be sent."""
+        if pending.on_drop is not None:
+            try:
+                pending.on_drop()
+            except Exception:
+                logger.exception("Command drop callback failed")
+
+    def _run(self) -> None:
+        """Sender thread main loop."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._running:
+                    return
+                channel, pending = next(iter(self._queue.items()))
+            cost = uart_size(pending.data)
+            delay = self.budget.delay(cost)
+            if delay > 0:
+                # A newer command may replace this one while we wait
+                time.sleep(delay)
+                continue
+            with self._send_lock:
+                with self._cond:
+                    pending = self._queue.pop(channel, None)
+                    if pending is None:
+                        continue
+                    if not self.budget.consume(uart_size(pending.data)):
+                        # Lost the tokens to a stop; put it back at the front
+                        self._queue[channel] = pending
+                        self._queue.move_to_end(channel, last=False)
+                        continue
+                    self._sending = True
+                try:
+                    self.send(pending.data)
+                    self.metrics.record_send(pending, time.monotonic())
+                    failed = False
+                except RobotConnectionError as e:
+                    self.metrics.failed += 1
+                    logger.warning("Queued command not sent: %s", e)
+                    failed = True
+            if failed:
+                self._drop(pending)
+            with self._cond:
+                self._sending = False
+                if not self._queue:
+                    self._cond.notify_all()
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
@@ -0,0 +1,130 @@
+"""Cached, filtered ultrasonic distance readings."""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+# Seconds a filtered reading is served without a new measurement
+DISTANCE_FRESHNESS = 0.1
+# Raw readings combined by the median filter
+FILTER_WINDOW = 5
+# Raw readings older than this (relative to the newest) leave the filter
+FILTER_MAX_AGE = 1.0
+# HC-SR04 working range; anything outside it is a missed or stray echo
+DISTANCE_MIN_CM = 2
+DISTANCE_MAX_CM = 400
+
+
+class DistanceReading:
+    """Filtered distance measurement.
+
+    Attributes:
+        value: Median distance in cm
+        timestamp: time.monotonic() when the newest raw reading arrived
+        samples: Number of raw readings the median was taken over
+    """
+
+    __slots__ = ("value", "timestamp", "samples")
+
+    def __init__(self, value: float, timestamp: float, samples: int):
+        self.value = value
+        self.timestamp = timestamp
+        self.samples = samples
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds since the newest raw reading.
+
+        Args:
+            now: Current monotonic time (defaults to time.monotonic())
+        """
+        return (time.monotonic() if now is None else now) - self.timestamp
+
+    def __repr__(self) -> str:
+        return f"DistanceReading(value={self.value}, samples={self.samples})"
+
+
+class DistanceFilter:
+    """Median filter and freshness cache for raw ultrasonic readings.
+
+    Readings outside the sensor's range are rejected outright; the
+    median of the remaining recent readings suppresses single spikes.
+    """
+
+    def __init__(
+        self,
+        freshness: float = DISTANCE_FRESHNESS,
+        window: int = FILTER_WINDOW,
+        max_age: float = FILTER_MAX_AGE,
+    ):
+        """Initialize filter.
+
+        Args:
+            freshness: Default seconds a reading stays usable
+            window: Number of raw readings in the median
+            max_age: Seconds after which raw readings stop counting
+        """
+        self.freshness = freshness
+        self.max_age = max_age
+        self.rejected = 0
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, value: float, timestamp: Optional[float] = None) -> bool:
+        """Add a raw reading.
+
+        Args:
+            value: Distance in cm reported by the firmware
+            timestamp: Receive time (defaults to time.monotonic())
+
+        Returns:
+            True if the reading was accepted; False if out of range or
+            older than the last reading (replies decoded from one read
+            share a timestamp and are all kept)
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if not DISTANCE_MIN_CM <= value <= DISTANCE_MAX_CM:
+            self.rejected += 1
+            return False
+        with self._lock:
+            if self._samples and timestamp < self._samples[-1][0]:
+                return False
+            self._samples.append((timestamp, float(value)))
+        return True
+
+    def reset(self) -> None:
+        """Discard all readings."""
+        with self._lock:
+            self._samples.clear()
+
+    def latest(
+        self, max_age: Optional[float] = None, now: Optional[float] = None
+    ) -> Optional[DistanceReading]:
+        """Return the filtered reading if it is fresh enough.
+
+        Args:
+            max_age: Seconds the newest raw reading may be old (defaults to
+                     freshness)
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            Filtered reading, or None if there is no fresh reading
+        """
+        if max_age is None:
+            max_age = self.freshness
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            if not self._samples:
+                return None
+            newest = self._samples[-1][0]
+            if now - newest > max_age:
+                return None
+            values = sorted(v for t, v in self._samples if newest - t <= self.max_age)
+        middle = len(values) // 2
+        if len(values) % 2:
+            median = values[middle]
+        else:
+            median = (values[middle - 1] + values[middle]) / 2
+        return DistanceReading(median, newest, len(values))
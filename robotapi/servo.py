@@ -0,0 +1,182 @@
+"""Client-side model of the camera's pan/tilt servos.
+
+The firmware offers relative camera steps (N=106, 10 degrees each) and
+absolute servo angles (N=5). CameraPose tracks where each servo is so that
+any pan/tilt target, relative or absolute, costs one N=5 command per servo
+moved, and predicts how long the move takes to settle.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from robotapi.exceptions import CommandError
+from robotapi.protocol import (
+    CAM_CENTER,
+    CAM_PAN_LEFT,
+    CAM_PAN_RIGHT,
+    CAM_TILT_DOWN,
+    CAM_TILT_UP,
+    PAN_MAX,
+    PAN_MIN,
+    SERVO_CENTER,
+    SERVO_PAN,
+    SERVO_STEP,
+    SERVO_TILT,
+    TILT_MAX,
+    TILT_MIN,
+    build_servo_cmd,
+)
+
+# Servo speed: 0.17 s per 60 degrees
+SERVO_SECONDS_PER_DEGREE = 0.17 / 60
+# The firmware holds each servo write for 500 ms before reading the next
+# command, so a second servo only starts moving after this
+FIRMWARE_SERVO_HOLD = 0.5
+
+_LIMITS = {SERVO_PAN: (PAN_MIN, PAN_MAX), SERVO_TILT: (TILT_MIN, TILT_MAX)}
+
+
+def servo_angle(servo: int, angle: float) -> int:
+    """Return the angle a servo actually reaches for a requested angle.
+
+    Rounds to the nearest SERVO_STEP (the firmware only has 10 degree
+    resolution) and clamps to the servo's range.
+
+    Args:
+        servo: SERVO_PAN or SERVO_TILT
+        angle: Requested angle in degrees
+
+    Returns:
+        Reachable angle in degrees
+    """
+    low, high = _LIMITS[servo]
+    return min(high, max(low, int(round(angle / SERVO_STEP)) * SERVO_STEP))
+
+
+def settle_time(degrees: float) -> float:
+    """Seconds for a servo to travel an angular distance.
+
+    Args:
+        degrees: Distance moved in degrees
+
+    Returns:
+        Predicted travel time
+    """
+    return abs(degrees) * SERVO_SECONDS_PER_DEGREE
+
+
+def servo_commands(moves: Dict[int, int]) -> List[Dict[str, Any]]:
+    """Build the N=5 commands for moves planned by CameraPose.plan().
+
+    Args:
+        moves: {servo: angle} to send
+
+    Returns:
+        Command dictionaries, in the order the servos should move
+    """
+    return [build_servo_cmd(servo, angle) for servo, angle in moves.items()]
+
+
+class CameraPose:
+    """Tracked pan and tilt angles.
+
+    An angle is None while unknown: before the first absolute move after
+    connecting, and after relative N=106 steps, which the firmware applies
+    to its own step counter rather than the servo's last N=5 angle.
+    """
+
+    def __init__(self):
+        """Initialize with both angles unknown."""
+        self.angles: Dict[int, Optional[int]] = {SERVO_PAN: None, SERVO_TILT: None}
+
+    @property
+    def pan(self) -> Optional[int]:
+        """Pan angle in degrees (90 faces forward, higher turns right)."""
+        return self.angles[SERVO_PAN]
+
+    @property
+    def tilt(self) -> Optional[int]:
+        """Tilt angle in degrees (90 is level, higher looks up)."""
+        return self.angles[SERVO_TILT]
+
+    def plan(
+        self, pan: Optional[float] = None, tilt: Optional[float] = None
+    ) -> Tuple[Dict[int, int], float]:
+        """Work out the servo commands needed to reach a pose.
+
+        Args:
+            pan: Target pan angle, or None to leave pan alone
+            tilt: Target tilt angle, or None to leave tilt alone
+
+        Returns:
+            Tuple of ({servo: angle} to send, predicted settle seconds).
+            Servos already at their target are left out. An unknown
+            starting angle is assumed to be the far end of the range.
+        """
+        moves: Dict[int, int] = {}
+        travel = []
+        for servo, target in ((SERVO_PAN, pan), (SERVO_TILT, tilt)):
+            if target is None:
+                continue
+            angle = servo_angle(servo, target)
+            current = self.angles[servo]
+            if current == angle:
+                continue
+            if current is None:
+                low, high = _LIMITS[servo]
+                distance = max(angle - low, high - angle)
+            else:
+                distance = angle - current
+            moves[servo] = angle
+            travel.append(settle_time(distance))
+        if not travel:
+            return moves, 0.0
+        # Servos move one after the other; each write but the last is held
+        return moves, FIRMWARE_SERVO_HOLD * (len(travel) - 1) + travel[-1]
+
+    def offset(self, pan: float = 0, tilt: float = 0) -> Dict[str, float]:
+        """Turn a move relative to the tracked pose into plan() targets.
+
+        Args:
+            pan: Degrees to pan (positive turns right)
+            tilt: Degrees to tilt (positive looks up)
+
+        Returns:
+            {"pan": angle, "tilt": angle} for each servo that moves
+
+        Raises:
+            CommandError: If a servo to be moved has no known angle
+        """
+        targets = {}
+        for name, delta, current in (("pan", pan, self.pan), ("tilt", tilt, self.tilt)):
+            if delta:
+                if current is None:
+                    raise CommandError(f"Camera {name} angle unknown; set it first")
+                targets[name] = current + delta
+        return targets
+
+    def apply(self, moves: Dict[int, int]) -> None:
+        """Record servo angles that have been sent.
+
+        Args:
+            moves: {servo: angle} as returned by plan()
+        """
+        self.angles.update(moves)
+
+    def step(self, direction: int) -> None:
+        """Record a relative N=106 camera command.
+
+        Args:
+            direction: CAM_* direction sent
+        """
+        if direction == CAM_CENTER:
+            self.angles = {SERVO_PAN: SERVO_CENTER, SERVO_TILT: SERVO_CENTER}
+        elif direction in (CAM_PAN_LEFT, CAM_PAN_RIGHT):
+            self.angles[SERVO_PAN] = None
+        elif direction in (CAM_TILT_UP, CAM_TILT_DOWN):
+            self.angles[SERVO_TILT] = None
+
+    def forget(self) -> None:
+        """Mark both angles unknown, e.g. after reconnecting."""
+        self.angles = {SERVO_PAN: None, SERVO_TILT: None}
+
+    def __repr__(self) -> str:
+        return f"CameraPose(pan={self.pan}, tilt={self.tilt})"
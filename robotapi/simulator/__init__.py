@@ -0,0 +1,21 @@
+"""Simulated cars for tests, benchmarks and load testing.
+
+SimulatorServer hosts any number of SimulatedRobots in one thread, each
+listening on its own ephemeral port and behaving like the real car: the
+ESP32 bridge's 1 s heartbeat and 3-miss disconnect, firmware replies,
+9600-baud serial latency, differential-drive motion and obstacles.
+"""
+
+from robotapi.simulator.robot import SimulatedRobot
+from robotapi.simulator.server import SimulatorServer
+from robotapi.simulator.uart import SerialLink
+from robotapi.simulator.world import Obstacle, Pose, World
+
+__all__ = [
+    "SimulatedRobot",
+    "SimulatorServer",
+    "SerialLink",
+    "World",
+    "Obstacle",
+    "Pose",
+]
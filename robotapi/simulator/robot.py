@@ -0,0 +1,449 @@
+"""One simulated car: the ESP32 bridge, its serial link and the Arduino firmware.
+
+Commands arrive over TCP at the bridge, which frames them, answers
+heartbeats itself and forwards everything else over the 9600-baud UART.
+The Arduino handles one frame per pass of its main loop; servo writes
+block that loop for half a second, and bytes arriving while its 64-byte
+receive buffer is full are lost. Replies travel back over the UART before
+the bridge forwards them to the client.
+"""
+
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from robotapi.protocol import MISSED_HEARTBEAT_LIMIT, UART_BYTES_PER_SECOND
+from robotapi.servo import FIRMWARE_SERVO_HOLD
+from robotapi.simulator.uart import SerialLink
+from robotapi.simulator.world import (
+    CM_PER_SECOND_PER_SPEED,
+    KINEMATIC_STEP,
+    SENSOR_MAX_CM,
+    Pose,
+    World,
+    drive,
+)
+
+# Commands whose firmware handler echoes the serial number with "_ok"
+_OK_COMMANDS = {1, 4, 5, 8, 110}
+# Commands answered with a bare "{ok}"
+_BARE_OK_COMMANDS = {100, 101, 105, 106}
+
+# Arduino serial receive buffer; frames arriving while it is full are lost
+RX_BUFFER_BYTES = 64
+# Firmware main loop time per command
+LOOP_SECONDS = 0.002
+# Ultrasonic echo wait per cm of range
+ECHO_SECONDS_PER_CM = 58e-6
+# Obstacle query (N=21 D1=1) answers true at or below this range in cm
+OBSTACLE_CM = 20
+# Motor PWM used by joystick commands (N=102)
+JOYSTICK_SPEED = 250
+# Sent by the bridge to the car when its client goes away
+_BRIDGE_STOP = '{"N":100}'
+
+# (left, right) wheel factors for movement directions (N=2/N=3 D1)
+_MOVE_WHEELS = {1: (-1, 1), 2: (1, -1), 3: (1, 1), 4: (-1, -1)}
+# (left, right) wheel factors for joystick directions (N=102 D1)
+_JOYSTICK_WHEELS = {
+    1: (1, 1),
+    2: (-1, -1),
+    3: (-1, 1),
+    4: (1, -1),
+    5: (0.5, 1),
+    6: (-0.5, -1),
+    7: (1, 0.5),
+    8: (-1, -0.5),
+    9: (0, 0),
+}
+
+
+class SimulatedRobot:
+    """State of one virtual car."""
+
+    def __init__(
+        self,
+        heartbeat_interval: float = 1.0,
+        history: int = 1000,
+        uart_rate: Optional[float] = UART_BYTES_PER_SECOND,
+        world: Optional[World] = None,
+    ):
+        """Initialize simulated robot.
+
+        Args:
+            heartbeat_interval: Seconds between {Heartbeat} messages
+            history: Number of commands and latency samples to keep
+            uart_rate: Serial link bytes per second, or None for no latency
+            world: Obstacles for the ultrasonic sensor and collisions; without
+                   one, distance readings come from distance_cm
+        """
+        self.heartbeat_interval = heartbeat_interval
+        self.world = world
+        self.port: Optional[int] = None
+        self.pose = Pose()
+        # Forces obstacle queries (N=21 D1=1) to answer true
+        self.obstacle_detected = False
+        # Reading returned by distance queries (N=21 D1=2) without a world, in cm
+        self.distance_cm = 100
+        # Readings by pan angle, overriding distance_cm, for sweep scans
+        self.pan_distances: Dict[int, float] = {}
+        # Line tracking readings (N=22) for the left, middle and right sensors
+        self.line_values = [0, 0, 0]
+        # Ground detection (N=23): False once the car has been lifted
+        self.on_ground = True
+        # Camera servo angles in degrees, keyed by N=5 D1 (1 pan, 2 tilt)
+        self.servo_angles = {1: 90, 2: 90}
+        # The firmware's separate N=106 step counters, in tens of degrees
+        self._servo_steps = {1: 9, 2: 9}
+        # Commands as the bridge received them, and as the Arduino ran them
+        self.commands_received: Deque[dict] = deque(maxlen=history)
+        self.commands_executed: Deque[dict] = deque(maxlen=history)
+        # Completed motions as (direction, speed, started, ended)
+        self.moves: Deque[Tuple[int, int, float, float]] = deque(maxlen=history)
+        self.heartbeat_latencies: Deque[float] = deque(maxlen=history)
+        self.heartbeats_sent = 0
+        self.heartbeats_answered = 0
+        self.heartbeat_disconnects = 0
+        self.frames_dropped = 0
+        self.collisions = 0
+        self._listener = None
+        self._client = None
+        self._index = 0
+        self._scheduled: Optional[float] = None
+        self._rx = ""
+        self._tx = bytearray()
+        self._next_heartbeat = 0.0
+        self._heartbeat_sent_at: Optional[float] = None
+        self._heartbeat_answered = False
+        self._missed = 0
+        self._hangup = False
+        self._down = SerialLink(uart_rate)
+        self._up = SerialLink(uart_rate)
+        self._rx_frames: Deque[Tuple[float, str]] = deque()
+        self._rx_bytes = 0
+        self._busy_until = 0.0
+        self._echo_cm = 0
+        self._motion: Optional[Tuple[int, int, float]] = None
+        self._timer: Optional[Tuple[float, str]] = None
+        self._wheels = (0.0, 0.0)
+        self._pose_time: Optional[float] = None
+        self._blocked = False
+
+    def is_connected(self) -> bool:
+        """Check if a client is attached.
+
+        Returns:
+            True if a client is connected
+        """
+        return self._client is not None
+
+    def is_moving(self) -> bool:
+        """Check if the car is driving.
+
+        Returns:
+            True if any wheel is turning
+        """
+        return self._wheels != (0.0, 0.0)
+
+    def position(self, now: Optional[float] = None) -> Pose:
+        """Return where the car is.
+
+        Args:
+            now: Monotonic time (defaults to time.monotonic())
+
+        Returns:
+            Pose at that time, given the current wheel speeds
+        """
+        pose, _, _ = self._integrate(time.monotonic() if now is None else now)
+        return pose
+
+    def _integrate(self, now: float) -> Tuple[Pose, bool, int]:
+        """Project the pose forward, stopping at obstacles.
+
+        Returns:
+            Tuple of (pose, blocked, new collisions)
+        """
+        left, right = self._wheels
+        if self._pose_time is None or now <= self._pose_time or (left == 0 and right == 0):
+            return self.pose, self._blocked, 0
+        if self.world is None:
+            return drive(self.pose, left, right, now - self._pose_time), False, 0
+        pose, blocked, collisions = self.pose, self._blocked, 0
+        t = self._pose_time
+        while t < now:
+            dt = min(KINEMATIC_STEP, now - t)
+            moved = drive(pose, left, right, dt)
+            if self.world.collides(moved.x, moved.y):
+                # Pinned against the obstacle; wheels can still turn the car
+                if not blocked:
+                    collisions += 1
+                blocked = True
+                moved.x, moved.y = pose.x, pose.y
+            else:
+                blocked = False
+            pose = moved
+            t += dt
+        return pose, blocked, collisions
+
+    def _set_wheels(self, left: float, right: float, now: float) -> None:
+        """Change wheel speeds (cm/s) after bringing the pose up to date."""
+        pose, self._blocked, collisions = self._integrate(now)
+        self.pose = pose
+        self.collisions += collisions
+        if self._pose_time is None or now > self._pose_time:
+            self._pose_time = now
+        self._wheels = (float(left), float(right))
+
+    def _start_motion(self, direction: int, speed: int, now: float) -> None:
+        """Begin a motion, ending any current one."""
+        self._end_motion(now)
+        self._motion = (direction, speed, now)
+        left, right = _MOVE_WHEELS.get(direction, (0, 0))
+        ground = speed * CM_PER_SECOND_PER_SPEED
+        self._set_wheels(left * ground, right * ground, now)
+
+    def _end_motion(self, now: float) -> None:
+        """Stop the wheels and record the current motion as finished."""
+        self._timer = None
+        if self._motion is not None:
+            direction, speed, started = self._motion
+            self.moves.append((direction, speed, started, now))
+            self._motion = None
+        self._set_wheels(0, 0, now)
+
+    def _set_servo(self, servo: int, tens: int) -> None:
+        """Move servos the way the firmware clamps them (N=5 D1 3 is both)."""
+        if servo in (1, 3):
+            self.servo_angles[1] = 10 * min(17, max(1, tens))
+        if servo in (2, 3):
+            self.servo_angles[2] = 10 * min(11, max(3, tens))
+
+    def _step_servo(self, direction: int) -> None:
+        """Apply an N=106 camera step to the firmware's step counters."""
+        if direction == 5:
+            # Centering leaves the step counters where they were
+            self._set_servo(3, 9)
+            return
+        servo, delta = {1: (2, -1), 2: (2, 1), 3: (1, 1), 4: (1, -1)}.get(direction, (0, 0))
+        if servo:
+            low, high = (1, 17) if servo == 1 else (3, 11)
+            self._servo_steps[servo] = min(high, max(low, self._servo_steps[servo] + delta))
+            self._set_servo(servo, self._servo_steps[servo])
+
+    def _sonar(self, now: float) -> int:
+        """Ultrasonic reading in cm at the current pan angle."""
+        pan = self.servo_angles[1]
+        if self.world is not None:
+            return self.world.sonar(self.position(now), pan)
+        return min(int(self.pan_distances.get(pan, self.distance_cm)), SENSOR_MAX_CM)
+
+    def handle_command(self, cmd: dict, now: Optional[float] = None) -> Optional[bytes]:
+        """Apply a command and build the firmware reply.
+
+        Args:
+            cmd: Decoded JSON command
+            now: Time the firmware runs it (defaults to time.monotonic())
+
+        Returns:
+            Reply bytes, or None if the firmware sends nothing
+        """
+        if now is None:
+            now = time.monotonic()
+        self.commands_executed.append(cmd)
+        n = cmd.get("N")
+        serial = cmd.get("H", "")
+        if n == 2:
+            # Timed move: replies {H_ok} once the timer expires
+            self._start_motion(cmd.get("D1", 0), cmd.get("D2", 0), now)
+            self._timer = (now + cmd.get("T", 0) / 1000.0, serial)
+            return None
+        if n == 3:
+            self._start_motion(cmd.get("D1", 0), cmd.get("D2", 0), now)
+            return f"{{{serial}_ok}}".encode("utf-8")
+        if n == 100:
+            self._end_motion(now)
+            return b"{ok}"
+        if n == 4:
+            self._end_motion(now)
+            self._set_wheels(
+                cmd.get("D1", 0) * CM_PER_SECOND_PER_SPEED,
+                cmd.get("D2", 0) * CM_PER_SECOND_PER_SPEED,
+                now,
+            )
+        elif n == 102:
+            self._end_motion(now)
+            left, right = _JOYSTICK_WHEELS.get(cmd.get("D1"), (0, 0))
+            ground = JOYSTICK_SPEED * CM_PER_SECOND_PER_SPEED
+            self._set_wheels(left * ground, right * ground, now)
+            return None
+        elif n == 5:
+            self._set_servo(cmd.get("D1"), cmd.get("D2", 0) // 10)
+        elif n == 106:
+            self._step_servo(cmd.get("D1"))
+        if n == 21:
+            self._echo_cm = self._sonar(now)
+            if cmd.get("D1") == 2:
+                return f"{{{serial}_{self._echo_cm}}}".encode("utf-8")
+            detected = self.obstacle_detected or self._echo_cm <= OBSTACLE_CM
+            result = "true" if detected else "false"
+            return f"{{{serial}_{result}}}".encode("utf-8")
+        if n == 22:
+            value = self.line_values[cmd.get("D1", 0)]
+            return f"{{{serial}_{value}}}".encode("utf-8")
+        if n == 23:
+            result = "true" if self.on_ground else "false"
+            return f"{{{serial}_{result}}}".encode("utf-8")
+        if n in _OK_COMMANDS:
+            return f"{{{serial}_ok}}".encode("utf-8")
+        if n in _BARE_OK_COMMANDS:
+            return b"{ok}"
+        return None
+
+    def _command_seconds(self, cmd: dict) -> float:
+        """Time the firmware's main loop spends on a command."""
+        n = cmd.get("N")
+        seconds = LOOP_SECONDS
+        if n == 5:
+            # D1=3 writes both servos, each with its own hold
+            seconds += FIRMWARE_SERVO_HOLD * (2 if cmd.get("D1") == 3 else 1)
+        elif n == 106 and cmd.get("D1") in (1, 2, 3, 4, 5):
+            seconds += FIRMWARE_SERVO_HOLD * (2 if cmd.get("D1") == 5 else 1)
+        elif n == 21:
+            seconds += self._echo_cm * ECHO_SECONDS_PER_CM
+        return seconds
+
+    def _on_frame(self, frame: str, now: float) -> None:
+        """Handle one complete frame at the bridge."""
+        if frame == "{Heartbeat}":
+            self._heartbeat_answered = True
+            if self._heartbeat_sent_at is not None:
+                self.heartbeat_latencies.append(now - self._heartbeat_sent_at)
+                self._heartbeat_sent_at = None
+                self.heartbeats_answered += 1
+            return
+        try:
+            cmd = json.loads(frame)
+        except ValueError:
+            cmd = None
+        if isinstance(cmd, dict):
+            self.commands_received.append(cmd)
+        # The bridge forwards every other frame for the Arduino to parse
+        self._down.send(frame, now)
+
+    def _on_data(self, data: bytes, now: float) -> None:
+        """Frame client bytes the way the ESP32 bridge does."""
+        for c in data.decode("utf-8", "replace"):
+            if not self._rx and c != "{":
+                continue
+            if c != " ":
+                self._rx += c
+            if c == "}":
+                frame, self._rx = self._rx, ""
+                self._on_frame(frame, now)
+
+    def _arrive(self, now: float) -> None:
+        """Move the next frame off the UART into the Arduino's buffer."""
+        arrival, frame = self._down.pop()
+        if self._rx_bytes + len(frame) > RX_BUFFER_BYTES:
+            self.frames_dropped += 1
+            return
+        self._rx_frames.append((arrival, frame))
+        self._rx_bytes += len(frame)
+
+    def _execute(self) -> None:
+        """Run the oldest buffered frame once the main loop is free."""
+        arrival, frame = self._rx_frames.popleft()
+        self._rx_bytes -= len(frame)
+        now = max(self._busy_until, arrival)
+        seconds = LOOP_SECONDS
+        try:
+            cmd = json.loads(frame)
+        except ValueError:
+            cmd = None
+        if isinstance(cmd, dict):
+            reply = self.handle_command(cmd, now)
+            seconds = self._command_seconds(cmd)
+            if reply:
+                self._up.send(reply.decode("utf-8"), now)
+        self._busy_until = now + seconds
+
+    def _ready(self) -> Optional[float]:
+        """When the Arduino will run its next buffered frame."""
+        if not self._rx_frames:
+            return None
+        return max(self._busy_until, self._rx_frames[0][0])
+
+    def next_event(self) -> Optional[float]:
+        """Time tick() next has something to do, or None if idle."""
+        times = [self._down.next_due(), self._ready(), self._up.next_due()]
+        if self._timer is not None:
+            times.append(self._timer[0])
+        if self._client is not None:
+            times.append(self._next_heartbeat)
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+
+    def _beat(self, now: float) -> None:
+        """Send a heartbeat, counting an unanswered previous one as missed."""
+        if self._heartbeat_answered:
+            self._missed = 0
+        else:
+            self._missed += 1
+        self._heartbeat_answered = False
+        self._tx += b"{Heartbeat}"
+        self.heartbeats_sent += 1
+        if self._heartbeat_sent_at is None:
+            self._heartbeat_sent_at = now
+        self._next_heartbeat = now + self.heartbeat_interval
+        if self._missed > MISSED_HEARTBEAT_LIMIT:
+            self.heartbeat_disconnects += 1
+            self._hangup = True
+
+    def tick(self, now: float) -> Optional[bytes]:
+        """Advance the serial link, firmware and bridge to now.
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            Bytes newly queued for the client, or None
+        """
+        start = len(self._tx)
+        while True:
+            arrival = self._down.next_due()
+            ready = self._ready()
+            timer = self._timer[0] if self._timer is not None else None
+            due = [t for t in (ready, timer, arrival) if t is not None and t <= now]
+            if not due:
+                break
+            first = min(due)
+            if first == ready:
+                self._execute()
+            elif first == timer:
+                serial = self._timer[1]
+                self._end_motion(timer)
+                self._up.send(f"{{{serial}_ok}}", timer)
+            else:
+                self._arrive(arrival)
+        for _, frame in self._up.receive(now):
+            self._tx += frame.encode("utf-8")
+        if self._client is not None and now >= self._next_heartbeat:
+            self._beat(now)
+        return bytes(self._tx[start:]) if len(self._tx) > start else None
+
+    def _attach(self, client, now: float) -> None:
+        """Start serving a newly connected client."""
+        self._client = client
+        self._rx = ""
+        self._tx = bytearray()
+        self._heartbeat_sent_at = None
+        self._heartbeat_answered = False
+        self._missed = 0
+        self._hangup = False
+        self._next_heartbeat = now + self.heartbeat_interval
+
+    def _detach(self, now: float) -> None:
+        """Forget the client; the bridge tells the car to stop."""
+        self._client = None
+        self._hangup = False
+        self._down.send(_BRIDGE_STOP, now)
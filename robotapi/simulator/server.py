@@ -0,0 +1,267 @@
+"""Socket server hosting many simulated cars in one thread."""
+
+import heapq
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+from robotapi.protocol import UART_BYTES_PER_SECOND
+from robotapi.transport import SocketPairTransport
+from robotapi.simulator.robot import SimulatedRobot
+from robotapi.simulator.world import World
+
+# Longest the server sleeps in select() with nothing scheduled
+_IDLE_TIMEOUT = 0.05
+
+
+class SimulatorServer:
+    """Hosts many simulated robots on ephemeral ports in one thread.
+
+    Each robot's next event (a UART delivery, the firmware finishing a
+    command, a timed move ending or a heartbeat) sits in one heap, so the
+    loop only wakes for robots with something to do.
+    """
+
+    def __init__(
+        self,
+        count: int = 1,
+        heartbeat_interval: float = 1.0,
+        host: str = "127.0.0.1",
+        uart_rate: Optional[float] = UART_BYTES_PER_SECOND,
+        world: Optional[World] = None,
+    ):
+        """Initialize simulator.
+
+        Args:
+            count: Number of robots to simulate
+            heartbeat_interval: Seconds between {Heartbeat} messages per robot
+            host: Interface to listen on
+            uart_rate: Serial link bytes per second, or None for no latency
+            world: Obstacles shared by all robots
+        """
+        self.host = host
+        self.robots: List[SimulatedRobot] = [
+            SimulatedRobot(heartbeat_interval, uart_rate=uart_rate, world=world)
+            for _ in range(count)
+        ]
+        for index, robot in enumerate(self.robots):
+            robot._index = index
+        self._events: List[Tuple[float, int]] = []
+        self._attaching: Deque[Tuple[int, socket.socket]] = deque()
+        self._waker_r: Optional[socket.socket] = None
+        self._waker_w: Optional[socket.socket] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def ports(self) -> List[int]:
+        """Listening port of each robot."""
+        return [robot.port for robot in self.robots]
+
+    def is_running(self) -> bool:
+        """Check if the simulator thread is running.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    def start(self) -> None:
+        """Bind listeners and start the simulator thread."""
+        self._selector = selectors.DefaultSelector()
+        self._events = []
+        for robot in self.robots:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((self.host, 0))
+            listener.listen(1)
+            listener.setblocking(False)
+            robot._listener = listener
+            robot._scheduled = None
+            robot.port = listener.getsockname()[1]
+            self._selector.register(listener, selectors.EVENT_READ, (robot, True))
+        self._waker_r, self._waker_w = socket.socketpair()
+        self._waker_r.setblocking(False)
+        self._waker_w.setblocking(False)
+        self._selector.register(self._waker_r, selectors.EVENT_READ, (None, False))
+        if self._attaching:
+            self._waker_w.send(b"\0")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robotapi-simulator", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the simulator and close all sockets."""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        for robot in self.robots:
+            for sock in (robot._client, robot._listener):
+                if sock:
+                    try:
+                        sock.close()
+                    except OSError:
+                        pass
+            robot._client = None
+            robot._listener = None
+        while self._attaching:
+            self._attaching.popleft()[1].close()
+        for sock in (self._waker_r, self._waker_w):
+            if sock:
+                sock.close()
+        self._waker_r = self._waker_w = None
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+
+    def _schedule(self, robot: SimulatedRobot) -> None:
+        """Queue a robot's next event unless an earlier one is queued."""
+        when = robot.next_event()
+        if when is None:
+            return
+        if robot._scheduled is None or when < robot._scheduled:
+            robot._scheduled = when
+            heapq.heappush(self._events, (when, robot._index))
+
+    def _service(self, robot: SimulatedRobot, now: float) -> None:
+        """Advance a robot to now and send whatever it produced."""
+        robot.tick(now)
+        self._flush(robot)
+        if robot._hangup:
+            # Too many missed heartbeats: the bridge closes the connection
+            self._drop(robot, now)
+        self._schedule(robot)
+
+    def attach(self, index: int, sock: socket.socket) -> None:
+        """Serve a robot over an already-connected socket (any thread).
+
+        The socket replaces the robot's client as if it had connected to
+        the robot's port.
+
+        Args:
+            index: Robot index
+            sock: The robot's end of a connected stream socket
+        """
+        self._attaching.append((index, sock))
+        try:
+            self._waker_w.send(b"\0")
+        except (AttributeError, OSError):
+            pass  # Not running; served once started
+
+    def transport(self, index: int = 0) -> SocketPairTransport:
+        """Return an in-process transport to a robot, needing no TCP port.
+
+        Args:
+            index: Robot index
+
+        Returns:
+            Transport that attaches a fresh socketpair on every open()
+        """
+        return SocketPairTransport(lambda peer: self.attach(index, peer))
+
+    def _accept(self, robot: SimulatedRobot) -> None:
+        """Accept a TCP client."""
+        try:
+            client, _ = robot._listener.accept()
+        except OSError:
+            return
+        self._serve(robot, client)
+
+    def _serve(self, robot: SimulatedRobot, client: socket.socket) -> None:
+        """Attach a new client, replacing any existing one."""
+        now = time.monotonic()
+        if robot._client:
+            self._drop(robot, now)
+        client.setblocking(False)
+        if client.family != socket.AF_UNIX:
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        robot._attach(client, now)
+        self._selector.register(client, selectors.EVENT_READ, (robot, False))
+        self._schedule(robot)
+
+    def _drop(self, robot: SimulatedRobot, now: float) -> None:
+        """Disconnect a robot's client."""
+        if robot._client:
+            try:
+                self._selector.unregister(robot._client)
+            except (KeyError, ValueError):
+                pass
+            try:
+                robot._client.close()
+            except OSError:
+                pass
+            robot._detach(now)
+
+    def _flush(self, robot: SimulatedRobot) -> None:
+        """Write pending reply bytes to a robot's client."""
+        if not robot._tx or not robot._client:
+            return
+        try:
+            sent = robot._client.send(robot._tx)
+            del robot._tx[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._drop(robot, time.monotonic())
+
+    def _run(self) -> None:
+        """Simulator main loop."""
+        while self._running:
+            now = time.monotonic()
+            while self._events and self._events[0][0] <= now:
+                when, index = heapq.heappop(self._events)
+                robot = self.robots[index]
+                if robot._scheduled != when:
+                    continue
+                robot._scheduled = None
+                self._service(robot, now)
+
+            timeout = _IDLE_TIMEOUT
+            if self._events:
+                timeout = min(timeout, max(0.0, self._events[0][0] - time.monotonic()))
+
+            for key, _ in self._selector.select(timeout):
+                robot, is_listener = key.data
+                if robot is None:
+                    self._drain_attaching()
+                    continue
+                if is_listener:
+                    self._accept(robot)
+                    continue
+                try:
+                    data = robot._client.recv(4096)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b""
+                now = time.monotonic()
+                if not data:
+                    self._drop(robot, now)
+                    self._schedule(robot)
+                    continue
+                robot._on_data(data, now)
+                self._service(robot, now)
+
+    def _drain_attaching(self) -> None:
+        """Serve sockets handed over by attach()."""
+        try:
+            while self._waker_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        while self._attaching:
+            index, sock = self._attaching.popleft()
+            self._serve(self.robots[index], sock)
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
@@ -0,0 +1,71 @@
+"""Serial link timing between the ESP32 bridge and the Arduino."""
+
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+
+class SerialLink:
+    """One direction of a UART.
+
+    Frames are transmitted one after another at the link's byte rate, so a
+    frame sent while the link is busy waits for the ones ahead of it.
+    """
+
+    def __init__(self, bytes_per_second: Optional[float]):
+        """Initialize link.
+
+        Args:
+            bytes_per_second: Byte rate, or None to deliver instantly
+        """
+        self.bytes_per_second = bytes_per_second
+        self.bytes_sent = 0
+        self._frames: Deque[Tuple[float, str]] = deque()
+        self._free_at = 0.0
+
+    def __len__(self) -> int:
+        """Number of frames not yet delivered."""
+        return len(self._frames)
+
+    def send(self, frame: str, now: float) -> float:
+        """Start transmitting a frame.
+
+        Args:
+            frame: Frame text
+            now: Time the frame is handed to the UART
+
+        Returns:
+            Time its last byte arrives
+        """
+        done = now
+        if self.bytes_per_second is not None:
+            done = max(now, self._free_at) + len(frame) / self.bytes_per_second
+            self._free_at = done
+        self._frames.append((done, frame))
+        self.bytes_sent += len(frame)
+        return done
+
+    def next_due(self) -> Optional[float]:
+        """Arrival time of the next frame, or None if the link is idle."""
+        return self._frames[0][0] if self._frames else None
+
+    def pop(self) -> Tuple[float, str]:
+        """Remove and return the next (arrival time, frame)."""
+        return self._frames.popleft()
+
+    def receive(self, now: float) -> List[Tuple[float, str]]:
+        """Remove and return every frame that has arrived by now.
+
+        Args:
+            now: Current time
+
+        Returns:
+            List of (arrival time, frame)
+        """
+        arrived = []
+        while self._frames and self._frames[0][0] <= now:
+            arrived.append(self._frames.popleft())
+        return arrived
+
+    def clear(self) -> None:
+        """Drop frames in transit."""
+        self._frames.clear()
@@ -0,0 +1,169 @@
+"""Differential-drive kinematics and obstacles for simulated cars.
+
+Positions are in cm and headings in radians, counter-clockwise from the
+x axis. A car starts at the origin facing along +x.
+"""
+
+import math
+from typing import Iterable, List, Optional, Tuple
+
+# Ground speed per unit of motor PWM (0-255), about 1 m/s flat out
+CM_PER_SECOND_PER_SPEED = 0.4
+# Distance between the left and right wheels
+TRACK_WIDTH_CM = 13.0
+# Radius of the circle enclosing the car, used for collisions
+CAR_RADIUS_CM = 12.0
+# Ultrasonic sensor distance ahead of the car's centre
+SENSOR_OFFSET_CM = 8.0
+# The firmware caps ultrasonic readings here; also what open space reads
+SENSOR_MAX_CM = 150
+# Longest interval integrated in one step when checking for collisions
+KINEMATIC_STEP = 0.01
+
+
+class Pose:
+    """Position and heading of a car."""
+
+    __slots__ = ("x", "y", "heading")
+
+    def __init__(self, x: float = 0.0, y: float = 0.0, heading: float = 0.0):
+        self.x = x
+        self.y = y
+        self.heading = heading
+
+    def __repr__(self) -> str:
+        return f"Pose(x={self.x:.1f}, y={self.y:.1f}, heading={math.degrees(self.heading):.1f})"
+
+
+def drive(pose: Pose, left: float, right: float, dt: float) -> Pose:
+    """Integrate differential-drive motion exactly over dt.
+
+    Args:
+        pose: Starting pose
+        left: Left wheel ground speed in cm/s
+        right: Right wheel ground speed in cm/s
+        dt: Seconds to integrate
+
+    Returns:
+        New pose
+    """
+    v = (left + right) / 2
+    omega = (right - left) / TRACK_WIDTH_CM
+    if abs(omega) < 1e-9:
+        return Pose(
+            pose.x + v * dt * math.cos(pose.heading),
+            pose.y + v * dt * math.sin(pose.heading),
+            pose.heading,
+        )
+    heading = pose.heading + omega * dt
+    radius = v / omega
+    return Pose(
+        pose.x + radius * (math.sin(heading) - math.sin(pose.heading)),
+        pose.y - radius * (math.cos(heading) - math.cos(pose.heading)),
+        heading,
+    )
+
+
+class Obstacle:
+    """A round obstacle such as a post or a chair leg."""
+
+    __slots__ = ("x", "y", "radius")
+
+    def __init__(self, x: float, y: float, radius: float):
+        self.x = x
+        self.y = y
+        self.radius = radius
+
+    def __repr__(self) -> str:
+        return f"Obstacle(x={self.x}, y={self.y}, radius={self.radius})"
+
+
+class World:
+    """Obstacles, and optionally walls, shared by simulated cars."""
+
+    def __init__(
+        self,
+        obstacles: Iterable[Obstacle] = (),
+        bounds: Optional[Tuple[float, float, float, float]] = None,
+    ):
+        """Initialize world.
+
+        Args:
+            obstacles: Round obstacles
+            bounds: Walls as (min_x, min_y, max_x, max_y), or None for open space
+        """
+        self.obstacles: List[Obstacle] = list(obstacles)
+        self.bounds = bounds
+
+    def collides(self, x: float, y: float, radius: float = CAR_RADIUS_CM) -> bool:
+        """Check whether a circle overlaps an obstacle or wall.
+
+        Args:
+            x: Centre x in cm
+            y: Centre y in cm
+            radius: Circle radius in cm
+
+        Returns:
+            True on contact
+        """
+        if self.bounds is not None:
+            min_x, min_y, max_x, max_y = self.bounds
+            if not (min_x + radius <= x <= max_x - radius and min_y + radius <= y <= max_y - radius):
+                return True
+        for o in self.obstacles:
+            if (x - o.x) ** 2 + (y - o.y) ** 2 < (radius + o.radius) ** 2:
+                return True
+        return False
+
+    def ray(self, x: float, y: float, angle: float) -> Optional[float]:
+        """Distance along a ray to the nearest surface.
+
+        Args:
+            x: Ray origin x in cm
+            y: Ray origin y in cm
+            angle: Ray direction in radians
+
+        Returns:
+            Distance in cm, or None if nothing is hit
+        """
+        dx, dy = math.cos(angle), math.sin(angle)
+        nearest = None
+        for o in self.obstacles:
+            # Solve |origin + t*d - centre| = radius for the first t >= 0
+            fx, fy = x - o.x, y - o.y
+            b = fx * dx + fy * dy
+            c = fx * fx + fy * fy - o.radius * o.radius
+            disc = b * b - c
+            if disc < 0:
+                continue
+            t = -b - math.sqrt(disc)
+            if t < 0:
+                t = -b + math.sqrt(disc)
+            if t >= 0 and (nearest is None or t < nearest):
+                nearest = t
+        if self.bounds is not None:
+            min_x, min_y, max_x, max_y = self.bounds
+            for edge, d, p in ((min_x, dx, x), (max_x, dx, x), (min_y, dy, y), (max_y, dy, y)):
+                if d != 0:
+                    t = (edge - p) / d
+                    if t >= 0 and (nearest is None or t < nearest):
+                        nearest = t
+        return nearest
+
+    def sonar(self, pose: Pose, pan: float) -> int:
+        """Reading of the ultrasonic sensor the firmware would report.
+
+        Args:
+            pose: Car pose
+            pan: Pan servo angle in degrees (90 ahead, higher turns right)
+
+        Returns:
+            Distance in whole cm, capped at SENSOR_MAX_CM
+        """
+        angle = pose.heading - math.radians(pan - 90)
+        x = pose.x + SENSOR_OFFSET_CM * math.cos(pose.heading)
+        y = pose.y + SENSOR_OFFSET_CM * math.sin(pose.heading)
+        distance = self.ray(x, y, angle)
+        if distance is None or distance > SENSOR_MAX_CM:
+            return SENSOR_MAX_CM
+        return int(distance)
@@ -0,0 +1,380 @@
+"""Sensor telemetry scheduled within the serial link's byte budget.
+
+Callers subscribe to sensors at the rates they need. One scheduler thread
+interleaves the queries by priority and earliest deadline, metering them
+through a TokenBucket so telemetry only ever uses its share of the 9600-baud
+ESP32-to-Arduino link and motion commands are never starved.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from robotapi.pacing import TokenBucket, command_cost, uart_bucket
+from robotapi.protocol import (
+    LINE_LEFT,
+    LINE_MIDDLE,
+    LINE_RIGHT,
+    build_distance_cmd,
+    build_ground_cmd,
+    build_line_tracking_cmd,
+    build_obstacle_cmd,
+)
+from robotapi.exceptions import CommandError, RobotConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Queries behind each sensor; a sample is published once all have replied
+SENSORS: Dict[str, Tuple[Dict[str, Any], ...]] = {
+    "distance": (build_distance_cmd(),),
+    "obstacle": (build_obstacle_cmd(),),
+    "line": tuple(build_line_tracking_cmd(s) for s in (LINE_LEFT, LINE_MIDDLE, LINE_RIGHT)),
+    "ground": (build_ground_cmd(),),
+}
+
+# Default share of the UART byte budget used by telemetry
+TELEMETRY_SHARE = 0.5
+# Seconds after which unanswered queries are abandoned
+QUERY_TIMEOUT = 0.5
+# Recent sample times used to measure each sensor's achieved rate
+RATE_SAMPLES = 16
+
+
+class Sample:
+    """One timestamped sensor reading.
+
+    Attributes:
+        sensor: Sensor name from SENSORS
+        value: Reading: cm for "distance", bool for "obstacle" and "ground",
+               (left, middle, right) analog values for "line"
+        timestamp: time.monotonic() when the last reply arrived
+    """
+
+    __slots__ = ("sensor", "value", "timestamp")
+
+    def __init__(self, sensor: str, value: Any, timestamp: float):
+        self.sensor = sensor
+        self.value = value
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return f"Sample({self.sensor!r}, {self.value!r})"
+
+
+class Subscription:
+    """A caller's interest in one sensor at a given rate."""
+
+    __slots__ = ("sensor", "rate", "priority", "callback")
+
+    def __init__(
+        self,
+        sensor: str,
+        rate: float,
+        priority: int,
+        callback: Optional[Callable[[Sample], None]],
+    ):
+        self.sensor = sensor
+        self.rate = rate
+        self.priority = priority
+        self.callback = callback
+
+    def __repr__(self) -> str:
+        return f"Subscription({self.sensor!r}, rate={self.rate}, priority={self.priority})"
+
+
+class _Channel:
+    """Scheduling state of one subscribed sensor."""
+
+    def __init__(self, sensor: str, now: float):
+        self.sensor = sensor
+        self.commands = SENSORS[sensor]
+        self.cost = sum(command_cost(cmd) for cmd in self.commands)
+        self.subscriptions: List[Subscription] = []
+        self.period = 0.0
+        self.priority = 0
+        self.next_due = now
+        self.pending: List[Future] = []
+        self.sent_at = 0.0
+        self.latest: Optional[Sample] = None
+        self.queries = 0
+        self.samples = 0
+        self.coalesced = 0
+        self.sample_times: Deque[float] = deque(maxlen=RATE_SAMPLES)
+
+    def update(self) -> None:
+        """Recompute rate and priority from the subscriptions."""
+        self.period = 1.0 / max(s.rate for s in self.subscriptions)
+        self.priority = max(s.priority for s in self.subscriptions)
+
+    @property
+    def rate(self) -> float:
+        """Achieved samples per second over recent samples."""
+        times = self.sample_times
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+
+class TelemetryScheduler:
+    """Polls subscribed sensors at their requested rates within a byte budget.
+
+    Among sensors that are due, the highest priority goes first and equal
+    priorities are served earliest-deadline-first, which interleaves them
+    round-robin when the budget cannot cover every requested rate. Each
+    sensor has at most one query set in flight.
+    """
+
+    def __init__(
+        self,
+        submit: Callable[[Dict[str, Any]], Future],
+        budget: Optional[TokenBucket] = None,
+        discard: Optional[Callable[[Future], None]] = None,
+        query_timeout: float = QUERY_TIMEOUT,
+    ):
+        """Initialize scheduler.
+
+        Args:
+            submit: Sends one command and returns the future of its reply
+            budget: Bucket metering UART bytes (defaults to TELEMETRY_SHARE of
+                    the link); share one bucket with other paced producers
+            discard: Called with queries abandoned after query_timeout
+            query_timeout: Seconds before unanswered queries are re-sent
+        """
+        self.submit = submit
+        self.budget = budget if budget is not None else uart_bucket(TELEMETRY_SHARE)
+        self.discard = discard
+        self.query_timeout = query_timeout
+        self.bytes_sent = 0
+        self._channels: Dict[str, _Channel] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def subscribe(
+        self,
+        sensor: str,
+        rate: float,
+        callback: Optional[Callable[[Sample], None]] = None,
+        priority: int = 0,
+    ) -> Subscription:
+        """Request samples of a sensor.
+
+        Args:
+            sensor: Sensor name ("distance", "obstacle", "line" or "ground")
+            rate: Samples per second wanted
+            callback: Called with each Sample from the I/O thread
+            priority: Higher values are served first when the budget is short
+
+        Returns:
+            Subscription to pass to unsubscribe()
+
+        Raises:
+            ValueError: If the sensor is unknown or rate is not positive
+        """
+        if sensor not in SENSORS:
+            raise ValueError(f"Unknown sensor: {sensor}")
+        if rate <= 0:
+            raise ValueError("Sample rate must be positive")
+        subscription = Subscription(sensor, rate, priority, callback)
+        with self._lock:
+            channel = self._channels.get(sensor)
+            if channel is None:
+                channel = self._channels[sensor] = _Channel(sensor, time.monotonic())
+            channel.subscriptions.append(subscription)
+            channel.update()
+        self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Cancel a subscription.
+
+        Args:
+            subscription: Subscription returned by subscribe()
+        """
+        with self._lock:
+            channel = self._channels.get(subscription.sensor)
+            if channel is None or subscription not in channel.subscriptions:
+                return
+            channel.subscriptions.remove(subscription)
+            if channel.subscriptions:
+                channel.update()
+            else:
+                del self._channels[subscription.sensor]
+
+    def latest(self, sensor: str) -> Optional[Sample]:
+        """Return the newest sample of a subscribed sensor.
+
+        Args:
+            sensor: Sensor name
+
+        Returns:
+            Newest sample, or None if none has arrived
+        """
+        channel = self._channels.get(sensor)
+        return channel.latest if channel else None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return per-sensor scheduling statistics.
+
+        Returns:
+            Dictionary keyed by sensor with requested and achieved rates,
+            query and sample counts and coalesced (skipped) periods
+        """
+        with self._lock:
+            return {
+                sensor: {
+                    "requested_rate": 1.0 / channel.period,
+                    "rate": channel.rate,
+                    "queries": channel.queries,
+                    "samples": channel.samples,
+                    "coalesced": channel.coalesced,
+                }
+                for sensor, channel in self._channels.items()
+            }
+
+    def is_running(self) -> bool:
+        """Check if the scheduler thread is running.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        if self._running:
+            return
+        self._running = True
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name="robotapi-telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread."""
+        self._running = False
+        self._wake.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _pick(self, now: float) -> Tuple[Optional[_Channel], float]:
+        """Choose the next sensor to query.
+
+        Returns:
+            Tuple of (channel or None, seconds until the next one is due)
+        """
+        best = None
+        wait = 1.0
+        with self._lock:
+            for channel in self._channels.values():
+                if channel.pending:
+                    if now - channel.sent_at < self.query_timeout:
+                        if channel.next_due <= now:
+                            # Still waiting on the last reply: skip this period
+                            channel.coalesced += 1
+                            channel.next_due += channel.period
+                        wait = min(wait, max(0.0, channel.next_due - now))
+                        continue
+                    self._abandon(channel)
+                if channel.next_due > now:
+                    wait = min(wait, channel.next_due - now)
+                elif best is None or (-channel.priority, channel.next_due) < (
+                    -best.priority,
+                    best.next_due,
+                ):
+                    best = channel
+        return best, wait
+
+    def _abandon(self, channel: _Channel) -> None:
+        """Forget queries whose replies never arrived (lock held)."""
+        pending, channel.pending = channel.pending, []
+        if self.discard is not None:
+            for future in pending:
+                if not future.done():
+                    self.discard(future)
+
+    def _send(self, channel: _Channel, now: float) -> None:
+        """Send one sensor's queries."""
+        futures = []
+        try:
+            for cmd in channel.commands:
+                futures.append(self.submit(cmd))
+        except CommandError as e:
+            # Pipeline full; retry shortly without losing the slot
+            self._fail(futures, e)
+            channel.next_due = now + channel.period / 4
+            return
+        except RobotConnectionError as e:
+            self._fail(futures, e)
+            raise
+        with self._lock:
+            channel.pending = futures
+            channel.sent_at = now
+            channel.queries += 1
+            channel.next_due = max(channel.next_due + channel.period, now)
+        self.bytes_sent += channel.cost
+        for future in futures:
+            future.add_done_callback(lambda _, c=channel, f=futures: self._on_reply(c, f))
+
+    def _fail(self, futures: List[Future], error: Exception) -> None:
+        """Fail the queries of a set that could not be sent in full."""
+        for future in futures:
+            if self.discard is not None:
+                self.discard(future)
+            if not future.done():
+                future.set_exception(error)
+
+    def _on_reply(self, channel: _Channel, futures: List[Future]) -> None:
+        """Publish a sample once every query of a set has replied (I/O thread)."""
+        with self._lock:
+            if channel.pending is not futures or not all(f.done() for f in futures):
+                return
+            channel.pending = []
+        if any(f.cancelled() or f.exception() is not None for f in futures):
+            return
+        values = [f.result() for f in futures]
+        timestamp = max(f.replied_at or 0.0 for f in futures)
+        sample = Sample(channel.sensor, values[0] if len(values) == 1 else tuple(values), timestamp)
+        channel.latest = sample
+        channel.samples += 1
+        channel.sample_times.append(timestamp)
+        for subscription in list(channel.subscriptions):
+            if subscription.callback is not None:
+                try:
+                    subscription.callback(sample)
+                except Exception:
+                    logger.exception("Telemetry callback failed")
+        self._wake.set()
+
+    def _run(self) -> None:
+        """Scheduler thread main loop."""
+        while self._running:
+            now = time.monotonic()
+            channel, wait = self._pick(now)
+            if channel is None:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            if not self.budget.consume(channel.cost, now):
+                # Re-pick afterwards: a higher priority sensor may be due
+                self._wake.wait(max(self.budget.delay(channel.cost, now), 0.001))
+                self._wake.clear()
+                continue
+            try:
+                self._send(channel, now)
+            except RobotConnectionError as e:
+                logger.warning("Telemetry stopped: %s", e)
+                break
+        self._running = False
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
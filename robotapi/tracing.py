@@ -0,0 +1,208 @@
+"""Opt-in span tracing of the I/O paths, exported as Chrome trace JSON.
+
+Instrumented code checks one attribute before doing anything else:
+
+    start = perf_counter_ns() if TRACER.enabled else 0
+    ...
+    if start:
+        TRACER.record("Connection.send", "io", start)
+
+so with tracing disabled (the default) a span costs an attribute load and
+a branch, and tracing can stay in place on robots in the field. Enabled,
+each span is one tuple written into a fixed-size ring, overwriting the
+oldest. The ring can be exported in the Chrome trace event format for
+chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import functools
+import itertools
+import json
+import os
+import threading
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, IO, List, Optional, Tuple, Union
+
+# Spans kept by default; about 100 bytes each
+DEFAULT_CAPACITY = 65536
+
+# (name, category, start ns, duration ns, thread id, args)
+Span = Tuple[str, str, int, int, int, Optional[Dict[str, Any]]]
+
+
+class Tracer:
+    """Ring buffer of timed spans."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """Initialize tracer, disabled.
+
+        Args:
+            capacity: Number of spans kept
+        """
+        self.enabled = False
+        self.capacity = capacity
+        self._ring: List[Optional[Span]] = [None] * capacity
+        self._counter = itertools.count()
+        self._threads: Dict[int, str] = {}
+
+    def enable(self, capacity: Optional[int] = None) -> None:
+        """Start recording spans, discarding any recorded before.
+
+        Args:
+            capacity: New ring size (keeps the current size by default)
+        """
+        if capacity is not None:
+            self.capacity = capacity
+        self.clear()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording; recorded spans are kept for export."""
+        self.enabled = False
+
+    def clear(self) -> None:
+        """Discard recorded spans."""
+        self._ring = [None] * self.capacity
+        self._counter = itertools.count()
+        self._threads = {}
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        start: int,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Record a span that started at start and ends now.
+
+        Args:
+            name: Span name
+            category: Category shown in the viewer, e.g. "io"
+            start: perf_counter_ns() when the span began
+            args: Optional details shown with the span
+        """
+        end = perf_counter_ns()
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        # next() on itertools.count is atomic, so threads never share a slot
+        # unless the ring wraps around
+        self._ring[next(self._counter) % self.capacity] = (name, category, start, end - start, tid, args)
+
+    def span(self, name: str, category: str = "controller", args: Optional[Dict[str, Any]] = None):
+        """Context manager recording the enclosed block as a span.
+
+        Args:
+            name: Span name
+            category: Category shown in the viewer
+            args: Optional details shown with the span
+        """
+        return _SpanContext(self, name, category, args)
+
+    def spans(self) -> List[Span]:
+        """Return recorded spans in order of their start."""
+        return sorted((span for span in list(self._ring) if span is not None), key=lambda span: span[2])
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Return recorded spans in the Chrome trace event format.
+
+        Returns:
+            Dictionary with a "traceEvents" list of complete ("X") events
+            in microseconds, plus thread name metadata
+        """
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._threads.items())
+        ]
+        for name, category, start, duration, tid, args in self.spans():
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, destination: Union[str, IO[str]]) -> None:
+        """Write recorded spans as Chrome trace JSON.
+
+        Args:
+            destination: File path or open text file
+        """
+        if isinstance(destination, str):
+            with open(destination, "w") as f:
+                json.dump(self.chrome_trace(), f)
+        else:
+            json.dump(self.chrome_trace(), destination)
+
+
+class _SpanContext:
+    """Context manager returned by Tracer.span()."""
+
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer: Tracer, name: str, category: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        if self.tracer.enabled:
+            self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.start:
+            self.tracer.record(self.name, self.category, self.start, self.args)
+
+
+# Process-wide tracer used by the instrumented code
+TRACER = Tracer()
+
+
+def traced(category: str = "controller") -> Callable:
+    """Decorate a method so each call is recorded as a span named after it.
+
+    Args:
+        category: Category shown in the viewer
+    """
+
+    def decorate(func: Callable) -> Callable:
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                TRACER.record(name, category, start)
+
+        return wrapper
+
+    return decorate
+
+
+def enable(capacity: Optional[int] = None) -> None:
+    """Start tracing (see Tracer.enable)."""
+    TRACER.enable(capacity)
+
+
+def disable() -> None:
+    """Stop tracing; recorded spans are kept for export."""
+    TRACER.disable()
+
+
+def export_chrome(destination: Union[str, IO[str]]) -> None:
+    """Write recorded spans as Chrome trace JSON (see Tracer.export_chrome)."""
+    TRACER.export_chrome(destination)
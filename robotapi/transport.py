@@ -0,0 +1,285 @@
+"""Byte-stream transports under Connection.
+
+Connection frames and counts messages; a Transport only moves bytes. The
+default is TCPTransport to the ESP32 bridge on port 100. SocketPairTransport
+keeps the stream in-process (SimulatorServer.transport() serves it without
+a listening port), and SerialTransport talks to the Arduino's UART directly,
+skipping WiFi and the bridge:
+
+    robot = RobotController("mega", transport=SerialTransport("/dev/ttyACM0"))
+
+Transports report failures as OSError; Connection turns them into
+RobotConnectionError.
+"""
+
+import os
+import select
+import socket
+from typing import Callable, Optional
+from robotapi.protocol import UART_BAUD
+
+# Largest read per recv() call
+READ_SIZE = 4096
+
+
+class Transport:
+    """Bidirectional byte stream to the robot's firmware."""
+
+    def open(self) -> None:
+        """Open the stream.
+
+        Raises:
+            OSError: If the robot cannot be reached
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Close the stream; safe to call when already closed."""
+        raise NotImplementedError
+
+    def send(self, data: bytes) -> None:
+        """Write all of data.
+
+        Args:
+            data: Bytes to send
+
+        Raises:
+            OSError: If the write fails
+        """
+        raise NotImplementedError
+
+    def recv(self, timeout: float) -> Optional[bytes]:
+        """Read whatever has arrived, waiting up to timeout for something.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            Received bytes, None on timeout, or b"" once the far end closed
+
+        Raises:
+            OSError: If the read fails
+        """
+        raise NotImplementedError
+
+    def readable(self, timeout: float) -> bool:
+        """Wait until recv() would return without blocking.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if data (or end of stream) is waiting, False on timeout
+
+        Raises:
+            OSError: If the stream is closed
+        """
+        ready, _, _ = select.select([self], [], [], timeout)
+        return bool(ready)
+
+    def fileno(self) -> int:
+        """Descriptor select() can wait on for incoming data."""
+        raise NotImplementedError
+
+
+class SocketTransport(Transport):
+    """Transport over an already-connected stream socket."""
+
+    def __init__(self, sock: Optional[socket.socket] = None):
+        """Initialize transport.
+
+        Args:
+            sock: Connected socket, e.g. one end of socket.socketpair()
+        """
+        self.sock = sock
+
+    def open(self) -> None:
+        """Check the socket is still usable.
+
+        Raises:
+            OSError: If the socket has been closed
+        """
+        if self.sock is None:
+            raise OSError("Socket closed")
+
+    def close(self) -> None:
+        """Close the socket."""
+        sock, self.sock = self.sock, None
+        if sock is not None:
+            sock.close()
+
+    def send(self, data: bytes) -> None:
+        """Write all of data."""
+        self._socket().sendall(data)
+
+    def recv(self, timeout: float) -> Optional[bytes]:
+        """Read up to READ_SIZE bytes."""
+        sock = self._socket()
+        sock.settimeout(timeout)
+        try:
+            return sock.recv(READ_SIZE)
+        except (socket.timeout, BlockingIOError):
+            return None
+
+    def fileno(self) -> int:
+        """Socket descriptor."""
+        return self._socket().fileno()
+
+    def _socket(self) -> socket.socket:
+        """Return the open socket (it may be closed by another thread)."""
+        sock = self.sock
+        if sock is None:
+            raise OSError("Socket closed")
+        return sock
+
+    def __str__(self) -> str:
+        return "socket"
+
+
+class TCPTransport(SocketTransport):
+    """TCP connection to the ESP32 bridge."""
+
+    def __init__(self, ip: str, port: int = 100):
+        """Initialize transport.
+
+        Args:
+            ip: Robot IP address
+            port: TCP port (default 100)
+        """
+        super().__init__()
+        self.ip = ip
+        self.port = port
+
+    def open(self) -> None:
+        """Connect to the bridge.
+
+        Raises:
+            OSError: If the connection fails
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.connect((self.ip, self.port))
+            sock.settimeout(0.1)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+    def __str__(self) -> str:
+        return f"{self.ip}:{self.port}"
+
+
+class SocketPairTransport(SocketTransport):
+    """In-process transport over a fresh socket.socketpair() per open().
+
+    The far end either goes to serve (a simulator, say) or is left on peer
+    for the caller to play the robot.
+    """
+
+    def __init__(self, serve: Optional[Callable[[socket.socket], None]] = None):
+        """Initialize transport.
+
+        Args:
+            serve: Called with the robot's end of each new pair
+        """
+        super().__init__()
+        self.serve = serve
+        self.peer: Optional[socket.socket] = None
+
+    def open(self) -> None:
+        """Create a new pair and hand over the robot's end."""
+        self.sock, peer = socket.socketpair()
+        if self.serve is not None:
+            self.serve(peer)
+        else:
+            self.peer = peer
+
+    def __str__(self) -> str:
+        return "socketpair"
+
+
+class SerialTransport(Transport):
+    """Direct serial link to the Arduino, bypassing the ESP32 bridge.
+
+    The firmware reads the same JSON frames from its UART that the bridge
+    forwards, so the rest of the stack is unchanged. There is no bridge to
+    send {Heartbeat}, and opening the port resets most Arduino boards, so
+    allow a couple of seconds before the first command. Needs termios (POSIX).
+    """
+
+    def __init__(self, device: str, baudrate: int = UART_BAUD):
+        """Initialize transport.
+
+        Args:
+            device: Serial device, e.g. "/dev/ttyACM0" or a pty's slave
+            baudrate: Line speed (default 9600, the bridge's UART rate)
+        """
+        self.device = device
+        self.baudrate = baudrate
+        self._fd: Optional[int] = None
+
+    def open(self) -> None:
+        """Open the device raw, 8N1, at baudrate.
+
+        Raises:
+            OSError: If the device cannot be opened or configured
+            ValueError: If the platform has no such baud rate
+        """
+        import termios
+
+        speed = getattr(termios, f"B{self.baudrate}", None)
+        if speed is None:
+            raise ValueError(f"Unsupported baud rate: {self.baudrate}")
+        fd = os.open(self.device, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        try:
+            attrs = termios.tcgetattr(fd)
+            attrs[0] = 0  # iflag: no translation or flow control
+            attrs[1] = 0  # oflag: no output processing
+            attrs[2] = termios.CS8 | termios.CREAD | termios.CLOCAL
+            attrs[3] = 0  # lflag: no canonical mode or echo
+            attrs[4] = attrs[5] = speed
+            attrs[6][termios.VMIN] = 0
+            attrs[6][termios.VTIME] = 0
+            termios.tcsetattr(fd, termios.TCSANOW, attrs)
+            termios.tcflush(fd, termios.TCIOFLUSH)
+        except termios.error as e:
+            os.close(fd)
+            raise OSError(f"Cannot configure {self.device}: {e}")
+        self._fd = fd
+
+    def close(self) -> None:
+        """Close the device."""
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def send(self, data: bytes) -> None:
+        """Write all of data, waiting while the output buffer is full."""
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self.fileno(), view)
+            except BlockingIOError:
+                select.select([], [self.fileno()], [], 1.0)
+                continue
+            view = view[written:]
+
+    def recv(self, timeout: float) -> Optional[bytes]:
+        """Read up to READ_SIZE bytes."""
+        fd = self.fileno()
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            return None
+        try:
+            return os.read(fd, READ_SIZE)
+        except BlockingIOError:
+            return None
+
+    def fileno(self) -> int:
+        """Device descriptor."""
+        if self._fd is None:
+            raise OSError("Serial port closed")
+        return self._fd
+
+    def __str__(self) -> str:
+        return self.device
@@ -0,0 +1,347 @@
+"""Parallel JPEG decode stage for camera frames.
+
+Decoding needs the optional ``vision`` extras (``pip install
+robotapi[vision]`` for NumPy and Pillow) unless a custom decoder is given.
+"""
+
+import io
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Optional
+from robotapi.camera import Frame, FrameRing
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept for percentiles
+LATENCY_SAMPLES = 1024
+
+
+def decode_jpeg(data: bytes, scale: int = 1) -> Any:
+    """Decode a JPEG into an RGB NumPy array.
+
+    Args:
+        data: JPEG bytes
+        scale: Reduction factor. 2, 4 and 8 let the JPEG decoder skip
+               work by decoding at reduced resolution directly.
+
+    Returns:
+        Array of shape (height, width, 3)
+
+    Raises:
+        ImportError: If NumPy or Pillow is not installed
+    """
+    try:
+        import numpy
+        from PIL import Image
+    except ImportError as e:
+        raise ImportError("JPEG decoding requires 'pip install robotapi[vision]'") from e
+
+    image = Image.open(io.BytesIO(data))
+    if scale > 1:
+        image.draft("RGB", (max(1, image.width // scale), max(1, image.height // scale)))
+    return numpy.asarray(image.convert("RGB"))
+
+
+class DecodedFrame:
+    """Decoder output for one camera frame.
+
+    Attributes:
+        image: Decoder result (a NumPy array with the default decoder)
+        sequence: Sequence number of the source frame
+        captured_at: time.monotonic() when the JPEG was received
+        decoded_at: time.monotonic() when decoding finished
+        decode_time: Seconds spent from submission to decoded
+    """
+
+    __slots__ = ("image", "sequence", "captured_at", "decoded_at", "decode_time")
+
+    def __init__(
+        self, image: Any, sequence: int, captured_at: float, decoded_at: float, decode_time: float
+    ):
+        self.image = image
+        self.sequence = sequence
+        self.captured_at = captured_at
+        self.decoded_at = decoded_at
+        self.decode_time = decode_time
+
+    @property
+    def latency(self) -> float:
+        """Capture-to-array latency in seconds."""
+        return self.decoded_at - self.captured_at
+
+    def __repr__(self) -> str:
+        return f"DecodedFrame(sequence={self.sequence}, latency={self.latency:.4f})"
+
+
+class DecodeMetrics:
+    """Frame counts and latency samples for a decode pipeline.
+
+    Updated from the feeder and pool threads; every update goes through a
+    record_* method, which takes the lock.
+    """
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        """Initialize metrics.
+
+        Args:
+            samples: Number of recent latency samples to keep
+        """
+        self._lock = threading.Lock()
+        self.frames_submitted = 0
+        self.frames_decoded = 0
+        self.frames_failed = 0
+        # Never submitted because newer frames superseded them
+        self.dropped_skipped = 0
+        # Decoded but discarded as stale or unread
+        self.dropped_stale = 0
+        self._decode_times: Deque[float] = deque(maxlen=samples)
+        self._latencies: Deque[float] = deque(maxlen=samples)
+
+    @property
+    def frames_dropped(self) -> int:
+        """Total frames that never reached a consumer."""
+        return self.dropped_skipped + self.dropped_stale
+
+    def record(self, decoded: DecodedFrame) -> None:
+        """Record one decoded frame."""
+        with self._lock:
+            self.frames_decoded += 1
+            self._decode_times.append(decoded.decode_time)
+            self._latencies.append(decoded.latency)
+
+    def record_submitted(self) -> None:
+        """Record a frame handed to the pool."""
+        with self._lock:
+            self.frames_submitted += 1
+
+    def record_failed(self) -> None:
+        """Record a frame the decoder rejected."""
+        with self._lock:
+            self.frames_failed += 1
+
+    def record_skipped(self, count: int) -> None:
+        """Record frames superseded before they were submitted."""
+        with self._lock:
+            self.dropped_skipped += count
+
+    def record_stale(self) -> None:
+        """Record a decoded frame discarded as stale or unread."""
+        with self._lock:
+            self.dropped_stale += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return counts and latency statistics.
+
+        Returns:
+            Dictionary of counts and p50/p99/max latencies in seconds
+        """
+        with self._lock:
+            decode_times = sorted(self._decode_times)
+            latencies = sorted(self._latencies)
+            stats = {
+                "frames_submitted": self.frames_submitted,
+                "frames_decoded": self.frames_decoded,
+                "frames_failed": self.frames_failed,
+                "frames_dropped": self.frames_dropped,
+                "dropped_skipped": self.dropped_skipped,
+                "dropped_stale": self.dropped_stale,
+            }
+        for name, samples in (("decode", decode_times), ("latency", latencies)):
+            stats[f"{name}_p50"] = _percentile(samples, 0.50)
+            stats[f"{name}_p99"] = _percentile(samples, 0.99)
+            stats[f"{name}_max"] = samples[-1] if samples else 0.0
+        return stats
+
+
+def _percentile(samples, fraction: float) -> float:
+    """Percentile of sorted samples (0.0 when empty)."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class DecodePipeline:
+    """Decodes the newest camera frames in a thread or process pool.
+
+    A feeder thread takes the newest frame from a FrameRing whenever a
+    worker is free, so frames that arrive while every worker is busy are
+    skipped rather than queued. With latest_only (the default) consumers
+    only ever see the newest decoded frame; otherwise decoded frames are
+    kept in order in a bounded backlog whose oldest entries are dropped.
+    """
+
+    def __init__(
+        self,
+        source: FrameRing,
+        workers: int = 2,
+        executor: str = "thread",
+        scale: int = 1,
+        latest_only: bool = True,
+        backlog: int = 8,
+        decoder: Optional[Callable[[bytes], Any]] = None,
+    ):
+        """Initialize pipeline.
+
+        Args:
+            source: Ring to take JPEG frames from, e.g. CameraStream.ring
+            workers: Number of concurrent decodes
+            executor: "thread" or "process"
+            scale: Reduced-resolution factor for the default decoder (1, 2, 4, 8)
+            latest_only: Deliver only the newest decoded frame to consumers
+            backlog: Decoded frames kept for consumers when not latest_only
+            decoder: Callable turning JPEG bytes into an image; must be
+                     picklable for the process executor
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor}")
+        self.source = source
+        self.workers = workers
+        self.executor_kind = executor
+        self.latest_only = latest_only
+        self.decoder = decoder if decoder is not None else partial(decode_jpeg, scale=scale)
+        self.metrics = DecodeMetrics()
+        self._results: Deque[DecodedFrame] = deque(maxlen=1 if latest_only else backlog)
+        self._published = -1
+        self._consumed = -1
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(workers)
+        self._executor: Optional[Executor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def is_running(self) -> bool:
+        """Check if the pipeline is running.
+
+        Returns:
+            True if running
+        """
+        return self._running
+
+    def start(self) -> None:
+        """Start the worker pool and feeder thread."""
+        if self._running:
+            return
+        if self.executor_kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="robotapi-decode"
+            )
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robotapi-decode-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop feeding frames and shut the pool down."""
+        self._running = False
+        self.source.wake()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._cond:
+            self._cond.notify_all()
+
+    def latest(self) -> Optional[DecodedFrame]:
+        """Return the newest decoded frame without blocking.
+
+        Returns:
+            Newest decoded frame, or None if none is ready
+        """
+        with self._cond:
+            return self._results[-1] if self._results else None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[DecodedFrame]:
+        """Wait for a decoded frame not yet returned by get().
+
+        With latest_only this is the newest decoded frame; otherwise the
+        oldest frame in the backlog.
+
+        Args:
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            Decoded frame, or None if the timeout expired or the pipeline stopped
+        """
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: not self._running or any(r.sequence > self._consumed for r in self._results),
+                timeout,
+            )
+            if not ready or not self._results or self._results[-1].sequence <= self._consumed:
+                return None
+            if self.latest_only:
+                result = self._results[-1]
+            else:
+                result = self._results.popleft()
+            self._consumed = result.sequence
+            return result
+
+    def _run(self) -> None:
+        """Feeder thread: submit the newest frame whenever a worker is free."""
+        last = -1
+        while self._running:
+            if not self._slots.acquire(timeout=0.1):
+                continue
+            frame = None
+            while self._running and frame is None:
+                frame = self.source.wait_newer(last, timeout=0.1)
+            if frame is None:
+                self._slots.release()
+                break
+            if last >= 0 and frame.sequence > last + 1:
+                self.metrics.record_skipped(frame.sequence - last - 1)
+            last = frame.sequence
+            self._submit(frame)
+
+    def _submit(self, frame: Frame) -> None:
+        """Hand one frame to the pool."""
+        submitted = time.monotonic()
+        try:
+            future = self._executor.submit(self.decoder, frame.data)
+        except RuntimeError:
+            # Pool shut down while stopping
+            self._slots.release()
+            return
+        self.metrics.record_submitted()
+        future.add_done_callback(partial(self._on_decoded, frame, submitted))
+
+    def _on_decoded(self, frame: Frame, submitted: float, future: Future) -> None:
+        """Publish a finished decode (pool thread)."""
+        self._slots.release()
+        now = time.monotonic()
+        try:
+            image = future.result()
+        except Exception:
+            self.metrics.record_failed()
+            logger.exception("Frame decode failed")
+            return
+        decoded = DecodedFrame(image, frame.sequence, frame.timestamp, now, now - submitted)
+        self.metrics.record(decoded)
+        with self._cond:
+            if decoded.sequence < self._published:
+                # A newer frame finished first
+                self.metrics.record_stale()
+                return
+            if len(self._results) == self._results.maxlen:
+                oldest = self._results[0]
+                if oldest.sequence > self._consumed:
+                    self.metrics.record_stale()
+            self._results.append(decoded)
+            self._published = decoded.sequence
+            self._cond.notify_all()
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
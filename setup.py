@@ -27,6 +27,11 @@ setup(
     ],
     python_requires=">=3.7",
     install_requires=[],
+    entry_points={
+        "console_scripts": [
+            "robotapi-daemon=robotapi.daemon:main",
+        ],
+    },
     extras_require={
         "dev": [
             "pytest>=7.0",
@@ -36,5 +41,9 @@ setup(
             "isort>=5.0",
             "mypy>=0.990",
         ],
+        "vision": [
+            "numpy>=1.20",
+            "Pillow>=8.0",
+        ],
     },
 )
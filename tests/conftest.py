@@ -1,121 +1,45 @@
 """Pytest fixtures for robotapi tests."""
 
-import socket
-import threading
-import json
-import time
 import pytest
+from robotapi.simulator import SimulatorServer
 
 
-class MockRobotServer:
-    """Mock TCP server simulating robot protocol."""
+def pytest_configure(config):
+    """Register the simulator marker."""
+    config.addinivalue_line(
+        "markers",
+        "simulator(count=1, heartbeat_interval=1.0, **kwargs): SimulatorServer "
+        "arguments for the simulator fixture",
+    )
 
-    def __init__(self, port=10100):
-        """Initialize mock server.
-        
-        Args:
-            port: TCP port to listen on
-        """
-        self.port = port
-        self._socket = None
-        self._thread = None
-        self._running = False
-        self._client_socket = None
-        self.commands_received = []
-        self.obstacle_detected = False
 
-    def start(self):
-        """Start mock server."""
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self._socket.bind(("127.0.0.1", self.port))
-        self._socket.listen(1)
-        self._running = True
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
-        time.sleep(0.1)  # Give server time to start
-
-    def stop(self):
-        """Stop mock server."""
-        self._running = False
-        if self._client_socket:
-            try:
-                self._client_socket.close()
-            except:
-                pass
-        if self._socket:
-            try:
-                self._socket.close()
-            except:
-                pass
-        if self._thread:
-            self._thread.join(timeout=1.0)
-
-    def _run(self):
-        """Server main loop."""
-        self._socket.settimeout(0.5)
-        
-        while self._running:
-            try:
-                client, addr = self._socket.accept()
-                self._client_socket = client
-                self._handle_client(client)
-            except socket.timeout:
-                continue
-            except:
-                break
+@pytest.fixture
+def mock_robot_server():
+    """Provide one simulated robot on an ephemeral port.
 
-    def _handle_client(self, client):
-        """Handle client connection."""
-        client.settimeout(0.1)
-        buffer = ""
-        
-        while self._running:
-            try:
-                # Send heartbeat periodically
-                time.sleep(0.05)
-                client.sendall(b"{Heartbeat}")
-                
-                # Receive commands
-                try:
-                    data = client.recv(1024)
-                    if not data:
-                        break
-                    
-                    buffer += data.decode("utf-8")
-                    
-                    # Handle heartbeat response
-                    if "{Heartbeat}" in buffer:
-                        buffer = buffer.replace("{Heartbeat}", "")
-                    
-                    # Parse complete JSON messages
-                    while "}" in buffer:
-                        end_pos = buffer.find("}")
-                        msg = buffer[:end_pos + 1]
-                        buffer = buffer[end_pos + 1:]
-                        
-                        if msg.strip():
-                            try:
-                                cmd = json.loads(msg)
-                                self.commands_received.append(cmd)
-                                
-                                # Respond to obstacle detection
-                                if cmd.get("N") == 21:
-                                    response = "true" if self.obstacle_detected else "false"
-                                    client.sendall(response.encode("utf-8"))
-                            except:
-                                pass
-                except socket.timeout:
-                    pass
-                            
-            except:
-                break
+    Yields the SimulatedRobot, whose port, commands_received and
+    obstacle_detected the integration tests use.
+    """
+    server = SimulatorServer(count=1)
+    server.start()
+    yield server.robots[0]
+    server.stop()
 
 
 @pytest.fixture
-def mock_robot_server():
-    """Provide mock robot server for testing."""
-    server = MockRobotServer(port=10100)
+def simulator(request):
+    """Provide a running SimulatorServer.
+
+    One robot with the firmware's 1 s heartbeat by default. A module, class
+    or test overrides the SimulatorServer arguments with a marker:
+
+        pytestmark = pytest.mark.simulator(count=3, heartbeat_interval=0.05)
+    """
+    marker = request.node.get_closest_marker("simulator")
+    options = {"count": 1, "heartbeat_interval": 1.0}
+    if marker is not None:
+        options.update(marker.kwargs)
+    server = SimulatorServer(**options)
     server.start()
     yield server
     server.stop()
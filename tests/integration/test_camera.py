@@ -9,7 +9,7 @@ class TestCameraIntegration:
 
     def test_camera_pan_left(self, mock_robot_server):
         """Test camera pan left."""
-        robot = RobotController("127.0.0.1", 10100)
+        robot = RobotController("127.0.0.1", mock_robot_server.port)
         robot.connect()
         
         try:
@@ -25,7 +25,7 @@ class TestCameraIntegration:
 
     def test_camera_pan_right(self, mock_robot_server):
         """Test camera pan right."""
-        robot = RobotController("127.0.0.1", 10100)
+        robot = RobotController("127.0.0.1", mock_robot_server.port)
         robot.connect()
         
         try:
@@ -40,7 +40,7 @@ class TestCameraIntegration:
 
     def test_camera_center(self, mock_robot_server):
         """Test camera center."""
-        robot = RobotController("127.0.0.1", 10100)
+        robot = RobotController("127.0.0.1", mock_robot_server.port)
         robot.connect()
         
         try:
@@ -9,7 +9,7 @@ class TestMovementIntegration:
 
     def test_forward_movement(self, mock_robot_server):
         """Test forward movement with mock robot."""
-        robot = RobotController("127.0.0.1", 10100)
+        robot = RobotController("127.0.0.1", mock_robot_server.port)
         robot.connect()
         
         try:
@@ -26,7 +26,7 @@ class TestMovementIntegration:
 
     def test_backward_movement(self, mock_robot_server):
         """Test backward movement with mock robot."""
-        robot = RobotController("127.0.0.1", 10100)
+        robot = RobotController("127.0.0.1", mock_robot_server.port)
         robot.connect()
         
         try:
@@ -42,7 +42,7 @@ class TestMovementIntegration:
 
     def test_rotation_left(self, mock_robot_server):
         """Test left rotation with mock robot."""
-        robot = RobotController("127.0.0.1", 10100)
+        robot = RobotController("127.0.0.1", mock_robot_server.port)
         robot.connect()
         
         try:
@@ -58,7 +58,7 @@ class TestMovementIntegration:
 
     def test_rotation_right(self, mock_robot_server):
         """Test right rotation with mock robot."""
-        robot = RobotController("127.0.0.1", 10100)
+        robot = RobotController("127.0.0.1", mock_robot_server.port)
         robot.connect()
         
         try:
@@ -76,7 +76,7 @@ class TestMovementIntegration:
         """Test obstacle detection during forward movement."""
         mock_robot_server.obstacle_detected = True
         
-        robot = RobotController("127.0.0.1", 10100)
+        robot = RobotController("127.0.0.1", mock_robot_server.port)
         robot.connect()
         
         try:
@@ -85,3 +85,36 @@ class TestMovementIntegration:
             
         finally:
             robot.disconnect()
+
+
+class TestReactorMovementIntegration:
+    """Integration tests for movement with the background reactor."""
+
+    def test_forward_movement(self, mock_robot_server):
+        """Test forward movement with the reactor thread."""
+        robot = RobotController("127.0.0.1", mock_robot_server.port, reactor=True)
+        robot.connect()
+        
+        try:
+            result = robot.forward(duration=0.3, speed=50)
+            assert result is True
+            
+            commands = [cmd for cmd in mock_robot_server.commands_received if cmd.get("N") == 3]
+            assert len(commands) > 0
+            
+        finally:
+            robot.disconnect()
+
+    def test_obstacle_detection(self, mock_robot_server):
+        """Test obstacle stop is delivered by the reactor thread."""
+        mock_robot_server.obstacle_detected = True
+        
+        robot = RobotController("127.0.0.1", mock_robot_server.port, reactor=True)
+        robot.connect()
+        
+        try:
+            result = robot.forward(duration=2.0, speed=50)
+            assert result is False
+            
+        finally:
+            robot.disconnect()
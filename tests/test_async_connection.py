@@ -0,0 +1,163 @@
+"""Unit tests for async_connection module."""
+
+import asyncio
+import pytest
+from robotapi.async_connection import AsyncConnection
+from robotapi.exceptions import RobotConnectionError
+
+
+async def start_server(handler):
+    """Start a local asyncio server on an ephemeral port."""
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, port
+
+
+class TestAsyncConnectionInit:
+    """Test connection initialization."""
+
+    def test_init(self):
+        """Test connection initialization."""
+        conn = AsyncConnection("10.0.0.57", 100)
+        assert conn.ip == "10.0.0.57"
+        assert conn.port == 100
+        assert not conn.is_connected()
+
+
+class TestAsyncConnectionConnect:
+    """Test connection establishment."""
+
+    def test_connect_and_disconnect(self):
+        """Test connecting to and disconnecting from a server."""
+
+        async def scenario():
+            async def handler(reader, writer):
+                await reader.read(1)
+                writer.close()
+
+            server, port = await start_server(handler)
+            async with server:
+                conn = AsyncConnection("127.0.0.1", port)
+                await conn.connect()
+                assert conn.is_connected()
+                await conn.disconnect()
+                assert not conn.is_connected()
+
+        asyncio.run(scenario())
+
+    def test_connect_failure(self):
+        """Test connection failure."""
+
+        async def scenario():
+            server, port = await start_server(lambda r, w: None)
+            server.close()
+            await server.wait_closed()
+            conn = AsyncConnection("127.0.0.1", port)
+            with pytest.raises(RobotConnectionError, match="Failed to connect"):
+                await conn.connect()
+            assert not conn.is_connected()
+
+        asyncio.run(scenario())
+
+
+class TestAsyncConnectionSendReceive:
+    """Test sending and receiving data."""
+
+    def test_send_not_connected(self):
+        """Test send when not connected."""
+        conn = AsyncConnection("10.0.0.57")
+        with pytest.raises(RobotConnectionError, match="Not connected"):
+            asyncio.run(conn.send(b"test"))
+
+    def test_receive_not_connected(self):
+        """Test receive when not connected."""
+        conn = AsyncConnection("10.0.0.57")
+        with pytest.raises(RobotConnectionError, match="Not connected"):
+            asyncio.run(conn.receive())
+
+    def test_echo_and_buffered_messages(self):
+        """Test sent data arrives and coalesced messages are all returned."""
+
+        async def scenario():
+            async def handler(reader, writer):
+                data = await reader.read(1024)
+                writer.write(data + b"{Heartbeat}")
+                await writer.drain()
+                await reader.read(1)
+
+            server, port = await start_server(handler)
+            async with server:
+                async with AsyncConnection("127.0.0.1", port) as conn:
+                    await conn.send(b'{"N":100}')
+                    first = await conn.receive(timeout=1.0)
+                    second = await conn.receive(timeout=1.0)
+            return first, second
+
+        assert asyncio.run(scenario()) == ('{"N":100}', "{Heartbeat}")
+
+    def test_concurrent_sends_serialized(self):
+        """Test concurrent sends never drain at the same time and all arrive."""
+        frames = [b'{"H":"%d","N":21,"D1":2}' % i for i in range(20)]
+
+        async def scenario():
+            received = bytearray()
+            done = asyncio.Event()
+
+            async def handler(reader, writer):
+                while len(received) < sum(map(len, frames)):
+                    received.extend(await reader.read(1024))
+                done.set()
+
+            server, port = await start_server(handler)
+            async with server:
+                async with AsyncConnection("127.0.0.1", port) as conn:
+                    drain = conn._writer.drain
+                    active = []
+                    overlaps = []
+
+                    async def tracked_drain():
+                        overlaps.append(bool(active))
+                        active.append(1)
+                        await asyncio.sleep(0.001)
+                        await drain()
+                        active.pop()
+
+                    conn._writer.drain = tracked_drain
+                    await asyncio.gather(*(conn.send(frame) for frame in frames))
+                    await asyncio.wait_for(done.wait(), 1.0)
+            return overlaps, bytes(received)
+
+        overlaps, received = asyncio.run(scenario())
+        assert not any(overlaps)
+        assert received == b"".join(frames)
+
+    def test_receive_timeout(self):
+        """Test receive timeout returns None."""
+
+        async def scenario():
+            async def handler(reader, writer):
+                await reader.read(1)
+
+            server, port = await start_server(handler)
+            async with server:
+                async with AsyncConnection("127.0.0.1", port) as conn:
+                    return await conn.receive(timeout=0.05)
+
+        assert asyncio.run(scenario()) is None
+
+    def test_receive_closed(self):
+        """Test receive when the robot closes the connection."""
+
+        async def scenario():
+            async def handler(reader, writer):
+                writer.close()
+
+            server, port = await start_server(handler)
+            async with server:
+                conn = AsyncConnection("127.0.0.1", port)
+                await conn.connect()
+                with pytest.raises(RobotConnectionError, match="closed"):
+                    await conn.receive(timeout=1.0)
+                assert not conn.is_connected()
+
+        asyncio.run(scenario())
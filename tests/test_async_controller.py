@@ -0,0 +1,198 @@
+"""Unit tests for async_controller module."""
+
+import asyncio
+import json
+import pytest
+from robotapi import AsyncRobotController
+from robotapi.exceptions import RobotConnectionError
+from robotapi.simulator import SimulatorServer
+
+
+class FakeRobot:
+    """Minimal asyncio robot that records commands and sends heartbeats."""
+
+    def __init__(self, obstacle=False, heartbeat_interval=0.02):
+        self.obstacle = obstacle
+        self.heartbeat_interval = heartbeat_interval
+        self.commands = []
+        self.heartbeat_replies = 0
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _heartbeats(self, writer):
+        while True:
+            writer.write(b"{Heartbeat}")
+            await writer.drain()
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _handle(self, reader, writer):
+        beats = asyncio.ensure_future(self._heartbeats(writer))
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(1024)
+                if not data:
+                    break
+                buffer += data
+                while b"}" in buffer:
+                    frame, _, buffer = buffer.partition(b"}")
+                    frame += b"}"
+                    if frame == b"{Heartbeat}":
+                        self.heartbeat_replies += 1
+                        continue
+                    cmd = json.loads(frame)
+                    self.commands.append(cmd)
+                    if cmd.get("N") == 21:
+                        value = "true" if self.obstacle else "false"
+                        writer.write(f"{{{cmd.get('H')}_{value}}}".encode())
+        except (ConnectionResetError, OSError):
+            pass
+        finally:
+            beats.cancel()
+            writer.close()
+
+
+def run_with_robot(scenario, **kwargs):
+    """Run scenario(robot, fake) against a connected controller."""
+
+    async def main():
+        fake = FakeRobot(**kwargs)
+        await fake.start()
+        try:
+            async with AsyncRobotController("127.0.0.1", fake.port) as robot:
+                result = await scenario(robot, fake)
+            return result, fake
+        finally:
+            await fake.close()
+
+    return asyncio.run(main())
+
+
+class TestAsyncRobotControllerInit:
+    """Test controller initialization."""
+
+    def test_init(self):
+        """Test controller initialization."""
+        robot = AsyncRobotController("10.0.0.57", 100)
+        assert robot.ip == "10.0.0.57"
+        assert robot.port == 100
+        assert not robot.is_connected()
+
+    def test_movement_not_connected(self):
+        """Test movement when not connected."""
+        robot = AsyncRobotController("10.0.0.57")
+        with pytest.raises(RobotConnectionError):
+            asyncio.run(robot.forward(1.0))
+
+
+class TestAsyncRobotControllerMovement:
+    """Test movement commands."""
+
+    def test_forward_no_obstacle(self):
+        """Test forward movement without obstacle."""
+
+        async def scenario(robot, fake):
+            return await robot.forward(0.2, 50)
+
+        result, fake = run_with_robot(scenario)
+        assert result is True
+        assert {"H": 22, "N": 3, "D1": 3, "D2": 50} in fake.commands
+        assert {"N": 100} in fake.commands
+
+    def test_forward_obstacle(self):
+        """Test forward stops early on obstacle."""
+
+        async def scenario(robot, fake):
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            result = await robot.forward(5.0, 50)
+            return result, loop.time() - start
+
+        (result, elapsed), fake = run_with_robot(scenario, obstacle=True)
+        assert result is False
+        assert elapsed < 1.0
+
+    def test_rotations_and_backward(self):
+        """Test each direction sends its movement command."""
+
+        async def scenario(robot, fake):
+            await robot.backward(0.05)
+            await robot.rotate_left(0.05)
+            await robot.rotate_right(0.05)
+
+        _, fake = run_with_robot(scenario)
+        directions = [cmd["D1"] for cmd in fake.commands if cmd.get("N") == 3]
+        assert directions == [4, 1, 2]
+
+    def test_heartbeats_answered_in_background(self):
+        """Test the reader task answers heartbeats while idle."""
+
+        async def scenario(robot, fake):
+            await asyncio.sleep(0.15)
+
+        _, fake = run_with_robot(scenario)
+        assert fake.heartbeat_replies >= 2
+
+    def test_many_robots_one_loop(self):
+        """Test a single event loop drives several robots concurrently."""
+
+        async def main():
+            fakes = [FakeRobot() for _ in range(5)]
+            for fake in fakes:
+                await fake.start()
+            robots = [AsyncRobotController("127.0.0.1", fake.port) for fake in fakes]
+            try:
+                for robot in robots:
+                    await robot.connect()
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                results = await asyncio.gather(*(robot.forward(0.2) for robot in robots))
+                elapsed = loop.time() - start
+            finally:
+                for robot in robots:
+                    await robot.disconnect()
+                for fake in fakes:
+                    await fake.close()
+            return results, elapsed
+
+        results, elapsed = asyncio.run(main())
+        assert results == [True] * 5
+        assert elapsed < 0.2 * 5
+
+    def test_timed_moves(self):
+        """Test firmware-timed moves end on the robot's own timer."""
+        with SimulatorServer(count=1, heartbeat_interval=0.05) as server:
+
+            async def main():
+                async with AsyncRobotController(
+                    "127.0.0.1", server.ports[0], timed_moves=True
+                ) as robot:
+                    return await robot.backward(0.2)
+
+            assert asyncio.run(main()) is True
+            (direction, _, started, ended), = server.robots[0].moves
+        assert direction == 4
+        assert ended - started == pytest.approx(0.2)
+
+
+class TestAsyncRobotControllerCamera:
+    """Test camera control."""
+
+    def test_camera_commands(self):
+        """Test camera steps are sent."""
+
+        async def scenario(robot, fake):
+            await robot.camera_pan_left(2)
+            await robot.camera_center()
+
+        _, fake = run_with_robot(scenario)
+        steps = [cmd["D1"] for cmd in fake.commands if cmd.get("N") == 106]
+        assert steps == [4, 4, 5]
@@ -0,0 +1,252 @@
+"""Unit tests for camera module."""
+
+import asyncio
+import random
+import socket
+import threading
+import time
+import pytest
+from robotapi import AsyncRobotController, RobotController
+from robotapi.camera import (
+    STREAM_BOUNDARY,
+    CameraStream,
+    Frame,
+    FrameRing,
+    MjpegParser,
+)
+
+
+def jpeg(index, size=64):
+    """Build a fake JPEG payload."""
+    return b"\xff\xd8" + bytes([index % 256]) * size + b"\xff\xd9"
+
+
+def part(data):
+    """Encode one multipart part the way the camera firmware does."""
+    return (
+        b"\r\n--" + STREAM_BOUNDARY + b"\r\n"
+        b"Content-Type: image/jpeg\r\n"
+        b"Content-Length: " + str(len(data)).encode() + b"\r\n"
+        b"X-Timestamp: 12.345\r\n\r\n" + data
+    )
+
+
+class FakeMjpegServer:
+    """Minimal HTTP server streaming numbered JPEG parts."""
+
+    def __init__(self, frames=1000, interval=0.005, status=b"200 OK"):
+        self.frames = frames
+        self.interval = interval
+        self.status = status
+        self.connections = 0
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen(4)
+        self._listener.settimeout(0.1)
+        self.port = self._listener.getsockname()[1]
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=2.0)
+        self._listener.close()
+
+    def _run(self):
+        while self._running:
+            try:
+                client, _ = self._listener.accept()
+            except socket.timeout:
+                continue
+            self.connections += 1
+            try:
+                self._serve(client)
+            except OSError:
+                pass
+            finally:
+                client.close()
+
+    def _serve(self, client):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            request += client.recv(1024)
+        client.sendall(
+            b"HTTP/1.1 " + self.status + b"\r\n"
+            b"Content-Type: multipart/x-mixed-replace;boundary=" + STREAM_BOUNDARY + b"\r\n\r\n"
+        )
+        for index in range(self.frames):
+            if not self._running:
+                return
+            client.sendall(part(jpeg(index)))
+            time.sleep(self.interval)
+
+
+@pytest.fixture
+def mjpeg_server():
+    """Provide a fake camera stream server."""
+    server = FakeMjpegServer()
+    yield server
+    server.close()
+
+
+class TestFrameRing:
+    """Test the latest-frame ring."""
+
+    def test_keeps_newest_frames(self):
+        """Test old frames are overwritten in order."""
+        ring = FrameRing(3)
+        assert ring.latest() is None
+        for i in range(5):
+            ring.push(Frame(bytes([i]), float(i), i))
+        assert len(ring) == 3
+        assert ring.count == 5
+        assert ring.latest().sequence == 4
+        assert [f.sequence for f in ring.frames()] == [2, 3, 4]
+
+    def test_wait_newer(self):
+        """Test waiting for a frame newer than one already seen."""
+        ring = FrameRing(2)
+        ring.push(Frame(b"a", 0.0, 0))
+        assert ring.wait_newer(-1, 0).sequence == 0
+        assert ring.wait_newer(0, 0.01) is None
+        threading.Timer(0.05, ring.push, (Frame(b"b", 0.0, 1),)).start()
+        assert ring.wait_newer(0, 1.0).sequence == 1
+
+    def test_invalid_size(self):
+        """Test a ring must hold at least one frame."""
+        with pytest.raises(ValueError):
+            FrameRing(0)
+
+
+class TestMjpegParser:
+    """Test multipart parsing."""
+
+    def test_single_part(self):
+        """Test one complete part yields its JPEG."""
+        parser = MjpegParser()
+        assert parser.feed(part(jpeg(1))) == [jpeg(1)]
+        assert parser.dropped_bytes == 0
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_random_segmentation(self, seed):
+        """Test arbitrary segmentation and buffer wrap-around."""
+        frames = [jpeg(i, size=random.Random(i).randint(1, 3000)) for i in range(40)]
+        stream = b"".join(part(f) for f in frames)
+        rng = random.Random(seed)
+        parser = MjpegParser(buffer_size=1024)
+        out = []
+        pos = 0
+        while pos < len(stream):
+            size = rng.randint(1, 700)
+            out.extend(parser.feed(stream[pos:pos + size]))
+            pos += size
+        assert out == frames
+        assert parser.dropped_bytes == 0
+
+    def test_receive_into_buffer(self):
+        """Test writable()/commit() receive directly into the parser."""
+        parser = MjpegParser()
+        data = part(jpeg(7))
+        space = parser.writable()
+        space[:len(data)] = data
+        del space
+        assert parser.commit(len(data)) == [jpeg(7)]
+
+    def test_frame_larger_than_buffer(self):
+        """Test the buffer grows to fit a large frame."""
+        parser = MjpegParser(buffer_size=256)
+        big = jpeg(3, size=5000)
+        assert parser.feed(part(big)) == [big]
+
+    def test_junk_and_missing_length_skipped(self):
+        """Test garbage and parts without Content-Length are skipped."""
+        parser = MjpegParser()
+        bad = b"\r\n--" + STREAM_BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n\r\nxx"
+        assert parser.feed(b"garbage" + bad + part(jpeg(2))) == [jpeg(2)]
+        assert parser.dropped_bytes >= len(b"garbage")
+
+
+class TestCameraStream:
+    """Test the persistent stream client."""
+
+    def test_latest_frame(self, mjpeg_server):
+        """Test frames arrive and latest() returns the newest."""
+        with CameraStream("127.0.0.1", mjpeg_server.port, ring_size=3) as stream:
+            first = stream.wait_frame(2.0)
+            assert first is not None
+            newer = stream.wait_frame(2.0, after=first.sequence + 5)
+            assert newer.sequence > first.sequence + 5
+            latest = stream.latest()
+            assert latest.sequence >= newer.sequence
+            assert latest.data == jpeg(latest.sequence)
+            assert len(stream.ring) == 3
+        assert mjpeg_server.connections == 1
+
+    def test_reconnects_after_close(self):
+        """Test the stream reconnects when the server ends it."""
+        server = FakeMjpegServer(frames=3, interval=0.0)
+        try:
+            stream = CameraStream("127.0.0.1", server.port, reconnect_delay=0.01)
+            stream.start()
+            try:
+                assert stream.wait_frame(2.0, after=4) is not None
+            finally:
+                stream.stop()
+            assert stream.reconnects >= 1
+            assert server.connections >= 2
+        finally:
+            server.close()
+
+    def test_http_error(self):
+        """Test non-200 responses produce no frames."""
+        server = FakeMjpegServer(status=b"404 Not Found")
+        try:
+            with CameraStream("127.0.0.1", server.port, reconnect_delay=0.01) as stream:
+                assert stream.wait_frame(0.2) is None
+        finally:
+            server.close()
+
+
+class TestControllerImages:
+    """Test get_image() on the controllers."""
+
+    def test_get_image(self, mjpeg_server):
+        """Test get_image() returns stream frames without a new request."""
+        robot = RobotController("127.0.0.1", camera_port=mjpeg_server.port)
+        try:
+            first = robot.get_image()
+            assert first.startswith(b"\xff\xd8")
+            start = time.perf_counter()
+            for _ in range(100):
+                robot.get_image()
+            assert (time.perf_counter() - start) / 100 < 0.001
+        finally:
+            robot.disconnect()
+        assert mjpeg_server.connections == 1
+
+    def test_async_get_image(self, mjpeg_server):
+        """Test the asyncio controller reads from the same stream."""
+
+        async def main():
+            robot = AsyncRobotController("127.0.0.1", camera_port=mjpeg_server.port)
+            try:
+                return await robot.get_image(), await robot.get_image()
+            finally:
+                await robot.disconnect()
+
+        first, second = asyncio.run(main())
+        assert first.startswith(b"\xff\xd8") and second.startswith(b"\xff\xd8")
+        assert mjpeg_server.connections == 1
+
+    def test_get_image_timeout(self):
+        """Test get_image() returns b"" when no stream is reachable."""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        robot = RobotController("127.0.0.1", camera_port=port)
+        try:
+            assert robot.get_image(timeout=0.1) == b""
+        finally:
+            robot.stop_camera()
@@ -5,6 +5,7 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from robotapi.connection import Connection
 from robotapi.exceptions import RobotConnectionError
+from robotapi.transport import SocketTransport
 
 
 class TestConnectionInit:
@@ -144,6 +145,48 @@ class TestConnectionReceive:
         message = conn.receive()
         assert message == '{"status": "ok"}'
 
+    @patch("socket.socket")
+    def test_receive_coalesced_messages(self, mock_socket_class):
+        """Test messages arriving in one read are returned without another read."""
+        mock_sock = Mock()
+        mock_sock.recv.side_effect = [b"{22_ok}{Heartbeat}{22_true}"]
+        mock_socket_class.return_value = mock_sock
+        
+        conn = Connection("10.0.0.57")
+        conn.connect()
+        
+        assert conn.receive() == "{22_ok}"
+        assert conn.receive() == "{Heartbeat}"
+        assert conn.receive() == "{22_true}"
+        assert mock_sock.recv.call_count == 1
+
+    @patch("socket.socket")
+    def test_receive_all(self, mock_socket_class):
+        """Test receiving every complete message from one read."""
+        mock_sock = Mock()
+        mock_sock.recv.side_effect = [b'{Heartbeat}{"a": {"b": "}"}}{22_', b"true}"]
+        mock_socket_class.return_value = mock_sock
+        
+        conn = Connection("10.0.0.57")
+        conn.connect()
+        
+        assert conn.receive_all() == ["{Heartbeat}", '{"a": {"b": "}"}}']
+        assert conn.receive_all() == ["{22_true}"]
+
+    @patch("socket.socket")
+    def test_receive_closed(self, mock_socket_class):
+        """Test receive when robot closes the connection."""
+        mock_sock = Mock()
+        mock_sock.recv.return_value = b""
+        mock_socket_class.return_value = mock_sock
+        
+        conn = Connection("10.0.0.57")
+        conn.connect()
+        
+        with pytest.raises(RobotConnectionError, match="closed"):
+            conn.receive()
+        assert not conn.is_connected()
+
     @patch("socket.socket")
     def test_receive_timeout(self, mock_socket_class):
         """Test receive timeout."""
@@ -165,6 +208,28 @@ class TestConnectionReceive:
             conn.receive()
 
 
+class TestConnectionReadable:
+    """Test waiting for incoming data."""
+
+    def test_readable(self):
+        """Test readable reports arrived data and queued messages."""
+        near, far = socket.socketpair()
+        conn = Connection("socketpair", transport=SocketTransport(near))
+        conn.connect()
+        assert conn.readable(0.01) is False
+        far.sendall(b"{Heartbeat}{1_ok}")
+        assert conn.readable(1.0) is True
+        assert conn.receive() == "{Heartbeat}"
+        # The second message is queued, so nothing needs to arrive
+        assert conn.readable(0) is True
+        conn.disconnect()
+        far.close()
+
+    def test_readable_not_connected(self):
+        """Test readable is False without a socket."""
+        assert Connection("10.0.0.57").readable(0.01) is False
+
+
 class TestConnectionContextManager:
     """Test context manager support."""
 
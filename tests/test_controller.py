@@ -1,10 +1,15 @@
 """Unit tests for controller module."""
 
+import time
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from robotapi.controller import RobotController, HeartbeatMonitor
 from robotapi.exceptions import RobotConnectionError
 
+# Without UART latency the firmware sees commands when the controller sends
+# them, so move durations measure the controller alone
+pytestmark = pytest.mark.simulator(heartbeat_interval=0.05, uart_rate=None)
+
 
 class TestRobotControllerInit:
     """Test controller initialization."""
@@ -24,6 +29,7 @@ class TestRobotControllerConnection:
     def test_connect(self, mock_conn_class):
         """Test connecting to robot."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn_class.return_value = mock_conn
         
         robot = RobotController("10.0.0.57")
@@ -36,6 +42,7 @@ class TestRobotControllerConnection:
     def test_disconnect(self, mock_conn_class):
         """Test disconnecting from robot."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         mock_conn_class.return_value = mock_conn
         
@@ -54,6 +61,7 @@ class TestRobotControllerMovement:
     def test_forward_no_obstacle(self, mock_conn_class):
         """Test forward movement without obstacle."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         mock_conn.receive.return_value = None
         
@@ -70,6 +78,7 @@ class TestRobotControllerMovement:
     def test_backward(self, mock_conn_class):
         """Test backward movement."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         mock_conn.receive.return_value = None
         
@@ -86,6 +95,7 @@ class TestRobotControllerMovement:
     def test_rotate_left(self, mock_conn_class):
         """Test left rotation."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         mock_conn.receive.return_value = None
         
@@ -102,6 +112,7 @@ class TestRobotControllerMovement:
     def test_rotate_right(self, mock_conn_class):
         """Test right rotation."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         mock_conn.receive.return_value = None
         
@@ -114,6 +125,26 @@ class TestRobotControllerMovement:
         assert result is True
         assert mock_conn.send.called
 
+    @patch("robotapi.controller.Connection")
+    def test_command_bytes_accounted(self, mock_conn_class):
+        """Test sent commands are pre-encoded and counted per command."""
+        mock_conn = Mock()
+        mock_conn.readable.return_value = False
+        mock_conn.is_connected.return_value = True
+        mock_conn.receive.return_value = None
+        
+        robot = RobotController("10.0.0.57")
+        robot._connection = mock_conn
+        robot.connect()
+        
+        robot.backward(0.1, 50)
+        
+        sent = [call.args[0] for call in mock_conn.send.call_args_list]
+        assert sent == [b'{"H":22,"N":3,"D1":4,"D2":50}', b'{"N":100}']
+        stats = robot.command_bytes.snapshot()
+        assert stats[3] == {"count": 1, "tcp_bytes": 29, "uart_bytes": 29}
+        assert stats[100]["count"] == 1
+
     def test_movement_not_connected(self):
         """Test movement when not connected."""
         robot = RobotController("10.0.0.57")
@@ -129,6 +160,7 @@ class TestRobotControllerCamera:
     def test_camera_pan_left(self, mock_conn_class):
         """Test camera pan left."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         
         robot = RobotController("10.0.0.57")
@@ -143,6 +175,7 @@ class TestRobotControllerCamera:
     def test_camera_pan_right(self, mock_conn_class):
         """Test camera pan right."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         
         robot = RobotController("10.0.0.57")
@@ -157,6 +190,7 @@ class TestRobotControllerCamera:
     def test_camera_center(self, mock_conn_class):
         """Test camera center."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         
         robot = RobotController("10.0.0.57")
@@ -198,6 +232,7 @@ class TestRobotControllerContextManager:
     def test_context_manager(self, mock_conn_class):
         """Test using controller as context manager."""
         mock_conn = Mock()
+        mock_conn.readable.return_value = False
         mock_conn.is_connected.return_value = True
         mock_conn_class.return_value = mock_conn
         
@@ -206,3 +241,49 @@ class TestRobotControllerContextManager:
             assert robot is not None
         
         mock_conn.disconnect.assert_called()
+
+
+def wait_until(condition, timeout=2.0):
+    """Poll condition until true or timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestRobotControllerTiming:
+    """Test movement durations against the simulator."""
+
+    @pytest.mark.parametrize("duration", [0.05, 0.3])
+    def test_polled_duration_is_deadline_bound(self, simulator, duration):
+        """Test polled moves last their duration, not a multiple of 100 ms."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            assert robot.backward(duration) is True
+        assert wait_until(lambda: simulator.robots[0].moves)
+        (direction, _, started, ended), = simulator.robots[0].moves
+        assert direction == 4
+        assert duration - 0.01 <= ended - started < duration + 0.1
+
+    @pytest.mark.parametrize("reactor", [False, True])
+    def test_timed_moves(self, simulator, reactor):
+        """Test firmware-timed moves end on the robot's own timer."""
+        with RobotController(
+            "127.0.0.1", simulator.ports[0], reactor=reactor, timed_moves=True
+        ) as robot:
+            assert robot.rotate_left(0.2) is True
+        commands = [cmd for cmd in simulator.robots[0].commands_received if cmd.get("N") == 2]
+        assert commands[0]["T"] == 200
+        (direction, _, started, ended), = simulator.robots[0].moves
+        assert direction == 1
+        assert ended - started == pytest.approx(0.2)
+
+    def test_timed_forward_stops_on_obstacle(self, simulator):
+        """Test obstacle checks still cut a timed move short."""
+        simulator.robots[0].obstacle_detected = True
+        with RobotController("127.0.0.1", simulator.ports[0], timed_moves=True) as robot:
+            assert robot.forward(5.0) is False
+        assert wait_until(lambda: simulator.robots[0].moves)
+        (_, _, started, ended), = simulator.robots[0].moves
+        assert ended - started < 1.0
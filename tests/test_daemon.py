@@ -0,0 +1,172 @@
+"""Unit tests for daemon module."""
+
+import socket
+import time
+import pytest
+from robotapi.daemon import (
+    FRAME_COMMAND,
+    FRAME_ERROR,
+    HEADER,
+    DaemonClient,
+    FrameReader,
+    RobotDaemon,
+    encode_frame,
+)
+from robotapi.exceptions import CommandError, RobotConnectionError
+from robotapi.protocol import (
+    DIR_BACKWARD,
+    build_distance_cmd,
+    build_movement_cmd,
+    build_obstacle_cmd,
+)
+
+# Two robots behind a real-rate serial link, so bursts are paced as on the car
+pytestmark = pytest.mark.simulator(count=2, heartbeat_interval=0.2)
+
+
+@pytest.fixture
+def daemon(simulator, tmp_path):
+    """Provide a daemon serving both simulated robots."""
+    robots = [("127.0.0.1", port) for port in simulator.ports]
+    with RobotDaemon(robots, str(tmp_path / "robotapi.sock"), poll_interval=0.05) as daemon:
+        yield daemon
+
+
+def connect(daemon):
+    """Return a client connected to the daemon."""
+    client = DaemonClient(daemon.path)
+    client.connect()
+    return client
+
+
+def wait_until(predicate, timeout=2.0):
+    """Poll predicate until it is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestFraming:
+    """Test frame encoding and decoding."""
+
+    def test_round_trip(self):
+        """Test frames split across reads are reassembled."""
+        data = encode_frame(FRAME_COMMAND, 1, 7, b'{"N":21}') + encode_frame(FRAME_ERROR, 0, 8)
+        reader = FrameReader()
+        assert reader.feed(data[:5]) == []
+        assert reader.feed(data[5:]) == [(FRAME_COMMAND, 1, 7, b'{"N":21}'), (FRAME_ERROR, 0, 8, b"")]
+
+    def test_header_size(self):
+        """Test the header is eight bytes."""
+        assert HEADER.size == 8
+        assert len(encode_frame(FRAME_COMMAND, 0, 1, b"x")) == 9
+
+    def test_payload_too_long(self):
+        """Test oversized payloads are rejected."""
+        with pytest.raises(ValueError):
+            encode_frame(FRAME_COMMAND, 0, 1, bytes(0x10000))
+
+
+class TestDaemon:
+    """Test the daemon against simulated robots."""
+
+    def test_hello_lists_robots(self, daemon, simulator):
+        """Test clients learn the robot names on connect."""
+        with DaemonClient(daemon.path) as client:
+            assert client.robots == [f"127.0.0.1:{port}" for port in simulator.ports]
+
+    def test_request_reply(self, daemon, simulator):
+        """Test a command's reply reaches the client that sent it."""
+        simulator.robots[1].distance_cm = 37
+        with DaemonClient(daemon.path) as client:
+            assert client.request(1, build_distance_cmd()).result(timeout=1.0) == 37
+            assert client.request(client.robots[1], build_distance_cmd()).result(timeout=1.0) == 37
+
+    def test_clients_share_connection(self, daemon, simulator):
+        """Test two clients share one upstream connection and get their own replies."""
+        simulator.robots[0].distance_cm = 12
+        first, second = connect(daemon), connect(daemon)
+        try:
+            futures = [
+                client.request(0, cmd)
+                for client in (first, second)
+                for cmd in (build_distance_cmd(), build_obstacle_cmd())
+            ]
+            assert [f.result(timeout=1.0) for f in futures] == [12, True, 12, True]
+            assert simulator.robots[0].frames_dropped == 0
+        finally:
+            first.close()
+            second.close()
+        assert daemon.robots[0].is_connected()
+        assert simulator.robots[0].heartbeat_disconnects == 0
+
+    def test_send_without_reply(self, daemon, simulator):
+        """Test a movement command is executed by the robot."""
+        sim = simulator.robots[0]
+        with DaemonClient(daemon.path) as client:
+            client.send(0, build_movement_cmd(DIR_BACKWARD, 50))
+            assert wait_until(sim.is_moving)
+        assert wait_until(lambda: not sim.is_moving())
+
+    def test_driver_disconnect_stops_car(self, daemon, simulator):
+        """Test the car stops when the client driving it goes away."""
+        sim = simulator.robots[0]
+        watcher = connect(daemon)
+        try:
+            with DaemonClient(daemon.path) as driver:
+                driver.send(0, build_movement_cmd(DIR_BACKWARD, 50))
+                assert wait_until(sim.is_moving)
+            assert wait_until(lambda: not sim.is_moving())
+        finally:
+            watcher.close()
+
+    def test_subscribe(self, daemon, simulator):
+        """Test telemetry samples are delivered until unsubscribed."""
+        simulator.robots[0].distance_cm = 55
+        samples = []
+        with DaemonClient(daemon.path) as client:
+            ident = client.subscribe(0, "distance", 20, samples.append)
+            assert wait_until(lambda: len(samples) >= 3)
+            client.unsubscribe(ident)
+            time.sleep(0.1)
+            count = len(samples)
+            time.sleep(0.2)
+            assert len(samples) == count
+        assert samples[0].sensor == "distance" and samples[0].value == 55
+
+    def test_bad_robot(self, daemon):
+        """Test commands for an unknown robot fail."""
+        with DaemonClient(daemon.path) as client:
+            with pytest.raises(CommandError):
+                client.request(5, build_distance_cmd()).result(timeout=1.0)
+            with pytest.raises(CommandError):
+                client.request("10.0.0.1:100", build_distance_cmd())
+
+    def test_stop_fails_requests(self, simulator, tmp_path):
+        """Test clients see the daemon going away."""
+        robots = [("127.0.0.1", simulator.ports[0])]
+        daemon = RobotDaemon(robots, str(tmp_path / "robotapi.sock"), poll_interval=0.05)
+        daemon.start()
+        client = connect(daemon)
+        daemon.stop()
+        assert wait_until(lambda: not client.is_connected())
+        with pytest.raises(RobotConnectionError):
+            client.request(0, build_distance_cmd())
+
+    def test_replaces_stale_socket(self, simulator, tmp_path):
+        """Test a socket file left by a dead daemon is replaced."""
+        path = str(tmp_path / "robotapi.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        with RobotDaemon([("127.0.0.1", simulator.ports[0])], path, poll_interval=0.05) as daemon:
+            with DaemonClient(daemon.path) as client:
+                assert len(client.robots) == 1
+            with pytest.raises(RobotConnectionError):
+                RobotDaemon([("127.0.0.1", simulator.ports[0])], path).start()
+
+    def test_no_daemon(self, tmp_path):
+        """Test connecting without a daemon raises RobotConnectionError."""
+        with pytest.raises(RobotConnectionError):
+            DaemonClient(str(tmp_path / "missing.sock")).connect()
@@ -0,0 +1,134 @@
+"""Unit tests for fleet module."""
+
+import threading
+import time
+import pytest
+from robotapi.fleet import Fleet, RobotHandle
+from robotapi.exceptions import RobotConnectionError
+
+pytestmark = pytest.mark.simulator(count=3, heartbeat_interval=0.05)
+
+
+def wait_until(condition, timeout=2.0):
+    """Poll condition until true or timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestFleetConnections:
+    """Test adding and removing robots."""
+
+    def test_add_and_remove(self, simulator):
+        """Test handles connect and disconnect."""
+        with Fleet() as fleet:
+            handles = [fleet.add("127.0.0.1", port) for port in simulator.ports]
+            assert len(fleet) == 3
+            assert all(isinstance(h, RobotHandle) for h in handles)
+            assert all(h.is_connected() for h in handles)
+            assert wait_until(lambda: all(r.is_connected() for r in simulator.robots))
+
+            fleet.remove(handles[0])
+            assert len(fleet) == 2
+            assert not handles[0].is_connected()
+            assert wait_until(lambda: not simulator.robots[0].is_connected())
+
+    def test_add_failure(self, simulator):
+        """Test connection failure is reported."""
+        port = simulator.ports[0]
+        simulator.stop()
+        with Fleet() as fleet:
+            with pytest.raises(RobotConnectionError, match="Failed to connect"):
+                fleet.add("127.0.0.1", port)
+
+    def test_paced_handle(self, simulator):
+        """Test a paced handle sends through a scheduler it stops on removal."""
+        with Fleet() as fleet:
+            handle = fleet.add("127.0.0.1", simulator.ports[0], pace_commands=True)
+            scheduler = handle.scheduler
+            assert scheduler.is_running()
+            assert handle.get_distance() == simulator.robots[0].distance_cm
+            fleet.remove(handle)
+            assert not scheduler.is_running()
+            assert handle.scheduler is None
+
+    def test_stop_disconnects_all(self, simulator):
+        """Test stopping the fleet closes every handle."""
+        fleet = Fleet()
+        handles = [fleet.add("127.0.0.1", port) for port in simulator.ports]
+        fleet.stop()
+        assert not fleet.is_running()
+        assert not any(h.is_connected() for h in handles)
+
+
+class TestFleetHeartbeats:
+    """Test heartbeat servicing."""
+
+    def test_heartbeats_answered_while_idle(self, simulator):
+        """Test every robot's heartbeats are answered with no caller activity."""
+        with Fleet() as fleet:
+            for port in simulator.ports:
+                fleet.add("127.0.0.1", port)
+            assert wait_until(lambda: all(r.heartbeats_answered >= 3 for r in simulator.robots))
+
+    def test_heartbeats_answered_while_others_move(self, simulator):
+        """Test idle robots keep answering while another robot is moving."""
+        with Fleet() as fleet:
+            handles = [fleet.add("127.0.0.1", port) for port in simulator.ports]
+            before = simulator.robots[2].heartbeats_answered
+            assert handles[0].backward(0.3) is True
+            assert simulator.robots[2].heartbeats_answered >= before + 3
+
+
+class TestRobotHandleMovement:
+    """Test the RobotController surface of handles."""
+
+    def test_forward_no_obstacle(self, simulator):
+        """Test forward movement completes."""
+        with Fleet() as fleet:
+            robot = fleet.add("127.0.0.1", simulator.ports[0])
+            assert robot.forward(0.2, 50) is True
+            assert wait_until(lambda: {"N": 100} in simulator.robots[0].commands_received)
+            commands = list(simulator.robots[0].commands_received)
+            assert {"H": 22, "N": 3, "D1": 3, "D2": 50} in commands
+
+    def test_forward_obstacle(self, simulator):
+        """Test forward stops early on obstacle."""
+        simulator.robots[1].obstacle_detected = True
+        with Fleet() as fleet:
+            robot = fleet.add("127.0.0.1", simulator.ports[1])
+            start = time.monotonic()
+            assert robot.forward(5.0, 50) is False
+            assert time.monotonic() - start < 1.0
+
+    def test_parallel_movement(self, simulator):
+        """Test handles can be driven concurrently from several threads."""
+        results = {}
+        with Fleet() as fleet:
+            handles = [fleet.add("127.0.0.1", port) for port in simulator.ports]
+
+            def drive(index, handle):
+                results[index] = handle.rotate_left(0.2)
+
+            threads = [
+                threading.Thread(target=drive, args=(i, h)) for i, h in enumerate(handles)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert results == {0: True, 1: True, 2: True}
+
+    def test_disconnect_detected(self, simulator):
+        """Test a robot dropping the connection fails the waiting caller."""
+        with Fleet() as fleet:
+            robot = fleet.add("127.0.0.1", simulator.ports[0])
+            assert wait_until(lambda: simulator.robots[0].is_connected())
+            threading.Timer(0.1, simulator.stop).start()
+            with pytest.raises(RobotConnectionError):
+                robot.backward(5.0)
+            assert not robot.is_connected()
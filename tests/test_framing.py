@@ -0,0 +1,95 @@
+"""Unit tests for framing module."""
+
+import random
+import pytest
+from robotapi.framing import FrameDecoder
+
+
+class TestFrameDecoder:
+    """Test incremental framing."""
+
+    def test_single_frame(self):
+        """Test one complete frame."""
+        decoder = FrameDecoder()
+        assert decoder.feed(b"{Heartbeat}") == ["{Heartbeat}"]
+        assert decoder.pending == 0
+
+    def test_coalesced_frames(self):
+        """Test every frame in one read is returned."""
+        decoder = FrameDecoder()
+        assert decoder.feed(b"{22_ok}{Heartbeat}{22_true}") == [
+            "{22_ok}",
+            "{Heartbeat}",
+            "{22_true}",
+        ]
+
+    def test_split_frame(self):
+        """Test a frame split across reads."""
+        decoder = FrameDecoder()
+        assert decoder.feed(b'{"status":') == []
+        assert decoder.pending == 10
+        assert decoder.feed(b' "ok"}') == ['{"status": "ok"}']
+
+    def test_nested_json(self):
+        """Test nested objects are framed as one message."""
+        decoder = FrameDecoder()
+        assert decoder.feed(b'{"a": {"b": 1}, "c": 2}') == ['{"a": {"b": 1}, "c": 2}']
+
+    def test_braces_inside_strings(self):
+        """Test braces and escaped quotes inside strings are ignored."""
+        decoder = FrameDecoder()
+        frame = b'{"text": "a}b{\\"}"}'
+        assert decoder.feed(frame) == [frame.decode()]
+
+    def test_escape_split_across_reads(self):
+        """Test an escape sequence split at a read boundary."""
+        decoder = FrameDecoder()
+        assert decoder.feed(b'{"text": "a\\') == []
+        assert decoder.feed(b'"}"}') == ['{"text": "a\\"}"}']
+
+    def test_stray_text_between_frames(self):
+        """Test bare tokens between frames are returned on their own."""
+        decoder = FrameDecoder()
+        assert decoder.feed(b"{Heartbeat} true ") == ["{Heartbeat}"]
+        assert decoder.feed(b"{Heartbeat}") == ["true", "{Heartbeat}"]
+
+    def test_unmatched_close_brace_ignored(self):
+        """Test a stray closing brace does not end a frame."""
+        decoder = FrameDecoder()
+        assert decoder.feed(b"}{ok}") == ["}", "{ok}"]
+
+    def test_overflow_resynchronises(self):
+        """Test an oversized frame is dropped and decoding recovers."""
+        decoder = FrameDecoder(max_frame_size=16)
+        assert decoder.feed(b"{" + b"x" * 32) == []
+        assert decoder.dropped_bytes == 33
+        assert decoder.pending == 0
+        assert decoder.feed(b"{ok}") == ["{ok}"]
+
+    def test_reset(self):
+        """Test reset discards partial frames."""
+        decoder = FrameDecoder()
+        decoder.feed(b'{"a": "}')
+        decoder.reset()
+        assert decoder.feed(b"{ok}") == ["{ok}"]
+
+    def test_memoryview_input(self):
+        """Test bytes-like input is accepted."""
+        decoder = FrameDecoder()
+        data = bytearray(b"{ok}{Heartbeat}")
+        assert decoder.feed(memoryview(data)[:4]) == ["{ok}"]
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_segmentation(self, seed):
+        """Test arbitrary TCP segmentation yields the same frames."""
+        frames = [b"{Heartbeat}", b'{"H":"7","N":3,"D1":3,"D2":50}', b"{7_ok}", b'{"s":"}{"}']
+        stream = b"".join(frames * 20)
+        rng = random.Random(seed)
+        decoder = FrameDecoder()
+        out = []
+        pos = 0
+        while pos < len(stream):
+            size = rng.randint(1, 17)
+            out.extend(decoder.feed(stream[pos:pos + size]))
+            pos += size
+        assert out == [f.decode() for f in frames * 20]
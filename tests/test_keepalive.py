@@ -0,0 +1,128 @@
+"""Unit tests for keepalive module."""
+
+import time
+from concurrent.futures import Future
+from unittest.mock import Mock
+import pytest
+from robotapi import RobotController
+from robotapi.controller import HeartbeatMonitor
+from robotapi.keepalive import HeartbeatResponder
+from robotapi.protocol import build_ground_cmd
+
+# Simulated heartbeat period; the bridge drops a client after about four
+HEARTBEAT = 0.05
+
+pytestmark = pytest.mark.simulator(heartbeat_interval=HEARTBEAT, uart_rate=None)
+
+
+def wait_until(predicate, timeout=2.0):
+    """Poll predicate until it is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestIdleController:
+    """Test an idle polled controller against the simulator."""
+
+    def test_idle_controller_stays_connected(self, simulator):
+        """Test heartbeats are answered while no call is polling."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            time.sleep(10 * HEARTBEAT)
+            assert sim.heartbeat_disconnects == 0
+            assert robot.heartbeat_responder.is_running()
+            assert isinstance(robot.wait_reply(robot.request(build_ground_cmd())), bool)
+        assert robot.metrics.heartbeat_reply.count >= 8
+        assert robot.metrics.heartbeat_reply.quantile(0.99) <= 0.01
+
+    def test_without_keepalive_is_dropped(self, simulator):
+        """Test an idle controller without the responder is dropped."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0], keepalive=False) as robot:
+            assert robot.heartbeat_responder is None
+            assert wait_until(lambda: sim.heartbeat_disconnects == 1)
+
+    def test_no_probes_by_default(self, simulator):
+        """Test an idle controller sends nothing but heartbeat replies."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            time.sleep(6 * HEARTBEAT)
+            assert robot.heartbeat_responder.probe is None
+        assert not sim.commands_received
+
+    def test_reactor_needs_no_responder(self, simulator):
+        """Test a reactor answers heartbeats without the responder thread."""
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            assert robot.heartbeat_responder is None
+            time.sleep(6 * HEARTBEAT)
+            assert simulator.robots[0].heartbeat_disconnects == 0
+
+    def test_reactor_only_probes(self, simulator):
+        """Test the responder leaves reading to the reactor when probing."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True, probe_interval=0.05) as robot:
+            assert robot.heartbeat_responder.read is False
+            assert wait_until(lambda: robot.heartbeat_responder.stats()["probes"] >= 2)
+            assert sim.heartbeat_disconnects == 0
+        assert any(cmd.get("N") == 23 for cmd in sim.commands_received)
+
+    def test_disconnect_stops_responder(self, simulator):
+        """Test disconnect stops the responder thread."""
+        robot = RobotController("127.0.0.1", simulator.ports[0])
+        robot.connect()
+        responder = robot.heartbeat_responder
+        robot.disconnect()
+        assert not responder.is_running()
+        assert robot.heartbeat_responder is None
+
+
+class TestStats:
+    """Test round-trip probes and statistics."""
+
+    def test_probe_round_trips(self, simulator):
+        """Test probes measure the link's round trip."""
+        with RobotController("127.0.0.1", simulator.ports[0], keepalive=False) as robot:
+            probe = lambda: robot.request(build_ground_cmd())
+            with HeartbeatResponder(
+                robot._connection, robot._heartbeat.service, robot.metrics, probe, probe_interval=0.02
+            ) as responder:
+                assert wait_until(lambda: responder.stats()["rtt"] is not None)
+                time.sleep(4 * HEARTBEAT)
+                stats = responder.stats()
+        assert stats["probes"] >= 1
+        assert 0 < stats["rtt_p50"] <= stats["rtt_max"] < 1.0
+        assert stats["heartbeats"] >= 2
+        assert stats["last_heartbeat_age"] < 2 * HEARTBEAT
+
+    def test_lost_probes(self):
+        """Test a probe still unanswered when the next is due counts as lost."""
+        connection = Mock()
+        connection.readable.return_value = False
+        responder = HeartbeatResponder(connection, Mock(return_value=0), probe=Future, probe_interval=1.0)
+        for now in (1.0, 2.0, 3.0):
+            responder._send_probe(now)
+        assert responder.probes_sent == 3
+        assert responder.probes_lost == 2
+        assert responder.stats()["rtt"] is None
+
+
+class TestService:
+    """Test HeartbeatMonitor.service()."""
+
+    def test_answers_heartbeat(self):
+        """Test arrived heartbeats are answered."""
+        connection = Mock()
+        connection.receive_all.return_value = ["{Heartbeat}", "{1_ok}"]
+        monitor = HeartbeatMonitor(connection)
+        assert monitor.service() == 2
+        connection.send.assert_called_once_with(b"{Heartbeat}")
+
+    def test_leaves_reading_caller_alone(self):
+        """Test nothing is read while a caller is polling."""
+        connection = Mock()
+        monitor = HeartbeatMonitor(connection)
+        with monitor.reading():
+            assert monitor.service() == -1
+        connection.receive_all.assert_not_called()
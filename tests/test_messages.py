@@ -0,0 +1,92 @@
+"""Unit tests for messages module."""
+
+import pytest
+from robotapi.messages import (
+    Ack,
+    BoolReply,
+    Heartbeat,
+    Json,
+    MessageDecoder,
+    ValueReply,
+    decode_frame,
+)
+
+
+class TestDecodeFrame:
+    """Test frame classification."""
+
+    def test_heartbeat(self):
+        """Test heartbeat frames."""
+        message = decode_frame("{Heartbeat}", 12.5)
+        assert message == Heartbeat()
+        assert message.timestamp == 12.5
+        assert message.serial is None
+
+    @pytest.mark.parametrize(
+        "frame, expected",
+        [
+            ("{7_ok}", Ack("7")),
+            ("{ok}", Ack(None)),
+            ("{8_true}", BoolReply("8", True)),
+            ("{9_false}", BoolReply("9", False)),
+            ("{10_42}", ValueReply("10", 42)),
+            ("{11_-3}", ValueReply("11", -3)),
+            ("{12_abc}", ValueReply("12", "abc")),
+            ("{_ok}", Ack("")),
+        ],
+    )
+    def test_replies(self, frame, expected):
+        """Test the firmware reply grammar."""
+        assert decode_frame(frame) == expected
+
+    def test_reply_values(self):
+        """Test every reply exposes its value."""
+        assert decode_frame("{7_ok}").value == "ok"
+        assert decode_frame("{8_true}").value is True
+        assert decode_frame("{10_42}").value == 42
+
+    def test_json(self):
+        """Test JSON objects are decoded, even if they mention true/false."""
+        message = decode_frame('{"status": "ok", "moving": true}')
+        assert message == Json({"status": "ok", "moving": True})
+        assert message.data["moving"] is True
+
+    def test_bare_tokens(self):
+        """Test bare true/false tokens decode without a serial."""
+        assert decode_frame("true") == BoolReply(None, True)
+        assert decode_frame("FALSE") == BoolReply(None, False)
+
+    @pytest.mark.parametrize("frame", ["invalid", "{Heartbeat", "{oops}", "{not json}", "[1]"])
+    def test_unknown(self, frame):
+        """Test unrecognised frames decode to None."""
+        assert decode_frame(frame) is None
+
+    def test_slots(self):
+        """Test messages carry no per-instance dictionary."""
+        assert not hasattr(decode_frame("{7_ok}"), "__dict__")
+        assert not hasattr(decode_frame("{Heartbeat}"), "__dict__")
+
+    def test_to_dict(self):
+        """Test dictionary forms match parse_response()."""
+        assert decode_frame("{Heartbeat}").to_dict() == {"type": "heartbeat"}
+        assert decode_frame("{7_ok}").to_dict() == {"type": "reply", "serial": "7", "value": "ok"}
+        assert decode_frame("true").to_dict() == {"type": "obstacle", "detected": True}
+
+
+class TestMessageDecoder:
+    """Test streaming decoding."""
+
+    def test_feed_split_stream(self):
+        """Test messages are decoded across reads with one timestamp per read."""
+        decoder = MessageDecoder()
+        assert decoder.feed(b"{Heartbeat}{7_", 1.0) == [Heartbeat()]
+        messages = decoder.feed(b'ok}{"a": 1}junk{8_true}', 2.0)
+        assert messages == [Ack("7"), Json({"a": 1}), BoolReply("8", True)]
+        assert [m.timestamp for m in messages] == [2.0, 2.0, 2.0]
+
+    def test_reset(self):
+        """Test reset discards partial frames."""
+        decoder = MessageDecoder()
+        decoder.feed(b"{7_")
+        decoder.reset()
+        assert decoder.feed(b"{ok}") == [Ack(None)]
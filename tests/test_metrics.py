@@ -0,0 +1,201 @@
+"""Unit tests for metrics module."""
+
+import time
+import urllib.request
+from unittest.mock import Mock, patch
+import pytest
+from robotapi import RobotController
+from robotapi.connection import Connection
+from robotapi.exceptions import RobotConnectionError
+from robotapi.metrics import (
+    Histogram,
+    HistogramFamily,
+    LinkMetrics,
+    MetricsRegistry,
+    MetricsServer,
+    render,
+)
+from robotapi.protocol import build_distance_cmd, build_led_cmd
+
+pytestmark = pytest.mark.simulator(heartbeat_interval=0.05)
+
+
+class TestHistogram:
+    """Test fixed-bucket histograms."""
+
+    def test_buckets_include_upper_bound(self):
+        """Test observations land in the first bucket bounding them."""
+        histogram = Histogram("h", "help", (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(2.65)
+
+    def test_quantile(self):
+        """Test quantiles are estimated as bucket upper bounds."""
+        histogram = Histogram("h", "help", (0.01, 0.1, 1.0))
+        for _ in range(98):
+            histogram.observe(0.005)
+        histogram.observe(0.05)
+        histogram.observe(5.0)
+        assert histogram.quantile(0.5) == 0.01
+        assert histogram.quantile(0.99) == 0.1
+        assert histogram.quantile(1.0) == float("inf")
+        assert Histogram("h", "help").quantile(0.5) == 0.0
+
+    def test_reset_keeps_buckets(self):
+        """Test reset zeroes the preallocated counts in place."""
+        histogram = Histogram("h", "help", (1.0,))
+        counts = histogram.counts
+        histogram.observe(0.5)
+        histogram.reset()
+        assert histogram.counts is counts
+        assert counts == [0, 0] and histogram.count == 0
+
+
+class TestRegistry:
+    """Test registration, snapshots and Prometheus text."""
+
+    def test_render(self):
+        """Test counters and cumulative histogram buckets are rendered."""
+        registry = MetricsRegistry({"robot": "car-1"})
+        registry.counter("sent_total", "Things sent").inc(3)
+        latency = registry.histogram("latency_seconds", "Latency", (0.1, 1.0))
+        latency.observe(0.05)
+        latency.observe(0.5)
+        assert registry.render() == (
+            "# HELP sent_total Things sent\n"
+            "# TYPE sent_total counter\n"
+            'sent_total{robot="car-1"} 3\n'
+            "# HELP latency_seconds Latency\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{robot="car-1",le="0.1"} 1\n'
+            'latency_seconds_bucket{robot="car-1",le="1"} 2\n'
+            'latency_seconds_bucket{robot="car-1",le="+Inf"} 2\n'
+            'latency_seconds_sum{robot="car-1"} 0.55\n'
+            'latency_seconds_count{robot="car-1"} 2\n'
+        )
+
+    def test_family_labels(self):
+        """Test family members carry their label and empty ones are omitted."""
+        family = HistogramFamily("rtt_seconds", "RTT", "n", [3, 21], (1.0,))
+        family.observe(21, 0.5)
+        family.observe(99, 2.0)
+        lines = family.samples((("robot", "a"),))
+        assert 'rtt_seconds_bucket{robot="a",n="21",le="1"} 1' in lines
+        assert 'rtt_seconds_count{robot="a",n="99"} 1' in lines
+        assert not any('n="3"' in line for line in lines)
+        assert set(family.snapshot()) == {21, 99}
+
+    def test_lookup_returns_existing(self):
+        """Test registering a name twice returns the first metric."""
+        registry = MetricsRegistry()
+        counter = registry.counter("x_total", "X")
+        assert registry.counter("x_total", "X") is counter
+        assert registry.get("x_total") is counter
+        with pytest.raises(ValueError):
+            registry.histogram("x_total", "X")
+
+    def test_render_many(self):
+        """Test registries of several robots share HELP and TYPE lines."""
+        a = LinkMetrics(MetricsRegistry({"robot": "a"}))
+        b = LinkMetrics(MetricsRegistry({"robot": "b"}))
+        a.connected()
+        text = render([a.registry, b.registry])
+        assert text.count("# TYPE robotapi_connects_total counter") == 1
+        assert 'robotapi_connects_total{robot="a"} 1' in text
+        assert 'robotapi_connects_total{robot="b"} 0' in text
+
+    def test_server(self):
+        """Test the HTTP exporter serves the current metrics."""
+        registry = MetricsRegistry()
+        registry.counter("scrapes_total", "Scrapes").inc()
+        with MetricsServer([registry], port=0) as server:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                assert b"scrapes_total 1" in response.read()
+
+
+class TestLinkMetrics:
+    """Test the per-connection metric set."""
+
+    def test_reconnects(self):
+        """Test connects after the first count as reconnects."""
+        metrics = LinkMetrics()
+        metrics.connected()
+        metrics.connected()
+        assert metrics.snapshot()["robotapi_connects_total"] == 2
+        assert metrics.reconnects.value == 1
+
+    def test_heartbeat_jitter(self):
+        """Test inter-arrival times and their change are recorded."""
+        metrics = LinkMetrics()
+        for timestamp in (10.0, 11.0, 12.25, 13.25):
+            metrics.heartbeat(timestamp)
+        assert metrics.heartbeat_interval.count == 3
+        assert metrics.heartbeat_interval.sum == pytest.approx(3.25)
+        assert metrics.heartbeat_jitter.sum == pytest.approx(0.5)
+
+    def test_heartbeats_missed_and_late(self):
+        """Test gaps count as missed heartbeats and slow replies as late."""
+        metrics = LinkMetrics(heartbeat_period=1.0)
+        for timestamp in (10.0, 11.0, 14.1, 15.0):
+            metrics.heartbeat(timestamp)
+        assert metrics.heartbeats_missed.value == 2
+        metrics.heartbeat_answered(0.002)
+        metrics.heartbeat_answered(1.5)
+        assert metrics.heartbeats_late.value == 1
+        assert metrics.last_heartbeat == 15.0
+
+    @patch("socket.socket")
+    def test_connection_traffic(self, mock_socket_class):
+        """Test Connection counts bytes, frames and lost connections."""
+        mock_sock = Mock()
+        mock_sock.recv.side_effect = [b"{Heartbeat}{1_ok}{2_", b""]
+        mock_socket_class.return_value = mock_sock
+        conn = Connection("10.0.0.57")
+        conn.connect()
+        conn.send(b'{"N":100}')
+        assert conn.receive_all() == ["{Heartbeat}", "{1_ok}"]
+        with pytest.raises(RobotConnectionError):
+            conn.receive()
+        snapshot = conn.metrics.snapshot()
+        assert snapshot["robotapi_bytes_sent_total"] == 9
+        assert snapshot["robotapi_messages_sent_total"] == 1
+        assert snapshot["robotapi_bytes_received_total"] == 20
+        assert snapshot["robotapi_messages_received_total"] == 2
+        assert snapshot["robotapi_connections_lost_total"] == 1
+
+
+class TestControllerMetrics:
+    """Test metrics recorded by RobotController against the simulator."""
+
+    def test_round_trips_by_command(self, simulator):
+        """Test round trips are recorded under each command number."""
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            robot.wait_reply(robot.request(build_distance_cmd()))
+            robot.wait_reply(robot.request(build_led_cmd(1, 0, 0, 0)))
+            robot.wait_reply(robot.request(build_led_cmd(1, 0, 0, 0)))
+        rtt = robot.metrics.snapshot()["robotapi_command_rtt_seconds"]
+        assert rtt[21]["count"] == 1 and rtt[8]["count"] == 2
+        assert 0 < rtt[8]["mean"] < 1.0
+
+    def test_heartbeats(self, simulator):
+        """Test heartbeat intervals and reply delays are recorded."""
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            time.sleep(0.3)
+        assert robot.metrics.heartbeat_reply.count >= 4
+        assert robot.metrics.heartbeat_interval.count >= 3
+        assert 'robotapi_heartbeat_reply_seconds_count{robot="127.0.0.1:' in robot.metrics.render()
+
+    def test_obstacle_queries(self, simulator):
+        """Test forward() counts obstacle queries and detections."""
+        simulator.robots[0].obstacle_detected = True
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            assert robot.forward(2.0) is False
+            robot.disconnect()
+            robot.connect()
+        assert robot.metrics.obstacle_queries.value >= 1
+        assert robot.metrics.obstacles_detected.value == 1
+        assert robot.metrics.reconnects.value == 1
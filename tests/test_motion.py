@@ -0,0 +1,138 @@
+"""Unit tests for motion module."""
+
+import time
+from concurrent.futures import CancelledError
+import pytest
+from robotapi import RobotController
+from robotapi.motion import Motion
+from robotapi.protocol import DIR_BACKWARD, DIR_LEFT
+from robotapi.simulator import SimulatorServer
+
+
+class TestMotion:
+    """Test the motion future on its own."""
+
+    def test_finish(self):
+        """Test finish resolves the future and records the end time."""
+        motion = Motion(DIR_BACKWARD, 1.0, 50)
+        motion.finish(True)
+        assert motion.result(timeout=0) is True
+        assert motion.ended_at is not None
+
+    def test_cancel(self):
+        """Test cancel interrupts the wait and calls back once."""
+        cancelled = []
+        motion = Motion(DIR_BACKWARD, 1.0, 50, cancelled.append)
+        assert motion.cancel() is True
+        assert motion.wake.is_set() and motion.interrupted
+        assert cancelled == [motion]
+        motion.finish(False)  # The drive thread finishing later is ignored
+        with pytest.raises(CancelledError):
+            motion.result(timeout=0)
+        assert motion.cancel() is True and cancelled == [motion]
+
+    def test_cancel_after_finish(self):
+        """Test a finished motion cannot be cancelled."""
+        motion = Motion(DIR_BACKWARD, 1.0, 50)
+        motion.finish(True)
+        assert motion.cancel() is False
+        assert not motion.interrupted
+
+    def test_fail_after_cancel(self):
+        """Test an error ending a cancelled motion leaves it cancelled."""
+        motion = Motion(DIR_BACKWARD, 1.0, 50)
+        motion.cancel()
+        motion.fail(RuntimeError("link lost"))
+        assert motion.cancelled()
+        motion.finish(True)
+        assert motion.cancelled()
+
+
+@pytest.fixture(params=[False, True], ids=["polled", "reactor"])
+def robot(request):
+    """Provide a connected controller, polled and with a reactor."""
+    server = SimulatorServer(count=1, heartbeat_interval=0.2, uart_rate=None)
+    server.start()
+    robot = RobotController("127.0.0.1", server.ports[0], reactor=request.param)
+    robot.connect()
+    robot.sim = server.robots[0]
+    yield robot
+    robot.disconnect()
+    server.stop()
+
+
+def wait_stopped(sim, timeout=1.0):
+    """Wait for the simulated car to stop."""
+    deadline = time.monotonic() + timeout
+    while sim.is_moving() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return not sim.is_moving()
+
+
+class TestControllerMotion:
+    """Test background movements against the simulator."""
+
+    def test_returns_at_once(self, robot):
+        """Test start_backward returns before the move ends and completes."""
+        start = time.monotonic()
+        motion = robot.start_backward(0.3)
+        assert time.monotonic() - start < 0.1
+        assert not motion.done()
+        assert motion.result(timeout=2.0) is True
+        assert wait_stopped(robot.sim)
+        direction, _, started, ended = robot.sim.moves[-1]
+        assert direction == DIR_BACKWARD
+        assert ended - started == pytest.approx(0.3, abs=0.1)
+
+    def test_cancel_stops_car(self, robot):
+        """Test cancel stops the car straight away."""
+        motion = robot.start_backward(5.0)
+        time.sleep(0.1)
+        assert motion.cancel() is True
+        assert wait_stopped(robot.sim, timeout=0.2)
+        assert not robot.is_moving()
+
+    def test_stop_ends_motion(self, robot):
+        """Test stop() resolves a running motion with False."""
+        motion = robot.start_rotate_left(5.0)
+        time.sleep(0.1)
+        robot.stop()
+        assert motion.result(timeout=1.0) is False
+        assert motion.interrupted
+
+    def test_newer_motion_supersedes(self, robot):
+        """Test starting a movement ends the last without stopping the car."""
+        first = robot.start_backward(5.0)
+        second = robot.start_rotate_left(0.3)
+        assert first.result(timeout=1.0) is False
+        assert robot.sim.is_moving()
+        assert second.result(timeout=2.0) is True
+        assert wait_stopped(robot.sim)
+        assert [move[0] for move in robot.sim.moves] == [DIR_BACKWARD, DIR_LEFT]
+
+    def test_obstacle_stop(self, robot):
+        """Test start_forward resolves False with obstacle set."""
+        motion = robot.start_forward(5.0)
+        time.sleep(0.1)
+        robot.sim.obstacle_detected = True
+        assert motion.result(timeout=2.0) is False
+        assert motion.obstacle and not motion.interrupted
+        assert robot.detect_obstacle()
+
+    def test_sensors_while_driving(self, robot):
+        """Test distance queries and camera moves overlap a movement."""
+        robot.sim.distance_cm = 42
+        motion = robot.start_backward(0.6)
+        start = time.monotonic()
+        assert robot.get_distance() == 42
+        robot.camera_set(pan=60)
+        assert time.monotonic() - start < 0.5
+        assert not motion.done()
+        assert motion.result(timeout=2.0) is True
+
+    def test_timed_move(self, robot):
+        """Test a firmware-timed movement resolves once the robot replies."""
+        robot.timed_moves = True
+        motion = robot.start_backward(0.2)
+        assert motion.result(timeout=2.0) is True
+        assert motion.reply.done()
@@ -0,0 +1,73 @@
+"""Unit tests for pacing module."""
+
+import pytest
+from robotapi.pacing import TokenBucket, command_cost, uart_bucket
+from robotapi.protocol import UART_BYTES_PER_SECOND, build_obstacle_cmd, build_stop_cmd
+
+
+class TestCommandCost:
+    """Test UART cost of commands."""
+
+    def test_tagged_command_uses_longest_serial(self):
+        """Test the cost assumes a three-digit serial."""
+        assert command_cost(build_obstacle_cmd()) == len('{"D1":1,"H":"999","N":21}')
+
+    def test_untagged_command(self):
+        """Test commands without H cost their encoded size."""
+        assert command_cost(build_stop_cmd()) == len('{"N":100}')
+
+
+class TestTokenBucket:
+    """Test TokenBucket."""
+
+    def test_starts_full(self):
+        """Test a new bucket holds its capacity."""
+        bucket = TokenBucket(100, capacity=10)
+        assert bucket.available(now=bucket._updated) == 10
+
+    def test_consume_and_refill(self):
+        """Test tokens are taken and refilled at the rate."""
+        bucket = TokenBucket(100, capacity=10)
+        start = bucket._updated
+        assert bucket.consume(10, now=start) is True
+        assert bucket.consume(1, now=start) is False
+        assert bucket.delay(5, now=start) == pytest.approx(0.05)
+        assert bucket.consume(5, now=start + 0.05) is True
+
+    def test_wait_of_delay_suffices(self):
+        """Test consuming after exactly delay() succeeds despite float rounding."""
+        bucket = TokenBucket(100, capacity=10)
+        start = bucket._updated = 8588.709928621  # start + 0.05 - start < 0.05
+        bucket.consume(10, now=start)
+        wait = bucket.delay(5, now=start)
+        assert bucket.consume(5, now=start + wait) is True
+        assert bucket.delay(0, now=start + wait) == 0.0
+
+    def test_refill_is_capped(self):
+        """Test idle time does not accumulate beyond capacity."""
+        bucket = TokenBucket(100, capacity=10)
+        assert bucket.available(now=bucket._updated + 60) == 10
+
+    def test_oversized_amount(self):
+        """Test an amount above capacity waits for a full bucket, then overdraws."""
+        bucket = TokenBucket(100, capacity=10)
+        start = bucket._updated
+        assert bucket.consume(30, now=start) is True
+        assert bucket.available(now=start) == -20
+        assert bucket.delay(30, now=start) == pytest.approx(0.3)
+
+    def test_charge_goes_into_debt(self):
+        """Test unconditional charges delay later traffic."""
+        bucket = TokenBucket(100, capacity=10)
+        start = bucket._updated
+        bucket.charge(15, now=start)
+        assert bucket.delay(1, now=start) == pytest.approx(0.06)
+
+    def test_invalid_rate(self):
+        """Test non-positive rates are rejected."""
+        with pytest.raises(ValueError):
+            TokenBucket(0)
+
+    def test_uart_bucket(self):
+        """Test UART buckets refill at a share of the link speed."""
+        assert uart_bucket(0.5).rate == UART_BYTES_PER_SECOND / 2
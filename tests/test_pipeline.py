@@ -0,0 +1,128 @@
+"""Unit tests for pipeline module."""
+
+import time
+import pytest
+from robotapi import RobotController
+from robotapi.pipeline import CommandPipeline
+from robotapi.protocol import (
+    UNTAGGED_SERIAL,
+    build_distance_cmd,
+    build_led_cmd,
+    build_movement_cmd,
+    build_obstacle_cmd,
+    build_stop_cmd,
+)
+from robotapi.messages import Heartbeat, decode_frame
+from robotapi.exceptions import CommandError, RobotConnectionError
+
+pytestmark = pytest.mark.simulator(heartbeat_interval=0.05)
+
+
+class TestCommandPipeline:
+    """Test serial assignment and reply matching."""
+
+    def test_prepare_tags_unique_serials(self):
+        """Test each command gets its own string serial."""
+        pipeline = CommandPipeline()
+        tagged = [pipeline.prepare(build_obstacle_cmd())[0] for _ in range(3)]
+        assert [cmd["H"] for cmd in tagged] == ["1", "2", "3"]
+        assert all(cmd["N"] == 21 for cmd in tagged)
+        assert len(pipeline) == 3
+
+    def test_out_of_order_replies(self):
+        """Test replies resolve the futures they belong to."""
+        pipeline = CommandPipeline()
+        _, first = pipeline.prepare(build_obstacle_cmd())
+        _, second = pipeline.prepare(build_movement_cmd(3, 50))
+        assert pipeline.resolve(decode_frame(f"{{{second.serial}_ok}}"))
+        assert pipeline.resolve(decode_frame(f"{{{first.serial}_true}}"))
+        assert first.result(0) is True
+        assert second.result(0) == "ok"
+        assert second.rtt is not None and second.rtt >= 0
+        assert len(pipeline) == 0
+
+    def test_unknown_reply_ignored(self):
+        """Test unmatched and serial-less replies are not consumed."""
+        pipeline = CommandPipeline()
+        pipeline.prepare(build_obstacle_cmd())
+        assert not pipeline.resolve(decode_frame("{99_true}"))
+        assert not pipeline.resolve(decode_frame("{ok}"))
+        assert not pipeline.resolve(Heartbeat())
+        assert len(pipeline) == 1
+
+    def test_command_without_reply_rejected(self):
+        """Test commands that never echo a serial cannot be pipelined."""
+        with pytest.raises(CommandError):
+            CommandPipeline().prepare(build_stop_cmd())
+
+    def test_full_pipeline(self):
+        """Test in-flight limit and eviction of stale commands."""
+        pipeline = CommandPipeline(max_in_flight=2, reply_timeout=0.05)
+        _, first = pipeline.prepare(build_obstacle_cmd())
+        pipeline.prepare(build_obstacle_cmd())
+        with pytest.raises(CommandError, match="Too many"):
+            pipeline.prepare(build_obstacle_cmd())
+        time.sleep(0.06)
+        pipeline.prepare(build_obstacle_cmd())
+        with pytest.raises(CommandError, match="No reply"):
+            first.result(0)
+
+    def test_fail_all(self):
+        """Test disconnect fails every pending future."""
+        pipeline = CommandPipeline()
+        _, future = pipeline.prepare(build_obstacle_cmd())
+        pipeline.fail_all(RobotConnectionError("Disconnected"))
+        with pytest.raises(RobotConnectionError):
+            future.result(0)
+        assert len(pipeline) == 0
+
+
+class TestControllerRequests:
+    """Test request futures against the simulator."""
+
+    @pytest.mark.parametrize("reactor", [False, True])
+    def test_requests_in_flight(self, simulator, reactor):
+        """Test several queries in flight resolve with their own replies."""
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=reactor) as robot:
+            futures = [robot.request(build_obstacle_cmd()) for _ in range(5)]
+            assert [robot.wait_reply(f) for f in futures] == [False] * 5
+            simulator.robots[0].obstacle_detected = True
+            late = robot.request(build_obstacle_cmd())
+            assert robot.wait_reply(late) is True
+            assert [cmd["H"] for cmd in simulator.robots[0].commands_received] == [
+                f.serial for f in futures + [late]
+            ]
+
+    def test_untagged_reply_not_matched(self, simulator):
+        """Test an untagged command's {22_ok} never resolves a tagged request."""
+        simulator.robots[0].distance_cm = 42
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            for _ in range(UNTAGGED_SERIAL - 2):
+                robot._pipeline._serials.next()
+            futures = []
+            for _ in range(3):
+                robot._send_command(build_led_cmd(1, 255, 0, 0))
+                futures.append(robot.request(build_distance_cmd()))
+            assert [robot.wait_reply(f) for f in futures] == [42] * 3
+            assert str(UNTAGGED_SERIAL) not in [f.serial for f in futures]
+
+    def test_wait_reply_timeout(self, simulator):
+        """Test a missing reply raises CommandError."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            tagged, future = robot._pipeline.prepare(build_obstacle_cmd())
+            with pytest.raises(CommandError, match="No reply"):
+                robot.wait_reply(future, timeout=0.2)
+
+    def test_disconnect_fails_pending(self, simulator):
+        """Test pending requests fail when the controller disconnects."""
+        robot = RobotController("127.0.0.1", simulator.ports[0])
+        robot.connect()
+        _, future = robot._pipeline.prepare(build_obstacle_cmd())
+        robot.disconnect()
+        with pytest.raises(RobotConnectionError):
+            future.result(0)
+
+    def test_request_not_connected(self):
+        """Test request requires a connection."""
+        with pytest.raises(RobotConnectionError):
+            RobotController("127.0.0.1", 1).request(build_obstacle_cmd())
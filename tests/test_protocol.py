@@ -18,16 +18,46 @@ class TestCommandBuilders:
         cmd = protocol.build_obstacle_cmd()
         assert cmd == {"H": 22, "N": 21, "D1": 1}
 
+    def test_build_distance_cmd(self):
+        """Test ultrasonic distance command builder."""
+        cmd = protocol.build_distance_cmd()
+        assert cmd == {"H": 22, "N": 21, "D1": 2}
+
     def test_build_camera_cmd(self):
         """Test camera control command builder."""
         cmd = protocol.build_camera_cmd(protocol.CAM_PAN_LEFT)
         assert cmd == {"H": 22, "N": 106, "D1": 4}
 
+    def test_build_timed_movement_cmd(self):
+        """Test timed movement command builder."""
+        cmd = protocol.build_timed_movement_cmd(protocol.DIR_BACKWARD, 80, 1.2345)
+        assert cmd == {"H": 22, "N": 2, "D1": 4, "D2": 80, "T": 1234}
+
     def test_build_stop_cmd(self):
         """Test stop command builder."""
         cmd = protocol.build_stop_cmd()
         assert cmd == {"N": 100}
 
+    def test_build_motor_speeds_cmd(self):
+        """Test per-side motor speed command builder."""
+        cmd = protocol.build_motor_speeds_cmd(120, 80)
+        assert cmd == {"H": 22, "N": 4, "D1": 120, "D2": 80}
+
+    def test_build_joystick_cmd(self):
+        """Test joystick command builder."""
+        cmd = protocol.build_joystick_cmd(protocol.JOYSTICK_STOP)
+        assert cmd == {"H": 22, "N": 102, "D1": 9}
+
+    def test_build_servo_cmd(self):
+        """Test absolute servo angle command builder."""
+        cmd = protocol.build_servo_cmd(protocol.SERVO_TILT, 60)
+        assert cmd == {"H": 22, "N": 5, "D1": 2, "D2": 60}
+
+    def test_build_led_cmd(self):
+        """Test LED colour command builder."""
+        cmd = protocol.build_led_cmd(2, 255, 0, 10)
+        assert cmd == {"H": 22, "N": 8, "D1": 2, "D2": 255, "D3": 0, "D4": 10}
+
 
 class TestCommandEncoding:
     """Test command encoding."""
@@ -39,6 +69,51 @@ class TestCommandEncoding:
         assert isinstance(encoded, bytes)
         assert json.loads(encoded.decode("utf-8")) == cmd
 
+    def test_encode_command_compact(self):
+        """Test encoding omits whitespace."""
+        encoded = protocol.encode_command(protocol.build_movement_cmd(protocol.DIR_FORWARD, 50))
+        assert encoded == b'{"H":22,"N":3,"D1":3,"D2":50}'
+
+    def test_fixed_commands_pre_encoded(self):
+        """Test cached commands match the builders and are reused."""
+        assert protocol.STOP_COMMAND == b'{"N":100}'
+        assert protocol.OBSTACLE_COMMAND == protocol.encode_command(protocol.build_obstacle_cmd())
+        for direction in (protocol.DIR_LEFT, protocol.DIR_BACKWARD):
+            for speed in (0, 50, 100):
+                encoded = protocol.encode_movement(direction, speed)
+                assert json.loads(encoded) == protocol.build_movement_cmd(direction, speed)
+                assert encoded is protocol.encode_movement(direction, speed)
+        encoded = protocol.encode_camera(protocol.CAM_CENTER)
+        assert json.loads(encoded) == protocol.build_camera_cmd(protocol.CAM_CENTER)
+        assert encoded is protocol.encode_camera(protocol.CAM_CENTER)
+
+    def test_uncached_commands_encoded(self):
+        """Test values outside the table are still encoded."""
+        assert json.loads(protocol.encode_movement(protocol.DIR_FORWARD, 150))["D2"] == 150
+        assert json.loads(protocol.encode_camera(9))["D1"] == 9
+
+    def test_uart_size(self):
+        """Test spaces stripped by the bridge are not counted."""
+        assert protocol.uart_size(b'{"N": 100}') == 9
+        assert protocol.uart_size(protocol.STOP_COMMAND) == 9
+
+
+class TestCommandByteCounter:
+    """Test per-command byte accounting."""
+
+    def test_record_and_snapshot(self):
+        """Test counts and byte totals are kept per command."""
+        counter = protocol.CommandByteCounter()
+        counter.record(protocol.CMD_STOP, protocol.STOP_COMMAND)
+        counter.record(protocol.CMD_STOP, b'{"N": 100}')
+        counter.record(protocol.CMD_MOVEMENT, protocol.encode_movement(protocol.DIR_FORWARD, 50))
+        snapshot = counter.snapshot()
+        assert snapshot[protocol.CMD_STOP] == {"count": 2, "tcp_bytes": 19, "uart_bytes": 18}
+        assert snapshot[protocol.CMD_MOVEMENT]["count"] == 1
+        assert counter.total_bytes == 19 + 29
+        counter.reset()
+        assert counter.snapshot() == {}
+
 
 class TestResponseParsing:
     """Test response parsing."""
@@ -63,11 +138,49 @@ class TestResponseParsing:
         result = protocol.parse_response('{"status": "ok"}')
         assert result == {"status": "ok"}
 
+    def test_parse_json_mentioning_true(self):
+        """Test JSON payloads are not mistaken for obstacle replies."""
+        result = protocol.parse_response('{"status": "true"}')
+        assert result == {"status": "true"}
+
     def test_parse_invalid(self):
         """Test parsing invalid response."""
         result = protocol.parse_response("invalid")
         assert result is None
 
+    def test_parse_serial_replies(self):
+        """Test parsing firmware replies carrying a serial number."""
+        assert protocol.parse_response("{7_ok}") == {"type": "reply", "serial": "7", "value": "ok"}
+        assert protocol.parse_response("{8_true}") == {"type": "reply", "serial": "8", "value": True}
+        assert protocol.parse_response("{9_false}") == {"type": "reply", "serial": "9", "value": False}
+        assert protocol.parse_response("{10_42}") == {"type": "reply", "serial": "10", "value": 42}
+
+    def test_parse_bare_ok(self):
+        """Test parsing replies without a serial number."""
+        assert protocol.parse_response("{ok}") == {"type": "reply", "serial": None, "value": "ok"}
+
+
+class TestSerials:
+    """Test command serial numbers."""
+
+    def test_serial_counter_rolls_over(self):
+        """Test serials cycle within their range."""
+        counter = protocol.SerialCounter(1, 3)
+        assert [counter.next() for _ in range(4)] == ["1", "2", "3", "1"]
+
+    def test_serial_counter_skips_untagged_serial(self):
+        """Test the serial untagged commands carry is never handed out."""
+        counter = protocol.SerialCounter(21, 23)
+        assert [counter.next() for _ in range(3)] == ["21", "23", "21"]
+
+    def test_with_serial(self):
+        """Test tagging copies the command and sends H as a string."""
+        cmd = protocol.build_obstacle_cmd()
+        tagged = protocol.with_serial(cmd, "5")
+        assert tagged["H"] == "5"
+        assert cmd["H"] == 22
+        assert protocol.encode_command(tagged) == b'{"H":"5","N":21,"D1":1}'
+
 
 class TestConstants:
     """Test protocol constants."""
@@ -0,0 +1,171 @@
+"""Unit tests for reactor module."""
+
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from robotapi.reactor import Reactor
+from robotapi.messages import BoolReply, Heartbeat, Json
+from robotapi.controller import HeartbeatMonitor
+from robotapi.exceptions import RobotConnectionError
+
+
+def make_connection(messages, delay=0.0):
+    """Build a mock connection that yields messages after delay then idles."""
+    pending = list(messages)
+    ready_at = time.monotonic() + delay
+    conn = Mock()
+
+    def receive_all(timeout=0.1):
+        if pending and time.monotonic() >= ready_at:
+            return [pending.pop(0)]
+        time.sleep(timeout)
+        return []
+
+    conn.receive_all.side_effect = receive_all
+    return conn
+
+
+class TestReactorLifecycle:
+    """Test starting and stopping the reactor."""
+
+    def test_start_stop(self):
+        """Test reader thread lifecycle."""
+        reactor = Reactor(make_connection([]), poll_interval=0.01)
+        reactor.start()
+        assert reactor.is_running()
+        reactor.stop()
+        assert not reactor.is_running()
+
+    def test_connection_error_stops_reactor(self):
+        """Test that a receive failure ends the thread and is recorded."""
+        conn = Mock()
+        conn.receive_all.side_effect = RobotConnectionError("Connection closed by robot")
+        reactor = Reactor(conn, poll_interval=0.01)
+        reactor.start()
+
+        with pytest.raises(RobotConnectionError, match="closed"):
+            reactor.wait_for(lambda r: True, timeout=1.0)
+
+        assert not reactor.is_running()
+        assert reactor.error is not None
+
+
+class TestReactorDispatch:
+    """Test response dispatch."""
+
+    def test_subscribers_receive_all_messages(self):
+        """Test every decoded message reaches subscribers."""
+        received = []
+        done = threading.Event()
+        reactor = Reactor(
+            make_connection(["{Heartbeat}", '{"status": "ok"}']), poll_interval=0.01
+        )
+
+        def on_response(response):
+            received.append(response)
+            if len(received) == 2:
+                done.set()
+
+        reactor.subscribe(on_response)
+        reactor.start()
+        try:
+            assert done.wait(1.0)
+        finally:
+            reactor.stop()
+
+        assert received == [Heartbeat(), Json({"status": "ok"})]
+        assert all(r.timestamp > 0 for r in received)
+
+    def test_unsubscribe(self):
+        """Test removed subscribers are no longer called."""
+        callback = Mock()
+        reactor = Reactor(make_connection([]))
+        reactor.subscribe(callback)
+        reactor.unsubscribe(callback)
+        reactor._dispatch(Heartbeat())
+        callback.assert_not_called()
+
+    def test_subscriber_exception_does_not_stop_dispatch(self):
+        """Test a failing subscriber does not starve the others."""
+        callback = Mock()
+        reactor = Reactor(make_connection([]))
+        reactor.subscribe(Mock(side_effect=ValueError("boom")))
+        reactor.subscribe(callback)
+        reactor._dispatch(Heartbeat())
+        callback.assert_called_once_with(Heartbeat())
+
+    def test_wait_for_match(self):
+        """Test waiting for a specific response."""
+        reactor = Reactor(
+            make_connection(["{Heartbeat}", "false", "true"], delay=0.05), poll_interval=0.01
+        )
+        reactor.start()
+        try:
+            response = reactor.wait_for(lambda r: isinstance(r, BoolReply) and r.value is True, timeout=1.0)
+        finally:
+            reactor.stop()
+
+        assert response == BoolReply(None, True)
+
+    def test_wait_for_timeout(self):
+        """Test wait_for returns None when nothing matches."""
+        reactor = Reactor(make_connection([]), poll_interval=0.01)
+        reactor.start()
+        try:
+            start = time.monotonic()
+            assert reactor.wait_for(lambda r: True, timeout=0.05) is None
+            assert time.monotonic() - start < 0.5
+        finally:
+            reactor.stop()
+
+
+class TestHeartbeatMonitorWithReactor:
+    """Test heartbeat handling on the reactor thread."""
+
+    def test_heartbeat_answered_by_reactor(self):
+        """Test heartbeats are answered without a wait in progress."""
+        conn = make_connection(["{Heartbeat}"])
+        reactor = Reactor(conn, poll_interval=0.01)
+        monitor = HeartbeatMonitor(conn, reactor)
+        reactor.start()
+        try:
+            deadline = time.monotonic() + 1.0
+            while not conn.send.called and time.monotonic() < deadline:
+                time.sleep(0.005)
+        finally:
+            monitor.close()
+            reactor.stop()
+
+        conn.send.assert_called_with(b"{Heartbeat}")
+
+    def test_wait_for_duration_stopped_by_callback(self):
+        """Test early stop from the callback wakes the waiter immediately."""
+        conn = make_connection(["true"], delay=0.05)
+        reactor = Reactor(conn, poll_interval=0.01)
+        monitor = HeartbeatMonitor(conn, reactor)
+        reactor.start()
+        try:
+            start = time.monotonic()
+            completed = monitor.wait_for_duration(
+                5.0, lambda r: not (isinstance(r, BoolReply) and r.value)
+            )
+            elapsed = time.monotonic() - start
+        finally:
+            monitor.close()
+            reactor.stop()
+
+        assert completed is False
+        assert elapsed < 1.0
+
+    def test_wait_for_duration_completes(self):
+        """Test full duration without early stop."""
+        conn = make_connection([])
+        reactor = Reactor(conn, poll_interval=0.01)
+        monitor = HeartbeatMonitor(conn, reactor)
+        reactor.start()
+        try:
+            assert monitor.wait_for_duration(0.05) is True
+        finally:
+            monitor.close()
+            reactor.stop()
@@ -0,0 +1,160 @@
+"""Unit tests for recorder module."""
+
+import os
+import time
+import pytest
+from robotapi import RobotController
+from robotapi.connection import Connection
+from robotapi.exceptions import RobotConnectionError
+from robotapi.protocol import build_distance_cmd
+from robotapi.recorder import (
+    MAGIC,
+    RECEIVED,
+    RECORD,
+    SENT,
+    ReplayTransport,
+    TrafficRecorder,
+    iter_records,
+)
+from robotapi.simulator import SimulatorServer
+from robotapi.transport import SocketPairTransport
+
+
+def write_log(path, records):
+    """Write (direction, data) records spaced by their index in 10 ms steps."""
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        for index, (direction, data) in enumerate(records):
+            f.write(RECORD.pack(10_000_000 * index, direction, len(data)) + data)
+
+
+class TestTrafficRecorder:
+    """Test writing and reading logs."""
+
+    def test_round_trip(self, tmp_path):
+        """Test records are read back in order with rising timestamps."""
+        path = str(tmp_path / "traffic.rlog")
+        with TrafficRecorder(path) as recorder:
+            recorder.record(SENT, b'{"N":100}')
+            recorder.record(RECEIVED, b"{ok}{Heart")
+            recorder.record(RECEIVED, b"beat}")
+        records = list(iter_records(path))
+        assert [(d, data) for _, d, data in records] == [
+            (SENT, b'{"N":100}'),
+            (RECEIVED, b"{ok}{Heart"),
+            (RECEIVED, b"beat}"),
+        ]
+        assert records[0][0] <= records[1][0] <= records[2][0]
+        assert os.path.getsize(path) == len(MAGIC) + 3 * RECORD.size + 24
+        assert recorder.records == 3 and recorder.bytes == 24
+
+    def test_append(self, tmp_path):
+        """Test reopening a log appends without a second header."""
+        path = str(tmp_path / "traffic.rlog")
+        for data in (b"{a}", b"{b}"):
+            with TrafficRecorder(path) as recorder:
+                recorder.record(RECEIVED, data)
+        assert [data for _, _, data in iter_records(path)] == [b"{a}", b"{b}"]
+
+    def test_long_chunk_split(self, tmp_path):
+        """Test chunks longer than a record holds are split."""
+        path = str(tmp_path / "traffic.rlog")
+        data = bytes(70000)
+        with TrafficRecorder(path) as recorder:
+            recorder.record(RECEIVED, data)
+        chunks = [chunk for _, _, chunk in iter_records(path)]
+        assert [len(chunk) for chunk in chunks] == [65535, 4465]
+        assert b"".join(chunks) == data
+
+    def test_truncated_record(self, tmp_path):
+        """Test a record cut short by a crash ends the log."""
+        path = str(tmp_path / "traffic.rlog")
+        write_log(path, [(RECEIVED, b"{a}"), (RECEIVED, b"{b}")])
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 1)
+        assert [data for _, _, data in iter_records(path)] == [b"{a}"]
+
+    def test_not_a_log(self, tmp_path):
+        """Test other files are rejected."""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"{Heartbeat}")
+        with pytest.raises(ValueError, match="not a robotapi traffic log"):
+            list(iter_records(str(path)))
+
+    def test_connection_records(self, tmp_path):
+        """Test a Connection logs what it sends and the chunks it reads."""
+        path = str(tmp_path / "traffic.rlog")
+        transport = SocketPairTransport()
+        with TrafficRecorder(path) as recorder:
+            with Connection("socketpair", transport=transport, recorder=recorder) as conn:
+                conn.send(b'{"N":100}')
+                transport.peer.sendall(b"{ok}")
+                assert conn.receive(1.0) == "{ok}"
+            transport.peer.close()
+        assert [(d, data) for _, d, data in iter_records(path)] == [
+            (SENT, b'{"N":100}'),
+            (RECEIVED, b"{ok}"),
+        ]
+
+
+class TestReplayTransport:
+    """Test playing logs back."""
+
+    def test_fast_replay(self, tmp_path):
+        """Test received chunks replay back to back and sends are discarded."""
+        path = str(tmp_path / "traffic.rlog")
+        write_log(path, [(SENT, b"{x}"), (RECEIVED, b"{ok}{Hea"), (RECEIVED, b"rtbeat}")] * 50)
+        replay = ReplayTransport(path, speed=None)
+        conn = Connection("replay", transport=replay)
+        conn.connect()
+        conn.send(b"{Heartbeat}")
+        start = time.monotonic()
+        messages = []
+        with pytest.raises(RobotConnectionError, match="closed"):
+            while True:
+                messages.extend(conn.receive_all(1.0))
+        assert time.monotonic() - start < 0.5
+        assert messages == ["{ok}", "{Heartbeat}"] * 50
+        assert replay.bytes_sent == 11
+
+    def test_paced_replay(self, tmp_path):
+        """Test chunks arrive at their recorded offsets divided by speed."""
+        path = str(tmp_path / "traffic.rlog")
+        write_log(path, [(RECEIVED, b"{a}")] + [(SENT, b"{x}")] * 9 + [(RECEIVED, b"{b}")])
+        for speed, expected in ((1.0, 0.1), (2.0, 0.05)):
+            with Connection("replay", transport=ReplayTransport(path, speed)) as conn:
+                start = time.monotonic()
+                assert conn.receive(1.0) == "{a}"
+                assert conn.receive(0.01) is None
+                assert conn.readable(0.01) is False
+                assert conn.receive(1.0) == "{b}"
+                assert time.monotonic() - start == pytest.approx(expected, abs=0.03)
+
+    def test_replay_controller(self, tmp_path):
+        """Test a recorded session replays through a controller."""
+        path = str(tmp_path / "traffic.rlog")
+        with SimulatorServer(count=1, heartbeat_interval=0.05, uart_rate=None) as server:
+            with TrafficRecorder(path) as recorder:
+                with RobotController("sim", transport=server.transport(0), recorder=recorder) as robot:
+                    for _ in range(5):
+                        robot.wait_reply(robot.request(build_distance_cmd()))
+                    time.sleep(0.2)
+        replay = ReplayTransport(path, speed=None)
+        robot = RobotController("replay", transport=replay)
+        robot.connect()
+        deadline = time.monotonic() + 2.0
+        while robot.is_connected() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not robot.is_connected()
+        assert robot.metrics.heartbeat_reply.count >= 3
+        assert robot.metrics.messages_received.value >= 8
+        assert robot.metrics.connections_lost.value == 1
+        assert replay.bytes_sent == robot.metrics.bytes_sent.value
+        robot.disconnect()
+
+    def test_not_a_log(self, tmp_path):
+        """Test opening something other than a log fails."""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not a log at all")
+        with pytest.raises(ValueError):
+            ReplayTransport(str(path)).open()
@@ -0,0 +1,191 @@
+"""Unit tests for sampler module."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+import pytest
+from robotapi import AsyncRobotController, RobotController
+from robotapi.protocol import UART_BYTES_PER_SECOND
+from robotapi.sampler import (
+    QUERY_UART_BYTES,
+    ObstacleSampler,
+    max_sample_rate,
+    sample_interval,
+)
+
+
+class FakeQueries:
+    """Records queries and hands out unresolved futures."""
+
+    def __init__(self):
+        self.futures = []
+        self.discarded = []
+
+    def submit(self):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def discard(self, future):
+        self.discarded.append(future)
+
+
+class TestSampleRate:
+    """Test rate limiting against the UART budget."""
+
+    def test_query_size(self):
+        """Test the worst-case query size includes a three-digit serial."""
+        assert QUERY_UART_BYTES == len('{"D1":1,"H":"999","N":21}')
+
+    def test_max_rate_fits_budget(self):
+        """Test the cap keeps queries within their share of the link."""
+        assert max_sample_rate(0.5) * QUERY_UART_BYTES == pytest.approx(UART_BYTES_PER_SECOND / 2)
+
+    def test_interval_for_low_rate(self):
+        """Test rates under the cap are used as given."""
+        assert sample_interval(10.0) == pytest.approx(0.1)
+
+    def test_interval_is_capped(self):
+        """Test rates over the cap are clamped."""
+        assert sample_interval(1000.0) == pytest.approx(1.0 / max_sample_rate())
+
+    def test_invalid_rate(self):
+        """Test non-positive rates are rejected."""
+        with pytest.raises(ValueError):
+            sample_interval(0)
+
+
+class TestObstacleSampler:
+    """Test ObstacleSampler."""
+
+    def test_coalesces_in_flight_query(self):
+        """Test ticks do not stack queries behind an unanswered one."""
+        queries = FakeQueries()
+        sampler = ObstacleSampler(queries.submit, lambda: None)
+        assert sampler.tick(now=0.0) is True
+        assert sampler.tick(now=0.1) is False
+        assert sampler.tick(now=0.2) is False
+        assert len(queries.futures) == 1
+        assert sampler.queries_coalesced == 2
+
+    def test_sends_after_reply(self):
+        """Test a new query is sent once the previous one is answered."""
+        queries = FakeQueries()
+        sampler = ObstacleSampler(queries.submit, lambda: None)
+        sampler.tick(now=0.0)
+        queries.futures[0].set_result(False)
+        assert sampler.tick(now=0.1) is True
+        assert sampler.replies == 1
+
+    def test_abandons_lost_query(self):
+        """Test an unanswered query is discarded after the timeout."""
+        queries = FakeQueries()
+        sampler = ObstacleSampler(
+            queries.submit, lambda: None, discard=queries.discard, query_timeout=0.5
+        )
+        sampler.tick(now=0.0)
+        assert sampler.tick(now=0.6) is True
+        assert queries.discarded == [queries.futures[0]]
+        assert sampler.queries_abandoned == 1
+
+    def test_obstacle_callback_runs_once(self):
+        """Test on_obstacle runs on the first positive reply only."""
+        calls = []
+        queries = FakeQueries()
+        sampler = ObstacleSampler(queries.submit, lambda: calls.append(1))
+        sampler.tick(now=0.0)
+        queries.futures[0].set_result(True)
+        sampler.tick(now=0.1)
+        queries.futures[1].set_result(True)
+        assert calls == [1]
+        assert sampler.detected
+
+    def test_replies_after_stop_are_ignored(self):
+        """Test a late positive reply does not fire after stop()."""
+        calls = []
+        queries = FakeQueries()
+        sampler = ObstacleSampler(queries.submit, lambda: calls.append(1))
+        sampler.tick(now=0.0)
+        sampler.stop()
+        queries.futures[0].set_result(True)
+        assert calls == []
+
+    def test_thread_samples_at_rate(self):
+        """Test the background thread sends queries at the requested rate."""
+        queries = FakeQueries()
+
+        def submit():
+            future = queries.submit()
+            future.set_result(False)
+            return future
+
+        with ObstacleSampler(submit, lambda: None, rate=20.0):
+            time.sleep(0.5)
+        assert 7 <= len(queries.futures) <= 13
+
+
+def wait_until(condition, timeout=2.0):
+    """Poll condition until true or timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def place_obstacle(simulator, onset_after):
+    """Make the simulated sensor report an obstacle after a delay."""
+    robot = simulator.robots[0]
+    onset = []
+
+    def place():
+        time.sleep(onset_after)
+        onset.append(time.monotonic())
+        robot.obstacle_detected = True
+
+    threading.Thread(target=place, daemon=True).start()
+    return onset, robot
+
+
+class TestForwardSampling:
+    """Test forward() obstacle sampling against the simulator."""
+
+    @pytest.mark.parametrize("reactor", [False, True])
+    def test_stops_between_heartbeats(self, simulator, reactor):
+        """Test an obstacle is caught well before the next heartbeat."""
+        onset, robot = place_obstacle(simulator, 0.3)
+        with RobotController(
+            "127.0.0.1", simulator.ports[0], reactor=reactor, obstacle_rate=15.0
+        ) as controller:
+            assert controller.forward(3.0) is False
+        assert wait_until(lambda: robot.moves)
+        (_, _, _, ended), = robot.moves
+        assert ended - onset[0] < 0.25
+        queries = [cmd for cmd in robot.commands_received if cmd.get("N") == 21]
+        assert len(queries) >= 3
+
+    def test_completes_without_obstacle(self, simulator):
+        """Test forward() runs its full duration when the path is clear."""
+        with RobotController("127.0.0.1", simulator.ports[0], obstacle_rate=10.0) as controller:
+            assert controller.forward(0.3) is True
+        queries = [cmd for cmd in simulator.robots[0].commands_received if cmd.get("N") == 21]
+        assert 2 <= len(queries) <= 5
+
+    def test_async_stops_between_heartbeats(self, simulator):
+        """Test the asyncio controller samples at the same rate."""
+        onset, robot = place_obstacle(simulator, 0.3)
+
+        async def run():
+            robot_api = AsyncRobotController("127.0.0.1", simulator.ports[0], obstacle_rate=15.0)
+            await robot_api.connect()
+            try:
+                return await robot_api.forward(3.0)
+            finally:
+                await robot_api.disconnect()
+
+        assert asyncio.run(run()) is False
+        assert wait_until(lambda: robot.moves)
+        (_, _, _, ended), = robot.moves
+        assert ended - onset[0] < 0.25
@@ -0,0 +1,116 @@
+"""Unit tests for scan module."""
+
+import asyncio
+import pytest
+from robotapi import AsyncRobotController, RobotController
+from robotapi.scan import NO_READING, SCAN_ANGLES, PolarProfile, query_delay, sweep_order
+from robotapi.servo import FIRMWARE_SERVO_HOLD
+
+
+class TestSweepOrder:
+    """Test sweep ordering."""
+
+    def test_ascending_by_default(self):
+        """Test angles are deduplicated, clamped and sorted."""
+        assert sweep_order([90, 0, 150, 91, 30]) == [10, 30, 90, 150]
+
+    def test_starts_at_nearer_end(self):
+        """Test the sweep begins at the end closest to the current pan."""
+        assert sweep_order(SCAN_ANGLES, start=160) == [150, 120, 90, 60, 30]
+        assert sweep_order(SCAN_ANGLES, start=40) == [30, 60, 90, 120, 150]
+
+    def test_query_delay_skips_servo_hold(self):
+        """Test only settle time beyond the firmware's servo hold is waited."""
+        assert query_delay(FIRMWARE_SERVO_HOLD + 0.2) == pytest.approx(0.2)
+        assert query_delay(0.1) == 0.0
+
+
+class TestPolarProfile:
+    """Test the profile container."""
+
+    def test_compact_arrays(self):
+        """Test angles and distances are stored as typed arrays in angle order."""
+        profile = PolarProfile([150, 30, 90], [40, 200, 80])
+        assert profile.angles.typecode == "B"
+        assert profile.distances.typecode == "H"
+        assert list(profile) == [(30, 200), (90, 80), (150, 40)]
+
+    def test_set_rejects_invalid_readings(self):
+        """Test missing and out-of-range readings are stored as NO_READING."""
+        profile = PolarProfile([30, 90, 150])
+        profile.set(30, 120)
+        profile.set(90, 0)
+        profile.set(150, None)
+        assert list(profile.distances) == [120, NO_READING, NO_READING]
+
+    def test_clearest(self):
+        """Test the longest range wins and ties go to straight ahead."""
+        profile = PolarProfile([30, 90, 120, 150], [250, 60, 250, NO_READING])
+        assert profile.clearest() == 120
+        assert profile.clearest(min_cm=300) is None
+
+    def test_heading(self):
+        """Test pan angles convert to headings from straight ahead."""
+        assert PolarProfile.heading(30) == -60
+        assert PolarProfile.heading(150) == 60
+
+
+@pytest.fixture
+def simulator(simulator):
+    """Put an obstacle ahead and to the left of the simulated robot."""
+    simulator.robots[0].pan_distances = {30: 25, 60: 40, 90: 15, 120: 180, 150: 90}
+    return simulator
+
+
+# The firmware caps readings at 150 cm
+EXPECTED = [(30, 25), (60, 40), (90, 15), (120, 150), (150, 90)]
+
+
+class TestControllerScan:
+    """Test sweep scans against the simulator."""
+
+    def test_polled_scan(self, simulator):
+        """Test a scan without a reactor measures every angle."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            profile = robot.scan()
+            assert robot.camera_pose.pan == 150
+        assert list(profile) == EXPECTED
+        assert profile.clearest() == 120
+
+    def test_reactor_scan_interleaves_commands(self, simulator):
+        """Test each move is followed by the query for that angle."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            profile = robot.scan([30, 90, 150])
+        assert list(profile) == [(30, 25), (90, 15), (150, 90)]
+        sent = [(c["N"], c.get("D2")) for c in sim.commands_received if c["N"] in (5, 21)]
+        assert sent == [(5, 30), (21, None), (5, 90), (21, None), (5, 150), (21, None)]
+
+    def test_second_scan_sweeps_back(self, simulator):
+        """Test a repeat scan starts where the last one ended."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            robot.scan()
+            sim.commands_received.clear()
+            profile = robot.scan()
+        pans = [c["D2"] for c in sim.commands_received if c["N"] == 5]
+        assert pans == [120, 90, 60, 30]
+        assert list(profile) == EXPECTED
+
+    def test_missing_echo(self, simulator):
+        """Test angles without a valid echo read NO_READING."""
+        simulator.robots[0].pan_distances = {}
+        simulator.robots[0].distance_cm = 0
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            profile = robot.scan([60, 120])
+        assert list(profile.distances) == [NO_READING, NO_READING]
+        assert profile.clearest() is None
+
+    def test_async_scan(self, simulator):
+        """Test the asyncio controller produces the same profile."""
+
+        async def run():
+            async with AsyncRobotController("127.0.0.1", simulator.ports[0]) as robot:
+                return await robot.scan()
+
+        assert list(asyncio.run(run())) == EXPECTED
@@ -0,0 +1,299 @@
+"""Unit tests for scheduler module."""
+
+import threading
+import time
+import pytest
+from robotapi import RobotController
+from robotapi.exceptions import CommandError, RobotConnectionError
+from robotapi.pacing import TokenBucket
+from robotapi.protocol import (
+    CMD_CAMERA,
+    CMD_JOYSTICK,
+    CMD_MOTOR_SPEEDS,
+    CMD_STOP,
+    STOP_COMMAND,
+    build_camera_cmd,
+    build_distance_cmd,
+    build_joystick_cmd,
+    build_led_cmd,
+    build_motor_speeds_cmd,
+    build_movement_cmd,
+    encode_command,
+    uart_size,
+)
+from robotapi.scheduler import DRIVE_CHANNEL, CommandScheduler, command_channel
+
+
+class FakeLink:
+    """Records sent bytes with their send times."""
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, data):
+        with self.lock:
+            self.sent.append((time.monotonic(), data))
+
+    @property
+    def data(self):
+        with self.lock:
+            return [d for _, d in self.sent]
+
+
+def joystick(direction):
+    """Encoded joystick command."""
+    return encode_command(build_joystick_cmd(direction))
+
+
+def wait_until(condition, timeout=2.0):
+    """Poll condition until true or timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestCommandChannel:
+    """Test coalescing channel assignment."""
+
+    def test_drive_commands_share_a_channel(self):
+        """Test every kind of drive command lands on the drive channel."""
+        assert command_channel(build_movement_cmd(3, 50)) == DRIVE_CHANNEL
+        assert command_channel(build_motor_speeds_cmd(10, 20)) == DRIVE_CHANNEL
+        assert command_channel(build_joystick_cmd(1)) == DRIVE_CHANNEL
+
+    def test_servo_and_led_channels_per_device(self):
+        """Test each servo and LED coalesces separately."""
+        assert command_channel(build_led_cmd(1, 0, 0, 0)) == command_channel(build_led_cmd(1, 9, 9, 9))
+        assert command_channel(build_led_cmd(1, 0, 0, 0)) != command_channel(build_led_cmd(2, 0, 0, 0))
+        assert command_channel({"N": 5, "D1": 1, "D2": 90}) != command_channel({"N": 5, "D1": 2, "D2": 90})
+
+    def test_relative_and_query_commands_not_coalesced(self):
+        """Test camera steps and sensor queries keep every instance."""
+        assert command_channel(build_camera_cmd(1)) is None
+        assert command_channel(build_distance_cmd()) is None
+
+
+class TestQueueing:
+    """Test coalescing and ordering without the sender thread."""
+
+    def test_newest_drive_command_wins(self):
+        """Test a newer drive command replaces the queued one in place."""
+        scheduler = CommandScheduler(FakeLink().send)
+        dropped = []
+        scheduler.submit(CMD_JOYSTICK, joystick(1), DRIVE_CHANNEL, lambda: dropped.append(1))
+        scheduler.submit(CMD_CAMERA, b"cam", None)
+        scheduler.submit(CMD_JOYSTICK, joystick(2), DRIVE_CHANNEL)
+        assert len(scheduler) == 2
+        assert [p.data for p in scheduler._queue.values()] == [joystick(2), b"cam"]
+        assert dropped == [1]
+        assert scheduler.stats()["coalesced"] == 1
+
+    def test_uncoalesced_commands_keep_order(self):
+        """Test commands without a channel are all kept in order."""
+        scheduler = CommandScheduler(FakeLink().send)
+        for i in range(3):
+            scheduler.submit(CMD_CAMERA, bytes([i]), None)
+        assert [p.data for p in scheduler._queue.values()] == [b"\x00", b"\x01", b"\x02"]
+
+    def test_stop_jumps_the_queue(self):
+        """Test stop is sent at once and discards queued motion."""
+        link = FakeLink()
+        scheduler = CommandScheduler(link.send)
+        scheduler.submit(CMD_JOYSTICK, joystick(1), DRIVE_CHANNEL)
+        scheduler.submit(CMD_CAMERA, b"cam", None)
+        scheduler.submit(CMD_STOP, STOP_COMMAND)
+        assert link.data == [STOP_COMMAND]
+        assert [p.data for p in scheduler._queue.values()] == [b"cam"]
+        assert scheduler.stats()["stops"] == 1
+
+    def test_stop_charges_the_budget(self):
+        """Test stop's bytes are accounted against later commands."""
+        budget = TokenBucket(960)
+        scheduler = CommandScheduler(FakeLink().send, budget)
+        before = budget.available()
+        scheduler.submit(CMD_STOP, STOP_COMMAND)
+        assert budget.available() < before - uart_size(STOP_COMMAND) + 1
+
+    def test_max_depth(self):
+        """Test the deepest queue is recorded."""
+        scheduler = CommandScheduler(FakeLink().send)
+        for i in range(4):
+            scheduler.submit(CMD_CAMERA, bytes([i]), None)
+        assert scheduler.stats()["max_depth"] == 4
+        assert scheduler.stats()["queue_depth"] == 4
+
+
+class TestSending:
+    """Test the paced sender thread."""
+
+    def test_sends_in_order(self):
+        """Test queued commands are all sent, in order."""
+        link = FakeLink()
+        with CommandScheduler(link.send) as scheduler:
+            for i in range(5):
+                scheduler.submit(CMD_CAMERA, bytes([i]), None)
+            assert scheduler.flush(2.0)
+        assert link.data == [bytes([i]) for i in range(5)]
+
+    def test_paced_to_budget(self):
+        """Test bytes leave no faster than the bucket allows."""
+        link = FakeLink()
+        data = b"x" * 20
+        budget = TokenBucket(200, capacity=20)
+        with CommandScheduler(link.send, budget) as scheduler:
+            start = time.monotonic()
+            for _ in range(6):
+                scheduler.submit(CMD_CAMERA, data, None)
+            assert scheduler.flush(3.0)
+            elapsed = time.monotonic() - start
+        # The first command uses the initial burst; five more need 0.1s each
+        assert elapsed >= 0.45
+        assert scheduler.stats()["bytes_sent"] == 120
+
+    def test_coalesces_while_link_busy(self):
+        """Test a burst of drive updates collapses to the newest one."""
+        link = FakeLink()
+        budget = TokenBucket(100, capacity=30)
+        with CommandScheduler(link.send, budget) as scheduler:
+            for direction in range(1, 9):
+                scheduler.submit(CMD_JOYSTICK, joystick(direction), DRIVE_CHANNEL)
+            assert scheduler.flush(3.0)
+        assert link.data[-1] == joystick(8)
+        assert len(link.data) < 8
+        stats = scheduler.stats()
+        assert stats["sent"] + stats["coalesced"] == 8
+
+    def test_records_age(self):
+        """Test command age is measured from submit to send."""
+        link = FakeLink()
+        budget = TokenBucket(200, capacity=20)
+        with CommandScheduler(link.send, budget) as scheduler:
+            for _ in range(3):
+                scheduler.submit(CMD_CAMERA, b"x" * 20, None)
+            scheduler.flush(2.0)
+        stats = scheduler.stats()
+        assert stats["age_max"] >= 0.15
+        assert stats["age_p50"] <= stats["age_max"]
+
+    def test_send_failure_drops_command(self):
+        """Test a failed send calls on_drop and keeps the thread running."""
+        link = FakeLink()
+        calls = []
+
+        def send(data):
+            calls.append(data)
+            if len(calls) == 1:
+                raise RobotConnectionError("Send failed")
+            link.send(data)
+
+        dropped = []
+        with CommandScheduler(send) as scheduler:
+            scheduler.submit(CMD_CAMERA, b"a", None, lambda: dropped.append("a"))
+            scheduler.submit(CMD_CAMERA, b"b", None)
+            assert scheduler.flush(2.0)
+        assert dropped == ["a"]
+        assert link.data == [b"b"]
+        assert scheduler.stats()["failed"] == 1
+
+    def test_stop_waits_for_drive_in_flight(self):
+        """Test a stop during a drive command's send is written after it."""
+        link = FakeLink()
+        sending = threading.Event()
+        release = threading.Event()
+
+        def send(data):
+            if data != STOP_COMMAND:
+                sending.set()
+                release.wait(2.0)
+            link.send(data)
+
+        with CommandScheduler(send) as scheduler:
+            scheduler.submit(CMD_JOYSTICK, joystick(1), DRIVE_CHANNEL)
+            assert sending.wait(2.0)
+            stopper = threading.Thread(target=scheduler.submit, args=(CMD_STOP, STOP_COMMAND))
+            stopper.start()
+            time.sleep(0.05)
+            assert link.data == []
+            release.set()
+            stopper.join(2.0)
+        assert link.data == [joystick(1), STOP_COMMAND]
+
+    def test_stop_drops_queue(self):
+        """Test stopping the scheduler drops whatever is still queued."""
+        dropped = []
+        scheduler = CommandScheduler(FakeLink().send, TokenBucket(1, capacity=1))
+        scheduler.start()
+        for i in range(3):
+            scheduler.submit(CMD_CAMERA, b"x" * 10, None, lambda i=i: dropped.append(i))
+        scheduler.stop()
+        assert len(scheduler) == 0
+        assert sorted(dropped) == [0, 1, 2]
+
+
+class TestControllerPacing:
+    """Test paced commands through the controller against the simulator."""
+
+    def test_teleop_updates_coalesce(self, simulator):
+        """Test 50 Hz wheel updates reach the car as the newest setting."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0], pace_commands=True) as robot:
+            for speed in range(100):
+                robot.set_wheel_speeds(speed, speed)
+                time.sleep(0.02)
+            assert robot.scheduler.flush(2.0)
+            stats = robot.scheduler.stats()
+            assert wait_until(
+                lambda: any(c.get("D1") == 99 for c in sim.commands_received if c.get("N") == CMD_MOTOR_SPEEDS)
+            )
+        speeds = [c for c in sim.commands_received if c.get("N") == CMD_MOTOR_SPEEDS]
+        assert len(speeds) < 100
+        assert stats["coalesced"] > 0
+        assert stats["age_max"] < 0.5
+
+    def test_stop_is_prompt(self, simulator):
+        """Test stop reaches the car ahead of queued motion."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0], pace_commands=True) as robot:
+            for direction in range(1, 9):
+                robot.joystick(direction)
+            robot.stop()
+            assert wait_until(lambda: any(c.get("N") == CMD_STOP for c in sim.commands_received))
+            received = list(sim.commands_received)
+        joysticks = [c for c in received if c.get("N") == CMD_JOYSTICK]
+        assert len(joysticks) < 8
+        assert not robot.is_moving()
+
+    def test_superseded_request_fails(self, simulator):
+        """Test a request replaced in the queue fails instead of hanging."""
+        with RobotController("127.0.0.1", simulator.ports[0], pace_commands=True) as robot:
+            robot.scheduler.budget = TokenBucket(1, capacity=1)
+            robot.scheduler.budget.charge(50)
+            first = robot.request(build_motor_speeds_cmd(10, 10))
+            robot.request(build_motor_speeds_cmd(20, 20))
+            with pytest.raises(CommandError):
+                first.result(timeout=1.0)
+
+    def test_led_stream_coalesces(self, simulator):
+        """Test paced LED writes return at once and the newest colour wins."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0], pace_commands=True) as robot:
+            start = time.monotonic()
+            for red in range(50):
+                robot.set_led(1, red, 0, 0)
+            assert time.monotonic() - start < 0.5
+            assert robot.scheduler.flush(2.0)
+            assert wait_until(
+                lambda: any(c.get("N") == 8 and c.get("D2") == 49 for c in sim.commands_received)
+            )
+            assert robot.scheduler.stats()["coalesced"] > 0
+
+    def test_unpaced_by_default(self, simulator):
+        """Test commands are written directly unless pacing is enabled."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            robot.set_led(1, 255, 0, 0)
+            assert robot.scheduler is None
+            assert wait_until(lambda: any(c.get("N") == 8 for c in simulator.robots[0].commands_received))
@@ -0,0 +1,153 @@
+"""Unit tests for sensors module."""
+
+import asyncio
+import threading
+import pytest
+from robotapi import AsyncRobotController, RobotController
+from robotapi.exceptions import CommandError
+from robotapi.sensors import DistanceFilter, DistanceReading
+
+
+class TestDistanceFilter:
+    """Test DistanceFilter."""
+
+    def test_empty(self):
+        """Test no reading before any sample."""
+        assert DistanceFilter().latest() is None
+
+    def test_median_rejects_spike(self):
+        """Test a single spike does not move the median."""
+        distance = DistanceFilter(window=5)
+        for i, value in enumerate([50, 51, 300, 49, 50]):
+            distance.add(value, timestamp=float(i) / 100)
+        reading = distance.latest(now=0.05)
+        assert reading.value == 50
+        assert reading.samples == 5
+
+    def test_even_window_averages_middle(self):
+        """Test the median of an even count is the mean of the middle pair."""
+        distance = DistanceFilter()
+        distance.add(40, timestamp=1.0)
+        distance.add(60, timestamp=1.01)
+        assert distance.latest(now=1.02).value == 50
+
+    def test_out_of_range_rejected(self):
+        """Test missed echoes are rejected rather than filtered."""
+        distance = DistanceFilter()
+        assert distance.add(0, timestamp=1.0) is False
+        assert distance.add(5000, timestamp=1.1) is False
+        assert distance.rejected == 2
+        assert distance.latest(now=1.1) is None
+
+    def test_freshness(self):
+        """Test readings expire after the freshness bound."""
+        distance = DistanceFilter(freshness=0.1)
+        distance.add(30, timestamp=10.0)
+        assert distance.latest(now=10.05).value == 30
+        assert distance.latest(now=10.2) is None
+        assert distance.latest(max_age=1.0, now=10.2).value == 30
+
+    def test_old_samples_leave_the_median(self):
+        """Test samples older than max_age relative to the newest are ignored."""
+        distance = DistanceFilter(max_age=1.0)
+        distance.add(200, timestamp=0.0)
+        distance.add(200, timestamp=0.1)
+        distance.add(20, timestamp=5.0)
+        reading = distance.latest(now=5.0)
+        assert reading.value == 20
+        assert reading.samples == 1
+
+    def test_same_batch_readings_kept(self):
+        """Test replies decoded from one read, sharing a timestamp, all count."""
+        distance = DistanceFilter()
+        assert distance.add(30, timestamp=1.0) is True
+        assert distance.add(34, timestamp=1.0) is True
+        reading = distance.latest(now=1.0)
+        assert reading.samples == 2
+        assert reading.value == 32
+
+    def test_older_reading_ignored(self):
+        """Test a reading older than the last one is rejected."""
+        distance = DistanceFilter()
+        assert distance.add(30, timestamp=2.0) is True
+        assert distance.add(40, timestamp=1.0) is False
+        assert distance.latest(now=2.0).samples == 1
+
+    def test_reading_age(self):
+        """Test reading age."""
+        assert DistanceReading(30.0, 1.0, 1).age(now=1.5) == pytest.approx(0.5)
+
+
+def distance_queries(simulator):
+    """Distance queries received by the simulated robot."""
+    return [
+        cmd for cmd in simulator.robots[0].commands_received
+        if cmd.get("N") == 21 and cmd.get("D1") == 2
+    ]
+
+
+class TestGetDistance:
+    """Test RobotController.get_distance() against the simulator."""
+
+    @pytest.mark.parametrize("reactor", [False, True])
+    def test_measures_distance(self, simulator, reactor):
+        """Test the firmware reading is returned in cm."""
+        simulator.robots[0].distance_cm = 42
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=reactor) as robot:
+            assert robot.get_distance() == 42.0
+
+    def test_cached_within_freshness(self, simulator):
+        """Test repeated calls inside the freshness window share one query."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            robot.distance.freshness = 5.0
+            for _ in range(50):
+                assert robot.get_distance() == 100.0
+        assert len(distance_queries(simulator)) == 1
+
+    def test_zero_max_age_always_measures(self, simulator):
+        """Test max_age=0 forces a new measurement."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            robot.get_distance(max_age=0)
+            simulator.robots[0].distance_cm = 60
+            robot.get_distance(max_age=0)
+            robot.get_distance(max_age=0)
+            assert robot.distance.latest(1.0).samples == 3
+        assert len(distance_queries(simulator)) == 3
+
+    def test_concurrent_callers_share_query(self, simulator):
+        """Test callers arriving together coalesce into one query."""
+        results = []
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            threads = [
+                threading.Thread(target=lambda: results.append(robot.get_distance()))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=2.0)
+        assert results == [100.0] * 8
+        assert len(distance_queries(simulator)) < 8
+
+    def test_invalid_reading(self, simulator):
+        """Test a missed echo raises instead of returning a bogus distance."""
+        simulator.robots[0].distance_cm = 0
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            with pytest.raises(CommandError):
+                robot.get_distance()
+
+    def test_async(self, simulator):
+        """Test the asyncio controller shares the same cache behaviour."""
+        simulator.robots[0].distance_cm = 25
+
+        async def run():
+            robot = AsyncRobotController("127.0.0.1", simulator.ports[0])
+            await robot.connect()
+            try:
+                robot.distance.freshness = 5.0
+                return [await robot.get_distance() for _ in range(5)]
+            finally:
+                await robot.disconnect()
+
+        assert asyncio.run(run()) == [25.0] * 5
+        assert len(distance_queries(simulator)) == 1
@@ -0,0 +1,185 @@
+"""Unit tests for servo module."""
+
+import asyncio
+import time
+import pytest
+from robotapi import AsyncRobotController, RobotController
+from robotapi.exceptions import CommandError
+from robotapi.protocol import CAM_CENTER, CAM_PAN_LEFT, CAM_TILT_UP, SERVO_PAN, SERVO_TILT
+from robotapi.servo import (
+    FIRMWARE_SERVO_HOLD,
+    CameraPose,
+    servo_angle,
+    servo_commands,
+    settle_time,
+)
+
+
+class TestServoAngle:
+    """Test reachable angle calculation."""
+
+    def test_rounds_to_firmware_resolution(self):
+        """Test angles round to the nearest 10 degrees."""
+        assert servo_angle(SERVO_PAN, 44) == 40
+        assert servo_angle(SERVO_PAN, 46) == 50
+
+    def test_clamps_to_range(self):
+        """Test each servo's range is enforced."""
+        assert servo_angle(SERVO_PAN, 0) == 10
+        assert servo_angle(SERVO_PAN, 200) == 170
+        assert servo_angle(SERVO_TILT, 0) == 30
+        assert servo_angle(SERVO_TILT, 180) == 110
+
+    def test_settle_time(self):
+        """Test travel time scales with distance at 0.17 s per 60 degrees."""
+        assert settle_time(60) == pytest.approx(0.17)
+        assert settle_time(-30) == pytest.approx(0.085)
+
+
+class TestCameraPose:
+    """Test the client-side pose model."""
+
+    def test_starts_unknown(self):
+        """Test nothing is assumed about the servos before a move."""
+        pose = CameraPose()
+        assert pose.pan is None and pose.tilt is None
+
+    def test_plan_one_command_per_servo(self):
+        """Test any distance costs a single command per servo moved."""
+        pose = CameraPose()
+        pose.apply({SERVO_PAN: 90, SERVO_TILT: 90})
+        moves, settle = pose.plan(pan=170)
+        assert moves == {SERVO_PAN: 170}
+        assert settle == pytest.approx(settle_time(80))
+
+    def test_plan_skips_servos_in_place(self):
+        """Test no command is planned for a servo already at its target."""
+        pose = CameraPose()
+        pose.apply({SERVO_PAN: 90, SERVO_TILT: 60})
+        assert pose.plan(pan=92, tilt=60) == ({}, 0.0)
+
+    def test_two_servos_wait_for_firmware_hold(self):
+        """Test the second servo is predicted to start after the first write."""
+        pose = CameraPose()
+        pose.apply({SERVO_PAN: 90, SERVO_TILT: 90})
+        moves, settle = pose.plan(pan=30, tilt=60)
+        assert moves == {SERVO_PAN: 30, SERVO_TILT: 60}
+        assert settle == pytest.approx(FIRMWARE_SERVO_HOLD + settle_time(30))
+
+    def test_unknown_start_assumes_worst_case(self):
+        """Test an unknown angle predicts travel from the far end of the range."""
+        _, settle = CameraPose().plan(pan=150)
+        assert settle == pytest.approx(settle_time(140))
+
+    def test_steps_invalidate_axis(self):
+        """Test relative steps leave only the other axis known."""
+        pose = CameraPose()
+        pose.step(CAM_CENTER)
+        assert (pose.pan, pose.tilt) == (90, 90)
+        pose.step(CAM_PAN_LEFT)
+        assert (pose.pan, pose.tilt) == (None, 90)
+        pose.step(CAM_TILT_UP)
+        assert pose.tilt is None
+
+    def test_offset_targets(self):
+        """Test a relative move becomes absolute targets for the axes moved."""
+        pose = CameraPose()
+        pose.apply({SERVO_PAN: 90, SERVO_TILT: 60})
+        assert pose.offset(pan=-30) == {"pan": 60}
+        assert pose.offset(pan=10, tilt=20) == {"pan": 100, "tilt": 80}
+
+    def test_offset_needs_known_angle(self):
+        """Test only the axes actually moved need a known angle."""
+        pose = CameraPose()
+        pose.apply({SERVO_PAN: 90})
+        assert pose.offset(pan=10) == {"pan": 100}
+        with pytest.raises(CommandError):
+            pose.offset(tilt=10)
+
+    def test_servo_commands(self):
+        """Test planned moves become one N=5 command per servo."""
+        cmds = servo_commands({SERVO_PAN: 30, SERVO_TILT: 60})
+        assert [(c["N"], c["D1"], c["D2"]) for c in cmds] == [(5, SERVO_PAN, 30), (5, SERVO_TILT, 60)]
+
+
+def received_servo_commands(sim):
+    """N=5 commands the simulated robot has received."""
+    return [c for c in sim.commands_received if c.get("N") == 5]
+
+
+def wait_until(condition, timeout=2.0):
+    """Poll condition until true or timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestControllerCamera:
+    """Test camera pose control against the simulator."""
+
+    def test_camera_set(self, simulator):
+        """Test an absolute pose is reached with one command per servo."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            settle = robot.camera_set(pan=40, tilt=70, wait=False)
+            assert wait_until(lambda: sim.servo_angles == {1: 40, 2: 70})
+        assert len(received_servo_commands(sim)) == 2
+        assert settle > 0
+        assert (robot.camera_pose.pan, robot.camera_pose.tilt) == (40, 70)
+
+    def test_camera_move_collapses_steps(self, simulator):
+        """Test a 90 degree relative pan is one command, not nine steps."""
+        sim = simulator.robots[0]
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            robot.camera_center()
+            robot.camera_move(pan=-90, wait=False)
+            robot.camera_move(pan=-90, wait=False)
+            assert wait_until(lambda: sim.servo_angles[1] == 10)
+        assert [c["D2"] for c in received_servo_commands(sim)] == [10]
+
+    def test_camera_move_needs_known_pose(self, simulator):
+        """Test a relative move from an unknown angle is refused."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            with pytest.raises(CommandError):
+                robot.camera_move(tilt=10)
+
+    def test_wait_sleeps_for_settle(self, simulator):
+        """Test camera_set() blocks for the predicted settle time."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            robot.camera_set(pan=90, tilt=90, wait=False)
+            start = time.monotonic()
+            settle = robot.camera_set(pan=150)
+            assert time.monotonic() - start >= settle * 0.9
+        assert settle == pytest.approx(settle_time(60))
+
+    def test_async_camera_set(self, simulator):
+        """Test the asyncio controller tracks the pose the same way."""
+        sim = simulator.robots[0]
+
+        async def run():
+            async with AsyncRobotController("127.0.0.1", simulator.ports[0]) as robot:
+                await robot.camera_set(pan=120, tilt=50, wait=False)
+                await robot.camera_move(pan=-20)
+                for _ in range(100):
+                    if sim.servo_angles == {1: 100, 2: 50}:
+                        break
+                    await asyncio.sleep(0.01)
+                return robot.camera_pose.pan
+
+        assert asyncio.run(run()) == 100
+        assert [c["D2"] for c in received_servo_commands(sim)] == [120, 50, 100]
+
+    def test_async_camera_waits_for_scan(self, simulator):
+        """Test a camera move does not cut into a scan's sweep."""
+        sim = simulator.robots[0]
+
+        async def run():
+            async with AsyncRobotController("127.0.0.1", simulator.ports[0]) as robot:
+                await asyncio.gather(robot.scan(), robot.camera_set(pan=90, wait=False))
+                return robot.camera_pose.pan
+
+        assert asyncio.run(run()) == 90
+        assert [c["D2"] for c in received_servo_commands(sim)] == [30, 60, 90, 120, 150, 90]
@@ -0,0 +1,290 @@
+"""Unit tests for simulator module."""
+
+import math
+import socket
+import time
+from collections import deque
+import pytest
+from robotapi.simulator import Obstacle, Pose, SerialLink, SimulatedRobot, SimulatorServer, World
+from robotapi.simulator.world import CM_PER_SECOND_PER_SPEED, TRACK_WIDTH_CM, drive
+
+
+class TestSimulatedRobot:
+    """Test firmware reply behaviour."""
+
+    def test_ok_reply_echoes_serial(self):
+        """Test movement commands are acknowledged with their serial."""
+        robot = SimulatedRobot()
+        assert robot.handle_command({"H": "7", "N": 3, "D1": 3, "D2": 50}) == b"{7_ok}"
+
+    def test_obstacle_reply(self):
+        """Test ultrasonic query replies."""
+        robot = SimulatedRobot()
+        assert robot.handle_command({"H": 22, "N": 21, "D1": 1}) == b"{22_false}"
+        robot.obstacle_detected = True
+        assert robot.handle_command({"H": 22, "N": 21, "D1": 1}) == b"{22_true}"
+
+    def test_distance_reply(self):
+        """Test ultrasonic distance replies with the reading in cm."""
+        robot = SimulatedRobot()
+        robot.distance_cm = 37.6
+        assert robot.handle_command({"H": "5", "N": 21, "D1": 2}) == b"{5_37}"
+
+    def test_timed_move(self):
+        """Test N=2 replies and stops once its timer expires."""
+        robot = SimulatedRobot()
+        assert robot.handle_command({"H": "4", "N": 2, "D1": 3, "D2": 60, "T": 250}, 10.0) is None
+        assert robot.is_moving()
+        assert robot.tick(10.2) is None
+        assert robot.tick(10.3) == b"{4_ok}"
+        assert not robot.is_moving()
+        assert list(robot.moves) == [(3, 60, 10.0, 10.25)]
+
+    def test_stop_ends_motion(self):
+        """Test motions are logged from command to stop."""
+        robot = SimulatedRobot()
+        robot.handle_command({"H": "1", "N": 3, "D1": 1, "D2": 50}, 1.0)
+        robot.handle_command({"H": "2", "N": 2, "D1": 2, "D2": 50, "T": 1000}, 1.5)
+        robot.handle_command({"N": 100}, 1.75)
+        assert list(robot.moves) == [(1, 50, 1.0, 1.5), (2, 50, 1.5, 1.75)]
+        assert robot.tick(5.0) is None
+
+    def test_bare_ok_and_silent_commands(self):
+        """Test stop replies {ok} and joystick commands are silent."""
+        robot = SimulatedRobot()
+        assert robot.handle_command({"N": 100}) == b"{ok}"
+        assert robot.handle_command({"H": 22, "N": 102, "D1": 1}) is None
+        assert len(robot.commands_executed) == 2
+
+    def test_servo_angles(self):
+        """Test N=5 angles are truncated to 10 degrees and clamped."""
+        robot = SimulatedRobot()
+        assert robot.handle_command({"H": "3", "N": 5, "D1": 1, "D2": 47}) == b"{3_ok}"
+        robot.handle_command({"H": "3", "N": 5, "D1": 2, "D2": 150})
+        assert robot.servo_angles == {1: 40, 2: 110}
+
+    def test_camera_steps_use_firmware_counters(self):
+        """Test N=106 steps ignore N=5 angles and centering keeps the counters."""
+        robot = SimulatedRobot()
+        robot.handle_command({"H": 22, "N": 5, "D1": 1, "D2": 30})
+        robot.handle_command({"H": 22, "N": 106, "D1": 3})
+        assert robot.servo_angles[1] == 100
+        robot.handle_command({"H": 22, "N": 106, "D1": 5})
+        robot.handle_command({"H": 22, "N": 106, "D1": 3})
+        assert robot.servo_angles == {1: 110, 2: 90}
+
+    def test_framing_strips_spaces(self):
+        """Test client bytes are framed like the ESP32 bridge."""
+        robot = SimulatedRobot()
+        robot._on_data(b'junk{"N": 100}{"H"', 0.0)
+        robot._on_data(b': 22, "N": 21, "D1": 1}', 0.0)
+        assert list(robot.commands_received) == [{"N": 100}, {"H": 22, "N": 21, "D1": 1}]
+        robot.tick(1.0)
+        assert robot._tx == b"{ok}{22_false}"
+
+
+class TestSimulatorServer:
+    """Test the multi-robot server."""
+
+    def test_heartbeats_and_latency(self):
+        """Test heartbeats are sent and reply latency recorded."""
+        with SimulatorServer(count=2, heartbeat_interval=0.02) as server:
+            sock = socket.create_connection(("127.0.0.1", server.ports[1]))
+            sock.settimeout(1.0)
+            try:
+                assert sock.recv(64).startswith(b"{Heartbeat}")
+                sock.sendall(b"{Heartbeat}")
+                deadline = time.monotonic() + 1.0
+                while not server.robots[1].heartbeat_latencies and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                sock.close()
+
+            assert server.robots[1].heartbeats_answered == 1
+            assert server.robots[0].heartbeats_sent == 0
+
+    def test_command_reply(self):
+        """Test commands over TCP get firmware replies."""
+        with SimulatorServer(count=1, heartbeat_interval=10.0) as server:
+            sock = socket.create_connection(("127.0.0.1", server.ports[0]))
+            sock.settimeout(1.0)
+            try:
+                sock.sendall(b'{"H":"5","N":3,"D1":3,"D2":50}')
+                assert sock.recv(64) == b"{5_ok}"
+            finally:
+                sock.close()
+
+    def test_sonar_is_capped(self):
+        """Test distance readings stop at the firmware's 150 cm limit."""
+        robot = SimulatedRobot()
+        robot.distance_cm = 400
+        assert robot.handle_command({"H": "5", "N": 21, "D1": 2}) == b"{5_150}"
+
+    def test_obstacle_query_uses_reading(self):
+        """Test obstacle queries answer true within 20 cm like the firmware."""
+        robot = SimulatedRobot()
+        robot.distance_cm = 20
+        assert robot.handle_command({"H": 22, "N": 21, "D1": 1}) == b"{22_true}"
+
+
+class TestSerialLink:
+    """Test UART timing."""
+
+    def test_frames_queue_at_byte_rate(self):
+        """Test a frame sent while the link is busy waits its turn."""
+        link = SerialLink(1000)
+        assert link.send("0123456789", 1.0) == pytest.approx(1.01)
+        assert link.send("0123456789", 1.0) == pytest.approx(1.02)
+        assert link.receive(1.015) == [(pytest.approx(1.01), "0123456789")]
+        assert len(link) == 1
+        assert link.bytes_sent == 20
+
+    def test_instant_link(self):
+        """Test a link without a rate delivers immediately."""
+        link = SerialLink(None)
+        assert link.send("{ok}", 2.0) == 2.0
+        assert link.next_due() == 2.0
+
+
+class TestFirmwareTiming:
+    """Test serial latency and the Arduino's main loop."""
+
+    def test_reply_waits_for_both_uart_directions(self):
+        """Test a reply arrives after the command and reply cross the UART."""
+        robot = SimulatedRobot(uart_rate=960)
+        robot._on_data(b'{"H":"5","N":3,"D1":3,"D2":50}', 0.0)
+        assert robot.commands_received and not robot.commands_executed
+        assert robot.tick(0.03) is None
+        assert robot.tick(0.05) == b"{5_ok}"
+        assert robot.next_event() is None
+
+    def test_servo_write_blocks_main_loop(self):
+        """Test commands queued behind a servo move wait for its hold."""
+        robot = SimulatedRobot(uart_rate=None)
+        robot._on_data(b'{"H":"1","N":5,"D1":3,"D2":90}{"H":"2","N":21,"D1":2}', 0.0)
+        assert robot.tick(0.01) == b"{1_ok}"
+        assert robot.tick(0.9) is None
+        assert robot.tick(1.01) == b"{2_100}"
+
+    def test_full_receive_buffer_drops_frames(self):
+        """Test frames arriving while 64 bytes are buffered are lost."""
+        robot = SimulatedRobot(uart_rate=None)
+        frame = b'{"H":"1","N":5,"D1":1,"D2":90}'
+        robot._on_data(frame * 4, 0.0)
+        robot.tick(0.1)
+        assert robot.frames_dropped == 1
+        robot.tick(5.0)
+        assert len(robot.commands_executed) == 3
+
+
+class TestHeartbeat:
+    """Test the bridge heartbeat."""
+
+    def test_disconnects_after_three_misses(self):
+        """Test the fourth unanswered heartbeat hangs up and stops the car."""
+        robot = SimulatedRobot(heartbeat_interval=1.0, uart_rate=None)
+        robot._attach(object(), 0.0)
+        robot.handle_command({"H": "1", "N": 3, "D1": 3, "D2": 100}, 0.0)
+        for now in (1.0, 2.0, 3.0):
+            robot.tick(now)
+            assert not robot._hangup
+        robot.tick(4.0)
+        assert robot._hangup
+        assert robot.heartbeat_disconnects == 1
+        robot._detach(4.0)
+        robot.tick(4.0)
+        assert not robot.is_moving()
+
+    def test_answers_reset_misses(self):
+        """Test a client answering every heartbeat stays connected."""
+        robot = SimulatedRobot(heartbeat_interval=1.0, uart_rate=None)
+        robot._attach(object(), 0.0)
+        for now in range(1, 10):
+            robot.tick(float(now))
+            robot._on_data(b"{Heartbeat}", now + 0.01)
+        assert not robot._hangup
+        assert robot.heartbeats_answered == 9
+        assert robot.commands_received == deque()
+
+
+class TestKinematics:
+    """Test differential-drive motion and obstacles."""
+
+    def test_drive_straight_and_turn(self):
+        """Test straight and in-place motion integrate exactly."""
+        pose = drive(Pose(), 40, 40, 2.0)
+        assert (pose.x, pose.y, pose.heading) == pytest.approx((80, 0, 0))
+        spin = drive(Pose(), -TRACK_WIDTH_CM * math.pi / 4, TRACK_WIDTH_CM * math.pi / 4, 1.0)
+        assert spin.heading == pytest.approx(math.pi / 2)
+        assert (spin.x, spin.y) == pytest.approx((0, 0))
+
+    def test_forward_command_moves_car(self):
+        """Test a forward command drives the car along its heading."""
+        robot = SimulatedRobot()
+        robot.handle_command({"H": "1", "N": 3, "D1": 3, "D2": 100}, 0.0)
+        pose = robot.position(1.0)
+        assert pose.x == pytest.approx(100 * CM_PER_SECOND_PER_SPEED)
+        robot.handle_command({"N": 100}, 1.0)
+        assert robot.position(5.0).x == pytest.approx(pose.x)
+
+    def test_joystick_and_wheel_speeds(self):
+        """Test N=4 and N=102 set the wheels directly."""
+        robot = SimulatedRobot()
+        robot.handle_command({"N": 4, "D1": 100, "D2": 100}, 0.0)
+        assert robot.position(0.5).x == pytest.approx(20)
+        robot.handle_command({"H": 22, "N": 102, "D1": 3}, 0.5)
+        assert robot.position(1.0).heading > 0
+        robot.handle_command({"H": 22, "N": 102, "D1": 9}, 1.0)
+        assert not robot.is_moving()
+
+    def test_sonar_and_collision(self):
+        """Test the sensor sees an obstacle ahead and the car stops at it."""
+        world = World([Obstacle(100, 0, 10)])
+        robot = SimulatedRobot(world=world)
+        assert robot.handle_command({"H": "5", "N": 21, "D1": 2}, 0.0) == b"{5_82}"
+        robot.handle_command({"H": "5", "N": 5, "D1": 1, "D2": 30}, 0.0)
+        assert robot.handle_command({"H": "5", "N": 21, "D1": 2}, 0.0) == b"{5_150}"
+        robot.handle_command({"H": "1", "N": 3, "D1": 3, "D2": 100}, 0.0)
+        assert robot.position(10.0).x == pytest.approx(78, abs=0.5)
+        robot.handle_command({"N": 100}, 10.0)
+        assert robot.collisions == 1
+
+    def test_walls(self):
+        """Test bounds reflect the sensor beam and block the car."""
+        world = World(bounds=(-50, -50, 50, 50))
+        assert world.sonar(Pose(), 90) == 42
+        assert world.sonar(Pose(heading=math.pi), 90) == 42
+        assert world.collides(45, 0)
+        assert not world.collides(0, 0)
+
+    def test_silent_client_is_dropped(self):
+        """Test a client that never answers heartbeats is disconnected."""
+        with SimulatorServer(count=1, heartbeat_interval=0.02) as server:
+            sock = socket.create_connection(("127.0.0.1", server.ports[0]))
+            sock.settimeout(1.0)
+            try:
+                received = b""
+                while True:
+                    data = sock.recv(64)
+                    if not data:
+                        break
+                    received += data
+            finally:
+                sock.close()
+            assert received == b"{Heartbeat}" * 4
+            assert server.robots[0].heartbeat_disconnects == 1
+
+    def test_hundreds_of_robots(self):
+        """Test one server hosts many robots on distinct ephemeral ports."""
+        with SimulatorServer(count=200, heartbeat_interval=10.0) as server:
+            assert len(set(server.ports)) == 200
+            socks = [socket.create_connection(("127.0.0.1", port)) for port in server.ports[::20]]
+            try:
+                for i, sock in enumerate(socks):
+                    sock.settimeout(1.0)
+                    sock.sendall(f'{{"H":"{i}","N":100}}'.encode())
+                for sock in socks:
+                    assert sock.recv(64) == b"{ok}"
+            finally:
+                for sock in socks:
+                    sock.close()
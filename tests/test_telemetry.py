@@ -0,0 +1,227 @@
+"""Unit tests for telemetry module."""
+
+import asyncio
+import threading
+import time
+import pytest
+from robotapi import AsyncRobotController, RobotController
+from robotapi.exceptions import CommandError, RobotConnectionError
+from robotapi.pacing import TokenBucket
+from robotapi.pipeline import CommandFuture
+from robotapi.protocol import with_serial
+from robotapi.telemetry import SENSORS, TelemetryScheduler
+
+
+class FakeSensors:
+    """Answers queries immediately and counts them per command number."""
+
+    def __init__(self, values=None):
+        self.values = values or {21: 50, 22: 400, 23: True}
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def submit(self, cmd):
+        with self.lock:
+            self.sent.append(cmd["N"])
+        future = CommandFuture(with_serial(cmd, "1"))
+        future.replied_at = time.monotonic()
+        future.set_result(self.values[cmd["N"]])
+        return future
+
+    def count(self, n):
+        with self.lock:
+            return self.sent.count(n)
+
+
+def wait_until(condition, timeout=2.0):
+    """Poll condition until true or timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestSubscriptions:
+    """Test subscription management."""
+
+    def test_unknown_sensor(self):
+        """Test unknown sensors are rejected."""
+        with pytest.raises(ValueError):
+            TelemetryScheduler(FakeSensors().submit).subscribe("lidar", 10)
+
+    def test_invalid_rate(self):
+        """Test non-positive rates are rejected."""
+        with pytest.raises(ValueError):
+            TelemetryScheduler(FakeSensors().submit).subscribe("ground", 0)
+
+    def test_fastest_subscriber_sets_rate(self):
+        """Test a sensor is polled at the highest requested rate."""
+        scheduler = TelemetryScheduler(FakeSensors().submit)
+        slow = scheduler.subscribe("ground", 2)
+        fast = scheduler.subscribe("ground", 10)
+        assert scheduler.stats()["ground"]["requested_rate"] == 10
+        scheduler.unsubscribe(fast)
+        assert scheduler.stats()["ground"]["requested_rate"] == 2
+        scheduler.unsubscribe(slow)
+        assert scheduler.stats() == {}
+
+    def test_line_sensor_has_three_queries(self):
+        """Test the line sensor reads left, middle and right."""
+        assert [cmd["D1"] for cmd in SENSORS["line"]] == [0, 1, 2]
+
+
+class TestScheduling:
+    """Test TelemetryScheduler timing and budgeting."""
+
+    def test_publishes_samples(self):
+        """Test callbacks receive timestamped samples."""
+        sensors = FakeSensors()
+        samples = []
+        with TelemetryScheduler(sensors.submit) as scheduler:
+            scheduler.subscribe("line", 20, samples.append)
+            scheduler.subscribe("ground", 20)
+            assert wait_until(lambda: samples and scheduler.latest("ground"))
+        assert samples[0].sensor == "line"
+        assert samples[0].value == (400, 400, 400)
+        assert samples[0].timestamp > 0
+        assert scheduler.latest("ground").value is True
+
+    def test_requested_rate(self):
+        """Test a sensor is polled at its rate when the budget allows."""
+        sensors = FakeSensors()
+        with TelemetryScheduler(sensors.submit) as scheduler:
+            scheduler.subscribe("ground", 10)
+            time.sleep(0.55)
+        assert 5 <= sensors.count(23) <= 7
+
+    def test_budget_limits_bytes(self):
+        """Test queries never exceed the byte budget."""
+        sensors = FakeSensors()
+        budget = TokenBucket(200, capacity=30)
+        with TelemetryScheduler(sensors.submit, budget) as scheduler:
+            scheduler.subscribe("distance", 100)
+            scheduler.subscribe("ground", 100)
+            time.sleep(0.5)
+        # At most capacity plus rate * elapsed bytes were sent
+        assert scheduler.bytes_sent <= 30 + 200 * 0.55
+
+    def test_round_robin_when_oversubscribed(self):
+        """Test equal priorities share a short budget evenly."""
+        sensors = FakeSensors()
+        with TelemetryScheduler(sensors.submit, TokenBucket(200, capacity=30)) as scheduler:
+            scheduler.subscribe("distance", 100)
+            scheduler.subscribe("ground", 100)
+            time.sleep(0.5)
+        distance, ground = sensors.count(21), sensors.count(23)
+        assert distance > 0 and ground > 0
+        assert abs(distance - ground) <= 1
+
+    def test_priority_wins_when_oversubscribed(self):
+        """Test a higher priority sensor takes the budget it needs first."""
+        sensors = FakeSensors()
+        with TelemetryScheduler(sensors.submit, TokenBucket(200, capacity=30)) as scheduler:
+            scheduler.subscribe("distance", 100, priority=1)
+            scheduler.subscribe("ground", 100)
+            time.sleep(0.5)
+        assert sensors.count(21) >= 4
+        assert sensors.count(23) <= 1
+
+    def test_low_priority_gets_leftover_budget(self):
+        """Test lower priorities still run when higher ones are satisfied."""
+        sensors = FakeSensors()
+        with TelemetryScheduler(sensors.submit, TokenBucket(200, capacity=30)) as scheduler:
+            scheduler.subscribe("distance", 4, priority=1)
+            scheduler.subscribe("ground", 100)
+            time.sleep(0.5)
+        assert 2 <= sensors.count(21) <= 3
+        assert sensors.count(23) >= 2
+
+    def test_one_query_set_in_flight(self):
+        """Test unanswered queries are not repeated every period."""
+        sent = []
+        discarded = []
+
+        def submit(cmd):
+            sent.append(cmd)
+            return CommandFuture(with_serial(cmd, "1"))
+
+        with TelemetryScheduler(submit, discard=discarded.append, query_timeout=0.3) as scheduler:
+            scheduler.subscribe("ground", 50)
+            time.sleep(0.2)
+            assert len(sent) == 1
+            assert wait_until(lambda: len(sent) == 2)
+        assert len(discarded) == 1
+        assert scheduler.stats()["ground"]["coalesced"] > 0
+
+    @pytest.mark.parametrize("error", [CommandError, RobotConnectionError])
+    def test_partial_set_failed(self, error):
+        """Test queries sent before a set was cut short are failed and discarded."""
+        sent = []
+        discarded = []
+
+        def submit(cmd):
+            if sent:
+                raise error("second query refused")
+            future = CommandFuture(with_serial(cmd, "1"))
+            sent.append(future)
+            return future
+
+        with TelemetryScheduler(submit, discard=discarded.append) as scheduler:
+            scheduler.subscribe("line", 10)
+            assert wait_until(lambda: discarded)
+        assert discarded[0] is sent[0]
+        with pytest.raises(error):
+            sent[0].result(timeout=0)
+
+    def test_callback_errors_do_not_stop_telemetry(self):
+        """Test a failing subscriber does not affect others."""
+        samples = []
+
+        def broken(sample):
+            raise RuntimeError("bad subscriber")
+
+        with TelemetryScheduler(FakeSensors().submit) as scheduler:
+            scheduler.subscribe("ground", 50, broken)
+            scheduler.subscribe("ground", 50, samples.append)
+            assert wait_until(lambda: len(samples) >= 3)
+
+
+class TestControllerTelemetry:
+    """Test telemetry through the controllers against the simulator."""
+
+    def test_sync_controller(self, simulator):
+        """Test samples arrive from the simulated sensors."""
+        simulator.robots[0].line_values = [10, 900, 20]
+        samples = []
+        with RobotController("127.0.0.1", simulator.ports[0], reactor=True) as robot:
+            robot.start_telemetry().subscribe("line", 10, samples.append)
+            assert wait_until(lambda: samples)
+        assert samples[0].value == (10, 900, 20)
+        assert robot._telemetry is None
+
+    def test_sync_controller_needs_reactor(self, simulator):
+        """Test telemetry is refused when nothing would read the replies."""
+        with RobotController("127.0.0.1", simulator.ports[0]) as robot:
+            with pytest.raises(CommandError):
+                robot.start_telemetry()
+
+    def test_async_controller(self, simulator):
+        """Test the asyncio controller sends queries on its loop."""
+        simulator.robots[0].on_ground = False
+
+        async def run():
+            robot = AsyncRobotController("127.0.0.1", simulator.ports[0])
+            await robot.connect()
+            try:
+                telemetry = robot.start_telemetry()
+                telemetry.subscribe("ground", 20)
+                for _ in range(100):
+                    if telemetry.latest("ground"):
+                        return telemetry.latest("ground").value
+                    await asyncio.sleep(0.01)
+            finally:
+                await robot.disconnect()
+
+        assert asyncio.run(run()) is False
@@ -0,0 +1,96 @@
+"""Unit tests for tracing module."""
+
+import io
+import json
+from time import perf_counter_ns
+from unittest.mock import Mock, patch
+import pytest
+from robotapi import RobotController, tracing
+from robotapi.connection import Connection
+from robotapi.messages import decode_frame
+from robotapi.simulator import SimulatorServer
+from robotapi.tracing import TRACER, Tracer
+
+
+@pytest.fixture
+def tracer():
+    """Enable the process-wide tracer for one test."""
+    tracing.enable(capacity=1024)
+    yield TRACER
+    tracing.disable()
+    TRACER.clear()
+
+
+class TestTracer:
+    """Test the span ring."""
+
+    def test_disabled_records_nothing(self):
+        """Test instrumented code records no spans by default."""
+        assert not TRACER.enabled
+        decode_frame("{Heartbeat}")
+        with TRACER.span("idle"):
+            pass
+        assert TRACER.spans() == []
+
+    def test_ring_keeps_newest(self):
+        """Test the ring overwrites the oldest spans once full."""
+        ring = Tracer(capacity=3)
+        ring.enable()
+        for i in range(5):
+            ring.record(f"span{i}", "test", perf_counter_ns())
+        assert [span[0] for span in ring.spans()] == ["span2", "span3", "span4"]
+
+    def test_span_context(self):
+        """Test the context manager records its block with args."""
+        ring = Tracer(capacity=4)
+        ring.enable()
+        with ring.span("block", "test", {"n": 1}):
+            pass
+        (name, category, start, duration, _, args), = ring.spans()
+        assert (name, category, args) == ("block", "test", {"n": 1})
+        assert duration >= 0
+
+    def test_chrome_trace(self):
+        """Test export produces complete events in microseconds."""
+        ring = Tracer(capacity=4)
+        ring.enable()
+        ring.record("send", "io", perf_counter_ns() - 2000, {"bytes": 9})
+        out = io.StringIO()
+        ring.export_chrome(out)
+        trace = json.loads(out.getvalue())
+        meta = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+        (event,) = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        assert meta[0]["args"]["name"] == "MainThread"
+        assert event["name"] == "send" and event["cat"] == "io"
+        assert event["dur"] >= 2.0
+        assert event["args"] == {"bytes": 9}
+
+
+class TestInstrumentation:
+    """Test spans recorded by the instrumented code."""
+
+    @patch("socket.socket")
+    def test_connection(self, mock_socket_class, tracer):
+        """Test Connection.send and receive record spans with byte counts."""
+        mock_sock = Mock()
+        mock_sock.recv.return_value = b"{Heartbeat}"
+        mock_socket_class.return_value = mock_sock
+        conn = Connection("10.0.0.57")
+        conn.connect()
+        conn.send(b"{Heartbeat}")
+        conn.receive()
+        spans = {span[0]: span for span in tracer.spans()}
+        assert spans["Connection.send"][5] == {"bytes": 11}
+        assert spans["Connection.receive"][5] == {"bytes": 11, "frames": 1}
+
+    def test_controller(self, tracer):
+        """Test controller calls, commands and waits are traced."""
+        with SimulatorServer(count=1) as server:
+            with RobotController("127.0.0.1", server.ports[0], reactor=True) as robot:
+                robot.backward(0.05)
+        names = [span[0] for span in tracer.spans()]
+        assert "RobotController.backward" in names
+        assert "HeartbeatMonitor.wait_for_duration" in names
+        assert "decode_frame" in names
+        commands = [span[5]["N"] for span in tracer.spans() if span[0] == "command"]
+        assert commands[:2] == [3, 100]
@@ -0,0 +1,152 @@
+"""Unit tests for transport module."""
+
+import os
+import socket
+import sys
+import time
+import pytest
+from robotapi import RobotController
+from robotapi.connection import Connection
+from robotapi.exceptions import RobotConnectionError
+from robotapi.protocol import build_distance_cmd
+from robotapi.simulator import SimulatorServer
+from robotapi.transport import SerialTransport, SocketPairTransport, SocketTransport
+
+posix_only = pytest.mark.skipif(sys.platform == "win32", reason="needs termios and ptys")
+
+
+class TestSocketTransport:
+    """Test transports over stream sockets."""
+
+    def test_socketpair_round_trip(self):
+        """Test a Connection over a socketpair exchanges frames with its peer."""
+        transport = SocketPairTransport()
+        with Connection("socketpair", transport=transport) as conn:
+            peer = transport.peer
+            conn.send(b'{"N":100}')
+            assert peer.recv(64) == b'{"N":100}'
+            peer.sendall(b"{ok}{Heartbeat}")
+            assert conn.receive_all(1.0) == ["{ok}", "{Heartbeat}"]
+        assert peer.recv(64) == b""
+        peer.close()
+
+    def test_recv_timeout(self):
+        """Test recv returns None when nothing arrives, even without waiting."""
+        near, far = socket.socketpair()
+        transport = SocketTransport(near)
+        assert transport.recv(0.01) is None
+        assert transport.recv(0) is None
+        transport.close()
+        far.close()
+
+    def test_closed_socket(self):
+        """Test a closed socket transport cannot be reopened."""
+        near, far = socket.socketpair()
+        conn = Connection("socketpair", transport=SocketTransport(near))
+        conn.connect()
+        conn.disconnect()
+        with pytest.raises(RobotConnectionError, match="Failed to connect to socket"):
+            conn.connect()
+        far.close()
+
+    def test_peer_closes(self):
+        """Test the peer hanging up is reported as a lost connection."""
+        transport = SocketPairTransport()
+        conn = Connection("socketpair", transport=transport)
+        conn.connect()
+        transport.peer.close()
+        with pytest.raises(RobotConnectionError, match="closed"):
+            conn.receive(1.0)
+        assert not conn.is_connected()
+
+
+class TestSimulatorTransport:
+    """Test the simulator served over in-process transports."""
+
+    def test_controller(self):
+        """Test a controller works without the simulator's TCP port."""
+        with SimulatorServer(count=2, heartbeat_interval=0.05, uart_rate=None) as server:
+            server.robots[1].distance_cm = 33
+            with RobotController("sim", transport=server.transport(1)) as robot:
+                assert robot.get_distance() == 33
+                time.sleep(0.2)
+                assert server.robots[1].heartbeats_answered >= 2
+                assert server.robots[1].heartbeat_disconnects == 0
+
+    def test_reconnect(self):
+        """Test each open attaches a fresh pair, replacing the last."""
+        with SimulatorServer(count=1, uart_rate=None) as server:
+            robot = RobotController("sim", transport=server.transport(0), keepalive=False)
+            for distance in (40, 50):
+                server.robots[0].distance_cm = distance
+                robot.connect()
+                assert robot.wait_reply(robot.request(build_distance_cmd())) == distance
+                robot.disconnect()
+
+    def test_attach_before_start(self):
+        """Test a transport opened before the simulator starts is served."""
+        server = SimulatorServer(count=1, uart_rate=None)
+        conn = Connection("sim", transport=server.transport(0))
+        conn.connect()
+        server.start()
+        try:
+            conn.send(b'{"H":"7","N":21,"D1":2}')
+            assert conn.receive(1.0) == "{7_100}"
+        finally:
+            conn.disconnect()
+            server.stop()
+
+
+@posix_only
+class TestSerialTransport:
+    """Test the serial transport against a pseudo-terminal."""
+
+    @pytest.fixture
+    def pty(self):
+        """Provide (master fd, slave device path) of a new pty."""
+        master, slave = os.openpty()
+        path = os.ttyname(slave)
+        yield master, path
+        os.close(slave)
+        try:
+            os.close(master)
+        except OSError:
+            pass
+
+    def test_round_trip(self, pty):
+        """Test frames cross the line in both directions unaltered."""
+        master, path = pty
+        with Connection(path, transport=SerialTransport(path)) as conn:
+            conn.send(b'{"H":"1","N":21,"D1":2}\n')
+            assert os.read(master, 64) == b'{"H":"1","N":21,"D1":2}\n'
+            os.write(master, b"{1_42}\r\n{Heartbeat}")
+            assert conn.receive_all(1.0) == ["{1_42}", "{Heartbeat}"]
+            assert conn.readable(0.01) is False
+
+    def test_line_settings(self, pty):
+        """Test the port is raw at the requested speed."""
+        import termios
+
+        _, path = pty
+        transport = SerialTransport(path, baudrate=115200)
+        transport.open()
+        try:
+            iflag, oflag, cflag, lflag, ispeed, ospeed, _ = termios.tcgetattr(transport.fileno())
+            assert ispeed == ospeed == termios.B115200
+            assert cflag & termios.CSIZE == termios.CS8
+            assert lflag & (termios.ICANON | termios.ECHO) == 0
+            assert oflag & termios.OPOST == 0
+        finally:
+            transport.close()
+
+    def test_unsupported_baud(self, pty):
+        """Test a baud rate termios lacks is rejected."""
+        with pytest.raises(ValueError, match="baud"):
+            SerialTransport(pty[1], baudrate=12345).open()
+
+    def test_missing_device(self, tmp_path):
+        """Test a missing device is a connection failure."""
+        conn = Connection("mega", transport=SerialTransport(str(tmp_path / "ttyACM9")))
+        with pytest.raises(RobotConnectionError, match="Failed to connect"):
+            conn.connect()
+        assert not conn.is_connected()
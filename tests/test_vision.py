@@ -0,0 +1,216 @@
+"""Unit tests for vision module."""
+
+import io
+import threading
+import time
+import pytest
+from robotapi.camera import Frame, FrameRing
+from robotapi.vision import DecodedFrame, DecodeMetrics, DecodePipeline, decode_jpeg
+
+
+def length_decoder(data):
+    """Stand-in decoder returning the payload size."""
+    return len(data)
+
+
+def slow_decoder(data):
+    """Decoder slow enough for frames to pile up behind it."""
+    time.sleep(0.05)
+    return len(data)
+
+
+def failing_decoder(data):
+    """Decoder that always fails."""
+    raise ValueError("corrupt JPEG")
+
+
+def push_frames(ring, count, interval=0.0):
+    """Push numbered frames into a ring."""
+    for _ in range(count):
+        ring.push(Frame(b"x" * (ring.count + 1), time.monotonic(), ring.count))
+        if interval:
+            time.sleep(interval)
+
+
+class TestDecodedFrame:
+    """Test DecodedFrame."""
+
+    def test_latency(self):
+        """Test capture-to-array latency."""
+        decoded = DecodedFrame(None, 3, 10.0, 10.25, 0.1)
+        assert decoded.latency == pytest.approx(0.25)
+        assert "sequence=3" in repr(decoded)
+
+
+class TestDecodeMetrics:
+    """Test DecodeMetrics."""
+
+    def test_empty_snapshot(self):
+        """Test snapshot before any frame is decoded."""
+        stats = DecodeMetrics().snapshot()
+        assert stats["frames_decoded"] == 0
+        assert stats["latency_p99"] == 0.0
+
+    def test_percentiles(self):
+        """Test latency percentiles over recorded frames."""
+        metrics = DecodeMetrics()
+        for i in range(100):
+            metrics.record(DecodedFrame(None, i, 0.0, (i + 1) / 1000, 0.001))
+        stats = metrics.snapshot()
+        assert stats["frames_decoded"] == 100
+        assert stats["latency_p50"] == pytest.approx(0.051)
+        assert stats["latency_p99"] == pytest.approx(0.100)
+        assert stats["latency_max"] == pytest.approx(0.100)
+        assert stats["decode_max"] == pytest.approx(0.001)
+
+    def test_samples_are_bounded(self):
+        """Test only recent samples are kept."""
+        metrics = DecodeMetrics(samples=10)
+        for i in range(100):
+            metrics.record(DecodedFrame(None, i, 0.0, float(i), 0.0))
+        assert metrics.snapshot()["latency_p50"] >= 90
+
+
+    def test_concurrent_counts(self):
+        """Test counters updated from several threads lose no updates."""
+        metrics = DecodeMetrics()
+
+        def worker():
+            for _ in range(2000):
+                metrics.record_submitted()
+                metrics.record_failed()
+                metrics.record_skipped(2)
+                metrics.record_stale()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = metrics.snapshot()
+        assert stats["frames_submitted"] == stats["frames_failed"] == 8000
+        assert stats["dropped_skipped"] == 16000
+        assert stats["frames_dropped"] == 24000
+
+
+class TestDecodePipeline:
+    """Test DecodePipeline."""
+
+    def test_invalid_executor(self):
+        """Test unknown executor kinds are rejected."""
+        with pytest.raises(ValueError):
+            DecodePipeline(FrameRing(), executor="gpu")
+
+    def test_decodes_frames(self):
+        """Test frames are decoded and delivered."""
+        ring = FrameRing(4)
+        with DecodePipeline(ring, decoder=length_decoder) as pipeline:
+            push_frames(ring, 1)
+            decoded = pipeline.get(timeout=2.0)
+        assert decoded.sequence == 0
+        assert decoded.image == 1
+        assert decoded.latency >= 0
+        assert pipeline.latest() is decoded
+
+    def test_get_returns_each_frame_once(self):
+        """Test get() does not hand out the same frame twice."""
+        ring = FrameRing(4)
+        with DecodePipeline(ring, decoder=length_decoder) as pipeline:
+            push_frames(ring, 1)
+            assert pipeline.get(timeout=2.0) is not None
+            assert pipeline.get(timeout=0.1) is None
+
+    def test_latest_only_drops_stale_frames(self):
+        """Test frames arriving while workers are busy are skipped."""
+        ring = FrameRing(4)
+        with DecodePipeline(ring, workers=1, decoder=slow_decoder) as pipeline:
+            push_frames(ring, 40, interval=0.005)
+            time.sleep(0.15)
+            decoded = pipeline.get(timeout=2.0)
+        stats = pipeline.metrics.snapshot()
+        assert decoded.sequence == 39
+        assert stats["frames_submitted"] < 40
+        assert stats["dropped_skipped"] > 0
+        assert stats["frames_dropped"] >= stats["dropped_skipped"]
+
+    def test_backlog_keeps_order(self):
+        """Test decoded frames are queued in order when not latest_only."""
+        ring = FrameRing(16)
+        with DecodePipeline(
+            ring, workers=1, decoder=length_decoder, latest_only=False, backlog=16
+        ) as pipeline:
+            sequences = []
+            for _ in range(5):
+                push_frames(ring, 1)
+                sequences.append(pipeline.get(timeout=2.0).sequence)
+        assert sequences == [0, 1, 2, 3, 4]
+
+    def test_backlog_drops_oldest(self):
+        """Test a full backlog discards its oldest unread frame."""
+        ring = FrameRing(16)
+        with DecodePipeline(
+            ring, workers=1, decoder=length_decoder, latest_only=False, backlog=2
+        ) as pipeline:
+            for _ in range(6):
+                push_frames(ring, 1)
+                deadline = time.monotonic() + 2.0
+                while pipeline.latest() is None or pipeline.latest().sequence != ring.count - 1:
+                    assert time.monotonic() < deadline
+                    time.sleep(0.001)
+            first = pipeline.get(timeout=1.0)
+        assert first.sequence == 4
+        assert pipeline.metrics.dropped_stale == 4
+
+    def test_decoder_errors_are_counted(self):
+        """Test decoder exceptions do not stop the pipeline."""
+        ring = FrameRing(4)
+        with DecodePipeline(ring, decoder=failing_decoder) as pipeline:
+            push_frames(ring, 1)
+            deadline = time.monotonic() + 2.0
+            while pipeline.metrics.frames_failed == 0:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert pipeline.get(timeout=0.05) is None
+
+    def test_stop_releases_get(self):
+        """Test stop() wakes a blocked get()."""
+        pipeline = DecodePipeline(FrameRing(), decoder=length_decoder)
+        pipeline.start()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(pipeline.get()))
+        waiter.start()
+        time.sleep(0.05)
+        pipeline.stop()
+        waiter.join(timeout=2.0)
+        assert results == [None]
+        assert not pipeline.is_running()
+
+    def test_process_executor(self):
+        """Test decoding in a process pool."""
+        ring = FrameRing(4)
+        with DecodePipeline(ring, executor="process", decoder=length_decoder) as pipeline:
+            push_frames(ring, 3)
+            decoded = pipeline.get(timeout=10.0)
+        assert decoded.image == decoded.sequence + 1
+
+
+class TestDecodeJpeg:
+    """Test the default NumPy/Pillow decoder."""
+
+    @pytest.fixture
+    def jpeg_bytes(self):
+        Image = pytest.importorskip("PIL.Image")
+        pytest.importorskip("numpy")
+        out = io.BytesIO()
+        Image.new("RGB", (64, 48), (200, 10, 10)).save(out, format="JPEG")
+        return out.getvalue()
+
+    def test_full_resolution(self, jpeg_bytes):
+        """Test decoding to an RGB array."""
+        array = decode_jpeg(jpeg_bytes)
+        assert array.shape == (48, 64, 3)
+        assert array[0, 0, 0] > 150
+
+    def test_reduced_resolution(self, jpeg_bytes):
+        """Test draft-mode decoding at a reduced scale."""
+        assert decode_jpeg(jpeg_bytes, scale=4).shape == (12, 16, 3)